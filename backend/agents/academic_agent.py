@@ -6,25 +6,45 @@ from backend.study_planner.planner_logic import (
     subject_weights,
     daily_time_split
 )
-from backend.study_planner.planner_llm import generate_plan
+from backend.study_planner.planner_llm import generate_plan, plan_topics
+from backend.study_planner.scheduler import format_schedule
+from backend.study_planner.extractor import extract_with_fallback
+from backend.async_db_service import save_study_plan, save_plan_schedule
 from datetime import date, timedelta
-import json
+import asyncio
+import logging
 from backend.mock_interview.session import (
     start_session,
-    get_current_question,
-    advance_question,
-    _sessions
+    is_session_active,
+    clear_session,
+    submit_answer,
+    set_answer_feedback,
+    end_interview
 )
+from backend.mock_interview.pipeline import (
+    INTERVIEW_PIPELINE, INTERVIEW_LLM_FEEDBACK, evaluation_pipeline, format_report, score_and_record
+)
+from backend.mock_interview.scorer import format_score, reference_embeddings
+from backend.mock_interview.rubrics import rubric_cache
 from backend.mock_interview.questions import (
     DSA_QUESTIONS, ML_QUESTIONS, OS_QUESTIONS, DBMS_QUESTIONS, HR_QUESTIONS
 )
 from backend.mock_interview.evaluator import evaluate_answer
 from backend.agents.agent_utils import is_feedback_message
+from backend.agents.memory import conversation_memory
+
+logger = logging.getLogger(__name__)
 
 
-def clear_session(user_id: str):
-    if user_id in _sessions:
-        del _sessions[user_id]
+async def finish_interview(user_id):
+    """Saves the interview result and clears the session; returns the summary or None."""
+    try:
+        summary = await end_interview(user_id, user_id)
+    except Exception:
+        logger.exception("Saving interview result failed")
+        summary = None
+    await clear_session(user_id)
+    return summary
 
 
 def is_greeting(message: str) -> bool:
@@ -86,7 +106,8 @@ async def respond(message: str, user_id: int) -> AsyncGenerator[str, None]:
 
     # STOP MOCK INTERVIEW 
     if is_stop_interview_request(msg):
-        clear_session(user_id)
+        evaluation_pipeline.cancel(user_id)
+        await clear_session(user_id)
         for ch in "Mock interview stopped. How else can I assist you?":
             yield ch
         return
@@ -94,38 +115,10 @@ async def respond(message: str, user_id: int) -> AsyncGenerator[str, None]:
     # STUDY PLANNER
     if is_study_plan_request(msg):
 
-        extraction_prompt = f"""
-Extract the following details from the user's request.
-
-Return ONLY a valid JSON object with these exact keys:
-- "exam_date": string in YYYY-MM-DD format or null
-- "hours_per_day": number or null
-
-Do not include any other text.
-
-User request:
-{msg}
-"""
-
-        try:
-            raw = ""
-            async for token in call_llm_stream(extraction_prompt):
-                raw += token
-            data = json.loads(raw)
-        except Exception:
-            data = {}
-
-        # Defaults
-        raw_date = data.get("exam_date")
-        if raw_date:
-            try:
-                exam_date = date.fromisoformat(raw_date)
-            except ValueError:
-                exam_date = date.today() + timedelta(days=14)
-        else:
-            exam_date = date.today() + timedelta(days=14)
-
-        hours = data.get("hours_per_day") or 4
+        # Local parse first; the LLM is only asked when it finds nothing
+        details = await extract_with_fallback(msg)
+        exam_date = details["exam_date"] or date.today() + timedelta(days=14)
+        hours = details["hours_per_day"] or 4
 
         subjects = ["DSA", "OS", "DBMS"]
         difficulty = {
@@ -137,7 +130,12 @@ User request:
         days = calculate_days_remaining(exam_date)
         weights = subject_weights(difficulty)
         split = daily_time_split(hours, weights)
-        plan = generate_plan(subjects, days, split)
+        schedule = generate_plan(subjects, exam_date, hours, difficulty)
+        plan = format_schedule(schedule)
+
+        # Stored like /api/planner/save, so the plan can be re-planned later
+        saved = await save_study_plan(user_id, subjects[0], plan_topics(subjects, difficulty), exam_date.isoformat())
+        await save_plan_schedule(saved["plan_id"], hours, [], schedule)
 
         yield f"""
 📚 Personalized Study Plan
@@ -149,11 +147,14 @@ User request:
 
 📝 Study Schedule:
 {plan}
+
+💾 Saved as plan #{saved["plan_id"]}
 """
+        return
 
     # START MOCK INTERVIEW
     if is_mock_interview_request(msg):
-        clear_session(user_id)
+        await clear_session(user_id)
         yield (
             "🎯 Mock Interview Mode Started\n\n"
             "Choose a domain:\n"
@@ -176,28 +177,63 @@ User request:
     }
 
     if msg.lower() in domain_map:
-        q = start_session(user_id, msg.lower(), domain_map[msg.lower()])
+        q = await start_session(user_id, msg.lower(), domain_map[msg.lower()])
+        # Reference rubrics for the upcoming questions, generated while the user answers
+        rubric_cache.prefetch(domain_map[msg.lower()])
         yield f"Interview Question 1:\n{q}"
         return
 
     # MOCK INTERVIEW ANSWER 
-    if user_id in _sessions:
-        question = get_current_question(user_id)
+    if await is_session_active(user_id):
+        submitted = await submit_answer(user_id, msg)
+        if submitted is None:  # expired or stopped meanwhile
+            return
+        index, question, next_q = submitted
+
+        if INTERVIEW_PIPELINE or not INTERVIEW_LLM_FEEDBACK:
+            # Detailed feedback runs in the background; the next question goes out right away.
+            # So does the local score until the scorer is warm (the first load can take seconds).
+            scored = reference_embeddings.ready
+            result = await score_and_record(user_id, index, question, msg, INTERVIEW_LLM_FEEDBACK) if scored else None
+            score_note = f" (score {result['score']}/10)" if result else ""
+            if INTERVIEW_LLM_FEEDBACK or not scored:
+                evaluation_pipeline.submit(user_id, index, question, msg, score=not scored,
+                                           llm_feedback=INTERVIEW_LLM_FEEDBACK)
+            if next_q:
+                yield (f"Answer recorded{score_note}. Feedback will be in your end-of-interview report."
+                       f"\n\nNext Question:\n{next_q}")
+                return
+            yield "Mock Interview Completed!\nPreparing your feedback...\n\n"
+            answers = await evaluation_pipeline.wait_for_feedback(user_id)
+            summary = await finish_interview(user_id)
+            yield format_report(answers, summary)
+            yield "\n\nGreat job!"
+            return
+
+        result = await score_and_record(user_id, index, question, msg, INTERVIEW_LLM_FEEDBACK)
         yield "--- FEEDBACK ---\n"
+        if result:
+            yield format_score(result) + "\n\n"
+        feedback = ""
         async for token in evaluate_answer(question, msg):
+            feedback += token
             yield token
+        await set_answer_feedback(user_id, index, feedback)
 
-        next_q = advance_question(user_id)
         if next_q:
             yield f"\n\nNext Question:\n{next_q}"
         else:
-            clear_session(user_id)
-            yield "\n\nMock Interview Completed!\nGreat job!"
+            summary = await finish_interview(user_id)
+            if summary:
+                yield (f"\n\nMock Interview Completed!\nScore: {summary['score']}% "
+                       f"({summary['correct']}/{summary['total']} correct)\n{summary['feedback']}")
+            else:
+                yield "\n\nMock Interview Completed!\nGreat job!"
         return
 
     # GREETING 
     if is_greeting(msg):
-        clear_session(user_id)
+        await clear_session(user_id)
         for ch in (
             "Hello! I'm your Academic Helper \n\n"
             "I can help you with:\n"
@@ -225,7 +261,8 @@ User request:
         return
     
     # ACADEMIC QUESTION (RAG) 
-    context = retrieve_context(msg)
+    context = await asyncio.to_thread(retrieve_context, msg)
+    history = await conversation_memory.context(user_id)
 
     prompt = f"""
 You are an AI academic mentor.
@@ -235,13 +272,13 @@ Follow the user's instructions (number of points, format, etc.).
 Context:
 {context}
 
-Question:
+{history}Question:
 {msg}
 
 Answer:
 """
 
-    async for token in call_llm_stream(prompt):
+    async for token in call_llm_stream(prompt, profile="academic"):
         yield token
         
     
@@ -1,4 +1,7 @@
-from backend.intent_router import classify_intent
+import time
+
+from backend import metrics, tracing
+from backend.intent_router import rule_intent, llm_intent
 from backend.mock_interview.session import is_session_active
 
 # AGENT CAPABILITY MAP 
@@ -11,6 +14,7 @@ AGENT_CAPABILITIES = {
 }
 
 
+@tracing.traced()
 async def route_agent(message: str, forced_role: str | None, user_id: int) -> str:
     """
     Decide which agent should handle the message.
@@ -22,12 +26,23 @@ async def route_agent(message: str, forced_role: str | None, user_id: int) -> st
     4. If agent selected BUT cannot handle intent → AUTO SWITCH to better agent
     """
 
+    start = time.perf_counter()
+
     # CRITICAL: During active mock interview, NEVER auto-switch
     # The academic agent is handling the interview session itself
-    if is_session_active(str(user_id)):
+    if await is_session_active(str(user_id)):
+        metrics.ROUTE_SECONDS.labels("session").observe(time.perf_counter() - start)
         return "academic"
 
-    detected_intent = await classify_intent(message)
+    # Keywords first; the LLM classifier only when they find nothing
+    with tracing.span("classify_intent") as span:
+        detected_intent = rule_intent(message)
+        path = "rule"
+        if detected_intent is None:
+            detected_intent = await llm_intent(message)
+            path = "llm"
+        span.set(path=path, intent=detected_intent)
+    metrics.ROUTE_SECONDS.labels(path).observe(time.perf_counter() - start)
 
     # CASE 1: User did NOT select an agent (first message)
     if not forced_role:
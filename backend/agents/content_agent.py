@@ -1,6 +1,8 @@
 from typing import AsyncGenerator
 from backend.llm_client import call_llm_stream
 from backend.agents.agent_utils import is_feedback_message, is_greeting
+from backend.agents.memory import conversation_memory
+from backend.agents import long_form
 
 async def respond(message: str, user_id: int) -> AsyncGenerator[str, None]:
     # Greetings
@@ -33,12 +35,32 @@ async def respond(message: str, user_id: int) -> AsyncGenerator[str, None]:
         return
     
     # CONTENT CREATION
+    history = await conversation_memory.context(user_id)
+    async for token in generate(message, history):
+        yield token
+
+
+async def generate(message: str, history: str = "") -> AsyncGenerator[str, None]:
+    """
+    Writes the requested content. It reads no per-user state, so batch
+    jobs (backend/jobs.py) call it directly: no chat history in the prompt
+    and no greeting or feedback replies.
+    """
     system_prompt = (
         "You are a creative content generator. "
         "You create YouTube scripts, essays, blogs, speeches, and social media content. "
         "Ensure clarity, structure, and engaging tone."
     )
 
-    prompt = f"{system_prompt}\n\nRequest: {message}\nContent:"
-    async for token in call_llm_stream(prompt):
+    # Long blog posts and scripts: outline, then sections in parallel (long_form.py)
+    words = long_form.target_words(message) if long_form.CONTENT_LONG_FORM else None
+    if words:
+        sections = await long_form.plan(message, words, system_prompt, history)
+        if sections:
+            async for token in long_form.write(sections):
+                yield token
+            return
+
+    prompt = f"{system_prompt}\n\n{history}Request: {message}\nContent:"
+    async for token in call_llm_stream(prompt, profile="content"):
         yield token
@@ -1,6 +1,7 @@
 from typing import AsyncGenerator
 from backend.llm_client import call_llm_stream
 from backend.agents.agent_utils import is_feedback_message, is_greeting
+from backend.agents.memory import conversation_memory
 
 async def respond(message: str, user_id: int) -> AsyncGenerator[str, None]:
     # Greetings
@@ -31,6 +32,7 @@ async def respond(message: str, user_id: int) -> AsyncGenerator[str, None]:
         "Answer clearly, politely, and concisely."
     )
 
-    prompt = f"{system_prompt}\n\nUser: {message}\nAssistant:"
-    async for token in call_llm_stream(prompt):
+    history = await conversation_memory.context(user_id)
+    prompt = f"{system_prompt}\n\n{history}User: {message}\nAssistant:"
+    async for token in call_llm_stream(prompt, profile="general"):
         yield token
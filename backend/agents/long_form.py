@@ -0,0 +1,162 @@
+"""
+Long-form content: an outline first, then the sections in parallel.
+
+A blog post or script of CONTENT_LONG_FORM_MIN_WORDS words or more takes
+minutes as one stream, because generation time grows with its length.
+For such requests content_agent asks for a short outline first, then
+generates every section as its own LLM call, up to
+CONTENT_PARALLEL_SECTIONS at once (each holds one LLM scheduler slot),
+and streams them in outline order. The first section streams live; a
+later one first sends what it has buffered while the earlier sections
+were streaming, then continues live. Every section prompt starts with
+the same short header (the conversation so far, the request, the outline
+and the voice to write in) so the sections read as one piece.
+
+One request must not crowd out everyone else's chat: only the first
+section runs at the caller's priority, the later ones queue at
+PRIORITY_BATCH so other users' turns overtake them, and the sections
+never take more than the scheduler slots that are free when writing
+starts, less one left for other users.
+
+Wall-clock time becomes roughly the outline plus length / parallel
+sections, while slots are free. Requests that are not long form, and
+outlines that cannot be parsed, use the single stream as before.
+"""
+
+import asyncio
+import os
+import re
+
+from backend import llm_client
+from backend.llm_client import PRIORITY_BATCH, call_llm_once, call_llm_stream
+
+CONTENT_LONG_FORM = os.getenv("CONTENT_LONG_FORM", "1") == "1"
+CONTENT_LONG_FORM_MIN_WORDS = int(os.getenv("CONTENT_LONG_FORM_MIN_WORDS", "800"))
+CONTENT_LONG_FORM_DEFAULT_WORDS = 1200     # "a long blog post" without a number
+CONTENT_WORDS_PER_SECTION = 250
+CONTENT_MAX_SECTIONS = int(os.getenv("CONTENT_MAX_SECTIONS", "6"))
+CONTENT_PARALLEL_SECTIONS = int(os.getenv("CONTENT_PARALLEL_SECTIONS", "3"))
+
+_FORMS = re.compile(r"\b(blog|article|essay|script|post|story|speech|report|newsletter)s?\b", re.IGNORECASE)
+_WORD_COUNT = re.compile(r"(\d[\d,]*)[\s-]*words?\b", re.IGNORECASE)
+_LONG = re.compile(r"\b(long|long-form|detailed|in-depth|comprehensive|full-length)\b", re.IGNORECASE)
+_OUTLINE_LINE = re.compile(r"^\s*(?:\d+[.)]|[-*•]|#{1,4})\s*(.+?)\s*$")
+_VOICE_LINE = re.compile(r"^\s*\**voice\**\s*:\s*(.+?)\s*$", re.IGNORECASE)
+
+_DONE = object()
+
+
+def target_words(message: str):
+    """Requested length in words when the message asks for long-form content, else None."""
+    if not _FORMS.search(message):
+        return None
+    count = _WORD_COUNT.search(message)
+    if count:
+        words = int(count.group(1).replace(",", ""))
+        return words if words >= CONTENT_LONG_FORM_MIN_WORDS else None
+    return CONTENT_LONG_FORM_DEFAULT_WORDS if _LONG.search(message) else None
+
+
+def section_count(words: int) -> int:
+    return max(2, min(CONTENT_MAX_SECTIONS, round(words / CONTENT_WORDS_PER_SECTION)))
+
+
+def parse_outline(text: str, max_sections: int = CONTENT_MAX_SECTIONS):
+    """(section titles, voice) from the outline reply; voice is None if the model left it out."""
+    titles, voice, seen = [], None, set()
+    for line in text.splitlines():
+        match = _VOICE_LINE.match(line)
+        if match:
+            voice = match.group(1)
+            continue
+        match = _OUTLINE_LINE.match(line)
+        if match:
+            title = match.group(1).replace("**", "").strip(" #:\"").strip()
+            if title and title.lower() not in seen:
+                seen.add(title.lower())
+                titles.append(title)
+    return titles[:max_sections], voice
+
+
+def outline_prompt(system_prompt: str, history: str, message: str, sections: int) -> str:
+    return (
+        f"{system_prompt}\n\n{history}Request: {message}\n\n"
+        f"Plan this piece as exactly {sections} sections. Reply with only a numbered list of "
+        f"short section headings, one per line, then one last line "
+        f"\"Voice: <tone and audience in a few words>\".\nOutline:"
+    )
+
+
+def context_header(system_prompt: str, history: str, message: str, titles: list, voice: str) -> str:
+    """Shared by every section prompt so the sections keep one tone and don't overlap."""
+    outline = "\n".join(f"{n}. {title}" for n, title in enumerate(titles, 1))
+    return f"{system_prompt}\n\n{history}Request: {message}\nOutline:\n{outline}\nVoice: {voice}\n"
+
+
+def section_prompt(header: str, number: int, title: str, words: int) -> str:
+    return (
+        f"{header}\nWrite only section {number}, \"{title}\", in about {words} words. "
+        f"The other sections are written separately: do not repeat the heading, "
+        f"introduce the whole piece or summarize it unless this section is meant to.\n"
+        f"Section {number}:"
+    )
+
+
+async def plan(message: str, words: int, system_prompt: str, history: str = ""):
+    """The section prompts and titles for a long-form request, or None to fall back to one stream."""
+    try:
+        reply = await call_llm_once(outline_prompt(system_prompt, history, message, section_count(words)),
+                                    profile="content_outline")
+    except Exception:
+        return None
+    titles, voice = parse_outline(reply)
+    if len(titles) < 2:
+        return None
+    header = context_header(system_prompt, history, message, titles, voice or "consistent with the request")
+    per_section = max(50, words // len(titles))
+    return [(title, section_prompt(header, n, title, per_section)) for n, title in enumerate(titles, 1)]
+
+
+def parallel_sections(parallel: int = None) -> int:
+    """How many sections may generate at once: configured, but within the free slots less one."""
+    scheduler = llm_client.llm_scheduler
+    free = scheduler.max_concurrency - scheduler.active - scheduler.queue_depth
+    return max(1, min(parallel or CONTENT_PARALLEL_SECTIONS, free - 1))
+
+
+async def write(sections: list, parallel: int = None):
+    """Generate the planned sections concurrently; yield their headings and tokens in order."""
+    semaphore = asyncio.Semaphore(parallel_sections(parallel))
+    queues = [asyncio.Queue() for _ in sections]
+    # The reader waits on the first section; the rest are read ahead, so other chats go first
+    first = llm_client.default_priority.get()
+    later = max(first, PRIORITY_BATCH)
+
+    async def produce(prompt: str, queue: asyncio.Queue, priority: int):
+        llm_client.default_priority.set(priority)   # this task only
+        async with semaphore:   # FIFO, so earlier sections start first
+            try:
+                async for token in call_llm_stream(prompt, profile="content_section"):
+                    queue.put_nowait(token)
+            except Exception as e:
+                queue.put_nowait(e)
+                return
+        queue.put_nowait(_DONE)
+
+    tasks = [asyncio.create_task(produce(prompt, queue, first if n == 0 else later))
+             for n, ((_, prompt), queue) in enumerate(zip(sections, queues))]
+    try:
+        for n, ((title, _), queue) in enumerate(zip(sections, queues)):
+            yield f"## {title}\n\n" if n == 0 else f"\n\n## {title}\n\n"
+            while True:
+                token = await queue.get()
+                if token is _DONE:
+                    break
+                if isinstance(token, Exception):
+                    raise token
+                yield token
+    finally:
+        # Stopped early (client gone, or a section failed): free the other sections' slots
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
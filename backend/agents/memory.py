@@ -0,0 +1,222 @@
+"""
+Per-user conversation memory for the chat agents.
+
+Every turn (user message + agent reply) is remembered. The last
+CHAT_MEMORY_TURNS turns are kept verbatim; older ones are folded into a
+rolling summary by a background LLM call (PRIORITY_BACKGROUND, so it
+never holds up a chat turn). The summary is updated incrementally -
+previous summary + the turns that fell out of the window - and stored
+with the turns in a session store (SESSION_STORE: memory or sqlite), so it
+is computed once per evicted turn, not once per prompt.
+
+context() renders what goes into a prompt within CHAT_MEMORY_TOKEN_BUDGET
+(estimated tokens): the summary first, then the most recent turns that
+still fit, each clipped so one long answer cannot take the whole budget.
+Prompt size stays bounded however long the conversation runs.
+
+If summarization fails or falls behind, turns waiting for it are still
+shown verbatim while the budget allows. Past CHAT_MEMORY_MAX_PENDING they
+are folded in locally (their first lines), so memory is bounded either
+way.
+
+Store reads and writes run on the DB thread (run_in_db_thread), so a
+sqlite store never does I/O or compare-and-swap retries on the event loop.
+"""
+
+import asyncio
+import logging
+import os
+from dataclasses import dataclass, field, asdict
+
+from backend.async_db_service import run_in_db_thread
+from backend.llm_client import PRIORITY_BACKGROUND, call_llm_once
+from backend.mock_interview.session_store import SESSION_STORE, create_session_store
+from backend.models import ChatMemoryState
+
+CHAT_MEMORY_ENABLED = os.getenv("CHAT_MEMORY_ENABLED", "1") == "1"
+CHAT_MEMORY_TURNS = int(os.getenv("CHAT_MEMORY_TURNS", "4"))
+CHAT_MEMORY_TOKEN_BUDGET = int(os.getenv("CHAT_MEMORY_TOKEN_BUDGET", "1200"))
+CHAT_MEMORY_SUMMARY_TOKENS = int(os.getenv("CHAT_MEMORY_SUMMARY_TOKENS", "250"))
+CHAT_MEMORY_MAX_PENDING = int(os.getenv("CHAT_MEMORY_MAX_PENDING", "8"))
+CHAT_MEMORY_TTL_SECONDS = float(os.getenv("CHAT_MEMORY_TTL_SECONDS", "86400"))
+CHARS_PER_TOKEN = 4   # rough estimate for English text and code
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def clip(text: str, max_tokens: int) -> str:
+    """Text cut to about max_tokens, keeping the start."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    return text[:max(max_chars - 3, 0)].rstrip() + "..."
+
+
+@dataclass(slots=True)
+class ConversationRecord:
+    user_id: str
+    turns: list = field(default_factory=list)     # recent turns, oldest first: {"agent", "user", "assistant"}
+    pending: list = field(default_factory=list)   # out of the window, not yet in the summary
+    summary: str = ""
+    summarized: int = 0                           # turns folded into the summary so far
+    version: int = 0
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ConversationRecord":
+        return cls(**data)
+
+
+def _render_turn(turn: dict, max_tokens: int) -> str:
+    half = max(max_tokens // 2, 1)
+    return f"User: {clip(turn['user'], half)}\nAssistant: {clip(turn['assistant'], half)}"
+
+
+def summary_prompt(summary: str, turns: list) -> str:
+    new_turns = "\n\n".join(_render_turn(t, 400) for t in turns)
+    return f"""
+Update the running summary of a conversation between a student and an assistant.
+
+Current summary:
+{summary or "(empty)"}
+
+New turns:
+{new_turns}
+
+Write the updated summary in at most {CHAT_MEMORY_SUMMARY_TOKENS * 3 // 4} words: topics discussed, what the
+student asked for, decisions and preferences, anything a follow-up might refer to. Plain text only.
+"""
+
+
+def _local_summary(summary: str, turns: list) -> str:
+    """Fold turns into the summary without the LLM: one line per turn, oldest lines dropped first."""
+    lines = [line for line in summary.splitlines() if line.strip()]
+    for turn in turns:
+        asked = turn["user"].strip().splitlines()[0] if turn["user"].strip() else ""
+        lines.append(f"- Student asked: {clip(asked, 30)}")
+    while lines and estimate_tokens("\n".join(lines)) > CHAT_MEMORY_SUMMARY_TOKENS:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+class ConversationMemory:
+    def __init__(self, store=None, turns: int = CHAT_MEMORY_TURNS, token_budget: int = CHAT_MEMORY_TOKEN_BUDGET):
+        if store is None:
+            store = create_session_store(
+                SESSION_STORE, record_type=ConversationRecord, ttl=CHAT_MEMORY_TTL_SECONDS,
+                **({"table": ChatMemoryState} if SESSION_STORE == "sqlite" else {}))
+        self.store = store
+        self.turns = turns
+        self.token_budget = token_budget
+        self._summarizing = {}   # user id -> background task
+
+    async def context(self, user_id) -> str:
+        """Conversation so far for a prompt, within the token budget ("" when there is none)."""
+        if not CHAT_MEMORY_ENABLED:
+            return ""
+        record = await run_in_db_thread(self.store.get, user_id)
+        if record is None or not (record.turns or record.pending or record.summary):
+            return ""
+        budget = self.token_budget
+        parts = []
+        if record.summary:
+            summary = clip(record.summary, min(CHAT_MEMORY_SUMMARY_TOKENS, budget // 3))
+            parts.append(f"Summary of the earlier conversation:\n{summary}")
+            budget -= estimate_tokens(parts[0])
+        recent = []
+        per_turn = max(self.token_budget // max(self.turns, 1), 50)
+        for turn in reversed(record.pending + record.turns):   # newest first
+            text = _render_turn(turn, per_turn)
+            cost = estimate_tokens(text)
+            if cost > budget:
+                break
+            recent.append(text)
+            budget -= cost
+        if recent:
+            parts.append("Recent conversation:\n" + "\n\n".join(reversed(recent)))
+        return "\n\n".join(parts) + "\n\n"
+
+    async def remember(self, user_id, agent: str, message: str, response: str):
+        """Record one turn; turns leaving the window are summarized in the background."""
+        if not CHAT_MEMORY_ENABLED:
+            return
+        record = await run_in_db_thread(self._add_turn, user_id,
+                                        {"agent": agent, "user": message, "assistant": response})
+        if record.pending:
+            self._schedule_summary(user_id)
+
+    def _add_turn(self, user_id, turn: dict) -> ConversationRecord:
+        """Runs on the DB thread."""
+        def add(record: ConversationRecord):
+            record.turns.append(turn)
+            while len(record.turns) > self.turns:
+                record.pending.append(record.turns.pop(0))
+            if len(record.pending) > CHAT_MEMORY_MAX_PENDING:
+                overflow = len(record.pending) - CHAT_MEMORY_MAX_PENDING
+                record.summary = _local_summary(record.summary, record.pending[:overflow])
+                record.summarized += overflow
+                del record.pending[:overflow]
+
+        record = self.store.update(user_id, add)
+        if record is None:
+            record = ConversationRecord(user_id=str(user_id))
+            add(record)
+            self.store.put(record)
+        return record
+
+    async def forget(self, user_id):
+        await run_in_db_thread(self.store.delete, user_id)
+
+    def pending(self) -> int:
+        """Background summaries still running (for tests and shutdown)."""
+        return sum(not task.done() for task in self._summarizing.values())
+
+    def _schedule_summary(self, user_id):
+        key = str(user_id)
+        task = self._summarizing.get(key)
+        if task is not None and not task.done():
+            return   # the running task picks up new pending turns when it finishes
+        try:
+            task = asyncio.get_running_loop().create_task(self._summarize(key))
+        except RuntimeError:
+            return   # no event loop (scripts): the turns stay pending
+        self._summarizing[key] = task
+        task.add_done_callback(lambda t: self._discard(key, t))
+
+    def _discard(self, key: str, task):
+        if self._summarizing.get(key) is task:
+            del self._summarizing[key]
+
+    async def _summarize(self, user_id: str):
+        while True:
+            record = await run_in_db_thread(self.store.get, user_id)
+            if record is None or not record.pending:
+                return
+            batch, base = list(record.pending), record.summarized
+            try:
+                summary = (await call_llm_once(summary_prompt(record.summary, batch), PRIORITY_BACKGROUND, "summary")).strip()
+            except Exception as e:
+                logger.warning("Chat summary for user %s failed: %s", user_id, e)
+                return
+            if not summary:
+                return
+            summary = clip(summary, CHAT_MEMORY_SUMMARY_TOKENS)
+
+            def fold(record: ConversationRecord):
+                if record.summarized != base:
+                    return   # turns were folded in meanwhile: this summary is stale, try again
+                del record.pending[:len(batch)]
+                record.summary = summary
+                record.summarized += len(batch)
+
+            if await run_in_db_thread(self.store.update, user_id, fold) is None:
+                return
+
+
+conversation_memory = ConversationMemory()
@@ -1,43 +1,139 @@
-from fastapi import FastAPI, UploadFile, File, Query
-from fastapi.responses import StreamingResponse
+from fastapi import FastAPI, UploadFile, File, Query, Response, HTTPException, WebSocket
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-import json, os
-
-from backend.agents import (
-    academic_agent,
-    content_agent,
-    code_agent,
-    general_agent
-)
+import asyncio, json, os, logging, time
+from contextlib import asynccontextmanager
 
+from backend import metrics, profiler, rate_limit, tracing
 from backend.rag.pdf_loader import load_pdf_text
 from backend.rag.txt_loader import load_txt_text
-from backend.rag.vector_store import add_documents
-
-from backend.db_service import (
-    create_user, save_interview, get_interview_history,
+from backend.rag.vector_store import add_documents, search as search_documents
+from backend.events import event_bus
+from backend.mock_interview.session import session_store, get_answers
+from backend.mock_interview.pipeline import evaluation_pipeline
+from backend.mock_interview.scorer import reference_embeddings
+from backend.mock_interview.batch import INTERVIEW_BATCH_MAX_ITEMS, evaluate_batch, summarize
+from backend.study_planner.scheduler import build_schedule, replan
+from backend.study_planner import plans
+from backend.jobs import JOB_AGENTS, JOBS_MAX_PROMPTS, JOBS_MAX_PROMPT_CHARS, check_callback_url, job_runner
+
+from backend.async_db_service import (
+    create_user, get_user as get_user_info, get_all_users as list_all_users,
+    iter_all_users, save_interview, get_interview_history, iter_interview_history,
+    iter_chat_history, search_chat_history,
     get_interview_stats, save_study_plan, get_user_plans,
-    save_chat, get_chat_history, update_plan_completion,
-    delete_all_interviews, get_all_interview_data, SessionLocal
+    update_plan_completion, iter_plan_days,
+    delete_all_interviews, get_all_interview_data, get_job, list_jobs,
+    run_in_db_thread, shutdown_db_thread
 )
-from backend.models import User, SessionLocal as SessionLocal_model
+from backend.models import check_database_settings
+from backend.migrations import apply_migrations
+from backend.chat_writer import chat_writer, get_chat_history, PENDING_ID
+from backend.chat_storage import archive_partitions, query_archive, read_partition, run_storage_policy, storage_loop
+from backend.db_service import encode_cursor, decode_cursor
+from datetime import datetime, date
 
 # APP INIT 
 
+tracing.configure_logging()
+
+async def warm_up_scorer():
+    """Embed the interview key points in the background so the first answer is scored fast."""
+    try:
+        await asyncio.to_thread(reference_embeddings.warm_up)
+    except Exception:
+        logging.getLogger(__name__).exception("Could not prepare interview key point embeddings")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await run_in_db_thread(check_database_settings)
+    await run_in_db_thread(apply_migrations)
+    await chat_writer.start()
+    await job_runner.start()
+    storage_task = asyncio.create_task(storage_loop())
+    scorer_task = asyncio.create_task(warm_up_scorer())
+    yield
+    scorer_task.cancel()
+    storage_task.cancel()
+    await job_runner.stop()
+    await chat_writer.stop()
+    await shutdown_db_thread()
+
+
 app = FastAPI(
     title="UniGenAI",
-    description="Multi-Agent LLM System (Academic | Code | Content | General)"
+    description="Multi-Agent LLM System (Academic | Code | Content | General)",
+    lifespan=lifespan
 )
 
-# Add CORS middleware
+# Which process answered (useful behind `python -m backend.serve --workers N`)
+WORKER_ID = str(os.getpid())
+
+@app.middleware("http")
+async def check_rate_limit(request, call_next):
+    """Per-user token buckets (backend/rate_limit.py), checked before the body is even read"""
+    policy = rate_limit.ENDPOINT_POLICIES.get((request.method, request.url.path))
+    if policy is not None and rate_limit.RATE_LIMIT_ENABLED:
+        key = rate_limit.request_key(request.query_params.get("user_id"),
+                                     request.client.host if request.client else None)
+        wait = rate_limit.rate_limiter.check(policy, key)
+        if wait:
+            metrics.RATE_LIMITED.labels(policy).inc()
+            return JSONResponse({"detail": f"Too many {policy} requests, retry in {wait:.1f} s"}, status_code=429,
+                                headers={"Retry-After": rate_limit.retry_after_header(wait)})
+    return await call_next(request)
+
+# Read at scrape time, so a replaced rate_limiter is picked up
+metrics.RATE_LIMIT_KEYS.set_function(lambda: rate_limit.rate_limiter.keys())
+
+@app.middleware("http")
+async def add_worker_header(request, call_next):
+    response = await call_next(request)
+    response.headers["X-Worker-Id"] = WORKER_ID
+    return response
+
+@app.middleware("http")
+async def trace_request(request, call_next):
+    """Request ID header, the request's trace, and on-demand profiling (see backend/tracing.py)"""
+    trace, token = tracing.start_trace(request.headers.get(tracing.REQUEST_ID_HEADER),
+                                       request.method, request.url.path)
+    profiling = profiler.begin(trace.request_id, request.url.path)
+    try:
+        response = await call_next(request)
+    except BaseException:
+        tracing.finish_trace(trace, 500)
+        profiler.end(profiling)
+        raise
+    finally:
+        tracing.reset(token)
+    response.headers[tracing.REQUEST_ID_HEADER] = trace.request_id
+
+    # Streaming responses are still running here: finish when the last chunk is sent
+    body = response.body_iterator
+
+    async def finish_after_body():
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            tracing.finish_trace(trace, response.status_code)
+            profiler.end(profiling)
+
+    response.body_iterator = finish_after_body()
+    return response
+
+# Add CORS middleware. Added last so it is outermost: every response, the rate
+# limiter's 429 included, gets the CORS headers the browser needs to read it
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Browsers only let the frontend read these response headers if they are listed
+    expose_headers=["X-Next-Cursor", "X-Request-ID", "X-Worker-Id", "Retry-After"],
 )
 
 app.mount("/ui", StaticFiles(directory="backend/static", html=True), name="static")
@@ -56,72 +152,107 @@ class InterviewResultRequest(BaseModel):
     correct: int
     total: int
 
+class BatchAnswer(BaseModel):
+    question: str
+    answer: str
+
+class BatchEvaluationRequest(BaseModel):
+    items: list[BatchAnswer]
+    domain: str = "custom"
+    concurrency: int | None = None
+
 class StudyPlanRequest(BaseModel):
     user_id: int
     subject: str
     topics: list
     exam_date: str
 
+class PlanSubject(BaseModel):
+    name: str
+    difficulty: str = "medium"
+    topics: list = []   # names or {"name", "hours"}
+
+class ScheduleRequest(BaseModel):
+    subjects: list[PlanSubject]
+    exam_date: str
+    hours_per_day: float = 4
+    start_date: str | None = None
+    rest_days: list[int] = []     # weekdays off, Monday = 0
+    completion: float = 0         # percent of the plan already done
+
+class JobRequest(BaseModel):
+    prompts: list[str]
+    agent: str = "content"
+    callback_url: str | None = None   # POSTed the finished job; local hosts only
+
 # FILE UPLOAD 
 
-UPLOAD_DIR = "backend/rag/documents"
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "backend/rag/documents")
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 @app.post("/upload-pdf")
-async def upload_pdf(file: UploadFile = File(...)):
+async def upload_pdf(file: UploadFile = File(...), user_id: int = Query(None)):
+    """Add notes to the RAG index; with a user_id, progress goes to that user's /ws/chat connections"""
+    def progress(stage: str, **fields):
+        if user_id is not None:
+            event_bus.publish(user_id, {"event": "ingest", "file": file.filename, "stage": stage, **fields})
+
     path = os.path.join(UPLOAD_DIR, file.filename)
 
+    data = await file.read()
     with open(path, "wb") as f:
-        f.write(await file.read())
+        f.write(data)
+    progress("received", bytes=len(data))
 
     ext = os.path.splitext(file.filename)[1].lower()
 
     if ext == ".pdf":
-        text = load_pdf_text(path)
+        loader = load_pdf_text
     elif ext == ".txt":
-        text = load_txt_text(path)
+        loader = load_txt_text
     else:
+        progress("failed", detail="Unsupported file type")
         return {"message": "Unsupported file type"}
 
-    add_documents([text])
+    # Parsing and embedding are CPU work: keep the event loop (and open streams) responsive
+    text = await asyncio.to_thread(loader, path)
+    progress("parsed", chars=len(text))
+    await asyncio.to_thread(add_documents, [text])
+    progress("indexed")
     return {"message": f"{file.filename} uploaded successfully"}
 
+@app.get("/api/rag/search")
+async def rag_search(q: str, top_k: int = Query(5, ge=1, le=50)):
+    """Top matching chunks from the uploaded notes"""
+    # Embedding the query (and loading the model on first use) is blocking work
+    return {"results": await asyncio.to_thread(search_documents, q, top_k)}
+
 
 # CHAT (STREAMING) 
 from backend.agents.agent_router import route_agent
+from backend.chat_turn import stream_turn
 
 @app.post("/chat")
 async def chat(req: ChatRequest, user_id: int = Query(None)):
+    received = time.perf_counter()
     
     # If no user_id provided, use default
     if user_id is None:
         user_id = 1
     
     agent_name = await route_agent(req.message, req.forced_role, user_id)
+    metrics.CHAT_REQUESTS.labels(agent_name).inc()
 
     async def event_generator():
+        metrics.SSE_STREAMS.inc()
         try:
             yield f"data: {json.dumps({'token': '', 'agent': agent_name})}\n\n"
-
-            if agent_name == "academic":
-                agent = academic_agent.respond
-            elif agent_name == "code":
-                agent = code_agent.respond
-            elif agent_name == "content":
-                agent = content_agent.respond
-            else:
-                agent = general_agent.respond
-
-            full_response = ""
-            async for token in agent(req.message, user_id):
-                full_response += token
+            async for token in stream_turn(req.message, user_id, agent_name, received):
                 yield f"data: {json.dumps({'token': token, 'agent': agent_name})}\n\n"
-
-            save_chat(user_id, agent_name, req.message, full_response)
-        except Exception as e:
-            print(f"ERROR: {e}")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            logging.getLogger(__name__).exception("Chat stream failed (agent=%s, user=%s)", agent_name, user_id)
+        finally:
+            metrics.SSE_STREAMS.dec()
     
     return StreamingResponse(
         event_generator(),
@@ -133,80 +264,295 @@ async def chat(req: ChatRequest, user_id: int = Query(None)):
         }
     )
 
+# CHAT (WEBSOCKET)
+from backend.ws_chat import ChatSocket
+
+@app.websocket("/ws/chat")
+async def ws_chat(websocket: WebSocket, user_id: int = Query(None), role: str = Query(None)):
+    """Many concurrent chat streams plus server events over one connection (protocol in backend/ws_chat.py)"""
+    await ChatSocket(websocket, user_id, role).run()
+
+# PAGINATION HELPERS
+MAX_PAGE_SIZE = 1000
+
+def _parse_cursor(cursor: str | None):
+    if not cursor:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _set_next_cursor(response: Response, rows: list, limit: int, date_key: str):
+    """Full page → hand out a cursor for the row after the last one (X-Next-Cursor)."""
+    if len(rows) == limit and rows[-1].get(date_key):
+        last = rows[-1]
+        row_id = last["id"] if last["id"] is not None else PENDING_ID
+        response.headers["X-Next-Cursor"] = encode_cursor(datetime.fromisoformat(last[date_key]), row_id)
+
+def _ndjson(rows):
+    async def lines():
+        async for row in rows:
+            yield json.dumps(row) + "\n"
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
 # USER ENDPOINTS
 @app.post("/api/user/create")
 async def create_user_endpoint(username: str):
-    user = create_user(username)
+    user = await create_user(username)
     return user
 
 @app.get("/api/user/{user_id}")
 async def get_user(user_id: int):
     """Get user information by ID"""
-    db = SessionLocal()
-    try:
-        user = db.query(User).filter(User.id == user_id).first()
-        if not user:
-            return {"error": "User not found"}
-        return {"id": user.id, "username": user.username, "created_at": user.created_at.isoformat()}
-    finally:
-        db.close()
+    return await get_user_info(user_id)
 
 @app.get("/api/users/all")
-async def get_all_users():
-    """Get all users in the system"""
-    db = SessionLocal()
-    try:
-        users = db.query(User).all()
-        return [{"id": u.id, "username": u.username, "created_at": u.created_at.isoformat()} for u in users]
-    finally:
-        db.close()
+async def get_all_users(response: Response, limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE), cursor: str = None):
+    """Get users in the system, oldest first (pass X-Next-Cursor back as ?cursor= for the next page)"""
+    users = await list_all_users(limit, _parse_cursor(cursor))
+    _set_next_cursor(response, users, limit, "created_at")
+    return users
+
+@app.get("/api/users/all/export")
+async def export_all_users():
+    """Stream every user as NDJSON"""
+    return _ndjson(iter_all_users())
 
 # INTERVIEW ENDPOINTS
 @app.post("/api/interview/save")
 async def save_interview_result(req: InterviewResultRequest):
-    result = save_interview(
+    result = await save_interview(
         req.user_id, req.domain, req.score, req.correct, req.total
     )
     return result
 
 @app.get("/api/interview/history/{user_id}")
-async def get_user_interview_history(user_id: int, domain: str = None):
-    interviews = get_interview_history(user_id, domain)
+async def get_user_interview_history(user_id: int, response: Response, domain: str = None,
+                                     limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE), cursor: str = None):
+    interviews = await get_interview_history(user_id, domain, limit, _parse_cursor(cursor))
+    _set_next_cursor(response, interviews, limit, "date")
     return interviews
+
+@app.get("/api/interview/history/{user_id}/export")
+async def export_user_interview_history(user_id: int, domain: str = None):
+    """Stream a user's full interview history as NDJSON"""
+    return _ndjson(iter_interview_history(user_id, domain))
     
+@app.get("/api/interview/feedback/{user_id}")
+async def get_interview_feedback(user_id: int):
+    """Answers in the running mock interview with their (background) evaluations"""
+    return {"answers": await get_answers(user_id), "evaluations_running": evaluation_pipeline.pending(user_id)}
+
+@app.post("/api/interview/evaluate-batch")
+async def evaluate_interview_batch(req: BatchEvaluationRequest, user_id: int = Query(None)):
+    """
+    Evaluate a whole answer sheet. Streams NDJSON: one {"index", ...} line per
+    answer as soon as it is evaluated (in completion order), then a final
+    {"summary"} line once the aggregate has been saved as an interview.
+    """
+    if user_id is None:
+        user_id = 1
+    if not req.items or len(req.items) > INTERVIEW_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Send between 1 and {INTERVIEW_BATCH_MAX_ITEMS} answers")
+
+    pairs = [(item.question, item.answer) for item in req.items]
+    kwargs = {"concurrency": req.concurrency} if req.concurrency else {}
+
+    async def lines():
+        results = []
+        async for result in evaluate_batch(pairs, **kwargs):
+            results.append(result)
+            yield json.dumps(result) + "\n"
+        summary = summarize(results)
+        await save_interview(user_id, req.domain, summary["score"], summary["correct"], summary["total"])
+        yield json.dumps({"summary": summary}) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
 @app.get("/api/interview/stats/{user_id}")
 async def get_user_stats(user_id: int):
-    return get_interview_stats(user_id)
+    return await get_interview_stats(user_id)
 
 # STUDY PLANNER ENDPOINTS
 @app.post("/api/planner/save")
 async def save_planner(req: StudyPlanRequest):
-    plan = save_study_plan(req.user_id, req.subject, req.topics, req.exam_date)
+    plan = await save_study_plan(req.user_id, req.subject, req.topics, req.exam_date)
     return plan
 
 @app.get("/api/planner/{user_id}")
 async def get_plans(user_id: int):
-    plans = get_user_plans(user_id)
+    plans = await get_user_plans(user_id)
     return plans
     
 @app.put("/api/planner/{plan_id}/update")
 async def update_planner(plan_id: int, completion: float):
-    plan = update_plan_completion(plan_id, completion)
+    """Set the completion and re-plan the remaining days of the stored schedule"""
+    plan = await update_plan_completion(plan_id, completion)
+    if plan:
+        plan["schedule"] = await plans.replan(plan_id)
     return plan
 
+@app.post("/api/planner/schedule")
+async def schedule_planner(req: ScheduleRequest):
+    try:
+        exam_date = date.fromisoformat(req.exam_date[:10])
+        start = date.fromisoformat(req.start_date[:10]) if req.start_date else date.today()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not 0 < req.hours_per_day <= 24:
+        raise HTTPException(status_code=400, detail="hours_per_day must be between 0 and 24")
+    subjects = [s.model_dump() for s in req.subjects]
+    if req.completion:
+        return await asyncio.to_thread(replan, subjects, exam_date, req.hours_per_day, start,
+                                       req.completion, start, req.rest_days)
+    return await asyncio.to_thread(build_schedule, subjects, exam_date, req.hours_per_day,
+                                   start, req.rest_days)
+
+@app.get("/api/planner/{plan_id}/schedule")
+async def get_planner_schedule(plan_id: int, hours_per_day: float = Query(plans.DEFAULT_HOURS_PER_DAY, gt=0, le=24),
+                            rest_days: list[int] = Query([])):
+    """Summary of a saved plan's stored schedule (built on first use with these settings)"""
+    header = await plans.ensure_schedule(plan_id, hours_per_day, rest_days)
+    if header is None:
+        raise HTTPException(status_code=404, detail="Plan not found")
+    return header
+
+@app.get("/api/planner/{plan_id}/days")
+async def get_plan_days(plan_id: int, start: date = Query(None, alias="from"), end: date = Query(None, alias="to")):
+    """Stream the stored days of a plan in [from, to] as NDJSON"""
+    if await plans.ensure_schedule(plan_id) is None:
+        raise HTTPException(status_code=404, detail="Plan not found")
+    return _ndjson(iter_plan_days(plan_id, start, end))
+
+@app.post("/api/planner/{plan_id}/missed")
+async def plan_day_missed(plan_id: int, day: date = None):
+    """Mark a day (default today) as missed and re-plan from the day after"""
+    header = await plans.mark_day_missed(plan_id, day or date.today())
+    if header is None:
+        raise HTTPException(status_code=404, detail="Plan not found")
+    return header
+
 # CHAT HISTORY ENDPOINTS
 @app.get("/api/chat/history/{user_id}")
-async def get_user_chat_history(user_id: int, limit: int = 50):
-    chats = get_chat_history(user_id, limit)
+async def get_user_chat_history(user_id: int, response: Response,
+                                limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE), cursor: str = None):
+    chats = await get_chat_history(user_id, limit, _parse_cursor(cursor))
+    _set_next_cursor(response, chats, limit, "date")
     return chats
 
+@app.get("/api/chat/search")
+async def search_user_chats(user_id: int, q: str, limit: int = Query(20, ge=1, le=100), any_term: bool = False):
+    """Ranked full-text search over a user's chats, with highlighted snippets"""
+    return await search_chat_history(user_id, q, limit, any_term)
+
+@app.get("/api/chat/history/{user_id}/export")
+async def export_user_chat_history(user_id: int):
+    """Stream a user's full chat history as NDJSON, newest first, archived chats last"""
+    await chat_writer.flush()
+
+    async def chats():
+        async for chat in iter_chat_history(user_id):
+            yield chat
+        # Cold storage, one monthly file at a time so memory stays bounded
+        for path in reversed(await asyncio.to_thread(archive_partitions)):
+            for chat in await asyncio.to_thread(read_partition, path, user_id):
+                yield chat
+
+    return _ndjson(chats())
+
+@app.get("/api/chat/archive/{user_id}")
+async def get_archived_chats(user_id: int, since: datetime = None, until: datetime = None,
+                             limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE)):
+    """Chats moved to cold storage, newest first, within [since, until)"""
+    return await asyncio.to_thread(query_archive, user_id, since, until, limit)
+
+# BATCH GENERATION JOBS (backend/jobs.py)
+@app.post("/api/jobs", status_code=202)
+async def submit_job(req: JobRequest, user_id: int = Query(None)):
+    """Queue many prompts for one agent; they are generated in the background and stored"""
+    if user_id is None:
+        user_id = 1
+    if req.agent not in JOB_AGENTS:
+        raise HTTPException(status_code=400, detail=f"agent must be one of {', '.join(JOB_AGENTS)}")
+    prompts = [p.strip() for p in req.prompts]
+    if not prompts or len(prompts) > JOBS_MAX_PROMPTS:
+        raise HTTPException(status_code=400, detail=f"Send between 1 and {JOBS_MAX_PROMPTS} prompts")
+    if not all(prompts) or max(map(len, prompts)) > JOBS_MAX_PROMPT_CHARS:
+        raise HTTPException(status_code=400,
+                            detail=f"Prompts must be non-empty and at most {JOBS_MAX_PROMPT_CHARS} characters")
+    try:
+        callback_url = check_callback_url(req.callback_url)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return await job_runner.submit(user_id, req.agent, prompts, callback_url)
+
+@app.get("/api/jobs")
+async def get_user_jobs(user_id: int, limit: int = Query(20, ge=1, le=100)):
+    return await list_jobs(user_id, limit)
+
+@app.get("/api/jobs/{job_id}")
+async def get_job_status(job_id: int, items: bool = True):
+    """Progress, throughput and (with items=true) every prompt's result so far"""
+    job = await get_job(job_id, items)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.delete("/api/jobs/{job_id}")
+async def cancel_job(job_id: int):
+    job = await job_runner.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+# METRICS
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus scrape endpoint (this worker's counters and histograms)"""
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
 # DEBUG ENDPOINTS
 @app.get("/api/debug/interviews/{user_id}")
 async def debug_interviews(user_id: int):
     """Get raw interview data for debugging"""
-    return get_all_interview_data(user_id)
+    return await get_all_interview_data(user_id)
 
 @app.delete("/api/debug/interviews/{user_id}")
 async def delete_interviews(user_id: int):
     """Delete all interviews for a user (testing only)"""
-    return delete_all_interviews(user_id)
\ No newline at end of file
+    return await delete_all_interviews(user_id)
+
+@app.get("/api/debug/interview-session/{user_id}")
+async def debug_interview_session(user_id: int):
+    """Live mock interview state for a user (null when none)"""
+    session = await run_in_db_thread(session_store.get, user_id)
+    return session.to_dict() if session else None
+
+@app.get("/api/debug/chat-writer")
+async def chat_writer_stats():
+    """Write-behind queue depth and flush latency counters"""
+    return chat_writer.stats()
+
+@app.get("/api/admin/traces/{request_id}")
+async def get_request_trace(request_id: str):
+    """Spans of a recent request to this worker, by its X-Request-ID"""
+    trace = tracing.get_trace(request_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Trace not found (unknown, too old, or served by another worker)")
+    return trace
+
+@app.post("/api/admin/profile")
+async def profile_next_requests(requests: int = Query(10, ge=1, le=1000),
+                                mode: str = Query("sample", pattern="^(sample|cprofile)$"),
+                                timeout: float = Query(60, gt=0, le=600)):
+    """Profile the next `requests` requests to this worker and return the aggregated profile"""
+    try:
+        return await profiler.profile_requests(requests, mode, timeout)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@app.post("/api/admin/storage/run")
+async def run_chat_storage(vacuum: bool = False):
+    """Run the chat compression/archive policy now instead of waiting for the timer"""
+    return await run_in_db_thread(run_storage_policy, vacuum=vacuum)
\ No newline at end of file
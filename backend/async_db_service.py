@@ -0,0 +1,139 @@
+"""
+Async facade over db_service.
+
+Every function here has the same name and arguments as its db_service
+counterpart but is awaitable. The synchronous SQLAlchemy work runs on a
+single dedicated DB thread, so commits never block the event loop and
+SQLite only ever sees one writer from this process.
+
+Each call's time on the DB thread is recorded per function
+(unigenai_db_seconds), as is the time it queued for the thread, and
+inside a request it is a "db" span of the request's trace.
+"""
+
+import asyncio
+import functools
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from backend import db_service, metrics, tracing
+
+__all__ = ['run_in_db_thread', 'stream_from_db_thread', 'shutdown_db_thread', 'create_user',
+           'get_user', 'get_all_users', 'iter_all_users', 'save_interview', 'get_interview_history',
+           'iter_interview_history', 'get_interview_stats', 'get_rubric', 'save_rubric', 'save_study_plan',
+           'update_plan_completion', 'get_study_plan', 'get_plan_schedule', 'save_plan_schedule',
+           'iter_plan_days', 'get_user_plans', 'save_chat', 'get_chat_history',
+           'iter_chat_history', 'search_chat_history', 'get_job', 'list_jobs', 'delete_all_interviews',
+           'get_all_interview_data']
+
+_executor = None   # created on first use, so the app can start again after a shutdown
+
+
+def _db_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="unigenai-db")
+    return _executor
+
+
+async def run_in_db_thread(func, *args, **kwargs):
+    """Run a blocking DB callable on the DB thread and await its result."""
+    label = getattr(func, "__name__", "other")
+    if label == "<lambda>":
+        label = "other"
+    return await _run_timed(label, functools.partial(func, *args, **kwargs))
+
+
+async def _run_timed(label: str, call):
+    queued = time.perf_counter()
+    started = []
+
+    def timed():
+        start = time.perf_counter()
+        started.append(start)
+        metrics.DB_QUEUE_SECONDS.observe(start - queued)
+        try:
+            return call()
+        finally:
+            metrics.DB_SECONDS.labels(label).observe(time.perf_counter() - start)
+
+    with tracing.span("db", function=label) as span:
+        try:
+            return await asyncio.get_running_loop().run_in_executor(_db_executor(), timed)
+        finally:
+            if started:
+                span.set(queue_ms=round((started[0] - queued) * 1000, 3))
+
+
+async def stream_from_db_thread(gen_func, *args, chunk_size: int = 200, **kwargs):
+    """
+    Drive a blocking generator (e.g. a server-side cursor) on the DB thread,
+    pulling chunk_size items per hop, and yield its items asynchronously.
+    Other DB work can run between chunks; the generator is closed on the DB
+    thread even if the consumer stops early.
+    """
+    gen = gen_func(*args, **kwargs)
+    label = gen_func.__name__
+    try:
+        while True:
+            chunk = await _run_timed(label, lambda: list(itertools.islice(gen, chunk_size)))
+            if not chunk:
+                break
+            for item in chunk:
+                yield item
+    finally:
+        await _run_timed(label, gen.close)
+
+
+async def shutdown_db_thread():
+    """Wait for queued DB work to finish (called on app shutdown) without blocking the event loop."""
+    global _executor
+    executor, _executor = _executor, None
+    if executor is not None:
+        await asyncio.to_thread(executor.shutdown, wait=True)
+
+
+def _make_async(func):
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await run_in_db_thread(func, *args, **kwargs)
+    return wrapper
+
+
+# USER FUNCTIONS
+create_user = _make_async(db_service.create_user)
+get_user = _make_async(db_service.get_user)
+get_all_users = _make_async(db_service.get_all_users)
+iter_all_users = functools.partial(stream_from_db_thread, db_service.iter_all_users)
+
+# INTERVIEW FUNCTIONS
+save_interview = _make_async(db_service.save_interview)
+get_interview_history = _make_async(db_service.get_interview_history)
+iter_interview_history = functools.partial(stream_from_db_thread, db_service.iter_interview_history)
+get_interview_stats = _make_async(db_service.get_interview_stats)
+get_rubric = _make_async(db_service.get_rubric)
+save_rubric = _make_async(db_service.save_rubric)
+
+# STUDY PLANNER FUNCTIONS
+save_study_plan = _make_async(db_service.save_study_plan)
+update_plan_completion = _make_async(db_service.update_plan_completion)
+get_study_plan = _make_async(db_service.get_study_plan)
+get_plan_schedule = _make_async(db_service.get_plan_schedule)
+save_plan_schedule = _make_async(db_service.save_plan_schedule)
+iter_plan_days = functools.partial(stream_from_db_thread, db_service.iter_plan_days)
+get_user_plans = _make_async(db_service.get_user_plans)
+
+# CHAT HISTORY FUNCTIONS
+save_chat = _make_async(db_service.save_chat)
+get_chat_history = _make_async(db_service.get_chat_history)
+iter_chat_history = functools.partial(stream_from_db_thread, db_service.iter_chat_history)
+search_chat_history = _make_async(db_service.search_chat_history)
+
+# BATCH JOB FUNCTIONS (the runner in backend/jobs.py does its own writes)
+get_job = _make_async(db_service.get_job)
+list_jobs = _make_async(db_service.list_jobs)
+
+# DEBUG/ADMIN FUNCTIONS
+delete_all_interviews = _make_async(db_service.delete_all_interviews)
+get_all_interview_data = _make_async(db_service.get_all_interview_data)
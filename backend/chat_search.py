@@ -0,0 +1,112 @@
+"""
+Full-text search over chat history (SQLite FTS5).
+
+chat_history_fts holds one row per chat_history row (same rowid) with the
+message, the response and a per-user token "u<user_id>". Triggers keep it
+in sync with chat_history (see migrations 4 and 5). Filtering on the user token
+inside MATCH lets FTS5 intersect the query with that user's short posting
+list instead of filtering every user's matches afterwards.
+
+Rebuild the whole index (backfill or repair):
+    python -m backend.chat_search
+
+The triggers call unzip_text, so chat_history must be written through a
+connection from backend.models.create_db_engine.
+"""
+
+import re
+
+from sqlalchemy import text
+
+FTS_TABLE = "chat_history_fts"
+
+# External-content FTS5: the index stores only tokens and reads text back
+# through this view, so compressed responses are not duplicated in plain
+# text. unzip_text is registered on every connection by create_db_engine.
+CREATE_TEXT_VIEW = (
+    "CREATE VIEW IF NOT EXISTS chat_history_text AS "
+    "SELECT id, message, COALESCE(response, unzip_text(response_z)) AS response, "
+    "'u' || user_id AS user_key FROM chat_history"
+)
+
+CREATE_FTS_TABLE = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+    "USING fts5(message, response, user_key, content = 'chat_history_text', content_rowid = 'id', "
+    "tokenize = 'porter unicode61')"
+)
+
+_NEW_TEXT = "COALESCE(new.response, unzip_text(new.response_z))"
+_OLD_TEXT = "COALESCE(old.response, unzip_text(old.response_z))"
+
+CREATE_TRIGGERS = [
+    "CREATE TRIGGER IF NOT EXISTS chat_history_fts_insert AFTER INSERT ON chat_history BEGIN "
+    f"INSERT INTO {FTS_TABLE} (rowid, message, response, user_key) "
+    f"VALUES (new.id, new.message, {_NEW_TEXT}, 'u' || new.user_id); END",
+
+    "CREATE TRIGGER IF NOT EXISTS chat_history_fts_delete AFTER DELETE ON chat_history BEGIN "
+    f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, message, response, user_key) "
+    f"VALUES ('delete', old.id, old.message, {_OLD_TEXT}, 'u' || old.user_id); END",
+
+    # Compressing a response changes its storage, not its text: skip the reindex
+    "CREATE TRIGGER IF NOT EXISTS chat_history_fts_update "
+    "AFTER UPDATE OF message, response, response_z, user_id ON chat_history "
+    f"WHEN old.message IS NOT new.message OR old.user_id IS NOT new.user_id OR {_OLD_TEXT} IS NOT {_NEW_TEXT} "
+    "BEGIN "
+    f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, message, response, user_key) "
+    f"VALUES ('delete', old.id, old.message, {_OLD_TEXT}, 'u' || old.user_id); "
+    f"INSERT INTO {FTS_TABLE} (rowid, message, response, user_key) "
+    f"VALUES (new.id, new.message, {_NEW_TEXT}, 'u' || new.user_id); END",
+]
+
+DROP_TRIGGERS = [
+    "DROP TRIGGER IF EXISTS chat_history_fts_insert",
+    "DROP TRIGGER IF EXISTS chat_history_fts_delete",
+    "DROP TRIGGER IF EXISTS chat_history_fts_update",
+]
+
+# bm25 column weights: message, response, user_key (the filter token must not affect rank)
+SEARCH_SQL = (
+    "SELECT c.id, c.role, c.message, c.created_at, "
+    f"snippet({FTS_TABLE}, 1, '[', ']', '…', :tokens) AS snippet, "
+    f"bm25({FTS_TABLE}, 2.0, 1.0, 0.0) AS score "
+    f"FROM {FTS_TABLE} JOIN chat_history c ON c.id = {FTS_TABLE}.rowid "
+    f"WHERE {FTS_TABLE} MATCH :match "
+    "ORDER BY score LIMIT :limit"
+)
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def fts_query(user_id: int, query: str, any_term: bool = False) -> str | None:
+    """
+    Turn free text into a safe FTS5 expression scoped to one user.
+    Every word is quoted, so user input can never inject FTS syntax.
+    Words are stemmed (porter), so "pages" also finds "paging"; a trailing
+    "*" turns the last word into a prefix search. Returns None when the
+    text has no searchable words.
+    """
+    words = _WORD.findall(query)
+    if not words:
+        return None
+    terms = [f'"{w}"' for w in words]
+    if query.rstrip().endswith("*"):
+        terms[-1] += "*"  # explicit prefix search: "pag*" finds "paging"
+    joined = " OR ".join(terms) if any_term else " AND ".join(terms)
+    return f'user_key : "u{int(user_id)}" AND ({joined})'
+
+
+def rebuild_chat_search(conn):
+    """Re-index every chat_history row from scratch (backfill / repair)."""
+    conn.execute(text(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('rebuild')"))
+
+
+def run_rebuild(db_engine=None):
+    if db_engine is None:
+        from backend.models import engine as db_engine
+    with db_engine.begin() as conn:
+        rebuild_chat_search(conn)
+        return conn.execute(text("SELECT COUNT(*) FROM chat_history")).scalar()
+
+
+if __name__ == "__main__":
+    print(f"Indexed {run_rebuild()} chat rows")
@@ -0,0 +1,289 @@
+"""
+Storage tiering for chat history.
+
+Hot:  recent rows, stored as plain text in chat_history.
+Warm: rows older than CHAT_COMPRESS_AFTER_DAYS whose response is at least
+      CHAT_COMPRESS_MIN_BYTES long keep their row, but the response moves
+      into response_z (zlib). Reads decompress transparently and the
+      search index still covers them.
+Cold: rows older than CHAT_ARCHIVE_AFTER_DAYS are appended to monthly
+      gzip'd JSON-lines files under CHAT_ARCHIVE_DIR (YYYY/YYYY-MM.jsonl.gz)
+      and deleted from the database. query_archive reads them back,
+      opening only the months that overlap the requested range.
+
+The policy runs every CHAT_STORAGE_INTERVAL_HOURS from the app (on the DB
+thread) or by hand:
+    python -m backend.chat_storage [--vacuum]
+"""
+
+import asyncio
+import gzip
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process only
+    fcntl = None
+
+from sqlalchemy import text
+
+from backend.models import compress_text, decompress_text
+
+logger = logging.getLogger(__name__)
+
+CHAT_COMPRESS_AFTER_DAYS = float(os.getenv("CHAT_COMPRESS_AFTER_DAYS", "7"))
+CHAT_COMPRESS_MIN_BYTES = int(os.getenv("CHAT_COMPRESS_MIN_BYTES", "1024"))
+CHAT_ARCHIVE_AFTER_DAYS = float(os.getenv("CHAT_ARCHIVE_AFTER_DAYS", "180"))
+CHAT_ARCHIVE_DIR = os.getenv(
+    "CHAT_ARCHIVE_DIR", os.path.join(os.path.dirname(__file__), "archive", "chat_history")
+)
+CHAT_STORAGE_INTERVAL_HOURS = float(os.getenv("CHAT_STORAGE_INTERVAL_HOURS", "6"))
+BATCH_SIZE = 1000
+
+
+def _engine(db_engine):
+    if db_engine is None:
+        from backend.models import engine as db_engine
+    return db_engine
+
+
+def _cutoff(days: float) -> str:
+    # Same text format SQLAlchemy's DateTime stores, so the comparison is a plain range scan
+    return (datetime.utcnow() - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+# WARM TIER
+def compress_old_responses(older_than_days: float = CHAT_COMPRESS_AFTER_DAYS,
+                           min_bytes: int = CHAT_COMPRESS_MIN_BYTES,
+                           db_engine=None, batch_size: int = BATCH_SIZE,
+                           after_id: int = 0, max_batches: int = None) -> dict:
+    """
+    Compress large responses older than the cutoff, one short transaction
+    per batch. Scans ids above after_id; "last_id" in the result resumes a
+    scan cut short by max_batches.
+    """
+    db_engine = _engine(db_engine)
+    cutoff = _cutoff(older_than_days)
+    stats = {"rows": 0, "bytes_before": 0, "bytes_after": 0, "last_id": after_id}
+    last_id = after_id
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        with db_engine.begin() as conn:
+            rows = conn.execute(text(
+                "SELECT id, response FROM chat_history "
+                "WHERE id > :last AND created_at < :cutoff "
+                "AND response IS NOT NULL AND length(CAST(response AS BLOB)) >= :min_bytes "
+                "ORDER BY id LIMIT :n"
+            ), {"last": last_id, "cutoff": cutoff, "min_bytes": min_bytes, "n": batch_size}).fetchall()
+            if not rows:
+                break
+            updates = []
+            for row_id, response in rows:
+                blob = compress_text(response)
+                raw = len(response.encode("utf-8"))
+                if len(blob) >= raw:
+                    continue  # incompressible, leave it alone
+                updates.append({"id": row_id, "z": blob})
+                stats["bytes_before"] += raw
+                stats["bytes_after"] += len(blob)
+            if updates:
+                conn.execute(text(
+                    "UPDATE chat_history SET response = NULL, response_z = :z WHERE id = :id"
+                ), updates)
+            stats["rows"] += len(updates)
+            last_id = stats["last_id"] = rows[-1][0]
+        batches += 1
+    return stats
+
+
+# COLD TIER
+@contextmanager
+def _archive_lock(archive_dir: str):
+    """
+    Serialise archive writers across worker processes (each worker runs the
+    policy loop). Yields False when another worker holds the lock: this runs
+    on the DB thread, so waiting for it would stall every DB call here.
+    """
+    os.makedirs(archive_dir, exist_ok=True)
+    with open(os.path.join(archive_dir, ".lock"), "w") as lock:
+        if fcntl:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+        yield True
+
+
+def _partition_path(created_at: datetime, archive_dir: str) -> str:
+    return os.path.join(archive_dir, f"{created_at:%Y}", f"{created_at:%Y-%m}.jsonl.gz")
+
+
+def archive_old_chats(older_than_days: float = CHAT_ARCHIVE_AFTER_DAYS,
+                      archive_dir: str = CHAT_ARCHIVE_DIR,
+                      db_engine=None, batch_size: int = BATCH_SIZE, max_batches: int = None) -> dict:
+    """
+    Move rows older than the cutoff into the monthly archive files.
+    Each batch is appended (as a new gzip member) and fsynced before its
+    rows are deleted, so a crash can at worst archive a row twice;
+    query_archive drops the duplicate. If another worker is archiving,
+    nothing is done ("skipped"); the next cycle tries again.
+    """
+    db_engine = _engine(db_engine)
+    cutoff = _cutoff(older_than_days)
+    stats = {"rows": 0, "partitions": set(), "skipped": False}
+    with _archive_lock(archive_dir) as held:
+        if not held:
+            return {"rows": 0, "partitions": 0, "skipped": True}
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            with db_engine.begin() as conn:
+                rows = conn.execute(text(
+                    "SELECT id, user_id, role, message, response, response_z, created_at FROM chat_history "
+                    "WHERE created_at < :cutoff ORDER BY id LIMIT :n"
+                ), {"cutoff": cutoff, "n": batch_size}).fetchall()
+                if not rows:
+                    break
+                by_partition = {}
+                for r in rows:
+                    created_at = r.created_at if isinstance(r.created_at, datetime) \
+                        else datetime.fromisoformat(r.created_at)
+                    by_partition.setdefault(_partition_path(created_at, archive_dir), []).append({
+                        "id": r.id,
+                        "user_id": r.user_id,
+                        "role": r.role,
+                        "message": r.message,
+                        "response": r.response if r.response is not None else decompress_text(r.response_z),
+                        "date": created_at.isoformat()
+                    })
+                for path, records in by_partition.items():
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    with open(path, "ab") as raw:
+                        with gzip.GzipFile(fileobj=raw, mode="ab") as f:
+                            f.write("".join(json.dumps(rec) + "\n" for rec in records).encode("utf-8"))
+                        raw.flush()
+                        os.fsync(raw.fileno())
+                    stats["partitions"].add(path)
+                conn.execute(text("DELETE FROM chat_history WHERE id = :id"), [{"id": r.id} for r in rows])
+                stats["rows"] += len(rows)
+            batches += 1
+    stats["partitions"] = len(stats["partitions"])
+    return stats
+
+
+def _months(since: datetime, until: datetime):
+    year, month = since.year, since.month
+    while (year, month) <= (until.year, until.month):
+        yield year, month
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def archive_partitions(since: datetime = None, until: datetime = None,
+                       archive_dir: str = CHAT_ARCHIVE_DIR) -> list:
+    """Archive files whose month overlaps [since, until), oldest first."""
+    if not os.path.isdir(archive_dir):
+        return []
+    if since is not None and until is not None:
+        return [_partition_path(datetime(y, m, 1), archive_dir) for y, m in _months(since, until)]
+    partitions = sorted(
+        os.path.join(archive_dir, year, name)
+        for year in os.listdir(archive_dir) if os.path.isdir(os.path.join(archive_dir, year))
+        for name in os.listdir(os.path.join(archive_dir, year)) if name.endswith(".jsonl.gz")
+    )
+    # Compare the YYYY-MM prefix: "2025-03.jsonl.gz" <= "2025-03" is False
+    if since is not None:
+        partitions = [p for p in partitions if os.path.basename(p)[:7] >= f"{since:%Y-%m}"]
+    if until is not None:
+        partitions = [p for p in partitions if os.path.basename(p)[:7] <= f"{until:%Y-%m}"]
+    return partitions
+
+
+def read_partition(path: str, user_id: int, since: datetime = None, until: datetime = None) -> list:
+    """One user's archived chats from one monthly file within [since, until), newest first."""
+    if not os.path.exists(path):
+        return []
+    since_iso = since.isoformat() if since else None
+    until_iso = until.isoformat() if until else None
+    found = {}   # by id: a crash between archive write and delete can append a row twice
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            rec = json.loads(line)
+            if rec["user_id"] != user_id:
+                continue
+            if (since_iso and rec["date"] < since_iso) or (until_iso and rec["date"] >= until_iso):
+                continue
+            rec.pop("user_id")
+            rec["archived"] = True
+            found[rec["id"]] = rec
+    return sorted(found.values(), key=lambda c: (c["date"], c["id"]), reverse=True)
+
+
+def query_archive(user_id: int, since: datetime = None, until: datetime = None,
+                  limit: int = 100, archive_dir: str = CHAT_ARCHIVE_DIR) -> list:
+    """Archived chats of one user within [since, until), newest first."""
+    chats = []
+    # Newest month first: stop once the limit is met by months that cannot be beaten
+    for path in reversed(archive_partitions(since, until, archive_dir)):
+        if len(chats) >= limit:
+            break
+        chats.extend(read_partition(path, user_id, since, until))
+    return chats[:limit]
+
+
+# POLICY
+def run_storage_policy(db_engine=None, vacuum: bool = False) -> dict:
+    """Archive first (no point compressing rows about to leave), then compress."""
+    start = time.perf_counter()
+    archived = archive_old_chats(db_engine=db_engine)
+    compressed = compress_old_responses(db_engine=db_engine)
+    if vacuum:
+        with _engine(db_engine).connect() as conn:
+            conn.execution_options(isolation_level="AUTOCOMMIT").execute(text("VACUUM"))
+    stats = {
+        "archived_rows": archived["rows"],
+        "archive_partitions": archived["partitions"],
+        "compressed_rows": compressed["rows"],
+        "compressed_bytes_before": compressed["bytes_before"],
+        "compressed_bytes_after": compressed["bytes_after"],
+        "seconds": round(time.perf_counter() - start, 3)
+    }
+    logger.info("Chat storage policy: %s", stats)
+    return stats
+
+
+async def storage_loop(interval_hours: float = CHAT_STORAGE_INTERVAL_HOURS):
+    """
+    Run the policy forever (started from the app lifespan). Each batch is
+    its own hop to the DB thread so chat reads and writes interleave.
+    """
+    from backend.async_db_service import run_in_db_thread
+    while True:
+        try:
+            archived = compressed = 0
+            while (batch := await run_in_db_thread(archive_old_chats, max_batches=1))["rows"]:
+                archived += batch["rows"]
+            last_id = -1
+            after_id = 0
+            while after_id != last_id:
+                last_id = after_id
+                batch = await run_in_db_thread(compress_old_responses, after_id=after_id, max_batches=1)
+                compressed += batch["rows"]
+                after_id = batch["last_id"]
+            logger.info("Chat storage policy: archived %d rows, compressed %d rows", archived, compressed)
+        except Exception as e:
+            logger.error("Chat storage policy failed: %s", e)
+        await asyncio.sleep(interval_hours * 3600)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vacuum", action="store_true", help="reclaim freed pages afterwards")
+    args = parser.parse_args()
+    print(run_storage_policy(vacuum=args.vacuum))
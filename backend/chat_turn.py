@@ -0,0 +1,60 @@
+"""
+One chat turn, shared by POST /chat (SSE) and /ws/chat (WebSocket).
+
+stream_turn() runs the chosen agent's respond() generator as it is and
+yields its tokens. Around it: time to first token, tokens and tokens/sec
+per agent (backend/metrics.py), the "agent" and "save_chat" spans of the
+request's trace, and once the answer is complete, the chat history write
+and the conversation memory. A turn that fails or is cancelled is not
+saved.
+"""
+
+import time
+
+from backend import metrics, tracing
+from backend.agents import academic_agent, code_agent, content_agent, general_agent
+from backend.agents.memory import conversation_memory
+from backend.chat_writer import save_chat
+
+AGENTS = {
+    "academic": academic_agent,
+    "code": code_agent,
+    "content": content_agent,
+    "general": general_agent,
+}
+
+
+async def stream_turn(message: str, user_id: int, agent_name: str, received: float = None):
+    """Tokens of the agent's answer. `received` (perf_counter) is when the request arrived, for TTFT."""
+    received = received or time.perf_counter()
+    respond = AGENTS.get(agent_name, general_agent).respond
+    tokens = metrics.CHAT_TOKENS.labels(agent_name)
+    span = tracing.start_span("agent", agent=agent_name)
+    first_token = None
+    count = 0
+    try:
+        full_response = ""
+        async for token in respond(message, user_id):
+            if token and first_token is None:
+                first_token = time.perf_counter()
+                metrics.CHAT_TTFT.labels(agent_name).observe(first_token - received)
+            count += 1
+            tokens.inc()
+            full_response += token
+            yield token
+
+        if first_token is not None and count > 1:
+            elapsed = time.perf_counter() - first_token
+            if elapsed > 0:
+                metrics.CHAT_TOKENS_PER_SECOND.labels(agent_name).observe((count - 1) / elapsed)
+        span.end(tokens=count)
+
+        with tracing.span("save_chat"):
+            await save_chat(user_id, agent_name, message, full_response)
+        await conversation_memory.remember(user_id, agent_name, message, full_response)
+    except Exception as e:
+        span.end(tokens=count, error=type(e).__name__)
+        metrics.CHAT_ERRORS.labels(agent_name).inc()
+        raise
+    finally:
+        span.end(tokens=count)
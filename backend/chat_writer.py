@@ -0,0 +1,217 @@
+"""
+Write-behind persistence for chat history.
+
+Finished /chat responses are queued in memory and written to SQLite in
+bulk transactions, either when the queue reaches CHAT_FLUSH_BATCH rows or
+every CHAT_FLUSH_INTERVAL seconds, whichever comes first. Pending rows are
+flushed on shutdown.
+
+One batch is in flight at a time. A failed batch goes back in front of the
+queue and is retried on the next tick; while the database keeps failing,
+at most CHAT_MAX_PENDING rows are held and the oldest are dropped (and
+counted in stats()["rows_dropped"]) beyond that.
+
+Flushes and history reads both run on the DB thread, so a read sees every
+row exactly once: either already committed or still queued.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+from backend import db_service
+from backend.async_db_service import run_in_db_thread
+
+__all__ = ['ChatWriteBehind', 'chat_writer', 'PENDING_ID', 'save_chat', 'get_chat_history']
+
+CHAT_FLUSH_BATCH = int(os.getenv("CHAT_FLUSH_BATCH", "50"))
+CHAT_FLUSH_INTERVAL = float(os.getenv("CHAT_FLUSH_INTERVAL", "1.0"))
+CHAT_MAX_PENDING = int(os.getenv("CHAT_MAX_PENDING", "10000"))
+
+logger = logging.getLogger(__name__)
+
+# Queued rows have no id yet; they sort after every committed row with the
+# same timestamp, and keyset cursors built from them use this placeholder.
+PENDING_ID = 2 ** 62
+
+
+def history_sort_key(chat: dict):
+    return (chat["date"] or "", chat["id"] if chat["id"] is not None else PENDING_ID)
+
+
+class ChatWriteBehind:
+    def __init__(self, max_batch: int = CHAT_FLUSH_BATCH, flush_interval: float = CHAT_FLUSH_INTERVAL,
+                 max_pending: int = CHAT_MAX_PENDING):
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_pending = max(1, max_pending)
+        self._lock = threading.Lock()
+        self._pending = []      # queued, not yet handed to the DB thread
+        self._inflight = []     # handed to the DB thread, not yet committed
+        self._writing = None    # task committing _inflight
+        self._wakeup = None
+        self._task = None
+
+        # Counters
+        self.rows_enqueued = 0
+        self.rows_flushed = 0
+        self.flushes = 0
+        self.flush_errors = 0
+        self.rows_dropped = 0
+        self.last_flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+        self.total_flush_seconds = 0.0
+
+    # QUEUE
+    def add(self, user_id: int, role: str, message: str, response: str):
+        row = {
+            "user_id": user_id,
+            "role": role,
+            "message": message,
+            "response": response,
+            "created_at": datetime.utcnow()
+        }
+        with self._lock:
+            self._pending.append(row)
+            self.rows_enqueued += 1
+            self._drop_overflow()
+            full = len(self._pending) >= self.max_batch
+        if full and self._wakeup is not None:
+            self._wakeup.set()
+
+    def _drop_overflow(self):
+        """Caller holds _lock. Keep at most max_pending queued rows, dropping the oldest."""
+        overflow = len(self._pending) + len(self._inflight) - self.max_pending
+        # Rows in flight may be committed yet, so only queued ones are dropped (and counted)
+        dropped = min(overflow, len(self._pending))
+        if dropped > 0:
+            del self._pending[:dropped]
+            self.rows_dropped += dropped
+            logger.error("Chat write-behind queue full: dropped %d unsaved chats", dropped)
+
+    def queue_depth(self) -> int:
+        with self._lock:
+            return len(self._pending) + len(self._inflight)
+
+    def pending_for(self, user_id: int) -> list:
+        with self._lock:
+            return [r for r in self._inflight + self._pending if r["user_id"] == user_id]
+
+    # FLUSHING
+    def _write_batch(self):
+        """Runs on the DB thread: commit the in-flight batch, then release it."""
+        with self._lock:
+            batch = list(self._inflight)
+        start = time.perf_counter()
+        db_service.save_chats(batch)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._inflight = []
+            self.rows_flushed += len(batch)
+            self.flushes += 1
+            self.last_flush_seconds = elapsed
+            self.max_flush_seconds = max(self.max_flush_seconds, elapsed)
+            self.total_flush_seconds += elapsed
+
+    async def flush(self):
+        """Commit everything queued so far (waits for a batch already in flight first)."""
+        # The write runs as its own task, so cancelling a caller never leaves a batch half-handled
+        while self._writing is not None:
+            await asyncio.shield(self._writing)
+        with self._lock:
+            if not self._pending:
+                return
+            self._inflight, self._pending = self._pending, []
+        self._writing = asyncio.create_task(self._write_inflight())
+        await asyncio.shield(self._writing)
+
+    async def _write_inflight(self):
+        try:
+            await run_in_db_thread(self._write_batch)
+        except Exception:
+            # Put the batch back in front of newer rows and retry next tick
+            with self._lock:
+                self._pending = self._inflight + self._pending
+                self._inflight = []
+                self.flush_errors += 1
+                self._drop_overflow()
+            logger.exception("Chat flush failed, %d chats kept for the next attempt", self.queue_depth())
+        finally:
+            self._writing = None
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def start(self):
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background flusher and write everything still queued."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        before = self.flush_errors
+        while self.queue_depth() and self.flush_errors == before:   # one failed attempt: give up
+            await self.flush()
+
+    # READ-YOUR-WRITES
+    def _history_with_pending(self, user_id: int, limit: int = 50, before: tuple = None):
+        """Runs on the DB thread so no row is both committed and in flight."""
+        chats = db_service.get_chat_history(user_id, limit, before)
+        pending = [
+            {
+                "id": None,
+                "role": r["role"],
+                "message": r["message"],
+                "response": r["response"],
+                "date": r["created_at"].isoformat()
+            }
+            for r in self.pending_for(user_id)
+            if before is None or (r["created_at"], PENDING_ID) < tuple(before)
+        ]
+        if not pending:
+            return chats
+        merged = pending + chats
+        merged.sort(key=history_sort_key, reverse=True)
+        return merged[:limit]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queue_depth": len(self._pending) + len(self._inflight),
+                "rows_enqueued": self.rows_enqueued,
+                "rows_flushed": self.rows_flushed,
+                "flushes": self.flushes,
+                "flush_errors": self.flush_errors,
+                "rows_dropped": self.rows_dropped,
+                "last_flush_ms": round(self.last_flush_seconds * 1000, 3),
+                "max_flush_ms": round(self.max_flush_seconds * 1000, 3),
+                "avg_flush_ms": round(self.total_flush_seconds * 1000 / self.flushes, 3) if self.flushes else 0.0
+            }
+
+
+chat_writer = ChatWriteBehind()
+
+
+# Same contracts as async_db_service.save_chat / get_chat_history
+async def save_chat(user_id: int, role: str, message: str, response: str):
+    chat_writer.add(user_id, role, message, response)
+
+
+async def get_chat_history(user_id: int, limit: int = 50, before: tuple = None):
+    return await run_in_db_thread(chat_writer._history_with_pending, user_id, limit, before)
@@ -1,11 +1,68 @@
-from backend.models import SessionLocal, User, InterviewSession, StudyPlan, ChatHistory
-from datetime import datetime
+from backend.models import (
+    SessionLocal, User, InterviewSession, InterviewStat, InterviewRubric, StudyPlan, StudyPlanSchedule,
+    StudyPlanDay, ChatHistory, GenerationJob, GenerationJobItem
+)
+from backend.chat_search import SEARCH_SQL, fts_query
+from sqlalchemy import insert, text, tuple_, DateTime
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from datetime import datetime, date
+import base64
 
 # Export for use in other modules
-__all__ = ['SessionLocal', 'create_user', 'save_interview', 'get_interview_history', 
-           'get_interview_stats', 'save_study_plan', 'update_plan_completion', 
-           'get_user_plans', 'save_chat', 'get_chat_history', 'delete_all_interviews', 
-           'get_all_interview_data']
+__all__ = ['SessionLocal', 'encode_cursor', 'decode_cursor', 'create_user', 'get_user', 'get_all_users',
+           'iter_all_users', 'save_interview', 'get_interview_history', 'iter_interview_history',
+           'get_interview_stats', 'get_rubric', 'save_rubric', 'save_study_plan', 'update_plan_completion', 
+           'get_user_plans', 'save_chat', 'save_chats', 'get_chat_history', 'iter_chat_history',
+           'search_chat_history', 'create_job', 'get_job', 'list_jobs', 'claim_jobs', 'renew_job_leases',
+           'release_job_leases', 'start_job', 'finish_job_item', 'cancel_job',
+           'delete_all_interviews', 'get_all_interview_data']
+
+EXPORT_BATCH_SIZE = 500
+
+
+# KEYSET CURSORS
+# A cursor is the (created_at, id) of the last row on a page, encoded as an
+# opaque URL-safe token. The next page continues strictly after that row, so
+# deep pages cost the same as the first one (no OFFSET scan).
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """Returns (created_at, id); raises ValueError on a malformed cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, row_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+
+
+def _user_dict(u):
+    return {"id": u.id, "username": u.username, "created_at": u.created_at.isoformat()}
+
+
+def _interview_dict(i):
+    return {
+        "id": i.id,
+        "domain": i.domain,
+        "score": i.score,
+        "correct": i.correct_answers,
+        "total": i.questions_answered,
+        "date": i.created_at.isoformat() if i.created_at else None
+    }
+
+
+def _chat_dict(c):
+    return {
+        "id": c.id,
+        "role": c.role,
+        "message": c.message,
+        "response": c.response_text,
+        "date": c.created_at.isoformat() if c.created_at else None
+    }
+
 
 # USER FUNCTIONS
 def create_user(username: str):
@@ -22,18 +79,75 @@ def create_user(username: str):
         db.close()
 
 
+def get_user(user_id: int):
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.id == user_id).first()
+        if not user:
+            return {"error": "User not found"}
+        return _user_dict(user)
+    finally:
+        db.close()
+
+
+def _users_query(db, after=None):
+    query = db.query(User)
+    if after:
+        query = query.filter(tuple_(User.created_at, User.id) > tuple(after))
+    return query.order_by(User.created_at, User.id)
+
+
+def get_all_users(limit: int = None, after: tuple = None):
+    """Users oldest first; `after` is the (created_at, id) cursor of the previous page."""
+    db = SessionLocal()
+    try:
+        query = _users_query(db, after)
+        if limit:
+            query = query.limit(limit)
+        return [_user_dict(u) for u in query]
+    finally:
+        db.close()
+
+
+def iter_all_users(batch_size: int = EXPORT_BATCH_SIZE):
+    """Stream every user from a server-side cursor, one dict at a time."""
+    db = SessionLocal()
+    try:
+        for u in _users_query(db).yield_per(batch_size):
+            yield _user_dict(u)
+    finally:
+        db.close()
+
+
 # INTERVIEW FUNCTIONS
 def save_interview(user_id: int, domain: str, score: float, correct: int, total: int):
     db = SessionLocal()
     try:
+        now = datetime.utcnow()
         session = InterviewSession(
             user_id=user_id,
             domain=domain,
             score=score,
             questions_answered=total,
-            correct_answers=correct
+            correct_answers=correct,
+            created_at=now
         )
         db.add(session)
+
+        # Keep the per-(user, domain) aggregate in the same transaction
+        upsert = sqlite_insert(InterviewStat).values(
+            user_id=user_id, domain=domain, session_count=1, score_sum=score,
+            first_score=score, first_at=now, last_score=score, last_at=now
+        )
+        db.execute(upsert.on_conflict_do_update(
+            index_elements=[InterviewStat.user_id, InterviewStat.domain],
+            set_={
+                "session_count": InterviewStat.session_count + 1,
+                "score_sum": InterviewStat.score_sum + score,
+                "last_score": score,
+                "last_at": now
+            }
+        ))
         db.commit()
         db.refresh(session)
         return {"session_id": session.id, "score": session.score}
@@ -41,62 +155,89 @@ def save_interview(user_id: int, domain: str, score: float, correct: int, total:
         db.close()
 
 
-def get_interview_history(user_id: int, domain: str = None):
+def _interview_history_query(db, user_id: int, domain: str = None, before=None):
+    query = db.query(InterviewSession).filter(InterviewSession.user_id == user_id)
+    if domain:
+        query = query.filter(InterviewSession.domain == domain)
+    if before:
+        query = query.filter(tuple_(InterviewSession.created_at, InterviewSession.id) < tuple(before))
+    return query.order_by(InterviewSession.created_at.desc(), InterviewSession.id.desc())
+
+
+def get_interview_history(user_id: int, domain: str = None, limit: int = None, before: tuple = None):
+    """Newest first; `before` is the (created_at, id) cursor of the previous page."""
     db = SessionLocal()
     try:
-        query = db.query(InterviewSession).filter(InterviewSession.user_id == user_id)
-        if domain:
-            query = query.filter(InterviewSession.domain == domain)
-        interviews = query.order_by(InterviewSession.created_at.desc()).all()
-        return [
-            {
-                "id": i.id,
-                "domain": i.domain,
-                "score": i.score,
-                "correct": i.correct_answers,
-                "total": i.questions_answered,
-                "date": i.created_at.isoformat() if i.created_at else None
-            }
-            for i in interviews
-        ]
+        query = _interview_history_query(db, user_id, domain, before)
+        if limit:
+            query = query.limit(limit)
+        return [_interview_dict(i) for i in query]
+    finally:
+        db.close()
+
+
+def iter_interview_history(user_id: int, domain: str = None, batch_size: int = EXPORT_BATCH_SIZE):
+    """Stream a user's interviews from a server-side cursor, one dict at a time."""
+    db = SessionLocal()
+    try:
+        for i in _interview_history_query(db, user_id, domain).yield_per(batch_size):
+            yield _interview_dict(i)
     finally:
         db.close()
 
 
 def get_interview_stats(user_id: int):
-    """Calculate average score, improvement, etc."""
+    """Calculate average score, improvement, etc. from the running aggregates."""
     db = SessionLocal()
     try:
-        interviews = db.query(InterviewSession).filter(
-            InterviewSession.user_id == user_id
-        ).order_by(InterviewSession.created_at).all()
-        
-        if not interviews:
+        rows = db.query(InterviewStat).filter(
+            InterviewStat.user_id == user_id
+        ).order_by(InterviewStat.first_at).all()
+
+        if not rows:
             return {"total_interviews": 0, "avg_score": 0, "improvement": 0, "by_domain": {}}
-        
-        scores = [i.score for i in interviews]
-        
-        # Calculate domain stats
-        stats_by_domain = {}
-        for interview in interviews:
-            if interview.domain not in stats_by_domain:
-                stats_by_domain[interview.domain] = []
-            stats_by_domain[interview.domain].append(interview.score)
-        
-        domain_stats = {domain: sum(scores_list)/len(scores_list) for domain, scores_list in stats_by_domain.items()}
-        
+
+        total = sum(r.session_count for r in rows)
+        first = rows[0]
+        last = max(rows, key=lambda r: r.last_at)
+
         return {
-            "total_interviews": len(interviews),
-            "avg_score": round(sum(scores) / len(scores), 2),
-            "last_score": scores[-1],
-            "first_score": scores[0],
-            "improvement": round(scores[-1] - scores[0], 2),
-            "by_domain": domain_stats
+            "total_interviews": total,
+            "avg_score": round(sum(r.score_sum for r in rows) / total, 2),
+            "last_score": last.last_score,
+            "first_score": first.first_score,
+            "improvement": round(last.last_score - first.first_score, 2),
+            "by_domain": {r.domain: r.score_sum / r.session_count for r in rows}
         }
     finally:
         db.close()
 
 
+def get_rubric(question: str, model: str):
+    """Cached reference rubric for a question, or None."""
+    db = SessionLocal()
+    try:
+        row = db.get(InterviewRubric, (question, model))
+        return row.rubric if row else None
+    finally:
+        db.close()
+
+
+def save_rubric(question: str, model: str, rubric: str):
+    db = SessionLocal()
+    try:
+        upsert = sqlite_insert(InterviewRubric).values(
+            question=question, model=model, rubric=rubric, created_at=datetime.utcnow()
+        )
+        db.execute(upsert.on_conflict_do_update(
+            index_elements=[InterviewRubric.question, InterviewRubric.model],
+            set_={"rubric": upsert.excluded.rubric, "created_at": upsert.excluded.created_at}
+        ))
+        db.commit()
+    finally:
+        db.close()
+
+
 # STUDY PLANNER FUNCTIONS
 def save_study_plan(user_id: int, subject: str, topics: list, exam_date: str):
     db = SessionLocal()
@@ -129,6 +270,98 @@ def update_plan_completion(plan_id: int, percentage: float):
         db.close()
 
 
+def get_study_plan(plan_id: int):
+    db = SessionLocal()
+    try:
+        p = db.query(StudyPlan).filter(StudyPlan.id == plan_id).first()
+        if p is None:
+            return None
+        return {
+            "id": p.id,
+            "user_id": p.user_id,
+            "subject": p.subject,
+            "completion": p.completion_percentage,
+            "exam_date": p.exam_date.isoformat() if p.exam_date else None,
+            "topics": p.topics,
+            "created_at": p.created_at.isoformat() if p.created_at else None,
+        }
+    finally:
+        db.close()
+
+
+def _plan_schedule_dict(h: StudyPlanSchedule) -> dict:
+    return {
+        "plan_id": h.plan_id,
+        "hours_per_day": h.hours_per_day,
+        "rest_days": h.rest_days or [],
+        "start": h.start.isoformat() if h.start else None,
+        "replanned_from": h.replanned_from.isoformat() if h.replanned_from else None,
+        "missed_days": h.missed_days or [],
+        "summary": h.summary,
+        "unscheduled": h.unscheduled or [],
+    }
+
+
+def get_plan_schedule(plan_id: int):
+    db = SessionLocal()
+    try:
+        h = db.query(StudyPlanSchedule).filter(StudyPlanSchedule.plan_id == plan_id).first()
+        return _plan_schedule_dict(h) if h else None
+    finally:
+        db.close()
+
+
+def save_plan_schedule(plan_id: int, hours_per_day: float, rest_days: list, schedule: dict,
+                       missed_days: list = None):
+    """
+    Store a (re)computed schedule: its days replace the stored days from
+    schedule["start"] on, earlier days are kept. One transaction.
+    """
+    replanned_from = date.fromisoformat(schedule["start"])
+    db = SessionLocal()
+    try:
+        values = {
+            "hours_per_day": hours_per_day,
+            "rest_days": list(rest_days),
+            "replanned_from": replanned_from,
+            "summary": schedule["summary"],
+            "unscheduled": schedule["unscheduled"],
+            "updated_at": datetime.utcnow(),
+        }
+        if missed_days is not None:
+            values["missed_days"] = missed_days
+        upsert = sqlite_insert(StudyPlanSchedule).values(plan_id=plan_id, start=replanned_from, **values)
+        db.execute(upsert.on_conflict_do_update(index_elements=[StudyPlanSchedule.plan_id], set_=values))
+        db.query(StudyPlanDay).filter(
+            StudyPlanDay.plan_id == plan_id, StudyPlanDay.day >= replanned_from
+        ).delete(synchronize_session=False)
+        if schedule["days"]:
+            db.execute(insert(StudyPlanDay), [
+                {"plan_id": plan_id, "day": date.fromisoformat(d["date"]), "hours": d["hours"], "slots": d["slots"]}
+                for d in schedule["days"]
+            ])
+        db.commit()
+        h = db.query(StudyPlanSchedule).filter(StudyPlanSchedule.plan_id == plan_id).first()
+        return _plan_schedule_dict(h)
+    finally:
+        db.close()
+
+
+def iter_plan_days(plan_id: int, start: date = None, end: date = None, batch_size: int = EXPORT_BATCH_SIZE):
+    """Stored days of a plan in [start, end], oldest first, one dict at a time."""
+    db = SessionLocal()
+    try:
+        query = db.query(StudyPlanDay).filter(StudyPlanDay.plan_id == plan_id)
+        if start:
+            query = query.filter(StudyPlanDay.day >= start)
+        if end:
+            query = query.filter(StudyPlanDay.day <= end)
+        for d in query.order_by(StudyPlanDay.day).yield_per(batch_size):
+            yield {"date": d.day.isoformat(), "hours": d.hours, "slots": d.slots}
+    finally:
+        db.close()
+
+
 def get_user_plans(user_id: int):
     db = SessionLocal()
     try:
@@ -163,21 +396,273 @@ def save_chat(user_id: int, role: str, message: str, response: str):
         db.close()
 
 
-def get_chat_history(user_id: int, limit: int = 50):
+def save_chats(rows: list):
+    """Insert many chat rows (dicts of ChatHistory columns) in one transaction."""
+    if not rows:
+        return
+    db = SessionLocal()
+    try:
+        db.execute(insert(ChatHistory), rows)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _chat_history_query(db, user_id: int, before=None):
+    query = db.query(ChatHistory).filter(ChatHistory.user_id == user_id)
+    if before:
+        query = query.filter(tuple_(ChatHistory.created_at, ChatHistory.id) < tuple(before))
+    return query.order_by(ChatHistory.created_at.desc(), ChatHistory.id.desc())
+
+
+def get_chat_history(user_id: int, limit: int = 50, before: tuple = None):
+    """Newest first; `before` is the (created_at, id) cursor of the previous page."""
+    db = SessionLocal()
+    try:
+        chats = _chat_history_query(db, user_id, before).limit(limit).all()
+        return [_chat_dict(c) for c in chats]
+    finally:
+        db.close()
+
+
+def iter_chat_history(user_id: int, batch_size: int = EXPORT_BATCH_SIZE):
+    """Stream a user's chats from a server-side cursor, one dict at a time."""
     db = SessionLocal()
     try:
-        chats = db.query(ChatHistory).filter(
-            ChatHistory.user_id == user_id
-        ).order_by(ChatHistory.created_at.desc()).limit(limit).all()
+        for c in _chat_history_query(db, user_id).yield_per(batch_size):
+            yield _chat_dict(c)
+    finally:
+        db.close()
+
+
+def search_chat_history(user_id: int, query: str, limit: int = 20, any_term: bool = False):
+    """Ranked full-text search over one user's chats (best match first)."""
+    match = fts_query(user_id, query, any_term)
+    if match is None:
+        return []
+    db = SessionLocal()
+    try:
+        statement = text(SEARCH_SQL).columns(created_at=DateTime)
+        rows = db.execute(statement, {"match": match, "limit": limit, "tokens": 16}).all()
         return [
             {
-                "role": c.role,
-                "message": c.message,
-                "response": c.response,
-                "date": c.created_at.isoformat() if c.created_at else None
+                "id": r.id,
+                "role": r.role,
+                "message": r.message,
+                "snippet": r.snippet,
+                "score": round(-r.score, 4),
+                "date": r.created_at.isoformat() if r.created_at else None
+            }
+            for r in rows
+        ]
+    finally:
+        db.close()
+
+
+# BATCH GENERATION JOBS (backend/jobs.py)
+ACTIVE_JOB_STATUSES = ("queued", "running")
+
+
+def _job_dict(j: GenerationJob, items: list = None) -> dict:
+    seconds = ((j.finished_at or datetime.utcnow()) - j.started_at).total_seconds() if j.started_at else 0.0
+    finished = j.done + j.failed
+    job = {
+        "id": j.id,
+        "user_id": j.user_id,
+        "agent": j.agent,
+        "status": j.status,
+        "total": j.total,
+        "done": j.done,
+        "failed": j.failed,
+        "tokens": j.tokens,
+        "callback_url": j.callback_url,
+        "created_at": j.created_at.isoformat() if j.created_at else None,
+        "started_at": j.started_at.isoformat() if j.started_at else None,
+        "finished_at": j.finished_at.isoformat() if j.finished_at else None,
+        # From the first prompt starting to the last one finishing (or now)
+        "throughput": {
+            "seconds": round(seconds, 3),
+            "tokens_per_second": round(j.tokens / seconds, 2) if seconds > 0 else None,
+            "prompts_per_minute": round(finished * 60 / seconds, 2) if seconds > 0 else None,
+        },
+    }
+    if items is not None:
+        job["items"] = [
+            {
+                "position": i.position,
+                "prompt": i.prompt,
+                "status": i.status,
+                "output": i.output,
+                "tokens": i.tokens,
+                "seconds": i.seconds,
+                "error": i.error,
             }
-            for c in chats
+            for i in items
         ]
+    return job
+
+
+def create_job(user_id: int, agent: str, prompts: list, callback_url: str = None,
+               worker: str = None, lease_until: float = None):
+    """Store a job and its prompts, leased to `worker`."""
+    db = SessionLocal()
+    try:
+        job = GenerationJob(user_id=user_id, agent=agent, status="queued", callback_url=callback_url,
+                            total=len(prompts), done=0, failed=0, tokens=0, worker=worker, lease_until=lease_until)
+        db.add(job)
+        db.flush()
+        db.execute(insert(GenerationJobItem), [
+            {"job_id": job.id, "position": n, "prompt": prompt, "status": "queued", "tokens": 0}
+            for n, prompt in enumerate(prompts)
+        ])
+        db.commit()
+        return _job_dict(job)
+    finally:
+        db.close()
+
+
+def get_job(job_id: int, with_items: bool = False):
+    db = SessionLocal()
+    try:
+        job = db.get(GenerationJob, job_id)
+        if job is None:
+            return None
+        items = None
+        if with_items:
+            items = db.query(GenerationJobItem).filter(GenerationJobItem.job_id == job_id) \
+                .order_by(GenerationJobItem.position).all()
+        return _job_dict(job, items)
+    finally:
+        db.close()
+
+
+def list_jobs(user_id: int, limit: int = 20):
+    """A user's jobs, newest first, without their prompts and outputs."""
+    db = SessionLocal()
+    try:
+        jobs = db.query(GenerationJob).filter(GenerationJob.user_id == user_id) \
+            .order_by(GenerationJob.created_at.desc(), GenerationJob.id.desc()).limit(limit).all()
+        return [_job_dict(j) for j in jobs]
+    finally:
+        db.close()
+
+
+def claim_jobs(worker: str, now: float, lease_until: float):
+    """
+    Take over unfinished jobs whose lease has run out (their worker stopped
+    or crashed). Returns [{"job", "items": [(position, prompt), ...]}] with
+    the prompts that still have no result.
+    """
+    db = SessionLocal()
+    try:
+        free = db.query(GenerationJob.id).filter(
+            GenerationJob.status.in_(ACTIVE_JOB_STATUSES),
+            (GenerationJob.lease_until == None) | (GenerationJob.lease_until < now)  # noqa: E711
+        ).order_by(GenerationJob.id).all()
+        claimed = []
+        for (job_id,) in free:
+            # Conditional on the lease still being free: another worker may have been faster
+            taken = db.query(GenerationJob).filter(
+                GenerationJob.id == job_id,
+                (GenerationJob.lease_until == None) | (GenerationJob.lease_until < now)  # noqa: E711
+            ).update({"worker": worker, "lease_until": lease_until}, synchronize_session=False)
+            db.commit()
+            if not taken:
+                continue
+            items = db.query(GenerationJobItem.position, GenerationJobItem.prompt).filter(
+                GenerationJobItem.job_id == job_id, GenerationJobItem.status == "queued"
+            ).order_by(GenerationJobItem.position).all()
+            claimed.append({"job": _job_dict(db.get(GenerationJob, job_id)), "items": [tuple(i) for i in items]})
+        return claimed
+    finally:
+        db.close()
+
+
+def renew_job_leases(worker: str, job_ids: list, lease_until: float):
+    """Extend the worker's leases. Returns the ids it still holds (not cancelled or taken over)."""
+    if not job_ids:
+        return []
+    db = SessionLocal()
+    try:
+        held = GenerationJob.id.in_(job_ids), GenerationJob.worker == worker, \
+            GenerationJob.status.in_(ACTIVE_JOB_STATUSES)
+        db.query(GenerationJob).filter(*held).update({"lease_until": lease_until}, synchronize_session=False)
+        db.commit()
+        return [job_id for (job_id,) in db.query(GenerationJob.id).filter(*held)]
+    finally:
+        db.close()
+
+
+def release_job_leases(worker: str, job_ids: list):
+    """Give jobs up (clean shutdown) so the next worker to look takes them over at once."""
+    if not job_ids:
+        return
+    db = SessionLocal()
+    try:
+        db.query(GenerationJob).filter(GenerationJob.id.in_(job_ids), GenerationJob.worker == worker) \
+            .update({"lease_until": 0}, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def start_job(job_id: int):
+    db = SessionLocal()
+    try:
+        db.query(GenerationJob).filter(GenerationJob.id == job_id, GenerationJob.status == "queued") \
+            .update({"status": "running", "started_at": datetime.utcnow()}, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def finish_job_item(job_id: int, position: int, status: str, output: str, tokens: int, seconds: float,
+                    error: str = None):
+    """
+    Store one prompt's result and count it on the job, which is done once
+    every prompt has one. Returns the job, or None when the prompt already
+    had a result or was cancelled (nothing is counted twice).
+    """
+    db = SessionLocal()
+    try:
+        stored = db.query(GenerationJobItem).filter(
+            GenerationJobItem.job_id == job_id, GenerationJobItem.position == position,
+            GenerationJobItem.status == "queued"
+        ).update({"status": status, "output": output, "tokens": tokens, "seconds": seconds, "error": error},
+                 synchronize_session=False)
+        if not stored:
+            db.rollback()
+            return None
+        job = db.get(GenerationJob, job_id)
+        if status == "done":
+            job.done += 1
+        else:
+            job.failed += 1
+        job.tokens += tokens
+        if job.done + job.failed >= job.total:
+            job.status = "done"
+            job.finished_at = datetime.utcnow()
+        db.commit()
+        return _job_dict(job)
+    finally:
+        db.close()
+
+
+def cancel_job(job_id: int):
+    """Cancel the prompts without a result. Returns the job (unchanged if already finished) or None."""
+    db = SessionLocal()
+    try:
+        job = db.get(GenerationJob, job_id)
+        if job is None:
+            return None
+        if job.status in ACTIVE_JOB_STATUSES:
+            db.query(GenerationJobItem).filter(
+                GenerationJobItem.job_id == job_id, GenerationJobItem.status == "queued"
+            ).update({"status": "cancelled"}, synchronize_session=False)
+            job.status = "cancelled"
+            job.finished_at = datetime.utcnow()
+            db.commit()
+        return _job_dict(job)
     finally:
         db.close()
 
@@ -188,6 +673,7 @@ def delete_all_interviews(user_id: int):
     db = SessionLocal()
     try:
         db.query(InterviewSession).filter(InterviewSession.user_id == user_id).delete()
+        db.query(InterviewStat).filter(InterviewStat.user_id == user_id).delete()
         db.commit()
         return {"message": "All interviews deleted"}
     finally:
@@ -0,0 +1,57 @@
+"""
+Per-user server events for open /ws/chat connections.
+
+Code that finishes something a user is waiting for publishes an event
+dict for that user: background interview evaluations
+(mock_interview/pipeline.py), note ingest progress (/upload-pdf with a
+user_id) and batch job progress (jobs.py). Every open WebSocket of the user receives it as
+{"type": "event", ...}. Users without an open connection are skipped, so
+publishing costs a dict lookup when nobody listens.
+
+Each subscriber has a queue of at most EVENTS_MAX_QUEUED events; a slow
+client loses the oldest ones rather than growing memory. Events are per
+process: they reach connections to the worker that published them.
+Publish from the event loop thread.
+"""
+
+import asyncio
+import os
+
+EVENTS_MAX_QUEUED = int(os.getenv("EVENTS_MAX_QUEUED", "100"))
+
+
+class EventBus:
+    def __init__(self, max_queued: int = EVENTS_MAX_QUEUED):
+        self.max_queued = max(1, max_queued)
+        self._subscribers = {}   # str(user_id) -> set of queues
+        self.dropped = 0
+
+    def subscribe(self, user_id) -> asyncio.Queue:
+        queue = asyncio.Queue(self.max_queued)
+        self._subscribers.setdefault(str(user_id), set()).add(queue)
+        return queue
+
+    def unsubscribe(self, user_id, queue: asyncio.Queue):
+        queues = self._subscribers.get(str(user_id))
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[str(user_id)]
+
+    def subscribers(self, user_id) -> int:
+        return len(self._subscribers.get(str(user_id), ()))
+
+    def publish(self, user_id, event: dict) -> int:
+        """Queue an event for every connection of the user; returns how many got it."""
+        queues = self._subscribers.get(str(user_id))
+        if not queues:
+            return 0
+        for queue in queues:
+            if queue.full():
+                queue.get_nowait()
+                self.dropped += 1
+            queue.put_nowait(event)
+        return len(queues)
+
+
+event_bus = EventBus()
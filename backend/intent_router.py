@@ -1,6 +1,11 @@
 from backend.llm_client import call_llm_once # Ensure this is your streaming or non-streaming call
 
 async def classify_intent(message: str) -> str:
+    return rule_intent(message) or await llm_intent(message)
+
+
+def rule_intent(message: str):
+    """Intent from keywords alone, or None when the message needs the LLM classifier."""
     msg = message.lower()
 
     # HARD-CODED PRIORITY CHECK (Rule-First)
@@ -25,7 +30,10 @@ async def classify_intent(message: str) -> str:
     code_commands = ["python", "java", "c++", "debug", "error", "bug", "run code"]
     if any(cmd in msg for cmd in code_commands):
         return "code"
+    return None
+
 
+async def llm_intent(message: str) -> str:
     # LLM-BASED REFINEMENT (The Classifier)
     prompt = f"""
 You are an intent classifier for UniGenAI.
@@ -45,7 +53,7 @@ Category:"""
 
     try:
         # Note: call_llm_once returns a string, not a stream
-        response = await call_llm_once(prompt)
+        response = await call_llm_once(prompt, profile="intent")
         
         intent = response.lower().strip()
 
@@ -0,0 +1,227 @@
+"""
+Batch generation jobs: many prompts for one agent, run in the background.
+
+POST /api/jobs stores the job and its prompts (generation_jobs,
+generation_job_items) and returns at once. The worker's JobRunner feeds
+the prompts to the agent's generation entry point in JOB_AGENTS,
+JOBS_CONCURRENCY at a time and at PRIORITY_BACKGROUND, so chat turns
+always get an LLM slot first. Only agents with such an entry point take
+jobs: it leaves out the user's chat history and touches no session
+state (no mock interviews started from a batch). Each result is written as soon as it is generated. Clients poll
+GET /api/jobs/{id}, watch "job" events on /ws/chat, or pass a
+callback_url on this machine (JOBS_CALLBACK_HOSTS), which is POSTed the
+finished job.
+
+Jobs survive restarts. A worker holds a lease on the jobs it runs and
+renews it while they run; on a clean shutdown it gives them up, after a
+crash they are free once the lease runs out (JOBS_LEASE_SECONDS). Every
+worker looks for free jobs at startup and every JOBS_POLL_SECONDS, takes
+them over and runs only the prompts that have no result yet.
+
+Throughput is reported per job: tokens per second and prompts per minute
+from the first prompt starting to the last one finishing.
+"""
+
+import asyncio
+import logging
+import os
+import time
+import uuid
+from urllib.parse import urlsplit
+
+import httpx
+
+from backend import db_service, llm_client, metrics
+from backend.async_db_service import run_in_db_thread
+from backend.agents import content_agent
+from backend.events import event_bus
+
+JOBS_MAX_PROMPTS = int(os.getenv("JOBS_MAX_PROMPTS", "100"))
+JOBS_MAX_PROMPT_CHARS = int(os.getenv("JOBS_MAX_PROMPT_CHARS", "4000"))
+JOBS_CONCURRENCY = int(os.getenv("JOBS_CONCURRENCY", "2"))
+JOBS_LEASE_SECONDS = float(os.getenv("JOBS_LEASE_SECONDS", "60"))
+JOBS_POLL_SECONDS = float(os.getenv("JOBS_POLL_SECONDS", "15"))
+JOBS_CALLBACK_HOSTS = {h.strip() for h in os.getenv("JOBS_CALLBACK_HOSTS", "127.0.0.1,localhost,::1").split(",")}
+JOBS_CALLBACK_TIMEOUT = float(os.getenv("JOBS_CALLBACK_TIMEOUT", "10"))
+
+# Agents that take batch jobs -> their memory-free, session-free generator
+JOB_AGENTS = {"content": content_agent.generate}
+
+logger = logging.getLogger(__name__)
+
+
+def check_callback_url(url: str | None) -> str | None:
+    """The callback URL if it is http(s) on an allowed host; raises ValueError otherwise."""
+    if not url:
+        return None
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or parts.hostname not in JOBS_CALLBACK_HOSTS:
+        raise ValueError(f"callback_url must be an http(s) URL on {', '.join(sorted(JOBS_CALLBACK_HOSTS))}")
+    return url
+
+
+class JobRunner:
+    def __init__(self, concurrency: int = JOBS_CONCURRENCY, lease_seconds: float = JOBS_LEASE_SECONDS,
+                 poll_seconds: float = JOBS_POLL_SECONDS):
+        self.concurrency = max(1, concurrency)
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._queue = asyncio.Queue()   # (job id, position, prompt)
+        self._jobs = {}                 # job id -> {"user_id", "agent", "callback_url", "started"}
+        self._running = {}              # job id -> generation tasks in flight
+        self._callbacks = set()
+        self._tasks = []
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize()
+
+    def jobs(self) -> list:
+        """Ids of the jobs this worker is running."""
+        return list(self._jobs)
+
+    async def start(self):
+        if self._tasks:
+            return
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.concurrency)]
+        self._tasks.append(asyncio.create_task(self._keep_leases()))
+
+    async def stop(self):
+        """Stop generating and give the leases up; unfinished prompts run again wherever the jobs resume."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._jobs:
+            await run_in_db_thread(db_service.release_job_leases, self.worker_id, list(self._jobs))
+        self._jobs.clear()
+        self._queue = asyncio.Queue()
+
+    async def submit(self, user_id: int, agent: str, prompts: list, callback_url: str = None) -> dict:
+        job = await run_in_db_thread(db_service.create_job, user_id, agent, prompts, callback_url,
+                                     self.worker_id, time.time() + self.lease_seconds)
+        self._take(job, list(enumerate(prompts)))
+        return job
+
+    async def cancel(self, job_id: int):
+        """Cancel a job's remaining prompts, including the ones generating now. None if there is no such job."""
+        job = await run_in_db_thread(db_service.cancel_job, job_id)
+        if job is not None and job["status"] == "cancelled":
+            self._jobs.pop(job_id, None)
+            for task in self._running.get(job_id, ()):
+                task.cancel()
+        return job
+
+    async def claim(self) -> int:
+        """Take over jobs whose lease has run out. Returns how many."""
+        now = time.time()
+        claimed = await run_in_db_thread(db_service.claim_jobs, self.worker_id, now, now + self.lease_seconds)
+        for entry in claimed:
+            if entry["job"]["id"] not in self._jobs:
+                logger.info("Resuming job %s: %d of %d prompts left", entry["job"]["id"],
+                            len(entry["items"]), entry["job"]["total"])
+                self._take(entry["job"], entry["items"])
+        return len(claimed)
+
+    def _take(self, job: dict, items: list):
+        self._jobs[job["id"]] = {
+            "user_id": job["user_id"],
+            "agent": job["agent"],
+            "callback_url": job["callback_url"],
+            "started": job["started_at"] is not None,
+        }
+        for position, prompt in items:
+            self._queue.put_nowait((job["id"], position, prompt))
+
+    async def _keep_leases(self):
+        interval = min(self.poll_seconds, self.lease_seconds / 3)
+        while True:
+            try:
+                held = list(self._jobs)
+                kept = await run_in_db_thread(db_service.renew_job_leases, self.worker_id, held,
+                                              time.time() + self.lease_seconds)
+                for job_id in set(held) - set(kept):
+                    self._jobs.pop(job_id, None)   # cancelled through another worker, or taken over
+                await self.claim()
+            except Exception:
+                logger.exception("Could not renew or claim batch jobs")
+            await asyncio.sleep(interval)
+
+    async def _work(self):
+        # Everything this task runs, the agent's LLM calls included, queues behind interactive work
+        llm_client.default_priority.set(llm_client.PRIORITY_BACKGROUND)
+        while True:
+            job_id, position, prompt = await self._queue.get()
+            job = self._jobs.get(job_id)
+            if job is None:
+                continue   # cancelled, or no longer ours
+            try:
+                await self._run_item(job_id, job, position, prompt)
+            except Exception:
+                logger.exception("Batch job %s prompt %s could not be stored", job_id, position)
+
+    async def _run_item(self, job_id: int, job: dict, position: int, prompt: str):
+        if not job["started"]:
+            job["started"] = True
+            await run_in_db_thread(db_service.start_job, job_id)
+
+        start = time.perf_counter()
+        generation = asyncio.create_task(self._generate(job, prompt))
+        running = self._running.setdefault(job_id, set())
+        running.add(generation)
+        try:
+            await asyncio.wait({generation})
+        finally:
+            running.discard(generation)
+            if not running:
+                self._running.pop(job_id, None)
+            if not generation.done():
+                generation.cancel()   # the runner is stopping
+        if generation.cancelled():
+            return
+        output, tokens, error = generation.result()
+        seconds = time.perf_counter() - start
+
+        status = "failed" if error else "done"
+        metrics.JOB_ITEMS.labels(status).inc()
+        metrics.JOB_ITEM_SECONDS.observe(seconds)
+        result = await run_in_db_thread(db_service.finish_job_item, job_id, position, status, output,
+                                        tokens, round(seconds, 3), error)
+        if result is None:
+            return
+        event_bus.publish(result["user_id"], {
+            "event": "job", "job_id": job_id, "status": result["status"],
+            "done": result["done"], "failed": result["failed"], "total": result["total"],
+        })
+        if result["status"] == "done":
+            self._jobs.pop(job_id, None)
+            if result["callback_url"]:
+                callback = asyncio.create_task(self._notify(result))
+                self._callbacks.add(callback)
+                callback.add_done_callback(self._callbacks.discard)
+
+    async def _generate(self, job: dict, prompt: str):
+        """(output, tokens, error) of the agent's answer to one prompt."""
+        tokens = []
+        try:
+            async for token in JOB_AGENTS[job["agent"]](prompt):
+                tokens.append(token)
+            return "".join(tokens), len(tokens), None
+        except Exception as e:
+            logger.warning("Batch prompt failed (%s agent): %s", job["agent"], e)
+            return "".join(tokens), len(tokens), f"{type(e).__name__}: {e}"
+
+    async def _notify(self, job: dict):
+        try:
+            async with httpx.AsyncClient(timeout=JOBS_CALLBACK_TIMEOUT) as client:
+                response = await client.post(job["callback_url"], json=job)
+            if response.status_code >= 400:
+                logger.warning("Callback for job %s returned %s", job["id"], response.status_code)
+        except httpx.HTTPError as e:
+            logger.warning("Callback for job %s failed: %s", job["id"], e)
+
+
+job_runner = JobRunner()
+# Read at scrape time, so a replaced job_runner is picked up
+metrics.JOB_ITEMS_QUEUED.set_function(lambda: job_runner.queued)
@@ -1,34 +1,198 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
 import httpx
 import json
 import os
+import time
+from contextlib import asynccontextmanager
+
+from backend import metrics, tracing
 
 # Configuration
 OLLAMA_URL = "http://localhost:11434/api/generate"
 MODEL_NAME = "llama3.2:1b" # Upgraded for better reasoning as discussed
 
-# NON-STREAMING (for intent classification etc.) 
-async def call_llm_once(prompt: str) -> str:
+# MODEL ROUTING
+# Models Ollama serves, smallest first (e.g. "llama3.2:1b,llama3.1:8b").
+# Every call names a generation profile, usually its agent. The profile
+# picks the model ("small" = first, "large" = last, or a model name) and
+# caps the generation (num_predict, stop, temperature, num_ctx) so one
+# runaway answer cannot hold a slot for minutes. While LLM_DEGRADE_QUEUE_DEPTH
+# or more calls are waiting for a slot, profiles with "degrade" drop to the
+# smallest model, unless the prompt is longer than LLM_LONG_PROMPT_CHARS.
+# Ollama reloads a model whose num_ctx changes, so profiles keep one
+# LLM_NUM_CTX unless overridden. LLM_PROFILES (JSON) overrides any field:
+# LLM_PROFILES='{"general": {"num_predict": 256, "model": "small"}}'.
+LLM_MODELS = [m.strip() for m in os.getenv("LLM_MODELS", MODEL_NAME).split(",") if m.strip()]
+LLM_DEGRADE_QUEUE_DEPTH = int(os.getenv("LLM_DEGRADE_QUEUE_DEPTH", "4"))
+LLM_LONG_PROMPT_CHARS = int(os.getenv("LLM_LONG_PROMPT_CHARS", "6000"))
+LLM_NUM_CTX = int(os.getenv("LLM_NUM_CTX", "4096"))
+
+
+def _profile(model: str, degrade: bool, num_predict: int, temperature: float, stop: list = None) -> dict:
+    options = {"num_predict": num_predict, "temperature": temperature, "num_ctx": LLM_NUM_CTX}
+    if stop:
+        options["stop"] = stop
+    return {"model": model, "degrade": degrade, "options": options}
+
+
+DEFAULT_PROFILES = {
+    "general": _profile("large", True, 512, 0.7),
+    "intent": _profile("large", True, 8, 0.0, ["\n"]),      # one category word
+    "academic": _profile("large", False, 1024, 0.5),
+    "code": _profile("large", False, 1024, 0.2),
+    "content": _profile("large", False, 2048, 0.8),
+    "content_outline": _profile("large", False, 200, 0.3),  # long-form: section headings
+    "content_section": _profile("large", False, 1024, 0.8), # long-form: one section
+    "evaluation": _profile("large", False, 400, 0.2),
+    "rubric": _profile("large", False, 400, 0.2),
+    "summary": _profile("small", False, 400, 0.2),           # conversation memory, background
+    "extraction": _profile("small", False, 128, 0.0),        # study plan dates and hours as JSON
+    "default": _profile("large", False, 1024, 0.7),
+}
+
+
+def load_profiles(overrides: str = None) -> dict:
+    """DEFAULT_PROFILES with a JSON object of per-profile overrides applied."""
+    profiles = {name: {**p, "options": dict(p["options"])} for name, p in DEFAULT_PROFILES.items()}
+    for name, changes in json.loads(overrides or "{}").items():
+        profile = profiles.setdefault(name, {**profiles["default"], "options": dict(profiles["default"]["options"])})
+        for key, value in changes.items():
+            if key in ("model", "degrade"):
+                profile[key] = value
+            else:
+                profile["options"][key] = value
+    return profiles
+
+
+GENERATION_PROFILES = load_profiles(os.getenv("LLM_PROFILES"))
+
+
+def model_for(profile: str) -> str:
+    """The model a profile uses when there is no load."""
+    model = GENERATION_PROFILES.get(profile, GENERATION_PROFILES["default"])["model"]
+    if model == "small":
+        return LLM_MODELS[0]
+    if model == "large":
+        return LLM_MODELS[-1]
+    return model
+
+
+def route(profile: str, prompt_chars: int, queue_depth: int):
+    """(model, options, reason) for one call; reason is "profile", "load" or "long_prompt"."""
+    settings = GENERATION_PROFILES.get(profile, GENERATION_PROFILES["default"])
+    model = model_for(profile)
+    smallest = LLM_MODELS[0]
+    if settings["degrade"] and model != smallest and queue_depth >= LLM_DEGRADE_QUEUE_DEPTH:
+        if prompt_chars > LLM_LONG_PROMPT_CHARS:
+            return model, settings["options"], "long_prompt"
+        return smallest, settings["options"], "load"
+    return model, settings["options"], "profile"
+
+
+def _route(profile: str, prompt: str):
+    if profile not in GENERATION_PROFILES:
+        profile = "default"   # keeps the metric's label values bounded
+    model, options, reason = route(profile, len(prompt), llm_scheduler.queue_depth)
+    metrics.LLM_ROUTES.labels(profile, model, reason).inc()
+    return profile, model, options, reason
+
+# How many generations may hit Ollama at once (match OLLAMA_NUM_PARALLEL)
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+
+# Lower value = served first when all slots are busy
+PRIORITY_INTERACTIVE = 0   # chat turns, intent classification
+PRIORITY_BATCH = 1         # batch evaluation requested by a user
+PRIORITY_BACKGROUND = 2    # prefetching, bulk jobs
+
+# Priority of calls that don't pass one. Background work (batch jobs) sets
+# it for its task, so the agents it runs queue at that priority unchanged.
+default_priority = contextvars.ContextVar("llm_default_priority", default=PRIORITY_INTERACTIVE)
+
+
+class LLMScheduler:
+    """
+    Priority-aware concurrency limit shared by every LLM call in the process.
+    A freed slot goes to the highest-priority waiter (FIFO within a
+    priority), so background work never delays an interactive request by
+    more than the one generation already running.
+    """
+
+    def __init__(self, max_concurrency: int = LLM_MAX_CONCURRENCY):
+        self.max_concurrency = max(1, max_concurrency)
+        self.active = 0
+        self._waiters = []   # heap of (priority, seq, future)
+        self._seq = itertools.count()
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for _, _, f in self._waiters if not f.done())
+
+    async def acquire(self, priority: int = PRIORITY_INTERACTIVE):
+        if self.active < self.max_concurrency and not self.queue_depth:
+            self.active += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()  # the slot was handed over just as we were cancelled
+            raise
+
+    def release(self):
+        # Hand the slot straight to the next live waiter; `active` stays the same
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active -= 1
+
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_INTERACTIVE):
+        start = time.perf_counter()
+        await self.acquire(priority)
+        waited = time.perf_counter() - start
+        metrics.LLM_WAIT_SECONDS.labels(priority).observe(waited)
+        try:
+            yield waited
+        finally:
+            self.release()
+
+
+llm_scheduler = LLMScheduler()
+# Read at scrape time, so a replaced llm_scheduler is picked up
+metrics.LLM_QUEUE_DEPTH.set_function(lambda: llm_scheduler.queue_depth)
+metrics.LLM_ACTIVE.set_function(lambda: llm_scheduler.active)
+
+
+async def _generate_once(prompt: str, model: str = MODEL_NAME, options: dict = None) -> str:
     async with httpx.AsyncClient(timeout=None) as client:
         response = await client.post(
             OLLAMA_URL,
             json={
-                "model": MODEL_NAME,
+                "model": model,
                 "prompt": prompt,
-                "stream": False
+                "stream": False,
+                "options": options or {}
             }
         )
         return response.json()["response"]
 
 
-# STREAMING (for chat UI) 
-async def call_llm_stream(prompt: str):
+async def _generate_stream(prompt: str, model: str = MODEL_NAME, options: dict = None):
     async with httpx.AsyncClient(timeout=None) as client:
         response = await client.post(
             OLLAMA_URL,
             json={
-                "model": MODEL_NAME,
+                "model": model,
                 "prompt": prompt,
-                "stream": True
+                "stream": True,
+                "options": options or {}
             }
         )
 
@@ -39,4 +203,39 @@ async def call_llm_stream(prompt: str):
             data = json.loads(line)
             token = data.get("response", "")
             if token:
-                yield token
\ No newline at end of file
+                yield token
+
+
+# NON-STREAMING (for intent classification etc.)
+async def call_llm_once(prompt: str, priority: int = None, profile: str = "default") -> str:
+    if priority is None:
+        priority = default_priority.get()
+    profile, model, options, reason = _route(profile, prompt)
+    with tracing.span("llm", kind="once", priority=priority, prompt_chars=len(prompt), profile=profile,
+                      model=model, route=reason) as span:
+        async with llm_scheduler.slot(priority) as waited:
+            span.set(wait_ms=round(waited * 1000, 3))
+            return await _generate_once(prompt, model, options)
+
+
+# STREAMING (for chat UI)
+async def call_llm_stream(prompt: str, priority: int = None, profile: str = "default"):
+    if priority is None:
+        priority = default_priority.get()
+    profile, model, options, reason = _route(profile, prompt)
+    # Not a `with` span: the consumer runs between our yields and must not become its child
+    span = tracing.start_span("llm", kind="stream", priority=priority, prompt_chars=len(prompt), profile=profile,
+                              model=model, route=reason)
+    tokens = 0
+    try:
+        # The slot is held until the stream is finished or closed
+        async with llm_scheduler.slot(priority) as waited:
+            span.set(wait_ms=round(waited * 1000, 3))
+            start = time.perf_counter()
+            async for token in _generate_stream(prompt, model, options):
+                if not tokens:
+                    span.set(first_token_ms=round((time.perf_counter() - start) * 1000, 3))
+                tokens += 1
+                yield token
+    finally:
+        span.end(tokens=tokens)
@@ -0,0 +1,322 @@
+"""
+In-process metrics in the Prometheus text format (served at /metrics).
+
+Counter, Gauge and Histogram with optional labels, registered in REGISTRY
+when created. Recording is lock-free: every metric child keeps one small
+list of numbers per thread that records into it, and only that thread
+ever writes to its list, so an inc() or observe() is a dict lookup, a
+bisect and a few list updates. The one lock is taken the first time a
+thread records into a child (and when a new label combination is seen).
+render() adds the per-thread values up at scrape time.
+
+Gauges can also read their value from a callback at scrape time
+(set_function), for things that are already counted somewhere else, like
+the LLM queue depth or the RAG corpus size.
+
+Values are per process: with several uvicorn workers, each serves its own
+/metrics (see X-Worker-Id).
+"""
+
+import bisect
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+FAST_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+RATE_BUCKETS = (1, 2, 5, 10, 20, 30, 50, 75, 100, 150, 200, 500)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Child:
+    """Values of one label combination, sharded by thread."""
+    __slots__ = ("_size", "_shards", "_lock")
+
+    def __init__(self, size: int):
+        self._size = size
+        self._shards = {}   # thread id -> [values]
+        self._lock = threading.Lock()
+
+    def _shard(self) -> list:
+        ident = threading.get_ident()
+        shard = self._shards.get(ident)
+        if shard is None:
+            with self._lock:
+                shard = self._shards.setdefault(ident, [0.0] * self._size)
+        return shard
+
+    def _totals(self) -> list:
+        totals = [0.0] * self._size
+        for shard in list(self._shards.values()):
+            for i, v in enumerate(shard):
+                totals[i] += v
+        return totals
+
+
+class _CounterChild(_Child):
+    __slots__ = ()
+
+    def __init__(self):
+        super().__init__(1)
+
+    def inc(self, amount: float = 1):
+        self._shard()[0] += amount
+
+    @property
+    def value(self) -> float:
+        return self._totals()[0]
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+
+    def dec(self, amount: float = 1):
+        self._shard()[0] -= amount
+
+    @contextmanager
+    def track_inprogress(self):
+        self.inc()
+        try:
+            yield
+        finally:
+            self.dec()
+
+
+class _HistogramChild(_Child):
+    __slots__ = ("_bounds",)
+
+    def __init__(self, bounds: tuple):
+        super().__init__(len(bounds) + 3)   # buckets, +Inf, sum, count
+        self._bounds = bounds
+
+    def observe(self, value: float):
+        shard = self._shard()
+        shard[bisect.bisect_left(self._bounds, value)] += 1
+        shard[-2] += value
+        shard[-1] += 1
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    @property
+    def count(self) -> float:
+        return self._totals()[-1]
+
+    @property
+    def sum(self) -> float:
+        return self._totals()[-2]
+
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self._children[()] = self._new_child()
+        (REGISTRY if registry is None else registry).register(self)
+
+    @abstractmethod
+    def _new_child(self):
+        ...
+
+    def labels(self, *values, **kwargs):
+        if kwargs:
+            values = tuple(kwargs[n] for n in self.labelnames)
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    @abstractmethod
+    def samples(self):
+        """(suffix, label string, value) tuples for the exposition."""
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines += [f"{self.name}{suffix}{labels} {_format_value(value)}" for suffix, labels, value in self.samples()]
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1):
+        self._default.inc(amount)
+
+    def samples(self):
+        for key, child in list(self._children.items()):
+            yield "", _format_labels(self.labelnames, key), child.value
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        self._function = None
+        super().__init__(*args, **kwargs)
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def inc(self, amount: float = 1):
+        self._default.inc(amount)
+
+    def dec(self, amount: float = 1):
+        self._default.dec(amount)
+
+    def track_inprogress(self):
+        return self._default.track_inprogress()
+
+    def set_function(self, function):
+        """Read the (unlabelled) value from function() at scrape time."""
+        self._function = function
+
+    def samples(self):
+        if self._function is not None:
+            try:
+                yield "", "", float(self._function())
+            except Exception:
+                pass
+            return
+        for key, child in list(self._children.items()):
+            yield "", _format_labels(self.labelnames, key), child.value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=LATENCY_BUCKETS, registry=None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self._default.observe(value)
+
+    def time(self):
+        return self._default.time()
+
+    def samples(self):
+        for key, child in list(self._children.items()):
+            totals = child._totals()
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (math.inf,), totals):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield "_bucket", _format_labels(self.labelnames, key, le), cumulative
+            yield "_sum", _format_labels(self.labelnames, key), totals[-2]
+            yield "_count", _format_labels(self.labelnames, key), totals[-1]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+
+    def get(self, name: str):
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        return "\n".join(m.render() for m in list(self._metrics.values())) + "\n"
+
+
+REGISTRY = Registry()
+
+
+# METRICS
+# Chat (/chat): per agent, from the request arriving to the first / last token
+CHAT_REQUESTS = Counter("unigenai_chat_requests_total", "Chat requests by agent", ["agent"])
+CHAT_ERRORS = Counter("unigenai_chat_errors_total", "Chat requests that failed while streaming", ["agent"])
+CHAT_TTFT = Histogram("unigenai_chat_time_to_first_token_seconds",
+                      "Time from the chat request to the first streamed token", ["agent"])
+CHAT_TOKENS = Counter("unigenai_chat_tokens_total", "Tokens streamed to chat clients", ["agent"])
+CHAT_TOKENS_PER_SECOND = Histogram("unigenai_chat_tokens_per_second",
+                                   "Streaming rate of a chat response after its first token", ["agent"],
+                                   buckets=RATE_BUCKETS)
+SSE_STREAMS = Gauge("unigenai_sse_streams_active", "Chat event streams currently open")
+WS_CONNECTIONS = Gauge("unigenai_ws_connections_active", "Open /ws/chat connections")
+WS_STREAMS = Gauge("unigenai_ws_streams_active", "Chat streams running over /ws/chat connections")
+
+# Routing: "session" (running interview), "rule" (keywords) or "llm" (classifier call)
+ROUTE_SECONDS = Histogram("unigenai_route_agent_seconds", "Time spent choosing the agent", ["path"],
+                          buckets=FAST_BUCKETS + (2.5, 5.0, 10.0))
+
+# RAG
+RAG_EMBED_SECONDS = Histogram("unigenai_rag_embed_seconds", "Embedding time", ["kind"])
+RAG_SEARCH_SECONDS = Histogram("unigenai_rag_search_seconds", "Similarity search time (after embedding)",
+                               buckets=FAST_BUCKETS)
+RAG_DOCUMENTS = Gauge("unigenai_rag_documents", "Chunks in the RAG index")
+
+# Database: time on the DB thread per function, and time queued for it
+DB_SECONDS = Histogram("unigenai_db_seconds", "Time a DB call ran on the DB thread", ["function"],
+                       buckets=FAST_BUCKETS + (2.5, 5.0))
+DB_QUEUE_SECONDS = Histogram("unigenai_db_queue_seconds", "Time a DB call waited for the DB thread",
+                             buckets=FAST_BUCKETS + (2.5, 5.0))
+
+# LLM scheduler
+LLM_QUEUE_DEPTH = Gauge("unigenai_llm_queue_depth", "LLM calls waiting for a slot")
+LLM_ACTIVE = Gauge("unigenai_llm_active", "LLM calls holding a slot")
+LLM_WAIT_SECONDS = Histogram("unigenai_llm_wait_seconds", "Time an LLM call waited for a slot", ["priority"])
+# reason: "profile" (the profile's model), "load" (queue too deep, smallest model), "long_prompt" (kept despite load)
+LLM_ROUTES = Counter("unigenai_llm_routes_total", "Model chosen per LLM call", ["profile", "model", "reason"])
+
+
+# Batch generation jobs (backend/jobs.py)
+JOB_ITEMS = Counter("unigenai_job_items_total", "Batch job prompts finished", ["status"])
+JOB_ITEM_SECONDS = Histogram("unigenai_job_item_seconds", "Time to generate one batch job prompt, waits included")
+JOB_ITEMS_QUEUED = Gauge("unigenai_job_items_queued", "Batch job prompts waiting in this worker")
+
+# Rate limiting
+RATE_LIMITED = Counter("unigenai_rate_limited_total", "Requests rejected by the rate limiter", ["policy"])
+RATE_LIMIT_KEYS = Gauge("unigenai_rate_limit_keys", "Keys in the rate limiter bucket tables")
+
+
+def render() -> str:
+    return REGISTRY.render()
@@ -0,0 +1,125 @@
+"""
+Versioned schema migrations.
+
+Base.metadata.create_all only creates missing tables, so anything that
+changes an existing database (new indexes, new columns, backfills) goes
+here as a numbered migration. Pending migrations are applied in order at
+startup and recorded in the schema_migrations table.
+
+A step is either a SQL string or a callable taking the open connection.
+"""
+
+import logging
+from datetime import datetime
+
+from sqlalchemy import text
+
+from backend.models import engine as default_engine, InterviewStat
+from backend import chat_search
+
+logger = logging.getLogger(__name__)
+
+
+def _add_response_z(conn):
+    # create_all already adds the column on fresh databases
+    columns = {row[1] for row in conn.execute(text("PRAGMA table_info(chat_history)"))}
+    if "response_z" not in columns:
+        conn.execute(text("ALTER TABLE chat_history ADD COLUMN response_z BLOB"))
+
+
+MIGRATIONS = [
+    (1, "composite user/time indexes", [
+        "CREATE INDEX IF NOT EXISTS ix_chat_history_user_created "
+        "ON chat_history (user_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS ix_interview_sessions_user_created "
+        "ON interview_sessions (user_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS ix_interview_sessions_user_domain_created "
+        "ON interview_sessions (user_id, domain, created_at)",
+        "CREATE INDEX IF NOT EXISTS ix_study_plans_user_created "
+        "ON study_plans (user_id, created_at)",
+    ]),
+    (2, "interview_stats running aggregates", [
+        lambda conn: InterviewStat.__table__.create(conn, checkfirst=True),
+        # Backfill from existing sessions; save_interview keeps it current afterwards
+        "INSERT OR REPLACE INTO interview_stats "
+        "(user_id, domain, session_count, score_sum, first_score, first_at, last_score, last_at) "
+        "SELECT user_id, domain, COUNT(*), SUM(score), MAX(first_score), MIN(created_at), "
+        "MAX(last_score), MAX(created_at) "
+        "FROM ("
+        "  SELECT user_id, domain, score, created_at, "
+        "    FIRST_VALUE(score) OVER (PARTITION BY user_id, domain ORDER BY created_at, id) AS first_score, "
+        "    FIRST_VALUE(score) OVER (PARTITION BY user_id, domain ORDER BY created_at DESC, id DESC) AS last_score "
+        "  FROM interview_sessions"
+        ") GROUP BY user_id, domain",
+    ]),
+    (3, "users keyset index", [
+        "CREATE INDEX IF NOT EXISTS ix_users_created ON users (created_at)",
+    ]),
+    # Frozen as applied; migration 5 replaces this table and its triggers
+    (4, "chat history full-text search", [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS chat_history_fts "
+        "USING fts5(message, response, user_key, tokenize = 'porter unicode61')",
+        # Index existing rows before the triggers exist so nothing is indexed twice
+        "INSERT INTO chat_history_fts (rowid, message, response, user_key) "
+        "SELECT id, message, response, 'u' || user_id FROM chat_history",
+        "CREATE TRIGGER IF NOT EXISTS chat_history_fts_insert AFTER INSERT ON chat_history BEGIN "
+        "INSERT INTO chat_history_fts (rowid, message, response, user_key) "
+        "VALUES (new.id, new.message, new.response, 'u' || new.user_id); END",
+        "CREATE TRIGGER IF NOT EXISTS chat_history_fts_delete AFTER DELETE ON chat_history BEGIN "
+        "DELETE FROM chat_history_fts WHERE rowid = old.id; END",
+        "CREATE TRIGGER IF NOT EXISTS chat_history_fts_update AFTER UPDATE OF message, response, user_id "
+        "ON chat_history BEGIN "
+        "DELETE FROM chat_history_fts WHERE rowid = old.id; "
+        "INSERT INTO chat_history_fts (rowid, message, response, user_key) "
+        "VALUES (new.id, new.message, new.response, 'u' || new.user_id); END",
+    ]),
+    (5, "compressed chat responses", [
+        _add_response_z,
+        *chat_search.DROP_TRIGGERS,
+        f"DROP TABLE IF EXISTS {chat_search.FTS_TABLE}",
+        chat_search.CREATE_TEXT_VIEW,
+        chat_search.CREATE_FTS_TABLE,
+        chat_search.rebuild_chat_search,
+        *chat_search.CREATE_TRIGGERS,
+    ]),
+]
+
+
+def _ensure_version_table(conn):
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "version INTEGER PRIMARY KEY, name VARCHAR NOT NULL, applied_at DATETIME NOT NULL)"
+    ))
+
+
+def current_version(db_engine=None) -> int:
+    db_engine = db_engine or default_engine
+    with db_engine.begin() as conn:
+        _ensure_version_table(conn)
+        return conn.execute(text("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")).scalar()
+
+
+def apply_migrations(db_engine=None) -> list:
+    """Apply every pending migration, each in its own transaction. Returns applied versions."""
+    db_engine = db_engine or default_engine
+    with db_engine.begin() as conn:
+        _ensure_version_table(conn)
+        done = {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+    applied = []
+    for version, name, steps in MIGRATIONS:
+        if version in done:
+            continue
+        with db_engine.begin() as conn:
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(text(step))
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, name, applied_at) VALUES (:v, :n, :t)"),
+                {"v": version, "n": name, "t": datetime.utcnow()}
+            )
+        logger.info("Applied migration %s: %s", version, name)
+        applied.append(version)
+    return applied
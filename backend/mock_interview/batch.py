@@ -0,0 +1,86 @@
+"""
+Batch interview evaluation (/api/interview/evaluate-batch).
+
+A whole sheet of (question, answer) pairs is evaluated at once. At most
+`concurrency` evaluations of a batch run together (INTERVIEW_BATCH_CONCURRENCY
+by default and as the cap), and every LLM call also queues on the shared
+llm_scheduler at PRIORITY_BATCH, so a large batch never holds more than its
+share of Ollama and chat turns still go first.
+
+Results are yielded as each evaluation finishes, tagged with the pair's
+index. Each result carries the local key point score when the question has
+reference key points (scorer.py), otherwise the "Score: N/10" parsed from
+the LLM feedback.
+"""
+
+import asyncio
+import logging
+import os
+
+from backend.llm_client import PRIORITY_BATCH
+from backend.mock_interview.evaluator import evaluate_answer, parse_llm_score
+from backend.mock_interview.scorer import INTERVIEW_PASS_SCORE, score_answer
+from backend.mock_interview.session import generate_feedback
+
+INTERVIEW_BATCH_CONCURRENCY = int(os.getenv("INTERVIEW_BATCH_CONCURRENCY", "4"))
+INTERVIEW_BATCH_MAX_ITEMS = int(os.getenv("INTERVIEW_BATCH_MAX_ITEMS", "100"))
+
+logger = logging.getLogger(__name__)
+
+
+async def _evaluate_one(index: int, question: str, answer: str, semaphore: asyncio.Semaphore) -> dict:
+    try:
+        local = await asyncio.to_thread(score_answer, question, answer)
+    except Exception:
+        logger.exception("Local answer scoring failed")
+        local = None
+
+    async with semaphore:
+        feedback = ""
+        async for token in evaluate_answer(question, answer, PRIORITY_BATCH):
+            feedback += token
+
+    failed = feedback.startswith("Evaluation failed")
+    if local is not None:
+        score, is_correct = local["score"], local["is_correct"]
+    else:
+        score = None if failed else parse_llm_score(feedback)
+        is_correct = score is not None and score >= INTERVIEW_PASS_SCORE
+    return {
+        "index": index,
+        "question": question,
+        "status": "failed" if failed else "done",
+        "score": score,
+        "is_correct": is_correct,
+        "feedback": feedback,
+    }
+
+
+async def evaluate_batch(items: list, concurrency: int = INTERVIEW_BATCH_CONCURRENCY):
+    """
+    Evaluate (question, answer) pairs concurrently; yields result dicts in
+    completion order. Pending evaluations are cancelled if the consumer
+    stops early (e.g. the client disconnects).
+    """
+    semaphore = asyncio.Semaphore(max(1, min(concurrency, INTERVIEW_BATCH_CONCURRENCY)))
+    tasks = [asyncio.create_task(_evaluate_one(i, q, a, semaphore)) for i, (q, a) in enumerate(items)]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            yield await finished
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def summarize(results: list) -> dict:
+    """Aggregate statistics over a finished batch, in the shape end_interview returns."""
+    scored = [r["score"] for r in results if r["score"] is not None]
+    score = round(sum(scored) / len(scored) * 10, 2) if scored else 0.0
+    return {
+        "score": score,
+        "correct": sum(1 for r in results if r["is_correct"]),
+        "total": len(results),
+        "scored": len(scored),
+        "failed": sum(1 for r in results if r["status"] == "failed"),
+        "feedback": generate_feedback(score),
+    }
@@ -1,7 +1,52 @@
-from backend.llm_client import call_llm_stream
+import logging
+import re
+from backend.llm_client import call_llm_stream, PRIORITY_INTERACTIVE
+from backend.mock_interview.rubrics import rubric_cache
 from typing import AsyncGenerator
 
-async def evaluate_answer(question: str, answer: str) -> AsyncGenerator[str, None]:
+logger = logging.getLogger(__name__)
+
+_SCORE_PATTERN = re.compile(r"score\W{0,6}(\d+(?:\.\d+)?)\s*(?:/|out of)\s*10", re.IGNORECASE)
+
+def parse_llm_score(feedback: str):
+    """The "Score: N/10" the evaluation prompt asks for, or None if the model left it out."""
+    match = _SCORE_PATTERN.search(feedback or "")
+    if not match:
+        return None
+    return min(float(match.group(1)), 10.0)
+
+def comparison_prompt(question: str, answer: str, rubric: str) -> str:
+    """Short prompt used once the question's reference rubric is cached (rubrics.py)."""
+    return f"""
+Grade the candidate's answer against the reference rubric.
+
+Question:
+{question}
+
+Reference rubric:
+{rubric}
+
+Candidate Answer:
+{answer}
+
+Reply with:
+- Strengths:
+- Weaknesses: (rubric points missed or wrong)
+- Score: N/10
+"""
+
+async def evaluate_answer(question: str, answer: str,
+                          priority: int = PRIORITY_INTERACTIVE) -> AsyncGenerator[str, None]:
+    try:
+        rubric = await rubric_cache.get(question)
+    except Exception:
+        logger.exception("Rubric lookup failed")
+        rubric = None
+    if rubric:
+        async for token in _stream_evaluation(comparison_prompt(question, answer, rubric), priority):
+            yield token
+        return
+
     prompt = f"""
 You are an expert interview evaluator for technical and behavioral interviews.
 Step 1: Identify the core technical concepts required for the question.
@@ -23,9 +68,12 @@ Provide a structured evaluation including:
 
 Keep the response concise and professional.
 """
+    async for token in _stream_evaluation(prompt, priority):
+        yield token
 
+async def _stream_evaluation(prompt: str, priority: int):
     try:
-        async for token in call_llm_stream(prompt):
+        async for token in call_llm_stream(prompt, priority, "evaluation"):
             yield token
     except Exception as e:
         yield f"Evaluation failed: {str(e)}"
\ No newline at end of file
@@ -0,0 +1,139 @@
+"""
+Pipelined interview evaluation.
+
+With INTERVIEW_PIPELINE on (default), an answer is recorded and the next
+question is shown immediately; evaluate_answer runs in a background task
+and stores its feedback on the session (session.set_answer_feedback).
+Feedback is read from /api/interview/feedback/{user_id} while the
+interview runs (or arrives as an "evaluation" event on the user's open
+/ws/chat connections) and is collected into the end-of-interview report.
+
+At most INTERVIEW_MAX_EVALUATIONS_PER_USER evaluations run at once per
+user; further answers queue behind them.
+
+Every answer is also scored locally (scorer.py): right away once the
+scorer is warm, otherwise as the first step of its background task, so a
+cold embedding model never holds up the next question. With
+INTERVIEW_LLM_FEEDBACK=0 that score is the only evaluation and no LLM
+call is made.
+"""
+
+import asyncio
+import logging
+import os
+import time
+
+from backend.events import event_bus
+from backend.mock_interview.evaluator import evaluate_answer
+from backend.mock_interview.scorer import format_score, score_answer
+from backend.mock_interview.session import get_answers, set_answer_feedback, set_answer_score
+from backend.mock_interview.session_store import session_key
+
+INTERVIEW_PIPELINE = os.getenv("INTERVIEW_PIPELINE", "1") == "1"
+INTERVIEW_MAX_EVALUATIONS_PER_USER = int(os.getenv("INTERVIEW_MAX_EVALUATIONS_PER_USER", "2"))
+INTERVIEW_LLM_FEEDBACK = os.getenv("INTERVIEW_LLM_FEEDBACK", "1") == "1"
+INTERVIEW_REPORT_TIMEOUT = float(os.getenv("INTERVIEW_REPORT_TIMEOUT", "300"))
+
+logger = logging.getLogger(__name__)
+
+
+async def score_and_record(user_id, index: int, question: str, answer: str,
+                           llm_feedback: bool = INTERVIEW_LLM_FEEDBACK):
+    """
+    Scores an answer locally and stores the result on the session. Without
+    LLM feedback the local score doubles as the evaluation. Returns the
+    score dict, or None if scoring is unavailable.
+    """
+    try:
+        result = await asyncio.to_thread(score_answer, question, answer)
+    except Exception:
+        logger.exception("Local answer scoring failed")
+        result = None
+    if llm_feedback:
+        if result is not None:
+            await set_answer_score(user_id, index, result)
+    elif result is not None:
+        await set_answer_score(user_id, index, result, feedback=format_score(result))
+    else:
+        await set_answer_feedback(user_id, index, "Evaluation failed: scoring unavailable", "failed")
+    return result
+
+
+class EvaluationPipeline:
+    def __init__(self, max_per_user: int = INTERVIEW_MAX_EVALUATIONS_PER_USER):
+        self.max_per_user = max_per_user
+        self._semaphores = {}   # user key -> Semaphore
+        self._tasks = {}        # user key -> set of running evaluation tasks
+
+    def submit(self, user_id, index: int, question: str, answer: str,
+               score: bool = False, llm_feedback: bool = True) -> asyncio.Task:
+        """Evaluate an answer in the background: local score first if `score`, then LLM feedback."""
+        key = session_key(user_id)
+        semaphore = self._semaphores.setdefault(key, asyncio.Semaphore(self.max_per_user))
+        task = asyncio.create_task(self._evaluate(key, semaphore, index, question, answer, score, llm_feedback))
+        tasks = self._tasks.setdefault(key, set())
+        tasks.add(task)
+        task.add_done_callback(lambda t: self._forget(key, t))
+        return task
+
+    def _forget(self, key: str, task: asyncio.Task):
+        tasks = self._tasks.get(key)
+        if tasks is not None:
+            tasks.discard(task)
+            if not tasks:
+                del self._tasks[key]
+                self._semaphores.pop(key, None)
+
+    async def _evaluate(self, key: str, semaphore: asyncio.Semaphore, index: int, question: str, answer: str,
+                        score: bool, llm_feedback: bool):
+        if score:
+            await score_and_record(key, index, question, answer, llm_feedback)
+        if not llm_feedback:
+            return
+        async with semaphore:
+            feedback = ""
+            async for token in evaluate_answer(question, answer):
+                feedback += token
+        status = "failed" if feedback.startswith("Evaluation failed") else "done"
+        await set_answer_feedback(key, index, feedback, status)
+        event_bus.publish(key, {"event": "evaluation", "index": index, "status": status, "feedback": feedback})
+
+    def pending(self, user_id) -> int:
+        return len(self._tasks.get(session_key(user_id), ()))
+
+    def cancel(self, user_id):
+        for task in list(self._tasks.get(session_key(user_id), ())):
+            task.cancel()
+
+    async def wait_for_feedback(self, user_id, timeout: float = INTERVIEW_REPORT_TIMEOUT) -> list:
+        """
+        Wait until every recorded answer has been evaluated and return them.
+        Evaluations started by another worker are picked up by polling the
+        shared session store.
+        """
+        key = session_key(user_id)
+        deadline = time.monotonic() + timeout
+        while True:
+            local = list(self._tasks.get(key, ()))
+            if local:
+                await asyncio.wait(local, timeout=max(0.0, deadline - time.monotonic()))
+            answers = await get_answers(key)
+            if all(a["status"] != "pending" for a in answers) or time.monotonic() >= deadline:
+                return answers
+            await asyncio.sleep(0.2)
+
+
+evaluation_pipeline = EvaluationPipeline()
+
+
+def format_report(answers: list, summary: dict = None) -> str:
+    lines = ["📋 Interview Report"]
+    if summary:
+        lines.append(f"Overall: {summary['score']}% ({summary['correct']}/{summary['total']} correct)\n"
+                     f"{summary['feedback']}")
+    for i, a in enumerate(answers, 1):
+        feedback = a["feedback"] if a["status"] != "pending" else "(evaluation still running)"
+        score = f" (score {a['score']}/10)" if a.get("score") is not None else ""
+        lines.append(f"\nQuestion {i}: {a['question']}\nYour answer: {a['answer']}{score}\n"
+                     f"--- FEEDBACK ---\n{feedback}")
+    return "\n".join(lines)
@@ -92,3 +92,449 @@ HR_QUESTIONS = [
     "What questions do you have for us?"
 ]
 
+
+
+# Reference key points per question, used by scorer.py to score answers locally
+# (embedding similarity) before, or instead of, the LLM evaluation.
+QUESTION_KEY_POINTS = {
+    # DSA
+    "What is the difference between an array and a linked list?": [
+        "An array stores elements in contiguous memory with a fixed size",
+        "A linked list stores nodes that point to the next node and can grow dynamically",
+        "Arrays give O(1) random access by index, linked lists need O(n) traversal",
+        "Linked lists insert and delete in O(1) at a known node, arrays must shift elements",
+    ],
+    "Explain time complexity with an example.": [
+        "Time complexity describes how running time grows with input size",
+        "It is expressed in Big-O notation as an upper bound",
+        "Linear search is O(n) while binary search is O(log n)",
+        "Constant factors and lower-order terms are ignored",
+    ],
+    "What is a stack and where is it used?": [
+        "A stack is a last-in first-out (LIFO) data structure",
+        "Push adds to the top and pop removes from the top in O(1)",
+        "Used for function call stacks and recursion",
+        "Used for undo operations, expression evaluation and bracket matching",
+    ],
+    "Explain recursion and its base case.": [
+        "Recursion is a function calling itself on a smaller subproblem",
+        "The base case stops the recursion and returns directly",
+        "Without a base case recursion never ends and overflows the stack",
+        "Example: factorial(n) = n * factorial(n - 1) with factorial(0) = 1",
+    ],
+    "What is a binary search tree and how does it work?": [
+        "A binary search tree keeps smaller keys in the left subtree and larger keys in the right subtree",
+        "Search, insert and delete compare the key and go left or right",
+        "Operations take O(log n) when balanced and O(n) when skewed",
+        "In-order traversal returns keys in sorted order",
+    ],
+    "Describe the difference between BFS and DFS.": [
+        "Breadth-first search explores level by level using a queue",
+        "Depth-first search goes as deep as possible first using a stack or recursion",
+        "BFS finds shortest paths in unweighted graphs",
+        "Both run in O(V + E) time",
+    ],
+    "What is dynamic programming? Give an example.": [
+        "Dynamic programming solves problems with overlapping subproblems and optimal substructure",
+        "Results of subproblems are stored to avoid recomputation",
+        "Memoization is top-down and tabulation is bottom-up",
+        "Examples: Fibonacci, knapsack, longest common subsequence",
+    ],
+    "Explain the concept of hashing and hash tables.": [
+        "A hash function maps a key to an index in an array of buckets",
+        "Hash tables give average O(1) insert, delete and lookup",
+        "Collisions happen when two keys map to the same bucket",
+        "Collisions are handled with chaining or open addressing",
+    ],
+    "What are the different types of sorting algorithms?": [
+        "Simple O(n^2) sorts: bubble sort, insertion sort, selection sort",
+        "Efficient O(n log n) sorts: merge sort, quicksort, heap sort",
+        "Non-comparison sorts like counting sort and radix sort run in linear time",
+        "Sorts differ in stability and in-place memory use",
+    ],
+    "How does merge sort work?": [
+        "Merge sort is a divide and conquer algorithm",
+        "It splits the array into halves and recursively sorts each half",
+        "The sorted halves are merged into one sorted array",
+        "It runs in O(n log n) time, is stable and needs O(n) extra space",
+    ],
+    "What is a graph and its representations?": [
+        "A graph is a set of vertices connected by edges",
+        "Graphs can be directed or undirected, weighted or unweighted",
+        "An adjacency matrix uses O(V^2) space and gives O(1) edge lookup",
+        "An adjacency list uses O(V + E) space and suits sparse graphs",
+    ],
+    "Explain the traveling salesman problem.": [
+        "Find the shortest route that visits every city exactly once and returns to the start",
+        "It is an NP-hard optimization problem",
+        "Brute force checks all permutations in O(n!) time",
+        "Dynamic programming (Held-Karp) or heuristics and approximations are used in practice",
+    ],
+    "What is a heap data structure?": [
+        "A heap is a complete binary tree satisfying the heap property",
+        "In a min-heap every parent is smaller than its children, in a max-heap larger",
+        "Insert and extract-min or extract-max take O(log n), peek takes O(1)",
+        "Heaps implement priority queues and heap sort, usually stored in an array",
+    ],
+    "Describe the quicksort algorithm.": [
+        "Quicksort picks a pivot and partitions elements smaller and larger than it",
+        "It recursively sorts the two partitions",
+        "Average time is O(n log n), worst case O(n^2) with bad pivots",
+        "It sorts in place and is not stable",
+    ],
+    "What is the time complexity of accessing an element in an array vs. a linked list?": [
+        "Array access by index is O(1) because the address is computed directly",
+        "Linked list access is O(n) because nodes must be traversed from the head",
+        "Arrays are cache friendly thanks to contiguous memory",
+    ],
+
+    # OS
+    "What is a process?": [
+        "A process is a program in execution",
+        "It has its own address space with code, data, heap and stack",
+        "The OS tracks it with a process control block (PCB)",
+        "Process states include new, ready, running, waiting and terminated",
+    ],
+    "Explain deadlock and its conditions.": [
+        "Deadlock is when processes wait forever for resources held by each other",
+        "Mutual exclusion, hold and wait, no preemption and circular wait must all hold",
+        "Handled by prevention, avoidance (banker's algorithm), detection and recovery",
+    ],
+    "Difference between process and thread?": [
+        "A process has its own address space while threads of a process share it",
+        "Threads are lighter to create and switch than processes",
+        "Each thread has its own stack, registers and program counter",
+        "Processes are isolated so a crash in one does not affect another",
+    ],
+    "What is virtual memory?": [
+        "Virtual memory gives each process the illusion of a large private address space",
+        "Virtual addresses are translated to physical addresses by the MMU using page tables",
+        "Pages not in RAM are kept on disk and loaded on a page fault",
+        "It allows programs larger than physical memory and isolates processes",
+    ],
+    "What is paging and segmentation?": [
+        "Paging divides memory into fixed-size pages and frames",
+        "Paging removes external fragmentation but can cause internal fragmentation",
+        "Segmentation divides memory into variable-size logical segments like code, data and stack",
+        "Segmentation can cause external fragmentation",
+    ],
+    "Explain the concept of scheduling algorithms.": [
+        "The CPU scheduler decides which ready process runs next",
+        "FCFS, shortest job first, priority and round robin are common algorithms",
+        "Round robin gives each process a time quantum",
+        "Goals include throughput, turnaround time, waiting time and fairness",
+    ],
+    "What is a semaphore and how is it used?": [
+        "A semaphore is an integer synchronization variable with atomic wait and signal operations",
+        "Wait (P) decrements and blocks when the value is zero, signal (V) increments",
+        "Binary semaphores act like mutexes, counting semaphores limit access to N resources",
+        "Used to protect critical sections and coordinate processes",
+    ],
+    "Describe the difference between monolithic and microkernel architectures.": [
+        "A monolithic kernel runs all OS services in kernel space",
+        "A microkernel keeps only minimal services in the kernel and runs others in user space",
+        "Monolithic kernels are faster thanks to fewer context switches",
+        "Microkernels are more modular, reliable and secure",
+    ],
+    "What is a file system and its types?": [
+        "A file system organizes how files and directories are stored and retrieved on disk",
+        "It manages metadata, free space and access permissions",
+        "Examples include FAT32, NTFS, ext4 and APFS",
+        "Allocation methods are contiguous, linked and indexed",
+    ],
+    "Explain memory management techniques.": [
+        "Memory management allocates and frees memory for processes",
+        "Techniques include contiguous allocation, paging and segmentation",
+        "Virtual memory with swapping lets processes exceed physical memory",
+        "Fragmentation can be internal or external",
+    ],
+    "What is a critical section problem?": [
+        "A critical section is code that accesses shared resources",
+        "Only one process may execute in its critical section at a time",
+        "A solution needs mutual exclusion, progress and bounded waiting",
+        "Solved with locks, semaphores, monitors or Peterson's algorithm",
+    ],
+    "Describe the producer-consumer problem.": [
+        "Producers add items to a shared bounded buffer and consumers remove them",
+        "Producers must wait when the buffer is full and consumers when it is empty",
+        "Solved with a mutex and two counting semaphores, empty and full",
+    ],
+    "What is context switching?": [
+        "Context switching saves the state of the running process and loads another's",
+        "The state is stored in the process control block, including registers and program counter",
+        "It is pure overhead because no useful work is done during the switch",
+        "Triggered by interrupts, system calls or the scheduler",
+    ],
+    "Explain the concept of interrupts.": [
+        "An interrupt is a signal that makes the CPU pause its current work to handle an event",
+        "Hardware interrupts come from devices, software interrupts from instructions or exceptions",
+        "The CPU runs an interrupt service routine found through the interrupt vector table",
+        "Interrupts avoid polling and enable asynchronous I/O",
+    ],
+    "What is the role of an operating system?": [
+        "The operating system manages hardware resources like CPU, memory and devices",
+        "It provides process management, memory management and file systems",
+        "It offers a user interface and system calls to programs",
+        "It enforces security and isolation between programs and users",
+    ],
+
+    # DBMS
+    "What is normalization?": [
+        "Normalization organizes tables to reduce redundancy",
+        "It removes insert, update and delete anomalies",
+        "It decomposes tables based on functional dependencies",
+        "Normal forms include 1NF, 2NF, 3NF and BCNF",
+    ],
+    "Explain ACID properties.": [
+        "Atomicity: a transaction happens completely or not at all",
+        "Consistency: a transaction moves the database from one valid state to another",
+        "Isolation: concurrent transactions do not interfere with each other",
+        "Durability: committed changes survive crashes",
+    ],
+    "Difference between primary key and foreign key?": [
+        "A primary key uniquely identifies each row and cannot be null",
+        "A foreign key references the primary key of another table",
+        "Foreign keys enforce referential integrity between tables",
+        "A table has one primary key but can have many foreign keys",
+    ],
+    "What is an index?": [
+        "An index is a data structure that speeds up lookups on columns",
+        "Indexes are usually B-trees or hash tables",
+        "They make reads faster but slow down writes and use extra storage",
+        "Clustered indexes define row order, non-clustered indexes are separate structures",
+    ],
+    "What are the different types of joins in SQL?": [
+        "An inner join returns only rows that match in both tables",
+        "A left outer join keeps all rows from the left table",
+        "A right outer join keeps all rows from the right table and a full outer join keeps all rows from both",
+        "A cross join returns the Cartesian product and a self join joins a table to itself",
+    ],
+    "Explain the concept of transactions.": [
+        "A transaction is a sequence of operations executed as one logical unit",
+        "It ends with commit to save or rollback to undo",
+        "Transactions follow the ACID properties",
+        "Concurrency control keeps concurrent transactions correct",
+    ],
+    "What is a database schema?": [
+        "A schema is the logical structure of a database",
+        "It defines tables, columns, data types, relationships and constraints",
+        "The schema changes rarely while the data (instance) changes often",
+        "There are physical, logical and view levels of schema",
+    ],
+    "Describe the differences between SQL and NoSQL.": [
+        "SQL databases are relational with fixed schemas and tables",
+        "NoSQL databases use flexible schemas: document, key-value, column or graph",
+        "SQL databases emphasise ACID and usually scale vertically",
+        "NoSQL databases often scale horizontally and may favour eventual consistency",
+    ],
+    "What is a view in a database?": [
+        "A view is a virtual table defined by a stored query",
+        "It does not store data itself unless it is materialized",
+        "Views simplify complex queries and restrict access to data",
+    ],
+    "Explain the CAP theorem.": [
+        "CAP stands for consistency, availability and partition tolerance",
+        "A distributed system can guarantee only two of the three at the same time",
+        "During a network partition a system must choose consistency or availability",
+    ],
+    "What is data warehousing?": [
+        "A data warehouse is a central store of integrated historical data for analysis",
+        "Data is loaded through ETL: extract, transform, load",
+        "It is optimised for OLAP queries rather than OLTP transactions",
+        "Star and snowflake schemas organise fact and dimension tables",
+    ],
+    "Describe the different normal forms.": [
+        "1NF requires atomic values and no repeating groups",
+        "2NF removes partial dependencies on part of a composite key",
+        "3NF removes transitive dependencies between non-key attributes",
+        "BCNF requires every determinant to be a candidate key",
+    ],
+    "What is a stored procedure?": [
+        "A stored procedure is precompiled SQL code stored in the database",
+        "It can take parameters and is called by name",
+        "It reduces network traffic and reuses logic",
+        "It can improve security by limiting direct table access",
+    ],
+    "Explain database concurrency control.": [
+        "Concurrency control keeps concurrent transactions correct and isolated",
+        "It prevents lost updates, dirty reads and unrepeatable reads",
+        "Lock-based protocols such as two-phase locking are common",
+        "Timestamp ordering and MVCC are alternatives to locking",
+    ],
+    "What is a trigger in databases?": [
+        "A trigger is code that runs automatically on insert, update or delete",
+        "Triggers can run before or after the event, per row or per statement",
+        "Used for auditing, enforcing rules and keeping derived data in sync",
+    ],
+
+    # ML
+    "What is machine learning and its types?": [
+        "Machine learning lets systems learn patterns from data instead of explicit rules",
+        "Supervised learning uses labelled data",
+        "Unsupervised learning finds structure in unlabelled data",
+        "Reinforcement learning learns from rewards by interacting with an environment",
+    ],
+    "Explain supervised vs unsupervised learning.": [
+        "Supervised learning trains on input-output pairs with labels",
+        "Supervised tasks are classification and regression",
+        "Unsupervised learning has no labels and finds hidden patterns",
+        "Unsupervised tasks are clustering and dimensionality reduction",
+    ],
+    "What is overfitting and how to prevent it?": [
+        "Overfitting is when a model learns noise and does well on training data but poorly on new data",
+        "It shows as low training error and high validation error",
+        "Prevent it with more data, regularization, dropout and early stopping",
+        "Simpler models and cross-validation also help",
+    ],
+    "Describe the bias-variance tradeoff.": [
+        "Bias is error from overly simple assumptions and causes underfitting",
+        "Variance is error from sensitivity to training data and causes overfitting",
+        "Lowering one usually raises the other",
+        "The goal is model complexity that minimises total error",
+    ],
+    "What is a neural network?": [
+        "A neural network is layers of connected neurons: input, hidden and output",
+        "Each neuron computes a weighted sum plus bias followed by an activation function",
+        "Weights are learned with backpropagation and gradient descent",
+        "Neural networks can approximate complex non-linear functions",
+    ],
+    "Explain the concept of gradient descent.": [
+        "Gradient descent minimises a loss function iteratively",
+        "Parameters move in the direction of the negative gradient",
+        "The learning rate controls the step size",
+        "Variants include batch, stochastic and mini-batch gradient descent",
+    ],
+    "What are decision trees and random forests?": [
+        "A decision tree splits data on feature thresholds to make predictions",
+        "Splits are chosen by measures like Gini impurity or information gain",
+        "A random forest is an ensemble of trees trained on bootstrap samples with random features",
+        "Random forests reduce overfitting by averaging or voting",
+    ],
+    "Describe k-means clustering.": [
+        "K-means partitions data into k clusters",
+        "Each point is assigned to the nearest centroid",
+        "Centroids are recomputed as the mean of their points until convergence",
+        "k must be chosen in advance, for example with the elbow method",
+    ],
+    "What is deep learning?": [
+        "Deep learning uses neural networks with many layers",
+        "It learns feature representations automatically from raw data",
+        "It needs large datasets and GPUs",
+        "It powers image recognition, speech and natural language processing",
+    ],
+    "Explain convolutional neural networks (CNNs).": [
+        "CNNs are neural networks designed for grid data such as images",
+        "Convolutional layers apply learned filters to detect local features",
+        "Pooling layers downsample feature maps",
+        "Fully connected layers at the end perform classification",
+    ],
+    "What is natural language processing?": [
+        "Natural language processing lets computers understand and generate human language",
+        "Tasks include tokenization, sentiment analysis, translation and named entity recognition",
+        "Modern NLP uses embeddings and transformer models",
+    ],
+    "Describe reinforcement learning.": [
+        "An agent learns by interacting with an environment",
+        "It takes actions in states and receives rewards",
+        "The goal is a policy that maximises cumulative reward",
+        "It balances exploration and exploitation, for example with Q-learning",
+    ],
+    "What is feature engineering?": [
+        "Feature engineering creates and transforms input variables to improve models",
+        "It includes scaling, encoding categorical variables and handling missing values",
+        "Feature selection removes irrelevant or redundant features",
+        "Domain knowledge guides which features to build",
+    ],
+    "Explain cross-validation.": [
+        "Cross-validation estimates how well a model generalises",
+        "In k-fold cross-validation data is split into k folds",
+        "Each fold is used once for validation while the rest train the model",
+        "Scores are averaged and used for model selection and detecting overfitting",
+    ],
+    "What are the differences between classification and regression?": [
+        "Classification predicts discrete categories or labels",
+        "Regression predicts continuous numeric values",
+        "Classification is measured with accuracy, precision and recall",
+        "Regression is measured with mean squared error or R squared",
+    ],
+
+    # HR
+    "Tell me about yourself.": [
+        "A short summary of education and background",
+        "Relevant skills and experience for the role",
+        "Key achievements or projects",
+        "Career goals and why this role fits",
+    ],
+    "What are your strengths?": [
+        "Names specific strengths relevant to the job",
+        "Backs each strength with a concrete example",
+        "Explains how the strengths help the team or company",
+    ],
+    "Why should we hire you?": [
+        "Matches skills and experience to the job requirements",
+        "Highlights unique value or achievements",
+        "Shows enthusiasm and cultural fit",
+    ],
+    "Describe a challenge you faced.": [
+        "Describes the situation and the challenge clearly",
+        "Explains the actions taken to address it",
+        "States the result and what was learned (STAR method)",
+    ],
+    "Where do you see yourself in 5 years?": [
+        "Realistic career growth goals",
+        "Goals aligned with the company and role",
+        "Commitment to learning and developing skills",
+    ],
+    "What are your weaknesses?": [
+        "An honest, genuine weakness",
+        "Steps being taken to improve it",
+        "Shows self-awareness without harming suitability for the role",
+    ],
+    "Tell me about a time you worked in a team.": [
+        "Describes the team, the project and their own role",
+        "Explains collaboration and communication with teammates",
+        "Mentions handling disagreements or challenges",
+        "States the outcome and the contribution made",
+    ],
+    "Why do you want to work here?": [
+        "Shows research about the company, its products and values",
+        "Connects personal goals and interests to the company",
+        "Explains what they can contribute",
+    ],
+    "What motivates you?": [
+        "Names genuine motivators such as learning, solving problems or impact",
+        "Gives an example of motivation in action",
+        "Relates the motivation to the role",
+    ],
+    "Describe your leadership experience.": [
+        "A specific example of leading a team or initiative",
+        "Actions taken to guide, motivate and delegate",
+        "The results achieved and lessons learned",
+    ],
+    "How do you handle pressure?": [
+        "Stays calm and prioritises tasks",
+        "Uses planning and time management",
+        "Gives an example of meeting a deadline under pressure",
+    ],
+    "What are your salary expectations?": [
+        "Gives a researched salary range based on the market and the role",
+        "Shows flexibility and openness to negotiation",
+        "Focuses on the overall opportunity and value",
+    ],
+    "Tell me about a project you're proud of.": [
+        "Describes the project goal and their role",
+        "Explains the technical or practical challenges solved",
+        "States measurable results or impact",
+        "Reflects on what was learned",
+    ],
+    "How do you stay updated with industry trends?": [
+        "Reads blogs, articles, newsletters or research papers",
+        "Takes online courses, attends conferences or meetups",
+        "Builds side projects and practises new technologies",
+    ],
+    "What questions do you have for us?": [
+        "Asks thoughtful questions about the role and team",
+        "Asks about company culture, growth and expectations",
+        "Shows genuine interest and preparation",
+    ],
+}
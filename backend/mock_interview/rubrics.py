@@ -0,0 +1,111 @@
+"""
+Reference rubrics for interview questions.
+
+When an interview starts, the whole question list is known, so
+prefetch() generates a reference rubric (ideal answer key points and what
+earns a high score) for every question that does not have one yet. The
+generation runs at PRIORITY_BACKGROUND on the LLM scheduler, so it only
+uses slots no chat turn or evaluation is waiting for.
+
+Rubrics are keyed by question text and model, kept in the
+interview_rubrics table (shared by every user and worker) with an LRU in
+front of it. evaluate_answer() looks one up and, when it is there, sends
+a short comparison prompt instead of asking the model to work out the
+ideal answer from scratch.
+"""
+
+import asyncio
+import logging
+import os
+from collections import OrderedDict
+
+from backend.async_db_service import get_rubric, save_rubric
+from backend.llm_client import PRIORITY_BACKGROUND, call_llm_once, model_for
+from backend.mock_interview.questions import QUESTION_KEY_POINTS
+
+INTERVIEW_RUBRIC_PREFETCH = os.getenv("INTERVIEW_RUBRIC_PREFETCH", "1") == "1"
+RUBRIC_CACHE_MAX_ENTRIES = int(os.getenv("RUBRIC_CACHE_MAX_ENTRIES", "1000"))
+MIN_RUBRIC_CHARS = 40   # anything shorter is a failed generation, not a rubric
+
+logger = logging.getLogger(__name__)
+
+
+def rubric_prompt(question: str) -> str:
+    key_points = QUESTION_KEY_POINTS.get(question)
+    hints = ""
+    if key_points:
+        hints = "\nMake sure these points are covered:\n" + "\n".join(f"- {p}" for p in key_points) + "\n"
+    return f"""
+You are preparing a grading rubric for a technical or behavioral interview question.
+
+Question:
+{question}
+{hints}
+Write:
+- Ideal answer: 3-6 short bullet points a strong candidate would mention.
+- Scoring: what earns 9-10, 6-8 and below 6.
+
+Be concise. Do not address the candidate.
+"""
+
+
+class RubricCache:
+    def __init__(self, model: str = None, max_entries: int = RUBRIC_CACHE_MAX_ENTRIES):
+        self.model = model or model_for("rubric")
+        self.max_entries = max_entries
+        self._memory = OrderedDict()   # question -> rubric
+        self._inflight = {}            # question -> generation task
+
+    def _remember(self, question: str, rubric: str):
+        self._memory[question] = rubric
+        self._memory.move_to_end(question)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    async def get(self, question: str):
+        """The cached rubric for a question, or None. Never generates one."""
+        question = question.strip()
+        rubric = self._memory.get(question)
+        if rubric is None:
+            rubric = await get_rubric(question, self.model)
+            if rubric is None:
+                return None
+        self._remember(question, rubric)
+        return rubric
+
+    def prefetch(self, questions) -> list:
+        """
+        Start background generation for every question without a rubric.
+        Returns the started tasks; questions already cached or in flight
+        (for any user) are skipped.
+        """
+        if not INTERVIEW_RUBRIC_PREFETCH:
+            return []
+        started = []
+        for question in dict.fromkeys(q.strip() for q in questions):
+            if question in self._memory or question in self._inflight:
+                continue
+            task = asyncio.create_task(self._generate(question))
+            self._inflight[question] = task
+            task.add_done_callback(lambda t, q=question: self._inflight.pop(q, None))
+            started.append(task)
+        return started
+
+    async def _generate(self, question: str):
+        if await self.get(question) is not None:
+            return
+        try:
+            rubric = (await call_llm_once(rubric_prompt(question), PRIORITY_BACKGROUND, "rubric")).strip()
+        except Exception as e:
+            logger.warning("Rubric generation failed for %r: %s", question[:60], e)
+            return
+        if len(rubric) < MIN_RUBRIC_CHARS:
+            return
+        await save_rubric(question, self.model, rubric)
+        self._remember(question, rubric)
+
+    def pending(self) -> int:
+        return len(self._inflight)
+
+
+rubric_cache = RubricCache()
@@ -0,0 +1,179 @@
+"""
+Local answer scoring against reference key points.
+
+Every question in questions.py has a few reference key points
+(QUESTION_KEY_POINTS). They are embedded once - at startup, or ahead of
+time with `python -m backend.mock_interview.scorer` - and cached in
+INTERVIEW_KEY_POINTS_CACHE, keyed by a fingerprint of the model name and
+the key point texts, so editing questions.py just rebuilds it.
+
+Scoring an answer embeds the answer and its sentences (one encode call)
+and takes, for each key point, the best cosine similarity. Similarities
+are mapped linearly from [SCORE_FLOOR, SCORE_CEILING] to [0, 1]; the
+answer scores 10 x their mean. A key point counts as covered at
+INTERVIEW_KEY_POINT_THRESHOLD and the answer is correct at
+INTERVIEW_PASS_SCORE. Once warm this takes milliseconds, so it runs inline
+on every answer; until the app's warm-up has loaded the model, answers are
+scored in the background (pipeline.py). The LLM evaluation is only needed
+for detailed feedback.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+
+import numpy as np
+
+from backend.mock_interview.questions import QUESTION_KEY_POINTS
+from backend.rag.embedding_server import EMBEDDING_MODEL
+from backend.rag.vector_store import encoder_loaded, get_encoder
+
+INTERVIEW_KEY_POINTS_CACHE = os.getenv("INTERVIEW_KEY_POINTS_CACHE", "backend/mock_interview/key_points.npz")
+INTERVIEW_KEY_POINT_THRESHOLD = float(os.getenv("INTERVIEW_KEY_POINT_THRESHOLD", "0.5"))
+INTERVIEW_PASS_SCORE = float(os.getenv("INTERVIEW_PASS_SCORE", "6"))
+SCORE_FLOOR = 0.2     # similarity of an unrelated answer
+SCORE_CEILING = 0.6   # similarity of an answer that clearly makes the point
+
+logger = logging.getLogger(__name__)
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?;])\s+|\n+")
+
+
+class ReferenceEmbeddings:
+    """Normalized key point vectors for every question, built once."""
+
+    def __init__(self, key_points: dict = QUESTION_KEY_POINTS, cache_path: str = INTERVIEW_KEY_POINTS_CACHE,
+                 encoder=None):
+        self.key_points = key_points
+        self.cache_path = cache_path
+        self._encoder = encoder
+        self._lock = threading.Lock()
+        self._rows = None      # question -> (start, end) rows in _matrix
+        self._matrix = None
+
+    @property
+    def encoder(self):
+        return self._encoder or get_encoder()
+
+    @property
+    def ready(self) -> bool:
+        """Key points and encoder loaded: scoring an answer takes milliseconds, not a model load."""
+        return self._matrix is not None and (self._encoder is not None or encoder_loaded())
+
+    def warm_up(self):
+        """Load the key points and the encoder (a cached matrix alone leaves the encoder cold)."""
+        self.load()
+        return self.encoder
+
+    def fingerprint(self) -> str:
+        payload = json.dumps([EMBEDDING_MODEL, sorted(self.key_points.items())])
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def load(self):
+        """Build (or read from cache) the key point matrix; safe to call repeatedly."""
+        with self._lock:
+            if self._matrix is not None:
+                return
+            rows, texts = {}, []
+            for question, points in self.key_points.items():
+                rows[question] = (len(texts), len(texts) + len(points))
+                texts.extend(points)
+
+            matrix = self._read_cache(len(texts))
+            if matrix is None:
+                matrix = _normalize(self.encoder.encode(texts))
+                self._write_cache(matrix)
+            self._rows, self._matrix = rows, matrix
+
+    def _read_cache(self, count: int):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return None
+        try:
+            with np.load(self.cache_path) as cached:
+                if str(cached["fingerprint"]) == self.fingerprint() and len(cached["vectors"]) == count:
+                    return cached["vectors"]
+        except (OSError, KeyError, ValueError) as e:
+            logger.warning("Ignoring key point cache %s: %s", self.cache_path, e)
+        return None
+
+    def _write_cache(self, matrix):
+        if not self.cache_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+            tmp = f"{self.cache_path}.{os.getpid()}.tmp.npz"
+            np.savez(tmp, vectors=matrix, fingerprint=np.array(self.fingerprint()))
+            os.replace(tmp, self.cache_path)
+        except OSError as e:
+            logger.warning("Could not write key point cache %s: %s", self.cache_path, e)
+
+    def for_question(self, question: str):
+        """(key points, vectors) for a question, or None if it has no reference."""
+        self.load()
+        span = self._rows.get(question)
+        if span is None:
+            return None
+        return self.key_points[question], self._matrix[span[0]:span[1]]
+
+
+def _normalize(vectors) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _answer_chunks(answer: str) -> list:
+    sentences = [s.strip() for s in _SENTENCE_SPLIT.split(answer) if len(s.strip()) > 2]
+    return [answer.strip()] + (sentences if len(sentences) > 1 else [])
+
+
+reference_embeddings = ReferenceEmbeddings()
+
+
+def score_answer(question: str, answer: str, references: ReferenceEmbeddings = None):
+    """
+    Score an answer against the question's key points. Returns a dict
+    (score 0-10, is_correct, covered, missed) or None for a question
+    without reference key points.
+    """
+    references = references or reference_embeddings
+    reference = references.for_question(question)
+    if reference is None:
+        return None
+    points, vectors = reference
+
+    chunks = _answer_chunks(answer) if answer and answer.strip() else []
+    if chunks:
+        similarity = (vectors @ _normalize(references.encoder.encode(chunks)).T).max(axis=1)
+    else:
+        similarity = np.zeros(len(points), dtype=np.float32)
+
+    coverage = np.clip((similarity - SCORE_FLOOR) / (SCORE_CEILING - SCORE_FLOOR), 0.0, 1.0)
+    score = round(float(coverage.mean()) * 10, 1)
+    covered = similarity >= INTERVIEW_KEY_POINT_THRESHOLD
+    return {
+        "score": score,
+        "is_correct": score >= INTERVIEW_PASS_SCORE,
+        "covered": [p for p, hit in zip(points, covered) if hit],
+        "missed": [p for p, hit in zip(points, covered) if not hit],
+    }
+
+
+def format_score(result: dict) -> str:
+    """Short feedback built from a local score, used when LLM feedback is off."""
+    lines = [f"Score: {result['score']}/10"]
+    if result["covered"]:
+        lines.append("Covered: " + "; ".join(result["covered"]))
+    if result["missed"]:
+        lines.append("Missing: " + "; ".join(result["missed"]))
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    # Build the cache ahead of time (e.g. in a Docker build step)
+    logging.basicConfig(level=logging.INFO)
+    reference_embeddings.load()
+    print(f"{sum(map(len, QUESTION_KEY_POINTS.values()))} key points -> {INTERVIEW_KEY_POINTS_CACHE}")
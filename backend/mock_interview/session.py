@@ -1,16 +1,17 @@
 
-from backend.db_service import save_interview
+from backend.async_db_service import run_in_db_thread, save_interview
+from backend.mock_interview.session_store import SessionRecord, create_session_store
 
 async def end_interview(session_id: str, user_id: int):
     """End interview and save results"""
-    session = get_session(session_id)
+    session = await get_session(session_id)
     
     score = calculate_score(session)
     correct = count_correct_answers(session)
-    total = len(session.questions)
+    total = len(session.answers) or len(session.questions)
     
     # SAVE TO DATABASE
-    save_interview(user_id, session.domain, score, correct, total)
+    await save_interview(user_id, session.domain, score, correct, total)
     
     return {
         "score": score,
@@ -19,75 +20,119 @@ async def end_interview(session_id: str, user_id: int):
         "feedback": generate_feedback(score)
     }
     
-_sessions = {}
+# Live sessions, keyed by str(user_id) (see session_store.py for backends and expiry).
+# Store calls run on the DB thread: the sqlite store does I/O and compare-and-swap retries.
+session_store = create_session_store()
 
-def start_session(user_id: str, domain: str, questions: list):
+async def start_session(user_id: str, domain: str, questions: list):
     """Initializes a new interview session safely."""
     if not questions:
         return None
-        
-    _sessions[user_id] = {
-        "domain": domain,
-        "questions": questions,
-        "current_index": 0,
-        "current_question": questions[0],
-        "is_active": True
-    }
+
+    await run_in_db_thread(session_store.put, SessionRecord(user_id=str(user_id), domain=domain, questions=list(questions)))
     return questions[0]
 
-def is_session_active(user_id: str) -> bool:
+async def is_session_active(user_id: str) -> bool:
     """Helper to check if the user is currently in an interview."""
-    return user_id in _sessions and _sessions[user_id].get("is_active", False)
+    session = await run_in_db_thread(session_store.get, user_id)
+    return session is not None and session.is_active
 
-def get_current_question(user_id: str):
+async def get_current_question(user_id: str):
     """Returns the current question without moving the index."""
-    session = _sessions.get(user_id)
+    session = await run_in_db_thread(session_store.get, user_id)
     if not session:
         return None
-    return session.get("current_question")
+    return session.current_question
+
+def _advance(session: SessionRecord):
+    session.current_index += 1
+    # Check if we reached the end of the list
+    if session.current_index >= len(session.questions):
+        session.is_active = False
 
-def advance_question(user_id: str):
+async def advance_question(user_id: str):
     """Moves to the next question and returns it, or returns None if finished."""
-    session = _sessions.get(user_id)
+    session = await run_in_db_thread(session_store.update, user_id, _advance)
     if not session:
         return None
+    return session.current_question
 
-    session["current_index"] += 1
+async def submit_answer(user_id: str, answer: str):
+    """
+    Records the answer to the current question and moves on, in one atomic
+    step. Returns (answer_index, question, next_question) or None when no
+    interview is running; next_question is None after the last one.
+    """
+    submitted = {}
 
-    # Check if we reached the end of the list
-    if session["current_index"] >= len(session["questions"]):
-        session["is_active"] = False
+    def record(session: SessionRecord):
+        submitted["index"] = len(session.answers)
+        submitted["question"] = session.current_question
+        session.answers.append({
+            "question": session.current_question,
+            "answer": answer,
+            "status": "pending",
+            "feedback": None
+        })
+        _advance(session)
+
+    session = await run_in_db_thread(session_store.update, user_id, record)
+    if not session:
         return None
+    return submitted["index"], submitted["question"], session.current_question
+
+async def set_answer_feedback(user_id: str, index: int, feedback: str, status: str = "done"):
+    """Stores the evaluation of one answer; False if the interview is gone."""
+    def store(session: SessionRecord):
+        if index < len(session.answers):
+            session.answers[index].update(feedback=feedback, status=status)
+
+    return await run_in_db_thread(session_store.update, user_id, store) is not None
+
+async def set_answer_score(user_id: str, index: int, result: dict, feedback: str = None):
+    """
+    Stores the local score of one answer (scorer.score_answer). With
+    feedback, the answer is also marked evaluated.
+    """
+    def store(session: SessionRecord):
+        if index < len(session.answers):
+            session.answers[index].update(result)
+            if feedback is not None:
+                session.answers[index].update(feedback=feedback, status="done")
+
+    return await run_in_db_thread(session_store.update, user_id, store) is not None
 
-    next_q = session["questions"][session["current_index"]]
-    session["current_question"] = next_q
-    return next_q
+async def get_answers(user_id: str) -> list:
+    """Answers so far with their evaluation status ("pending" / "done" / "failed")."""
+    session = await run_in_db_thread(session_store.get, user_id)
+    return list(session.answers) if session else []
 
-def clear_session(user_id: str):
+async def clear_session(user_id: str):
     """Cleanly deletes the session data."""
-    if user_id in _sessions:
-        del _sessions[user_id]
+    await run_in_db_thread(session_store.delete, user_id)
 
-def get_session(session_id: str):
+async def get_session(session_id: str) -> SessionRecord:
     """Retrieve a session by ID."""
-    session = _sessions.get(session_id)
+    session = await run_in_db_thread(session_store.get, session_id)
     if not session:
         raise ValueError(f"Session {session_id} not found")
     return session
 
-def count_correct_answers(session: dict) -> int:
+def count_correct_answers(session: SessionRecord) -> int:
     """Count the number of correct answers in a session."""
-    if "answers" not in session:
-        return 0
     correct_count = 0
-    for answer in session.get("answers", []):
+    for answer in session.answers:
         if answer.get("is_correct", False):
             correct_count += 1
     return correct_count
 
-def calculate_score(session: dict) -> float:
+def calculate_score(session: SessionRecord) -> float:
     """Calculate interview score as a percentage."""
-    total_questions = len(session.get("questions", []))
+    scored = [a["score"] for a in session.answers if a.get("score") is not None]
+    if scored:
+        # Mean local score (0-10) of the answered questions
+        return round(sum(scored) / len(scored) * 10, 2)
+    total_questions = len(session.questions)
     if total_questions == 0:
         return 0.0
     correct_answers = count_correct_answers(session)
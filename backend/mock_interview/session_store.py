@@ -0,0 +1,261 @@
+"""
+Storage for live mock interview sessions.
+
+A session lives for SESSION_TTL_SECONDS after its last update, so
+abandoned interviews are dropped instead of accumulating forever, and at
+most SESSION_MAX_ENTRIES sessions are kept (least recently updated go
+first). Keys are always str(user_id), whether callers pass an int or a str.
+Other per-user state (chat memory, backend/agents/memory.py) uses its own
+store: a record_type with to_dict/from_dict, user_id and version like
+SessionRecord, and for sqlite its own table shaped like
+interview_session_state.
+
+SESSION_STORE selects the backend:
+    memory  (default) per-process OrderedDict
+    sqlite  interview_session_state table in DATABASE_URL; sessions
+            survive restarts and are shared by every uvicorn worker
+"""
+
+import os
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, field, asdict
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from backend.models import InterviewSessionState
+
+SESSION_STORE = os.getenv("SESSION_STORE", "memory")
+SESSION_TTL_SECONDS = float(os.getenv("SESSION_TTL_SECONDS", "3600"))
+SESSION_MAX_ENTRIES = int(os.getenv("SESSION_MAX_ENTRIES", "10000"))
+# Backoff between compare-and-swap retries: doubles from the base, jittered, capped
+SESSION_CAS_BACKOFF_SECONDS = 0.002
+SESSION_CAS_BACKOFF_MAX_SECONDS = 0.1
+
+
+@dataclass(slots=True)
+class SessionRecord:
+    user_id: str
+    domain: str
+    questions: list
+    current_index: int = 0
+    is_active: bool = True
+    answers: list = field(default_factory=list)
+    version: int = 0   # bumped by every update(); SqliteSessionStore uses it for compare-and-swap
+
+    @property
+    def current_question(self):
+        if self.current_index < len(self.questions):
+            return self.questions[self.current_index]
+        return None
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SessionRecord":
+        return cls(**data)
+
+
+def session_key(user_id) -> str:
+    return str(user_id)
+
+
+class SessionStore(ABC):
+    """get/put/delete by user id; implementations handle expiry and size limits."""
+
+    def __init__(self, ttl: float = SESSION_TTL_SECONDS, max_entries: int = SESSION_MAX_ENTRIES,
+                 clock=time.time, record_type=SessionRecord):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self.record_type = record_type
+
+    @abstractmethod
+    def get(self, user_id) -> SessionRecord | None:
+        ...
+
+    @abstractmethod
+    def put(self, record: SessionRecord):
+        ...
+
+    @abstractmethod
+    def update(self, user_id, mutate) -> SessionRecord | None:
+        """
+        Atomically apply mutate(record) to the live session and save it.
+        Concurrent updates (background evaluations, another worker) are
+        never lost. Returns the updated record, or None if there is none.
+        """
+
+    @abstractmethod
+    def delete(self, user_id):
+        ...
+
+    @abstractmethod
+    def purge_expired(self) -> int:
+        ...
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+
+class InMemorySessionStore(SessionStore):
+    """Ordered by last update, so expired and least recently used entries sit at the front."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, record)
+
+    def get(self, user_id):
+        key = session_key(user_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= self.clock():
+                del self._entries[key]
+                return None
+            return entry[1]
+
+    def put(self, record):
+        record.user_id = session_key(record.user_id)
+        with self._lock:
+            self._entries.pop(record.user_id, None)
+            self._entries[record.user_id] = (self.clock() + self.ttl, record)
+            self._purge_locked()
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def update(self, user_id, mutate):
+        key = session_key(user_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= self.clock():
+                return None
+            record = entry[1]
+            mutate(record)
+            record.version += 1
+            self._entries.move_to_end(key)
+            self._entries[key] = (self.clock() + self.ttl, record)
+            return record
+
+    def delete(self, user_id):
+        with self._lock:
+            self._entries.pop(session_key(user_id), None)
+
+    def _purge_locked(self) -> int:
+        now = self.clock()
+        purged = 0
+        while self._entries:
+            expires_at, _ = next(iter(self._entries.values()))
+            if expires_at > now:
+                break
+            self._entries.popitem(last=False)
+            purged += 1
+        return purged
+
+    def purge_expired(self):
+        with self._lock:
+            return self._purge_locked()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+class SqliteSessionStore(SessionStore):
+    """One row per live session; expiry and the size cap are enforced every purge_every writes."""
+
+    def __init__(self, db_engine=None, purge_every: int = 100, table=InterviewSessionState, **kwargs):
+        super().__init__(**kwargs)
+        if db_engine is None:
+            from backend.models import engine as db_engine
+        self.engine = db_engine
+        self.purge_every = purge_every
+        self.table = table
+        self._writes = 0
+        table.__table__.create(self.engine, checkfirst=True)
+
+    def get(self, user_id):
+        with self.engine.connect() as conn:
+            row = conn.execute(
+                select(self.table.state).where(
+                    self.table.user_id == session_key(user_id),
+                    self.table.expires_at > self.clock()
+                )
+            ).first()
+        return self.record_type.from_dict(row.state) if row else None
+
+    def put(self, record):
+        record.user_id = session_key(record.user_id)
+        expires_at = self.clock() + self.ttl
+        upsert = sqlite_insert(self.table).values(
+            user_id=record.user_id, state=record.to_dict(), expires_at=expires_at
+        )
+        with self.engine.begin() as conn:
+            conn.execute(upsert.on_conflict_do_update(
+                index_elements=[self.table.user_id],
+                set_={"state": upsert.excluded.state, "expires_at": expires_at}
+            ))
+        self._writes += 1
+        if self._writes % self.purge_every == 0:
+            self.purge_expired()
+
+    def update(self, user_id, mutate, retries: int = 20):
+        # Blocking (I/O and backoff sleeps): call it on the DB thread, see session.py
+        table = self.table
+        for attempt in range(retries):
+            if attempt:
+                # Another worker won the race: back off so the writers stop colliding
+                delay = min(SESSION_CAS_BACKOFF_SECONDS * 2 ** attempt, SESSION_CAS_BACKOFF_MAX_SECONDS)
+                time.sleep(random.uniform(0, delay))
+            record = self.get(user_id)
+            if record is None:
+                return None
+            seen = record.version
+            mutate(record)
+            record.version = seen + 1
+            with self.engine.begin() as conn:
+                updated = conn.execute(
+                    update(table)
+                    .where(table.user_id == record.user_id,
+                           func.coalesce(func.json_extract(table.state, "$.version"), 0) == seen)
+                    .values(state=record.to_dict(), expires_at=self.clock() + self.ttl)
+                ).rowcount
+            if updated:
+                return record
+        raise RuntimeError(f"Session {user_id} is being updated too often to apply a change")
+
+    def delete(self, user_id):
+        with self.engine.begin() as conn:
+            conn.execute(delete(self.table).where(self.table.user_id == session_key(user_id)))
+
+    def purge_expired(self):
+        table = self.table
+        with self.engine.begin() as conn:
+            purged = conn.execute(delete(table).where(table.expires_at <= self.clock())).rowcount
+            # Over the cap: drop the sessions closest to expiring (least recently updated)
+            keep = select(table.user_id).order_by(table.expires_at.desc()).limit(self.max_entries)
+            purged += conn.execute(delete(table).where(table.user_id.not_in(keep))).rowcount
+        return purged
+
+    def __len__(self):
+        with self.engine.connect() as conn:
+            return conn.execute(
+                select(func.count()).select_from(self.table)
+                .where(self.table.expires_at > self.clock())
+            ).scalar()
+
+
+def create_session_store(kind: str = SESSION_STORE, **kwargs) -> SessionStore:
+    if kind == "memory":
+        return InMemorySessionStore(**kwargs)
+    if kind == "sqlite":
+        return SqliteSessionStore(**kwargs)
+    raise ValueError(f"Unknown SESSION_STORE {kind!r} (expected 'memory' or 'sqlite')")
@@ -1,11 +1,93 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, JSON
+from sqlalchemy import create_engine, event, text, Index, Column, Integer, String, Float, Date, DateTime, JSON, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 from datetime import datetime
+import logging
+import os
+import zlib
 
-DATABASE_URL = "sqlite:///./unigenai.db"
+logger = logging.getLogger(__name__)
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./unigenai.db")
+
+# SQLITE TUNING
+# Applied to every new connection. Override any value from the environment.
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),       # readers don't block the writer
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),      # safe with WAL, no fsync per commit
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", "-65536")),   # negative = KiB, i.e. 64 MiB
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "temp_store": os.getenv("SQLITE_TEMP_STORE", "MEMORY"),
+}
+
+# SQLite allows one writer at a time, so a small pool is enough: one
+# connection for the DB thread plus a few for concurrent readers.
+SQLITE_POOL_SIZE = int(os.getenv("SQLITE_POOL_SIZE", "5"))
+SQLITE_POOL_MAX_OVERFLOW = int(os.getenv("SQLITE_POOL_MAX_OVERFLOW", "5"))
+SQLITE_POOL_TIMEOUT = float(os.getenv("SQLITE_POOL_TIMEOUT", "30"))
+
+
+# COMPRESSED TEXT
+# Old, large chat responses are stored zlib-compressed (see backend/chat_storage.py).
+def compress_text(value: str) -> bytes:
+    return zlib.compress(value.encode("utf-8"), 6)
+
+
+def decompress_text(blob: bytes | None) -> str | None:
+    return zlib.decompress(blob).decode("utf-8") if blob is not None else None
+
+
+def create_db_engine(url: str = DATABASE_URL, pragmas: dict = SQLITE_PRAGMAS):
+    """Build the SQLAlchemy engine, applying the SQLite profile when relevant."""
+    if not url.startswith("sqlite"):
+        return create_engine(url, pool_pre_ping=True)
+
+    connect_args = {"check_same_thread": False}
+    if "busy_timeout" in pragmas:
+        connect_args["timeout"] = pragmas["busy_timeout"] / 1000
+
+    if url in ("sqlite://", "sqlite:///:memory:"):
+        # A private in-memory DB only exists on its one connection
+        db_engine = create_engine(url, connect_args=connect_args, poolclass=StaticPool)
+    else:
+        db_engine = create_engine(
+            url,
+            connect_args=connect_args,
+            pool_size=SQLITE_POOL_SIZE,
+            max_overflow=SQLITE_POOL_MAX_OVERFLOW,
+            pool_timeout=SQLITE_POOL_TIMEOUT
+        )
+
+    @event.listens_for(db_engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+        # Lets SQL (the search index triggers and view) read compressed responses
+        dbapi_connection.create_function("unzip_text", 1, decompress_text, deterministic=True)
+
+    return db_engine
+
+
+def check_database_settings(db_engine=None) -> dict:
+    """Startup self-check: read back and log the settings actually in effect."""
+    db_engine = db_engine or engine
+    settings = {"url": db_engine.url.render_as_string(hide_password=True)}
+    if db_engine.dialect.name == "sqlite":
+        with db_engine.connect() as conn:
+            for name in ("journal_mode", "synchronous", "busy_timeout", "cache_size", "mmap_size", "temp_store"):
+                settings[name] = conn.execute(text(f"PRAGMA {name}")).scalar()
+        settings["pool"] = db_engine.pool.status()
+        if str(settings["journal_mode"]).lower() != str(SQLITE_PRAGMAS["journal_mode"]).lower():
+            logger.warning("SQLite journal_mode is %s, expected %s", settings["journal_mode"], SQLITE_PRAGMAS["journal_mode"])
+    logger.info("Database settings: %s", settings)
+    return settings
+
+
+engine = create_db_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -13,6 +95,9 @@ Base = declarative_base()
 # USER TABLE
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_created", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     username = Column(String, unique=True, index=True)
@@ -22,6 +107,10 @@ class User(Base):
 # INTERVIEW HISTORY
 class InterviewSession(Base):
     __tablename__ = "interview_sessions"
+    __table_args__ = (
+        Index("ix_interview_sessions_user_created", "user_id", "created_at"),
+        Index("ix_interview_sessions_user_domain_created", "user_id", "domain", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, index=True)
@@ -32,9 +121,54 @@ class InterviewSession(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
+# INTERVIEW STATS (running aggregate per user and domain, kept by save_interview)
+class InterviewStat(Base):
+    __tablename__ = "interview_stats"
+
+    user_id = Column(Integer, primary_key=True)
+    domain = Column(String, primary_key=True)
+    session_count = Column(Integer, default=0)
+    score_sum = Column(Float, default=0.0)
+    first_score = Column(Float)
+    first_at = Column(DateTime)
+    last_score = Column(Float)
+    last_at = Column(DateTime)
+
+
+# LIVE MOCK INTERVIEWS (SqliteSessionStore in backend/mock_interview/session_store.py)
+class InterviewSessionState(Base):
+    __tablename__ = "interview_session_state"
+
+    user_id = Column(String, primary_key=True)
+    state = Column(JSON)
+    expires_at = Column(Float, index=True)  # epoch seconds
+
+
+# CHAT MEMORY (same store, see backend/agents/memory.py)
+class ChatMemoryState(Base):
+    __tablename__ = "chat_memory_state"
+
+    user_id = Column(String, primary_key=True)
+    state = Column(JSON)
+    expires_at = Column(Float, index=True)  # epoch seconds
+
+
+# REFERENCE RUBRICS (generated once per question and model, shared by every user)
+class InterviewRubric(Base):
+    __tablename__ = "interview_rubrics"
+
+    question = Column(String, primary_key=True)
+    model = Column(String, primary_key=True)
+    rubric = Column(String)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
 # STUDY PLANNER
 class StudyPlan(Base):
     __tablename__ = "study_plans"
+    __table_args__ = (
+        Index("ix_study_plans_user_created", "user_id", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, index=True)
@@ -45,17 +179,85 @@ class StudyPlan(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
+class StudyPlanSchedule(Base):
+    """Generated schedule of a study plan; its days are in study_plan_days"""
+    __tablename__ = "study_plan_schedules"
+
+    plan_id = Column(Integer, primary_key=True)
+    hours_per_day = Column(Float)
+    rest_days = Column(JSON)            # weekdays off, Monday = 0
+    start = Column(Date)                # first planned day
+    replanned_from = Column(Date)       # days before this are from earlier runs
+    missed_days = Column(JSON)
+    summary = Column(JSON)              # of the days from replanned_from on
+    unscheduled = Column(JSON)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+
+class StudyPlanDay(Base):
+    __tablename__ = "study_plan_days"
+
+    plan_id = Column(Integer, primary_key=True)
+    day = Column(Date, primary_key=True)
+    hours = Column(Float)
+    slots = Column(JSON)                # [{"subject", "topic", "hours", "kind"}]
+
+
 # CHAT HISTORY
 class ChatHistory(Base):
     __tablename__ = "chat_history"
+    __table_args__ = (
+        Index("ix_chat_history_user_created", "user_id", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, index=True)
     role = Column(String)  # academic, content, code, general
     message = Column(String)
-    response = Column(String)
+    response = Column(String)        # NULL once compressed into response_z
+    response_z = Column(LargeBinary)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    @property
+    def response_text(self):
+        return self.response if self.response is not None else decompress_text(self.response_z)
+
+
+# BATCH GENERATION JOBS (backend/jobs.py)
+class GenerationJob(Base):
+    __tablename__ = "generation_jobs"
+    __table_args__ = (
+        Index("ix_generation_jobs_user_created", "user_id", "created_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer)
+    agent = Column(String)
+    status = Column(String, index=True)  # queued, running, done, cancelled
+    callback_url = Column(String)
+    total = Column(Integer)
+    done = Column(Integer, default=0)
+    failed = Column(Integer, default=0)
+    tokens = Column(Integer, default=0)
+    worker = Column(String)              # worker holding the lease
+    lease_until = Column(Float)          # epoch seconds; after this any worker may take the job over
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+
+
+class GenerationJobItem(Base):
+    __tablename__ = "generation_job_items"
+
+    job_id = Column(Integer, primary_key=True)
+    position = Column(Integer, primary_key=True)
+    prompt = Column(String)
+    status = Column(String)              # queued, done, failed, cancelled
+    output = Column(String)
+    tokens = Column(Integer, default=0)
+    seconds = Column(Float)
+    error = Column(String)
+
 
-# Create tables
+# Create tables (schema changes to existing databases live in backend/migrations.py)
 Base.metadata.create_all(bind=engine)
\ No newline at end of file
@@ -0,0 +1,209 @@
+"""
+On-demand profiling of the next N requests (POST /api/admin/profile).
+
+profile_requests() arms a profile, waits until N requests to this worker
+have been served (or the timeout) and returns the aggregated result.
+Profiling is only on while at least one of those requests is in flight.
+
+- mode "sample": a thread samples the stacks of the event loop thread and
+  the DB thread every PROFILE_SAMPLE_INTERVAL_MS. Cheap enough to run on a
+  loaded worker. Returns functions by self/total samples and the hottest
+  stacks in collapsed form ("thread;outer;...;inner", as flamegraph.pl
+  reads them). Samples of an idle thread (waiting in select or on a queue)
+  are only counted.
+- mode "cprofile": cProfile on the event loop thread. Exact call counts,
+  but it slows the worker down noticeably while on.
+
+Both see everything the worker does while a profiled request is in
+flight, including requests that run concurrently with it. Admin requests
+and /metrics scrapes are never counted as profiled requests. One profile
+at a time per worker.
+"""
+
+import asyncio
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5"))
+PROFILE_TOP = int(os.getenv("PROFILE_TOP", "40"))
+PROFILE_MAX_DEPTH = 64
+PROFILE_SKIP_PREFIXES = ("/api/admin", "/metrics", "/ui")
+MODES = ("sample", "cprofile")
+
+# Innermost Python frames of a thread with nothing to do
+_IDLE_FRAMES = {("selectors.py", "select"), ("thread.py", "_worker"), ("threading.py", "wait"), ("queue.py", "get")}
+
+_session = None
+
+
+def _label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _stack(frame) -> tuple:
+    """Labels from the outermost frame to `frame`."""
+    labels = []
+    while frame is not None and len(labels) < PROFILE_MAX_DEPTH:
+        labels.append(_label(frame.f_code))
+        frame = frame.f_back
+    return tuple(reversed(labels))
+
+
+class ProfileSession:
+    def __init__(self, requests: int, mode: str = "sample", interval_ms: float = PROFILE_SAMPLE_INTERVAL_MS):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {', '.join(MODES)}")
+        self.requests = requests
+        self.mode = mode
+        self.interval = interval_ms / 1000
+        self.request_ids = []
+        self.claimed = 0
+        self.completed = 0
+        self.active = 0
+        self.done = asyncio.Event()
+        self.profiled_seconds = 0.0
+        self._since = None
+        self._profile = cProfile.Profile() if mode == "cprofile" else None
+        self._stacks = Counter()
+        self._samples = 0
+        self._idle = 0
+        self._threads = {}
+        self._sampling = threading.Event()
+        self._stopped = threading.Event()
+        self._sampler = None
+
+    def start(self):
+        """Call on the event loop thread."""
+        if self.mode == "sample":
+            self._threads = {threading.get_ident(): "loop"}
+            self._threads.update({t.ident: "db" for t in threading.enumerate() if t.name.startswith("unigenai-db")})
+            self._sampler = threading.Thread(target=self._sample_loop, name="unigenai-profiler", daemon=True)
+            self._sampler.start()
+
+    def stop(self):
+        self._pause()
+        self._stopped.set()
+        self._sampling.set()   # wake the sampler so it sees the stop
+        if self._sampler is not None:
+            self._sampler.join()
+
+    def claim(self, request_id: str) -> bool:
+        """Count a request as profiled, if any are left to profile."""
+        if self.claimed >= self.requests or self._stopped.is_set():
+            return False
+        self.claimed += 1
+        self.request_ids.append(request_id)
+        self.active += 1
+        if self.active == 1:
+            self._resume()
+        return True
+
+    def release(self):
+        self.active -= 1
+        self.completed += 1
+        if self.active == 0:
+            self._pause()
+        if self.completed >= self.requests:
+            self.done.set()
+
+    def _resume(self):
+        self._since = time.perf_counter()
+        if self._profile is not None:
+            self._profile.enable()
+        self._sampling.set()
+
+    def _pause(self):
+        if self._since is None:
+            return
+        self.profiled_seconds += time.perf_counter() - self._since
+        self._since = None
+        if self._profile is not None:
+            self._profile.disable()
+        self._sampling.clear()
+
+    def _sample_loop(self):
+        while True:
+            self._sampling.wait()
+            if self._stopped.is_set():
+                return
+            frames = sys._current_frames()
+            for ident, name in self._threads.items():
+                frame = frames.get(ident)
+                if frame is None:
+                    continue
+                if (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in _IDLE_FRAMES:
+                    self._idle += 1
+                    continue
+                self._stacks[(name,) + _stack(frame)] += 1
+            self._samples += 1
+            time.sleep(self.interval)
+
+    def result(self) -> dict:
+        data = {"mode": self.mode, "requests": self.requests, "completed": self.completed,
+                "complete": self.completed >= self.requests, "request_ids": self.request_ids,
+                "profiled_ms": round(self.profiled_seconds * 1000, 3)}
+        if self.mode == "cprofile":
+            data["functions"] = self._cprofile_functions()
+        else:
+            data.update(self._sample_summary())
+        return data
+
+    def _cprofile_functions(self) -> list:
+        try:
+            stats = pstats.Stats(self._profile).stats
+        except TypeError:
+            return []   # nothing was recorded
+        rows = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:PROFILE_TOP]
+        return [{"function": f"{func} ({os.path.basename(file)}:{line})", "calls": calls,
+                 "self_ms": round(tottime * 1000, 3), "total_ms": round(cumtime * 1000, 3)}
+                for (file, line, func), (_, calls, tottime, cumtime, _) in rows]
+
+    def _sample_summary(self) -> dict:
+        own, total = Counter(), Counter()
+        for stack, count in self._stacks.items():
+            own[stack[-1]] += count
+            for label in set(stack[1:]):
+                total[label] += count
+        functions = [{"function": label, "self": own[label], "total": count}
+                     for label, count in total.most_common(PROFILE_TOP)]
+        stacks = [{"stack": ";".join(stack), "count": count} for stack, count in self._stacks.most_common(PROFILE_TOP)]
+        return {"interval_ms": self.interval * 1000, "samples": self._samples, "idle_samples": self._idle,
+                "functions": functions, "stacks": stacks}
+
+
+def begin(request_id: str, path: str):
+    """Middleware hook at the start of a request: the session profiling it, or None."""
+    session = _session
+    if session is None or path.startswith(PROFILE_SKIP_PREFIXES):
+        return None
+    return session if session.claim(request_id) else None
+
+
+def end(session):
+    """Middleware hook once the response of a request returned by begin() has been sent."""
+    if session is not None:
+        session.release()
+
+
+async def profile_requests(requests: int, mode: str = "sample", timeout: float = 60,
+                           interval_ms: float = PROFILE_SAMPLE_INTERVAL_MS) -> dict:
+    """Profile the next `requests` requests and return the aggregated profile (partial on timeout)."""
+    global _session
+    if _session is not None:
+        raise RuntimeError("A profile is already running on this worker")
+    session = ProfileSession(requests, mode, interval_ms)
+    _session = session
+    session.start()
+    try:
+        await asyncio.wait_for(session.done.wait(), timeout)
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        _session = None
+        session.stop()
+    return session.result()
@@ -0,0 +1,159 @@
+"""
+Embedding worker process.
+
+Loads the SentenceTransformer once and serves encode requests from every
+web worker over multiprocessing.connection (pickled lists of texts in,
+float32 arrays out). Requests that arrive while the model is busy are
+encoded together in one batch.
+
+Run on its own:
+    EMBEDDING_AUTHKEY=<secret> python -m backend.rag.embedding_server --port 8765
+and point workers at it with EMBEDDING_SERVER=127.0.0.1:8765 and the same
+EMBEDDING_AUTHKEY (backend/serve.py does all of this, with a random key
+per launch).
+
+multiprocessing.connection unpickles whatever an authenticated peer
+sends, so the key is what stands between the port and code execution in
+this process. There is no default: the server refuses to start, and the
+client to connect, without one.
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+MAX_BATCH_TEXTS = 256
+
+
+def load_model():
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(EMBEDDING_MODEL)
+
+
+def authkey() -> bytes:
+    """EMBEDDING_AUTHKEY, read when used: backend/serve.py sets it after this module may be imported."""
+    key = os.getenv("EMBEDDING_AUTHKEY", "")
+    if not key:
+        raise RuntimeError("EMBEDDING_AUTHKEY is not set: the embedding server needs a secret shared "
+                           "with its clients (backend/serve.py generates one per launch)")
+    return key.encode()
+
+
+def parse_address(value: str):
+    """"host:port" for TCP, anything else is a Unix socket path."""
+    host, sep, port = value.rpartition(":")
+    if sep and port.isdigit():
+        return host or "127.0.0.1", int(port)
+    return value
+
+
+# SERVER
+def _encode_loop(model, requests: queue.Queue):
+    while True:
+        batch = [requests.get()]
+        size = len(batch[0][0])
+        while size < MAX_BATCH_TEXTS:
+            try:
+                batch.append(requests.get_nowait())
+            except queue.Empty:
+                break
+            size += len(batch[-1][0])
+        texts = [t for item_texts, _ in batch for t in item_texts]
+        try:
+            vectors = np.asarray(model.encode(texts), dtype=np.float32)
+        except Exception as e:
+            vectors = e
+        start = 0
+        for item_texts, reply in batch:
+            if isinstance(vectors, Exception):
+                reply.put(vectors)
+            else:
+                reply.put(vectors[start:start + len(item_texts)])
+            start += len(item_texts)
+
+
+def _handle(conn, requests: queue.Queue):
+    reply = queue.Queue(maxsize=1)
+    with conn:
+        while True:
+            try:
+                texts = conn.recv()
+            except (EOFError, OSError):
+                return
+            requests.put((list(texts), reply))
+            result = reply.get()
+            conn.send(result if not isinstance(result, Exception) else RuntimeError(str(result)))
+
+
+def serve(address, model=None):
+    key = authkey()   # before loading the model: refuse to listen without a key
+    model = model or load_model()
+    requests = queue.Queue()
+    threading.Thread(target=_encode_loop, args=(model, requests), daemon=True).start()
+    with Listener(address, authkey=key) as listener:
+        logger.info("Embedding server (%s) listening on %s", EMBEDDING_MODEL, listener.address)
+        while True:
+            try:
+                conn = listener.accept()
+            except Exception as e:  # bad authkey, aborted handshake
+                logger.warning("Rejected embedding client: %s", e)
+                continue
+            threading.Thread(target=_handle, args=(conn, requests), daemon=True).start()
+
+
+# CLIENT
+class RemoteEncoder:
+    """Drop-in for SentenceTransformer.encode; one connection per calling thread."""
+
+    def __init__(self, address, connect_timeout: float = 60.0):
+        self.address = parse_address(address) if isinstance(address, str) else address
+        self.connect_timeout = connect_timeout
+        self._authkey = authkey()
+        self._local = threading.local()
+
+    def _connect(self):
+        deadline = time.monotonic() + self.connect_timeout
+        while True:
+            try:
+                return Client(self.address, authkey=self._authkey)
+            except (ConnectionRefusedError, FileNotFoundError):
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.2)  # server still loading the model
+
+    def encode(self, texts, **kwargs):
+        for attempt in (1, 2):
+            conn = getattr(self._local, "conn", None)
+            if conn is None:
+                conn = self._local.conn = self._connect()
+            try:
+                conn.send(list(texts))
+                result = conn.recv()
+                break
+            except (EOFError, OSError):
+                self._local.conn = None  # server restarted; reconnect once
+                if attempt == 2:
+                    raise
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--socket", help="Unix socket path instead of TCP")
+    args = parser.parse_args()
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
+    serve(args.socket or (args.host, args.port))
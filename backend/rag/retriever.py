@@ -1,5 +1,7 @@
+from backend import tracing
 from backend.rag.vector_store import search
 
+@tracing.traced()
 def retrieve_context(query: str) -> str:
     results = search(query)
     return "\n\n".join(results)
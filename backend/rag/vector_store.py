@@ -1,31 +1,159 @@
-from sentence_transformers import SentenceTransformer
+import json
+import os
+import threading
+import time
+
 import numpy as np
 
-model = SentenceTransformer("all-MiniLM-L6-v2")
+from backend import metrics
 
-# In-memory store (simple & fast)
-DOCUMENTS = []
-EMBEDDINGS = []
+try:
+    import fcntl
+except ImportError:  # Windows: single-process only
+    fcntl = None
 
+# EMBEDDING_SERVER=host:port routes encoding to the shared embedding worker
+# (backend/rag/embedding_server.py); otherwise the model loads in-process on first use.
+EMBEDDING_SERVER = os.getenv("EMBEDDING_SERVER")
+# RAG_INDEX_DIR keeps the index on disk, memory-mapped and shared by every worker
+RAG_INDEX_DIR = os.getenv("RAG_INDEX_DIR")
 
-def add_documents(texts):
-    embeddings = model.encode(texts)
+_encoder = None
+_encoder_lock = threading.Lock()
+
+
+def get_encoder():
+    global _encoder
+    with _encoder_lock:
+        if _encoder is None:
+            if EMBEDDING_SERVER:
+                from backend.rag.embedding_server import RemoteEncoder
+                _encoder = RemoteEncoder(EMBEDDING_SERVER)
+            else:
+                from backend.rag.embedding_server import load_model
+                _encoder = load_model()
+        return _encoder
+
+
+def encoder_loaded() -> bool:
+    """True once get_encoder() has loaded the model (so encoding won't stall on it)."""
+    return _encoder is not None
+
+
+class InMemoryIndex:
+    """Process-local store (simple & fast)."""
+
+    def __init__(self):
+        self.documents = []
+        self.embeddings = None
+        self._lock = threading.Lock()   # uploads are indexed off the event loop
+
+    def add(self, texts, embeddings):
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        with self._lock:
+            self.embeddings = embeddings if self.embeddings is None else np.vstack([self.embeddings, embeddings])
+            self.documents = self.documents + list(texts)
+
+    def snapshot(self):
+        with self._lock:
+            return self.documents, self.embeddings
+
+
+class MmapIndex:
+    """
+    Append-only on-disk store shared by several processes.
 
-    for text, emb in zip(texts, embeddings):
-        DOCUMENTS.append(text)
-        EMBEDDINGS.append(emb)
+    documents.jsonl  one JSON string per chunk
+    embeddings.f32   row-major float32 matrix, memory-mapped by readers
+    meta.json        committed row count / byte sizes, replaced atomically
+
+    Writers append under an exclusive file lock and publish by replacing
+    meta.json, so readers never see a half-written row: anything past the
+    committed sizes is ignored (and overwritten by the next writer).
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._docs_path = os.path.join(directory, "documents.jsonl")
+        self._vecs_path = os.path.join(directory, "embeddings.f32")
+        self._meta_path = os.path.join(directory, "meta.json")
+        self._lock_path = os.path.join(directory, "index.lock")
+        self._lock = threading.Lock()
+        self._meta = {"count": 0, "dim": 0, "doc_bytes": 0}
+        self.documents = []
+        self.embeddings = None
+
+    def _read_meta(self) -> dict:
+        try:
+            with open(self._meta_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"count": 0, "dim": 0, "doc_bytes": 0}
+
+    def _refresh(self):
+        """Map rows committed by any process since the last look (meta.json is a few bytes)."""
+        meta = self._read_meta()
+        if meta["count"] > self._meta["count"]:
+            with open(self._docs_path, "rb") as f:
+                f.seek(self._meta["doc_bytes"])
+                new = f.read(meta["doc_bytes"] - self._meta["doc_bytes"])
+            self.documents.extend(json.loads(line) for line in new.splitlines())
+            self.embeddings = np.memmap(self._vecs_path, dtype=np.float32, mode="r",
+                                        shape=(meta["count"], meta["dim"]))
+            self._meta = meta
+
+    def add(self, texts, embeddings):
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        payload = "".join(json.dumps(t) + "\n" for t in texts).encode("utf-8")
+        with self._lock, open(self._lock_path, "w") as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            meta = self._read_meta()
+            if meta["count"] and meta["dim"] != embeddings.shape[1]:
+                raise ValueError(f"Embedding size {embeddings.shape[1]} does not match index ({meta['dim']})")
+            for path, offset, data in ((self._docs_path, meta["doc_bytes"], payload),
+                                       (self._vecs_path, meta["count"] * meta["dim"] * 4, embeddings.tobytes())):
+                with open(path, "ab") as f:
+                    f.truncate(offset)  # drop leftovers of a writer that died before committing
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+            meta = {"count": meta["count"] + len(texts), "dim": embeddings.shape[1],
+                    "doc_bytes": meta["doc_bytes"] + len(payload)}
+            tmp = self._meta_path + f".{os.getpid()}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(meta, f)
+            os.replace(tmp, self._meta_path)
+
+    def snapshot(self):
+        with self._lock:
+            self._refresh()
+            return self.documents, self.embeddings
+
+
+_index = MmapIndex(RAG_INDEX_DIR) if RAG_INDEX_DIR else InMemoryIndex()
+metrics.RAG_DOCUMENTS.set_function(lambda: len(_index.snapshot()[0]))
+
+
+def add_documents(texts):
+    if not texts:
+        return
+    with metrics.RAG_EMBED_SECONDS.labels("documents").time():
+        embeddings = get_encoder().encode(texts)
+    _index.add(texts, embeddings)
 
 
 def search(query, top_k=5):
-    if not DOCUMENTS:
+    documents, embeddings = _index.snapshot()
+    if not documents:
         return []
 
-    query_emb = model.encode([query])[0]
-
-    scores = []
-    for idx, emb in enumerate(EMBEDDINGS):
-        score = np.dot(query_emb, emb)
-        scores.append((score, DOCUMENTS[idx]))
+    with metrics.RAG_EMBED_SECONDS.labels("query").time():
+        query_emb = np.asarray(get_encoder().encode([query])[0], dtype=np.float32)
 
-    scores.sort(reverse=True, key=lambda x: x[0])
-    return [doc for _, doc in scores[:top_k]]
+    start = time.perf_counter()
+    scores = embeddings[:len(documents)] @ query_emb
+    order = np.argsort(-scores, kind="stable")[:top_k]
+    metrics.RAG_SEARCH_SECONDS.observe(time.perf_counter() - start)
+    return [documents[i] for i in order]
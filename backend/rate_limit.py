@@ -0,0 +1,139 @@
+"""
+Per-user rate limiting with token buckets.
+
+Each policy (chat, upload, evaluation, ...) has its own bucket per key: the
+user_id query parameter when the request has one, the client IP
+otherwise. A bucket holds up to `burst` tokens and refills at
+`requests / seconds` tokens per second; a request takes one token or is
+rejected with 429 and a Retry-After header. The check runs in middleware
+on the method and path alone, before the body is read and before any DB
+or LLM work.
+
+Limits are read from the environment as "<requests>/<seconds>:<burst>",
+e.g. RATE_LIMIT_CHAT=20/60:5 (20 a minute, up to 5 back to back), or
+"off". ENDPOINT_POLICIES says which policy applies to which endpoint;
+endpoints not listed are not limited.
+
+Buckets live in one LRU table per policy, capped at RATE_LIMIT_MAX_KEYS
+keys. The least recently seen key goes first; once a key has been idle
+for burst / rate seconds its bucket is full again, so dropping it loses
+nothing. Under a flood of distinct keys, evicted keys start again with a
+full bucket.
+
+The user_id parameter is chosen by the client, so it only keeps honest
+clients apart: a client that sends a new user_id with every request gets
+a fresh bucket each time. Only the IP fallback is a bound the client
+cannot pick; for abusive clients, limit by IP in front of the app as
+well (reverse proxy).
+
+Buckets are per process: with N uvicorn workers a user can get up to N
+times the budget. The tables are only touched from the event loop
+thread, so they take no lock.
+"""
+
+import math
+import os
+import time
+from collections import OrderedDict
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") == "1"
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+
+DEFAULT_LIMITS = {
+    "chat": "20/60:5",           # chat turns (each one is an LLM generation)
+    "upload": "10/3600:3",       # note uploads (PDF parsing + embedding)
+    "evaluation": "6/60:2",      # batch answer evaluations
+    "jobs": "10/3600:3",         # batch generation jobs (up to JOBS_MAX_PROMPTS prompts each)
+}
+
+# (method, path) -> policy
+ENDPOINT_POLICIES = {
+    ("POST", "/chat"): "chat",
+    ("POST", "/upload-pdf"): "upload",
+    ("POST", "/api/interview/evaluate-batch"): "evaluation",
+    ("POST", "/api/jobs"): "jobs",
+}
+
+
+def parse_limit(spec: str):
+    """"<requests>/<seconds>:<burst>" -> (tokens per second, burst); None for "off"/"0"."""
+    spec = spec.strip().lower()
+    if spec in ("off", "0", ""):
+        return None
+    try:
+        rate, _, burst = spec.partition(":")
+        requests, _, seconds = rate.partition("/")
+        requests, seconds = float(requests), float(seconds or 1)
+        burst = float(burst) if burst else max(requests, 1.0)
+    except ValueError:
+        raise ValueError(f"Bad rate limit {spec!r}, expected <requests>/<seconds>:<burst>") from None
+    if requests <= 0 or seconds <= 0 or burst < 1:
+        raise ValueError(f"Bad rate limit {spec!r}: requests, seconds and burst must be positive")
+    return requests / seconds, burst
+
+
+class TokenBucketTable:
+    """Token buckets keyed by user or IP, at most max_keys of them."""
+
+    def __init__(self, rate: float, burst: float, max_keys: int = RATE_LIMIT_MAX_KEYS, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max(1, max_keys)
+        self.clock = clock
+        self._buckets = OrderedDict()   # key -> [tokens, last refill time], least recently used first
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def acquire(self, key, cost: float = 1) -> float:
+        """Take `cost` tokens. Returns 0 if allowed, else the seconds until it would be."""
+        now = self.clock()
+        cost = min(cost, self.burst)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [self.burst, now]
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+        if bucket[0] >= cost:
+            bucket[0] -= cost
+            return 0.0
+        return (cost - bucket[0]) / self.rate
+
+
+class RateLimiter:
+    def __init__(self, limits: dict = None, max_keys: int = RATE_LIMIT_MAX_KEYS, clock=time.monotonic):
+        if limits is None:
+            limits = {name: os.getenv(f"RATE_LIMIT_{name.upper()}", spec) for name, spec in DEFAULT_LIMITS.items()}
+        self.tables = {}
+        for name, spec in limits.items():
+            parsed = parse_limit(spec) if isinstance(spec, str) else spec
+            if parsed is not None:
+                self.tables[name] = TokenBucketTable(*parsed, max_keys=max_keys, clock=clock)
+
+    def check(self, policy: str, key, cost: float = 1) -> float:
+        """0 if the request may go ahead, else seconds to wait. Unknown or disabled policies always pass."""
+        table = self.tables.get(policy)
+        if table is None:
+            return 0.0
+        return table.acquire(key, cost)
+
+    def keys(self) -> int:
+        return sum(len(t) for t in self.tables.values())
+
+
+def request_key(user_id, client_host) -> str:
+    """The bucket key: the user for requests naming one, the client address otherwise."""
+    if user_id is not None and str(user_id).isdigit():
+        return f"user:{int(user_id)}"
+    return f"ip:{client_host or 'unknown'}"
+
+
+def retry_after_header(seconds: float) -> str:
+    return str(max(1, math.ceil(seconds)))
+
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,60 @@
+"""
+Multi-worker launcher.
+
+    python -m backend.serve --workers 4 --port 8000
+
+Runs N uvicorn workers that share all user-visible state:
+- interview sessions in SQLite (SESSION_STORE=sqlite)
+- the RAG index as memory-mapped files under RAG_INDEX_DIR
+- one embedding process holding the only copy of the model (EMBEDDING_SERVER),
+  authenticated with a random EMBEDDING_AUTHKEY generated per launch
+Migrations are applied once here, before the workers start.
+With --workers 1 it behaves like plain `uvicorn backend.app:app`.
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import secrets
+
+import uvicorn
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--embedding-port", type=int, default=8765)
+    parser.add_argument("--index-dir", default=os.getenv("RAG_INDEX_DIR", "backend/rag/index"))
+    args = parser.parse_args()
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
+
+    embedder = None
+    if args.workers > 1:
+        # Workers are fresh interpreters: everything they need goes through the environment
+        os.environ.setdefault("SESSION_STORE", "sqlite")
+        os.environ["RAG_INDEX_DIR"] = args.index_dir
+        if not os.getenv("EMBEDDING_SERVER"):
+            from backend.rag.embedding_server import serve
+            # A fresh secret per launch unless one is given: the embedder and the workers inherit it
+            os.environ.setdefault("EMBEDDING_AUTHKEY", secrets.token_hex(32))
+            address = ("127.0.0.1", args.embedding_port)
+            embedder = multiprocessing.Process(target=serve, args=(address,), name="unigenai-embedder",
+                                               daemon=True)
+            embedder.start()
+            os.environ["EMBEDDING_SERVER"] = f"{address[0]}:{address[1]}"
+
+        from backend.migrations import apply_migrations
+        apply_migrations()
+
+    try:
+        uvicorn.run("backend.app:app", host=args.host, port=args.port, workers=args.workers)
+    finally:
+        if embedder is not None:
+            embedder.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+"""
+Exam date and daily hours extraction for study plan requests.
+
+extract_plan_details() parses the message locally with regular
+expressions, in microseconds:
+
+    absolute dates   2026-12-05, 05/12/2026 (day first), Dec 5th, 5 December 2026
+    relative dates   today, tomorrow, in 3 weeks, two months from now, 10 days left,
+                     in 48 hours, next Friday, on the 15th, next week, the week after
+                     next, next month, end of the month
+    hours            4 hours a day, 2-3 hrs daily, 90 minutes per day, an hour and a half,
+                     20 hours a week (divided by 7)
+
+A weekday ("Friday", "this Friday", "next Friday") means its next
+occurrence after today, "the 15th" the next 15th. When the message
+mentions several dates, the one closest after "exam" / "test" / ... wins.
+
+extract_with_fallback() only asks the LLM when the parser finds neither
+value.
+"""
+
+import calendar
+import json
+import re
+from datetime import date, timedelta
+
+from backend.llm_client import call_llm_once
+
+MAX_HOURS_PER_DAY = 24
+
+_MONTHS = {
+    "jan": 1, "january": 1, "feb": 2, "february": 2, "mar": 3, "march": 3, "apr": 4, "april": 4,
+    "may": 5, "jun": 6, "june": 6, "jul": 7, "july": 7, "aug": 8, "august": 8,
+    "sep": 9, "sept": 9, "september": 9, "oct": 10, "october": 10, "nov": 11, "november": 11,
+    "dec": 12, "december": 12,
+}
+_WEEKDAYS = {name: i for i, name in enumerate(
+    ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"])}
+_NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+    "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "fifteen": 15, "twenty": 20,
+    "thirty": 30, "couple": 2, "couple of": 2, "few": 3, "a few": 3, "a couple of": 2, "half": 0.5,
+    "half an": 0.5, "half a": 0.5,
+}
+
+_MONTH = r"(" + "|".join(sorted(_MONTHS, key=len, reverse=True)) + r")\.?"
+_NUM = r"(\d+(?:\.\d+)?|" + "|".join(sorted(map(re.escape, _NUMBER_WORDS), key=len, reverse=True)) + r")"
+_ORD = r"(?:st|nd|rd|th)?"
+_YEAR = r"(?:,?\s+(\d{4}))?"
+
+_EXAM_WORDS = re.compile(r"\b(exams?|tests?|finals?|midterms?|papers?|quiz(?:zes)?|viva|interview)\b", re.I)
+_IN_HOURS = re.compile(r"\b(?:in|within|after)\s+$", re.I)
+
+
+def _number(token: str) -> float:
+    token = token.lower()
+    return float(token) if token[0].isdigit() else float(_NUMBER_WORDS[token])
+
+
+def _add_months(start: date, months: int) -> date:
+    month_index = start.month - 1 + months
+    year, month = start.year + month_index // 12, month_index % 12 + 1
+    return date(year, month, min(start.day, calendar.monthrange(year, month)[1]))
+
+
+def _safe_date(year: int, month: int, day: int):
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+def _upcoming(today: date, month: int, day: int, year: str = None):
+    """The date with an explicit year, else its next occurrence on or after today."""
+    if year:
+        return _safe_date(int(year), month, day)
+    candidate = _safe_date(today.year, month, day)
+    if candidate is None or candidate < today:
+        candidate = _safe_date(today.year + 1, month, day)
+    return candidate
+
+
+def _full_year(year: str) -> int:
+    value = int(year)
+    return value + 2000 if value < 100 else value
+
+
+# Each rule: (pattern, function(match, today) -> date | None). Earlier rules win on overlap.
+def _iso(m, today):
+    return _safe_date(int(m[1]), int(m[2]), int(m[3]))
+
+
+def _numeric(m, today):
+    first, second = int(m[1]), int(m[3])
+    day, month = (second, first) if second > 12 >= first else (first, second)  # day first unless impossible
+    if m[4]:
+        return _safe_date(_full_year(m[4]), month, day)
+    return _upcoming(today, month, day)
+
+
+def _month_day(m, today):
+    return _upcoming(today, _MONTHS[m[1].lower()], int(m[2]), m[3])
+
+
+def _day_month(m, today):
+    return _upcoming(today, _MONTHS[m[2].lower()], int(m[1]), m[3])
+
+
+def _ordinal_day(m, today):
+    day = int(m[1])
+    month_start = today.replace(day=1)
+    for offset in range(13):
+        start = _add_months(month_start, offset)
+        candidate = _safe_date(start.year, start.month, day)
+        if candidate and candidate >= today:
+            return candidate
+    return None
+
+
+def _relative(m, today):
+    amount, unit = _number(m[1]), m[2].lower()
+    try:
+        if unit == "month":
+            return _add_months(today, max(1, round(amount)))
+        days_per_unit = {"hour": 1 / 24, "day": 1, "week": 7}[unit]
+        return today + timedelta(days=round(amount * days_per_unit))
+    except (OverflowError, ValueError):
+        return None   # past year 9999 ("in 99999999 days"): not a date
+
+
+def _weekday(m, today):
+    ahead = (_WEEKDAYS[m[1].lower()] - today.weekday()) % 7 or 7
+    return today + timedelta(days=ahead)
+
+
+def _next_period(m, today):
+    return today + timedelta(days=7) if m[1].lower() == "week" else _add_months(today, 1)
+
+
+def _end_of_month(m, today):
+    month = _add_months(today.replace(day=1), 1 if m[1] else 0)
+    return month.replace(day=calendar.monthrange(month.year, month.month)[1])
+
+
+_DATE_RULES = [
+    (re.compile(r"\b(\d{4})[-/.](\d{1,2})[-/.](\d{1,2})\b"), _iso),
+    (re.compile(r"\b(\d{1,2})([/.-])(\d{1,2})\2(\d{4}|\d{2})\b"), _numeric),
+    (re.compile(r"\b(\d{1,2})(/)(\d{1,2})()(?![/\d])"), _numeric),
+    (re.compile(rf"\b{_MONTH}\s+(\d{{1,2}}){_ORD}\b{_YEAR}", re.I), _month_day),
+    (re.compile(rf"\b(\d{{1,2}}){_ORD}\s+(?:of\s+)?{_MONTH}\b{_YEAR}", re.I), _day_month),
+    (re.compile(r"\bthe\s+(\d{1,2})(?:st|nd|rd|th)\b", re.I), _ordinal_day),
+    (re.compile(rf"\b(?:in|within|after|for\s+the\s+next)\s+(?:the\s+next\s+|about\s+|around\s+|just\s+)?"
+                rf"{_NUM}\s+(hour|day|week|month)s?\b", re.I), _relative),
+    (re.compile(rf"\b{_NUM}\s+(day|week|month)s?\s+(?:from\s+(?:now|today)|later|away|left|to\s+go)\b", re.I),
+     _relative),
+    (re.compile(r"\bday\s+after\s+tomorrow\b", re.I), lambda m, today: today + timedelta(days=2)),
+    (re.compile(r"\bweek\s+after\s+next\b", re.I), lambda m, today: today + timedelta(days=14)),
+    (re.compile(r"\btomorrow\b", re.I), lambda m, today: today + timedelta(days=1)),
+    (re.compile(r"\b(?:today|tonight)\b", re.I), lambda m, today: today),
+    (re.compile(r"\bend\s+of\s+(?:the\s+|this\s+)?(next\s+)?month\b", re.I), _end_of_month),
+    (re.compile(r"\bnext\s+(week|month)\b", re.I), _next_period),
+    (re.compile(r"\b(?:(?:next|this|coming|on)\s+)?(" + "|".join(_WEEKDAYS) + r")\b", re.I), _weekday),
+]
+
+_UNIT = r"(hours?|hrs?|h|minutes?|mins?)\b"
+_PER = r"(?:\s*(?:a|an|per|each|every|/|in\s+a)\s*(day|night|week)|\s*(daily|weekly))?"
+_HOUR_RULES = [
+    re.compile(rf"\b{_NUM}\s*(?:-|–|to|or)\s*{_NUM}\s*{_UNIT}{_PER}", re.I),
+    re.compile(rf"(?:\b|(?<=\d)){_NUM}\s*{_UNIT}(\s+and\s+a\s+half)?{_PER}", re.I),
+    re.compile(rf"\b(hours?|hrs?)\s*[:=]\s*{_NUM}(){_PER}", re.I),   # "hours: 4 per day"
+]
+_DAILY_CONTEXT = re.compile(r"\b(daily|every\s*day|each\s+day|per\s+day|a\s+day)\b", re.I)
+
+
+def extract_exam_date(message: str, today: date = None):
+    today = today or date.today()
+    taken, candidates = [], []
+    for pattern, rule in _DATE_RULES:
+        for m in pattern.finditer(message):
+            if any(m.start() < end and start < m.end() for start, end in taken):
+                continue
+            value = rule(m, today)
+            if value is not None:
+                taken.append(m.span())
+                candidates.append((m.start(), m.end(), value))
+    if not candidates:
+        return None
+
+    keywords = [k.span() for k in _EXAM_WORDS.finditer(message)]
+    if not keywords:
+        return max(candidates)[2]
+
+    def rank(candidate):
+        start, end, value = candidate
+        after = [start - k_end for k_start, k_end in keywords if start >= k_start]
+        before = [k_start - end for k_start, k_end in keywords if start < k_start]
+        # Prefer a date following an exam word, then the nearest one; a date of today is rarely the exam
+        gap = min(after) if after else 1000 + min(before)
+        return (value == today, gap)
+
+    return min(candidates, key=rank)[2]
+
+
+def extract_hours_per_day(message: str):
+    best = None   # (priority, hours)
+    taken = []
+    for rule_index, pattern in enumerate(_HOUR_RULES):
+        for m in pattern.finditer(message):
+            if any(m.start() < end and start < m.end() for start, end in taken):
+                continue
+            taken.append(m.span())
+            if rule_index == 0:   # "2-3 hours": the middle of the range
+                low, high, unit, per, per_word = m.groups()
+                amount = (_number(low) + _number(high)) / 2
+            elif rule_index == 1:
+                value, unit, and_a_half, per, per_word = m.groups()
+                amount = _number(value) + (0.5 if and_a_half else 0)
+            else:
+                unit, value, _, per, per_word = m.groups()
+                amount = _number(value)
+            period = per or per_word or ""
+            if _IN_HOURS.search(message[:m.start()]):
+                continue   # "in 48 hours" is a deadline, not study time
+            hours = amount / 60 if unit.lower().startswith("m") else amount
+            period = period.lower()
+            if period in ("week", "weekly"):
+                hours, priority = hours / 7, 2
+            elif period:
+                priority = 2
+            else:
+                priority = 1 + bool(_DAILY_CONTEXT.search(message))
+            if 0 < hours <= MAX_HOURS_PER_DAY and (best is None or priority > best[0]):
+                best = (priority, round(hours, 2))
+    return best[1] if best else None
+
+
+def extract_plan_details(message: str, today: date = None) -> dict:
+    """{"exam_date": date | None, "hours_per_day": float | None} parsed from the message."""
+    return {
+        "exam_date": extract_exam_date(message, today),
+        "hours_per_day": extract_hours_per_day(message),
+    }
+
+
+LLM_EXTRACTION_PROMPT = """
+Extract the following details from the user's request.
+
+Return ONLY a valid JSON object with these exact keys:
+- "exam_date": string in YYYY-MM-DD format or null
+- "hours_per_day": number or null
+
+Do not include any other text.
+
+User request:
+{message}
+"""
+
+
+async def extract_with_llm(message: str) -> dict:
+    details = {"exam_date": None, "hours_per_day": None}
+    try:
+        raw = await call_llm_once(LLM_EXTRACTION_PROMPT.format(message=message), profile="extraction")
+        data = json.loads(raw[raw.index("{"):raw.rindex("}") + 1])
+    except Exception:
+        return details
+    try:
+        details["exam_date"] = date.fromisoformat(str(data.get("exam_date")))
+    except ValueError:
+        pass
+    try:
+        hours = float(data.get("hours_per_day"))
+        if 0 < hours <= MAX_HOURS_PER_DAY:
+            details["hours_per_day"] = hours
+    except (TypeError, ValueError):
+        pass
+    return details
+
+
+async def extract_with_fallback(message: str, today: date = None) -> dict:
+    """Local parse; the LLM is only consulted when it finds neither value."""
+    details = extract_plan_details(message, today)
+    if details["exam_date"] is None and details["hours_per_day"] is None:
+        details = await extract_with_llm(message)
+    return details
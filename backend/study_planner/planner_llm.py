@@ -1,19 +1,31 @@
-from backend.study_planner.topics import DSA_TOPICS, OS_TOPICS, DBMS_TOPICS
+from backend.study_planner.scheduler import build_schedule
+from backend.study_planner.topics import SUBJECT_TOPICS
 
-def generate_plan(subjects, days, daily_split):
-    plan = []
 
-    for day in range(days):
-        dsa = DSA_TOPICS[day % len(DSA_TOPICS)]
-        os = OS_TOPICS[day % len(OS_TOPICS)]
-        dbms = DBMS_TOPICS[day % len(DBMS_TOPICS)]
+def generate_plan(subjects, exam_date, hours_per_day, difficulty=None, start=None):
+    """
+    Schedule for the chat planner: subject names get their built-in topics
+    (topics.SUBJECT_TOPICS); dict subjects are passed through as they are.
+    """
+    difficulty = difficulty or {}
+    expanded = []
+    for subject in subjects:
+        if isinstance(subject, str):
+            subject = {
+                "name": subject,
+                "difficulty": difficulty.get(subject, "medium"),
+                "topics": SUBJECT_TOPICS.get(subject, []),
+            }
+        expanded.append(subject)
+    return build_schedule(expanded, exam_date, hours_per_day, start)
 
-        plan.append(
-            f"""Day {day + 1}:
-- DSA ({daily_split['DSA']} hrs): {dsa} + coding practice
-- OS ({daily_split['OS']} hrs): {os} + concept notes
-- DBMS ({daily_split['DBMS']} hrs): {dbms} + SQL practice
-"""
-        )
 
-    return "\n".join(plan)
\ No newline at end of file
+def plan_topics(subjects, difficulty=None):
+    """
+    StudyPlan.topics for a chat plan: the built-in topics of each subject,
+    tagged with subject and difficulty so scheduler.subjects_from_topics
+    gives back what generate_plan scheduled.
+    """
+    difficulty = difficulty or {}
+    return [{"name": topic, "subject": subject, "difficulty": difficulty.get(subject, "medium")}
+            for subject in subjects for topic in SUBJECT_TOPICS.get(subject, [])]
@@ -0,0 +1,92 @@
+"""
+Stored study plan schedules.
+
+A saved plan's schedule is kept in structured form: a header row
+(study_plan_schedules: hours, rest days, summary) and one row per day
+(study_plan_days). ensure_schedule() builds it the first time it is
+needed. replan() recomputes only the days from a given date on (today by
+default); earlier days stay as they were. It works out what is already
+done from the plan's completion percentage and the stored days, read in
+order only as far as needed. A missed day re-plans from the day after it.
+Day ranges are read back lazily with iter_plan_days.
+"""
+
+import asyncio
+from contextlib import closing
+from datetime import date, datetime, timedelta
+
+from backend import db_service
+from backend.async_db_service import (
+    get_study_plan, get_plan_schedule, save_plan_schedule, run_in_db_thread,
+)
+from backend.study_planner.scheduler import build_schedule, progress_from_days, subjects_from_topics
+
+DEFAULT_HOURS_PER_DAY = 4
+
+
+def _plan_inputs(plan: dict):
+    subjects = subjects_from_topics(plan["topics"], plan["subject"])
+    exam_date = date.fromisoformat(plan["exam_date"][:10])
+    return subjects, exam_date
+
+
+async def ensure_schedule(plan_id: int, hours_per_day: float = DEFAULT_HOURS_PER_DAY, rest_days=(),
+                          today: date = None):
+    """The stored schedule header of a plan, built now if there is none. None for an unknown plan."""
+    header = await get_plan_schedule(plan_id)
+    if header is not None:
+        return header
+    plan = await get_study_plan(plan_id)
+    if plan is None or not plan["exam_date"]:
+        return None
+    subjects, exam_date = _plan_inputs(plan)
+    today = today or date.today()
+    planned_from = datetime.fromisoformat(plan["created_at"]).date() if plan["created_at"] else today
+    schedule = await asyncio.to_thread(_first_schedule, subjects, exam_date, hours_per_day, rest_days,
+                                       planned_from, today, plan["completion"] or 0)
+    return await save_plan_schedule(plan_id, hours_per_day, list(rest_days), schedule)
+
+
+def _first_schedule(subjects, exam_date, hours_per_day, rest_days, planned_from, today, completion):
+    if not completion:
+        return build_schedule(subjects, exam_date, hours_per_day, today, rest_days)
+    # Progress reported before the schedule was stored: replay the plan from its creation
+    original = build_schedule(subjects, exam_date, hours_per_day, min(planned_from, today), rest_days)
+    progress, finished = progress_from_days(original["days"], subjects, completion, original["unscheduled"])
+    return build_schedule(subjects, exam_date, hours_per_day, today, rest_days, progress, finished=finished)
+
+
+async def replan(plan_id: int, from_day: date = None, hours_per_day: float = DEFAULT_HOURS_PER_DAY,
+                 missed_day: date = None):
+    """
+    Recompute the stored schedule from `from_day` (default today) to the
+    exam and return the new header. Builds the whole schedule if the plan
+    has none yet.
+    """
+    plan = await get_study_plan(plan_id)
+    if plan is None or not plan["exam_date"]:
+        return None
+    header = await get_plan_schedule(plan_id)
+    if header is None:
+        return await ensure_schedule(plan_id, hours_per_day, today=from_day)
+
+    subjects, exam_date = _plan_inputs(plan)
+    from_day = max(from_day or date.today(), date.fromisoformat(header["start"]))
+
+    def progress():
+        with closing(db_service.iter_plan_days(plan_id)) as days:
+            return progress_from_days(days, subjects, plan["completion"] or 0, header["unscheduled"])
+
+    done, finished = await run_in_db_thread(progress)
+    schedule = await asyncio.to_thread(build_schedule, subjects, exam_date, header["hours_per_day"], from_day,
+                                       header["rest_days"], done, finished=finished)
+    missed = None
+    if missed_day is not None:
+        missed = sorted(set(header["missed_days"]) | {missed_day.isoformat()})
+    return await save_plan_schedule(plan_id, header["hours_per_day"], header["rest_days"], schedule, missed)
+
+
+async def mark_day_missed(plan_id: int, day: date, today: date = None):
+    """Record a missed day and re-plan from the day after it (or today, if that is later)."""
+    today = today or date.today()
+    return await replan(plan_id, max(day + timedelta(days=1), today), missed_day=day)
@@ -0,0 +1,337 @@
+"""
+Constraint-aware study plan scheduler.
+
+build_schedule() turns subjects with topics (and estimated hours per topic)
+into a day-by-day plan of slots between a start date and the exam:
+
+- Capacity: hours_per_day on every study day; rest_weekdays are skipped and
+  the exam day itself is not planned.
+- Allocation: subjects share each day through a priority heap keyed by
+  virtual time (hours given / weight), so over the whole plan every subject
+  gets time in proportion to its weight: difficulty (planner_logic.
+  subject_weights) x hours of work left. Topics of a subject are studied in
+  the order given.
+- Spaced repetition: a finished topic gets short revision slots
+  REVISION_INTERVALS days later. Due revisions go first on a day but take
+  at most REVISION_SHARE of it; the rest roll over to the next day.
+- Final review: the last few study days are whole-syllabus review, split
+  over subjects with planner_logic.daily_time_split. Time left on a day
+  once every topic has been studied becomes practice, split the same way.
+- Completion-aware: `progress` (hours already done per topic) is
+  subtracted first and `finished` (date a topic was done) keeps its
+  remaining revisions on the plan. progress_from_days() derives both from
+  the plan's completion percentage (update_plan_completion) and the days
+  planned so far; progress_from_completion() replays the original
+  schedule for that.
+- Memoized: schedules are cached relative to their start date, so the
+  same syllabus, hours and number of days reuse one computation.
+
+The result is plain JSON: {"days": [{"date", "slots": [{"subject", "topic",
+"hours", "kind"}]}], "unscheduled": [...], "summary": {...}}. A 365-day
+horizon with hundreds of topics takes a few milliseconds.
+"""
+
+import heapq
+import json
+import os
+import threading
+from collections import OrderedDict, deque
+from datetime import date, timedelta
+
+from backend.study_planner.planner_logic import subject_weights, daily_time_split
+
+DEFAULT_TOPIC_HOURS = 2.0
+MIN_SLOT_HOURS = 0.5
+REVISION_INTERVALS = (1, 3, 7, 14, 30)   # days after a topic is finished
+REVISION_HOURS = 0.25
+REVISION_SHARE = 0.4                      # max fraction of a day spent on due revisions
+FINAL_REVIEW_DAYS = 2
+SCHEDULE_CACHE_MAX_ENTRIES = int(os.getenv("SCHEDULE_CACHE_MAX_ENTRIES", "256"))
+_EPS = 1e-9
+_ANCHOR = date(2001, 1, 1)   # a Monday; cached schedules start here
+
+_cache = OrderedDict()       # inputs relative to the start date -> schedule
+_cache_lock = threading.Lock()
+cache_stats = {"hits": 0, "misses": 0}
+
+
+def normalize_subjects(subjects) -> list:
+    """
+    Accepts subject names, or dicts {"name", "difficulty", "topics"} where a
+    topic is a name or {"name", "hours"}. Returns the dict form.
+    """
+    normalized = []
+    for subject in subjects:
+        if isinstance(subject, str):
+            subject = {"name": subject}
+        topics = []
+        for topic in subject.get("topics") or []:
+            if isinstance(topic, str):
+                topic = {"name": topic}
+            hours = float(topic.get("hours") or topic.get("estimated_hours") or DEFAULT_TOPIC_HOURS)
+            topics.append({"name": topic.get("name") or topic.get("topic"), "hours": hours})
+        normalized.append({
+            "name": subject["name"],
+            "difficulty": subject.get("difficulty", "medium"),
+            "topics": topics,
+        })
+    return normalized
+
+
+def study_days(start: date, exam_date: date, rest_weekdays=()) -> list:
+    rest = set(rest_weekdays)
+    return [start + timedelta(days=i) for i in range(max((exam_date - start).days, 0))
+            if (start + timedelta(days=i)).weekday() not in rest]
+
+
+class _Day:
+    __slots__ = ("date", "free", "slots")
+
+    def __init__(self, day: date, capacity: float):
+        self.date = day
+        self.free = capacity
+        self.slots = {}   # (subject, topic, kind) -> hours, in insertion order
+
+    def add(self, subject: str, topic: str, kind: str, hours: float):
+        key = (subject, topic, kind)
+        self.slots[key] = self.slots.get(key, 0.0) + hours
+        self.free -= hours
+
+    def to_dict(self) -> dict:
+        slots = [{"subject": s, "topic": t, "hours": round(h, 2), "kind": k}
+                 for (s, t, k), h in self.slots.items()]
+        return {"date": self.date.isoformat(), "hours": round(sum(h for h in self.slots.values()), 2),
+                "slots": slots}
+
+
+def _fill(day: _Day, share: dict, topic: str, kind: str):
+    """Spread the rest of the day over subjects in daily_time_split proportions."""
+    total = sum(share.values())
+    free = day.free
+    for name, hours in share.items():
+        if hours > _EPS and total > _EPS:
+            day.add(name, topic, kind, free * hours / total)
+
+
+def build_schedule(subjects, exam_date: date, hours_per_day: float, start: date = None,
+                   rest_weekdays=(), progress: dict = None, final_review_days: int = FINAL_REVIEW_DAYS,
+                   finished: dict = None) -> dict:
+    """
+    Plan study from `start` (default today) up to the day before `exam_date`.
+    `progress` maps (subject, topic) to hours already done, `finished` to
+    the date a topic was finished.
+    """
+    start = start or date.today()
+    subjects = normalize_subjects(subjects)
+    rest = sorted(set(rest_weekdays))
+    # Only the weekday of the start matters, and only with rest days
+    anchor = _ANCHOR + timedelta(days=start.weekday()) if rest else _ANCHOR
+    finished_offsets = sorted([list(k), (d - start).days] for k, d in (finished or {}).items())
+    key = json.dumps([subjects, hours_per_day, (exam_date - start).days, (anchor - _ANCHOR).days, rest,
+                      sorted([list(k), v] for k, v in (progress or {}).items()), final_review_days,
+                      finished_offsets])
+
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+            cache_stats["hits"] += 1
+    if cached is None:
+        cached = _build(subjects, anchor + timedelta(days=(exam_date - start).days), hours_per_day, anchor,
+                        rest, progress or {}, final_review_days,
+                        {tuple(k): anchor + timedelta(days=offset) for k, offset in finished_offsets})
+        with _cache_lock:
+            cache_stats["misses"] += 1
+            _cache[key] = cached
+            while len(_cache) > SCHEDULE_CACHE_MAX_ENTRIES:
+                _cache.popitem(last=False)
+    return _rebase(cached, start, exam_date)
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
+
+
+def _rebase(schedule: dict, start: date, exam_date: date) -> dict:
+    """A copy of a cached schedule moved to start on `start`."""
+    shift = start - date.fromisoformat(schedule["start"])
+    days = [{"date": (date.fromisoformat(d["date"]) + shift).isoformat(), "hours": d["hours"],
+             "slots": [dict(slot) for slot in d["slots"]]} for d in schedule["days"]]
+    return {**schedule, "start": start.isoformat(), "exam_date": exam_date.isoformat(), "days": days,
+            "unscheduled": [dict(u) for u in schedule["unscheduled"]], "summary": dict(schedule["summary"])}
+
+
+def _build(subjects: list, exam_date: date, hours_per_day: float, start: date, rest_weekdays,
+           progress: dict, final_review_days: int, finished: dict) -> dict:
+    days = [_Day(d, hours_per_day) for d in study_days(start, exam_date, rest_weekdays)]
+    review_days = min(final_review_days, len(days) // 7)
+    study_part, review_part = days[:len(days) - review_days], days[len(days) - review_days:]
+
+    # Remaining work per subject: [topic, hours left], in the given order
+    work, completed = {}, 0
+    for subject in subjects:
+        queue = deque()
+        for topic in subject["topics"]:
+            left = topic["hours"] - progress.get((subject["name"], topic["name"]), 0.0)
+            if left > _EPS:
+                queue.append([topic["name"], left])
+            else:
+                completed += 1
+        work[subject["name"]] = queue
+
+    difficulty = {s["name"]: s["difficulty"] for s in subjects}
+    base_weights = subject_weights(difficulty)
+    share = daily_time_split(hours_per_day, base_weights) if base_weights else {}
+    weights = {name: base_weights[name] * max(sum(h for _, h in work[name]), _EPS) for name in work}
+
+    heap = [(0.0, i, name) for i, name in enumerate(work) if work[name]]
+    heapq.heapify(heap)
+    revisions = []   # (due date, seq, subject, topic)
+    seq = len(heap)
+    for (name, topic), done_on in finished.items():
+        for interval in REVISION_INTERVALS:
+            due = done_on + timedelta(days=interval)
+            if due >= start:
+                seq += 1
+                revisions.append((due, seq, name, topic))
+    heapq.heapify(revisions)
+
+    for day in study_part:
+        # Due revisions first, within their share of the day
+        # (the ones that do not fit stay due, oldest first, for the next day)
+        revision_budget = min(day.free, hours_per_day * REVISION_SHARE)
+        while revisions and revisions[0][0] <= day.date and revision_budget + _EPS >= REVISION_HOURS:
+            _, _, subject, topic = heapq.heappop(revisions)
+            day.add(subject, topic, "revision", REVISION_HOURS)
+            revision_budget -= REVISION_HOURS
+
+        # New material, subject picked by lowest virtual time
+        while day.free > _EPS and heap:
+            vtime, order, name = heapq.heappop(heap)
+            topic = work[name][0]
+            chunk = min(topic[1], day.free, max(share.get(name, 0.0), MIN_SLOT_HOURS))
+            day.add(name, topic[0], "study", chunk)
+            topic[1] -= chunk
+            if topic[1] <= _EPS:
+                work[name].popleft()
+                for interval in REVISION_INTERVALS:
+                    seq += 1
+                    heapq.heappush(revisions, (day.date + timedelta(days=interval), seq, name, topic[0]))
+            if work[name]:
+                heapq.heappush(heap, (vtime + chunk / weights[name], order, name))
+
+        if day.free > _EPS and not heap:
+            _fill(day, share, "Practice problems and past papers", "practice")
+
+    for day in review_part:
+        _fill(day, share, "Full syllabus review", "review")
+
+    unscheduled = [{"subject": name, "topic": topic, "hours": round(left, 2)}
+                   for name, queue in work.items() for topic, left in queue]
+    planned = {"study": 0.0, "revision": 0.0, "practice": 0.0, "review": 0.0}
+    for day in days:
+        for (_, _, kind), hours in day.slots.items():
+            planned[kind] += hours
+    return {
+        "start": start.isoformat(),
+        "exam_date": exam_date.isoformat(),
+        "hours_per_day": hours_per_day,
+        "days": [day.to_dict() for day in days],
+        "unscheduled": unscheduled,
+        "summary": {
+            "study_days": len(days),
+            "topics": sum(len(s["topics"]) for s in subjects),
+            "topics_completed": completed,
+            "study_hours": round(planned["study"], 2),
+            "revision_hours": round(planned["revision"], 2),
+            "practice_hours": round(planned["practice"], 2),
+            "review_hours": round(planned["review"], 2),
+            "unscheduled_hours": round(sum(u["hours"] for u in unscheduled), 2),
+        },
+    }
+
+
+def progress_from_days(days, subjects, completion: float, unscheduled=()) -> tuple:
+    """
+    (progress, finished) for a plan that is `completion` percent done: the
+    first `completion`% of the syllabus hours, in the order `days` (an
+    iterable of day dicts, oldest first) planned them. Stops reading days
+    as soon as that many hours are accounted for.
+    """
+    topic_hours = {(s["name"], t["name"]): t["hours"] for s in normalize_subjects(subjects) for t in s["topics"]}
+    remaining = sum(topic_hours.values()) * max(0.0, min(completion, 100.0)) / 100
+    progress, finished = {}, {}
+
+    def take(key, hours, day):
+        nonlocal remaining
+        done = min(hours, remaining)
+        progress[key] = progress.get(key, 0.0) + done
+        remaining -= done
+        if day is not None and progress[key] + _EPS >= topic_hours.get(key, 0.0):
+            finished[key] = day
+
+    for day in days:
+        if remaining <= _EPS:
+            break
+        for slot in day["slots"]:
+            if slot["kind"] == "study" and remaining > _EPS:
+                take((slot["subject"], slot["topic"]), slot["hours"], date.fromisoformat(day["date"]))
+    # Unscheduled topics come last: they would have been studied after everything planned
+    for u in unscheduled:
+        if remaining > _EPS:
+            take((u["subject"], u["topic"]), u["hours"], None)
+    return progress, finished
+
+
+def progress_from_completion(subjects, exam_date: date, hours_per_day: float, start: date,
+                             completion: float, rest_weekdays=()) -> dict:
+    """Hours done per (subject, topic), replaying the original schedule."""
+    original = build_schedule(subjects, exam_date, hours_per_day, start, rest_weekdays)
+    return progress_from_days(original["days"], subjects, completion, original["unscheduled"])[0]
+
+
+def replan(subjects, exam_date: date, hours_per_day: float, planned_from: date, completion: float,
+           today: date = None, rest_weekdays=()) -> dict:
+    """
+    Fresh schedule from today for a plan first made on `planned_from`, with
+    the work a `completion` percentage stands for taken off.
+    """
+    today = today or date.today()
+    original = build_schedule(subjects, exam_date, hours_per_day, planned_from, rest_weekdays)
+    progress, finished = progress_from_days(original["days"], subjects, completion, original["unscheduled"])
+    return build_schedule(subjects, exam_date, hours_per_day, max(today, planned_from),
+                          rest_weekdays, progress, finished=finished)
+
+
+def subjects_from_topics(topics: list, default_subject: str) -> list:
+    """
+    Subjects for a stored plan (StudyPlan.topics): topics are names or
+    dicts, grouped by their "subject" key (default: the plan's subject).
+    """
+    grouped = {}
+    for topic in topics or []:
+        name = topic.get("subject", default_subject) if isinstance(topic, dict) else default_subject
+        subject = grouped.setdefault(name, {"name": name, "difficulty": "medium", "topics": []})
+        if isinstance(topic, dict) and topic.get("difficulty"):
+            subject["difficulty"] = topic["difficulty"]
+        subject["topics"].append(topic)
+    return list(grouped.values())
+
+
+def format_schedule(schedule: dict, max_days: int = 7) -> str:
+    """Readable text for chat: the first max_days days plus a summary."""
+    lines = []
+    for i, day in enumerate(schedule["days"][:max_days], 1):
+        lines.append(f"Day {i} ({day['date']}):")
+        for slot in day["slots"]:
+            label = " (revision)" if slot["kind"] == "revision" else ""
+            lines.append(f"- {slot['subject']} ({slot['hours']} hrs): {slot['topic']}{label}")
+        lines.append("")
+    remaining = len(schedule["days"]) - max_days
+    if remaining > 0:
+        lines.append(f"... and {remaining} more days.")
+    if schedule["unscheduled"]:
+        lines.append(f"⚠ {len(schedule['unscheduled'])} topics "
+                     f"({schedule['summary']['unscheduled_hours']} hrs) do not fit before the exam.")
+    return "\n".join(lines)
@@ -38,3 +38,11 @@ DBMS_TOPICS = [
     "Query Optimization",
     "Recovery Techniques"
 ]
+
+
+# Built-in syllabus for the subject names the chat planner knows
+SUBJECT_TOPICS = {
+    "DSA": DSA_TOPICS,
+    "OS": OS_TOPICS,
+    "DBMS": DBMS_TOPICS,
+}
@@ -0,0 +1,281 @@
+"""
+Per-request tracing and structured logs.
+
+Every HTTP request gets a request ID (the client's X-Request-ID if it sent
+one, otherwise a new one), returned in the X-Request-ID response header.
+Code on the request's path records spans around the steps worth timing:
+
+    with tracing.span("retrieve_context"):
+        ...
+
+    @tracing.traced()            # the same, for a whole function
+    async def route_agent(...):
+
+    span = tracing.start_span("llm", kind="stream")   # in async generators
+    ...
+    span.end(tokens=n)
+
+A span's parent is the span around it, so the spans of a request form a
+tree. They are collected on the request's Trace, found through a context
+variable (it follows the request into tasks it starts). When the response
+has been sent, the trace is logged as one JSON line (logger
+backend.tracing, requests slower than TRACE_LOG_MIN_MS) and the last
+TRACE_RECENT traces are kept for /api/admin/traces/{request_id}.
+
+Outside a request span() does nothing and costs one context variable
+lookup. LOG_FORMAT=json turns every log line into JSON carrying the
+request ID it was logged under.
+"""
+
+import functools
+import inspect
+import itertools
+import json
+import logging
+import os
+import re
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+REQUEST_ID_HEADER = "X-Request-ID"
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
+TRACE_LOG_MIN_MS = float(os.getenv("TRACE_LOG_MIN_MS", "0"))
+TRACE_MAX_SPANS = int(os.getenv("TRACE_MAX_SPANS", "256"))
+TRACE_RECENT = int(os.getenv("TRACE_RECENT", "256"))
+# Requests that are neither logged nor kept (scrapes, static files)
+TRACE_SKIP_PREFIXES = ("/metrics", "/ui")
+_VALID_REQUEST_ID = re.compile(r"[A-Za-z0-9._-]{1,64}")
+
+logger = logging.getLogger(__name__)
+
+_trace = ContextVar("unigenai_trace", default=None)
+_parent = ContextVar("unigenai_span", default=None)
+_recent = OrderedDict()   # request id -> finished trace dict
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+class Span:
+    __slots__ = ("trace", "id", "parent", "name", "start", "duration", "attrs")
+
+    def __init__(self, trace, span_id: int, parent, name: str, attrs: dict):
+        self.trace = trace
+        self.id = span_id
+        self.parent = parent
+        self.name = name
+        self.start = time.perf_counter()
+        self.duration = None
+        self.attrs = attrs
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def end(self, **attrs):
+        if attrs:
+            self.attrs.update(attrs)
+        if self.duration is None:
+            self.duration = time.perf_counter() - self.start
+
+    def to_dict(self) -> dict:
+        data = {"id": self.id, "parent": self.parent, "name": self.name,
+                "start_ms": _ms(self.start - self.trace.start),
+                "ms": _ms(self.duration) if self.duration is not None else None}
+        data.update(self.attrs)
+        return data
+
+
+class _NoopSpan:
+    """Returned outside a request: accepts everything, records nothing."""
+    __slots__ = ()
+
+    def set(self, **attrs):
+        pass
+
+    def end(self, **attrs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class Trace:
+    def __init__(self, request_id: str, method: str = "", path: str = ""):
+        self.request_id = request_id
+        self.method = method
+        self.path = path
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.duration = None
+        self.status = None
+        self.spans = []
+        self.dropped = 0
+        self._ids = itertools.count(1)
+
+    def start_span(self, name: str, attrs: dict) -> Span:
+        span = Span(self, next(self._ids), _parent.get(), name, attrs)
+        if len(self.spans) < TRACE_MAX_SPANS:
+            self.spans.append(span)
+        else:
+            self.dropped += 1
+        return span
+
+    def to_dict(self) -> dict:
+        data = {"event": "request", "request_id": self.request_id, "method": self.method, "path": self.path,
+                "status": self.status, "started_at": round(self.started_at, 3),
+                "ms": _ms(self.duration) if self.duration is not None else None,
+                "spans": [s.to_dict() for s in self.spans]}
+        if self.dropped:
+            data["dropped_spans"] = self.dropped
+        return data
+
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def start_trace(request_id: str = None, method: str = "", path: str = ""):
+    """Make a new trace current. Returns (trace, token) - pass the token to reset()."""
+    if not request_id or not _VALID_REQUEST_ID.fullmatch(request_id):
+        request_id = new_request_id()   # missing, or nothing we want in our logs
+    trace = Trace(request_id, method, path)
+    return trace, (_trace.set(trace), _parent.set(None))
+
+
+def reset(token):
+    trace_token, parent_token = token
+    _parent.reset(parent_token)
+    _trace.reset(trace_token)
+
+
+def current_trace():
+    return _trace.get()
+
+
+def current_request_id():
+    trace = _trace.get()
+    return trace.request_id if trace is not None else None
+
+
+def start_span(name: str, **attrs):
+    """A span that ends when .end() is called; it does not become the parent of later spans."""
+    trace = _trace.get()
+    if trace is None:
+        return _NOOP
+    return trace.start_span(name, attrs)
+
+
+@contextmanager
+def _run_span(span: Span):
+    token = _parent.set(span.id)
+    try:
+        yield span
+    except BaseException as e:
+        span.attrs["error"] = type(e).__name__
+        raise
+    finally:
+        _parent.reset(token)
+        span.end()
+
+
+def span(name: str, **attrs):
+    """Context manager timing the block as a span; spans started inside it are its children."""
+    trace = _trace.get()
+    if trace is None:
+        return _NOOP
+    return _run_span(trace.start_span(name, attrs))
+
+
+def traced(name: str = None):
+    """Decorator: every call of the function (sync or async) is a span."""
+    def decorate(func):
+        label = name or func.__name__
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                with span(label):
+                    return await func(*args, **kwargs)
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with span(label):
+                    return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+class _JsonText:
+    """Formats as JSON only if the log line is actually written."""
+    __slots__ = ("data",)
+
+    def __init__(self, data):
+        self.data = data
+
+    def __str__(self):
+        return json.dumps(self.data, default=str)
+
+
+def finish_trace(trace: Trace, status: int = None):
+    """Close a trace once its response is sent: log it and keep it for lookup."""
+    if trace.duration is not None:
+        return
+    trace.duration = time.perf_counter() - trace.start
+    trace.status = status
+    if trace.path.startswith(TRACE_SKIP_PREFIXES):
+        return
+    data = trace.to_dict()
+    _recent[trace.request_id] = data
+    while len(_recent) > TRACE_RECENT:
+        _recent.popitem(last=False)
+    if data["ms"] >= TRACE_LOG_MIN_MS:
+        logger.info("%s", _JsonText(data), extra={"fields": data})
+
+
+def get_trace(request_id: str):
+    """A recently finished trace of this worker, or None."""
+    return _recent.get(request_id)
+
+
+# LOGGING
+class RequestIdFilter(logging.Filter):
+    """Adds record.request_id (None outside a request)."""
+
+    def filter(self, record):
+        record.request_id = current_request_id()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        payload = {"ts": round(record.created, 3), "level": record.levelname, "logger": record.name}
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            payload["request_id"] = request_id
+        fields = getattr(record, "fields", None)
+        if fields:
+            payload.update(fields)
+        else:
+            payload["message"] = record.getMessage()
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+def configure_logging(level: str = None):
+    """basicConfig plus request IDs on every record, and JSON lines with LOG_FORMAT=json."""
+    logging.basicConfig(level=level or os.getenv("LOG_LEVEL", "INFO"))
+    for handler in logging.getLogger().handlers:
+        if not any(isinstance(f, RequestIdFilter) for f in handler.filters):
+            handler.addFilter(RequestIdFilter())
+        if LOG_FORMAT == "json":
+            handler.setFormatter(JsonFormatter())
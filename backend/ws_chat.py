@@ -0,0 +1,182 @@
+"""
+/ws/chat: many chat streams over one WebSocket.
+
+Connect with ?user_id=...&role=... once; role is the forced_role of every
+turn until changed. Frames are JSON objects with a "type":
+
+client -> server
+    {"type": "chat", "id": "s1", "message": "...", "role": "code"}   start a stream (role optional)
+    {"type": "cancel", "id": "s1"}                                    stop it
+    {"type": "role", "role": "code"}                                  change the default role (null: none)
+    {"type": "ping"}
+
+server -> client
+    {"type": "ready", "user_id", "role", "max_streams"}
+    {"type": "start", "id", "agent"}
+    {"type": "token", "id", "token"}
+    {"type": "end", "id", "tokens"}
+    {"type": "cancelled", "id"}
+    {"type": "error", "id", "detail"}          (+ "retry_after" when rate limited)
+    {"type": "event", "event": "evaluation" | "ingest" | "job", ...}   (backend/events.py)
+    {"type": "pong"}
+
+Each stream runs route_agent and chat_turn.stream_turn like POST /chat,
+so the agents are unchanged. Up to WS_MAX_STREAMS run at once per
+connection and their frames interleave, tagged with the stream id. Every
+chat frame is rate limited like POST /chat and gets its own trace
+(request ID "<connection>-<stream id>"). All frames leave through one
+queue of WS_SEND_QUEUE frames, so a slow client slows its own streams
+down instead of piling up memory. Closing the socket cancels its streams.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+
+from backend import metrics, rate_limit, tracing
+from backend.agents.agent_router import route_agent
+from backend.chat_turn import stream_turn
+from backend.events import event_bus
+
+WS_MAX_STREAMS = int(os.getenv("WS_MAX_STREAMS", "4"))
+WS_SEND_QUEUE = int(os.getenv("WS_SEND_QUEUE", "256"))
+
+logger = logging.getLogger(__name__)
+
+
+class ChatSocket:
+    def __init__(self, websocket, user_id: int = None, role: str = None):
+        self.websocket = websocket
+        client = websocket.client.host if websocket.client else None
+        self.rate_key = rate_limit.request_key(user_id, client)
+        self.user_id = 1 if user_id is None else user_id   # same default as POST /chat
+        self.role = role or None
+        self.connection_id = tracing.new_request_id()[:8]
+        self.streams = {}   # stream id -> task
+        self._outbox = asyncio.Queue(WS_SEND_QUEUE)
+
+    async def run(self):
+        await self.websocket.accept()
+        events = event_bus.subscribe(self.user_id)
+        sender = asyncio.create_task(self._send_loop())
+        forwarder = asyncio.create_task(self._forward_events(events))
+        metrics.WS_CONNECTIONS.inc()
+        try:
+            await self.send({"type": "ready", "user_id": self.user_id, "role": self.role,
+                             "max_streams": WS_MAX_STREAMS})
+            while True:
+                message = await self.websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                try:
+                    # A binary frame has no "text": answered with the error frame like bad JSON
+                    data = json.loads(message["text"]) if message.get("text") is not None else None
+                except ValueError:
+                    data = None
+                await self.handle(data)
+        finally:
+            metrics.WS_CONNECTIONS.dec()
+            event_bus.unsubscribe(self.user_id, events)
+            streams = list(self.streams.values())
+            for task in streams:
+                task.cancel()
+            await asyncio.gather(*streams, return_exceptions=True)
+            forwarder.cancel()
+            sender.cancel()
+
+    async def send(self, frame: dict):
+        await self._outbox.put(frame)
+
+    async def _send_loop(self):
+        try:
+            while True:
+                frame = await self._outbox.get()
+                await self.websocket.send_text(json.dumps(frame))
+        except Exception:
+            pass   # the client is gone; run() cleans up once receive sees it
+
+    async def _forward_events(self, events: asyncio.Queue):
+        while True:
+            event = await events.get()
+            await self.send({"type": "event", **event})
+
+    async def error(self, detail: str, stream_id=None, **extra):
+        frame = {"type": "error", "detail": detail, **extra}
+        if stream_id is not None:
+            frame["id"] = stream_id
+        await self.send(frame)
+
+    async def handle(self, data):
+        kind = data.get("type") if isinstance(data, dict) else None
+        if kind == "chat":
+            await self.start_stream(data)
+        elif kind == "cancel":
+            stream_id = data.get("id")
+            task = self.streams.get(stream_id) if isinstance(stream_id, (str, int)) else None
+            if task is None:
+                await self.error("No such stream", stream_id)
+            else:
+                task.cancel()
+        elif kind == "role":
+            self.role = data.get("role") or None
+        elif kind == "ping":
+            await self.send({"type": "pong"})
+        else:
+            await self.error("Frames must be JSON objects with a type of chat, cancel, role or ping")
+
+    async def start_stream(self, data: dict):
+        stream_id, message = data.get("id"), data.get("message")
+        if not isinstance(stream_id, (str, int)) or stream_id in self.streams:
+            await self.error("Each stream needs an id that is not in use", stream_id)
+            return
+        if not isinstance(message, str) or not message.strip():
+            await self.error("message must be a non-empty string", stream_id)
+            return
+        if len(self.streams) >= WS_MAX_STREAMS:
+            await self.error(f"At most {WS_MAX_STREAMS} streams at once per connection", stream_id)
+            return
+        if rate_limit.RATE_LIMIT_ENABLED:
+            wait = rate_limit.rate_limiter.check("chat", self.rate_key)
+            if wait:
+                metrics.RATE_LIMITED.labels("chat").inc()
+                await self.error("Too many chat requests", stream_id, retry_after=round(wait, 1))
+                return
+
+        role = data["role"] if "role" in data else self.role
+        trace, token = tracing.start_trace(f"{self.connection_id}-{stream_id}", "WS", "/ws/chat")
+        try:
+            task = asyncio.create_task(self._stream(stream_id, message, role, trace))
+        finally:
+            tracing.reset(token)
+        self.streams[stream_id] = task
+        task.add_done_callback(lambda t: self.streams.pop(stream_id, None))
+
+    async def _stream(self, stream_id, message: str, role, trace):
+        received = time.perf_counter()
+        status = 200
+        metrics.WS_STREAMS.inc()
+        try:
+            agent_name = await route_agent(message, role, self.user_id)
+            metrics.CHAT_REQUESTS.labels(agent_name).inc()
+            await self.send({"type": "start", "id": stream_id, "agent": agent_name})
+            count = 0
+            async for token in stream_turn(message, self.user_id, agent_name, received):
+                count += 1
+                await self.send({"type": "token", "id": stream_id, "token": token})
+            await self.send({"type": "end", "id": stream_id, "tokens": count})
+        except asyncio.CancelledError:
+            status = 499
+            try:
+                self._outbox.put_nowait({"type": "cancelled", "id": stream_id})
+            except asyncio.QueueFull:
+                pass
+            raise
+        except Exception:
+            status = 500
+            logger.exception("Chat stream %s failed (user=%s)", stream_id, self.user_id)
+            await self.error("The answer could not be generated", stream_id)
+        finally:
+            metrics.WS_STREAMS.dec()
+            tracing.finish_trace(trace, status)
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Chat Search Benchmark
+Builds a synthetic chat_history with millions of rows, times the FTS5
+backfill (migration 4) and compares per-user search latency with the
+LIKE scan the browser-side workaround amounts to.
+
+Usage: python bench_chat_search.py [--rows 2000000] [--users 5000] [--queries 200]
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+_TMP = tempfile.mkdtemp(prefix="unigenai_bench_")
+DB_PATH = os.path.join(_TMP, "search.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+
+from backend import db_service
+from backend.migrations import apply_migrations
+
+BLUE = '\033[94m'
+GREEN = '\033[92m'
+END = '\033[0m'
+
+VOCAB = (
+    "paging segmentation virtual memory process thread deadlock semaphore mutex scheduler "
+    "round robin priority kernel interrupt cache tlb page fault swap disk file system inode "
+    "array linked list stack queue heap tree graph hashing recursion dynamic programming greedy "
+    "sorting merge quick binary search complexity normalization index transaction acid join "
+    "schema view trigger gradient descent overfitting regression classification neural network "
+    "the a of to and is in that it for on with as this are be by an explain example because"
+).split()
+TOPICS = ["paging", "deadlock", "normalization", "recursion", "overfitting", "hashing", "semaphore", "index"]
+# A long tail of rarer words so term frequencies look like real text
+RARE = [f"{w}{n}" for n in range(400) for w in ("alpha", "beta", "gamma", "delta", "omega")]
+
+
+def sentence(rng, words):
+    return " ".join(rng.choice(VOCAB) if rng.random() < 0.8 else rng.choice(RARE) for _ in range(words))
+
+
+def pick_user(rng, users):
+    # Log-uniform: a handful of heavy users own a large share of the history
+    return max(1, int(users ** rng.random()))
+
+
+def populate(rows, users, seed=1):
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+
+    def gen():
+        for i in range(rows):
+            yield (
+                pick_user(rng, users),
+                rng.choice(["academic", "code", "content", "general"]),
+                f"what is {rng.choice(TOPICS)} " + sentence(rng, 6),
+                sentence(rng, 40),
+                (start + timedelta(seconds=i * 7)).isoformat(sep=" "),
+            )
+
+    conn.executemany(
+        "INSERT INTO chat_history (user_id, role, message, response, created_at) VALUES (?, ?, ?, ?, ?)",
+        gen()
+    )
+    conn.commit()
+    conn.close()
+
+
+def like_search(conn, user_id, term, limit=20):
+    pattern = f"%{term}%"
+    return conn.execute(
+        "SELECT id, role, message, created_at FROM chat_history "
+        "WHERE user_id = ? AND (message LIKE ? OR response LIKE ?) "
+        "ORDER BY created_at DESC LIMIT ?",
+        (user_id, pattern, pattern, limit)
+    ).fetchall()
+
+
+def timed(fn, cases):
+    latencies = []
+    for args in cases:
+        t0 = time.perf_counter()
+        fn(*args)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{BLUE}Chat search benchmark: {args.rows:,} rows, {args.users:,} users ({DB_PATH}){END}")
+
+    t0 = time.perf_counter()
+    populate(args.rows, args.users)
+    print(f"Generated rows in {time.perf_counter() - t0:.1f}s, "
+          f"DB size {os.path.getsize(DB_PATH) / 1e6:.0f} MB")
+
+    t0 = time.perf_counter()
+    apply_migrations()
+    elapsed = time.perf_counter() - t0
+    print(f"Migrations incl. FTS backfill: {elapsed:.1f}s ({args.rows / elapsed:,.0f} rows/s), "
+          f"DB size {os.path.getsize(DB_PATH) / 1e6:.0f} MB")
+
+    conn = sqlite3.connect(DB_PATH)
+    heavy = [u for u, _ in conn.execute(
+        "SELECT user_id, COUNT(*) n FROM chat_history GROUP BY user_id ORDER BY n DESC LIMIT 10")]
+    heavy_rows = conn.execute("SELECT COUNT(*) FROM chat_history WHERE user_id = ?", (heavy[0],)).fetchone()[0]
+
+    rng = random.Random(2)
+    workloads = {
+        "typical user, common term": [(pick_user(rng, args.users), rng.choice(TOPICS)) for _ in range(args.queries)],
+        "typical user, rare term": [(pick_user(rng, args.users), rng.choice(RARE)) for _ in range(args.queries)],
+        "heavy user, common term": [(rng.choice(heavy), rng.choice(TOPICS)) for _ in range(args.queries)],
+        "heavy user, rare term": [(rng.choice(heavy), rng.choice(RARE)) for _ in range(args.queries)],
+    }
+
+    print(f"Heaviest user has {heavy_rows:,} chats\n")
+    print(f"{'workload':>28}  {'FTS p50':>8}  {'FTS p95':>8}  {'LIKE p50':>8}  {'LIKE p95':>8}   (ms)")
+    for name, cases in workloads.items():
+        fts_p50, fts_p95 = timed(lambda u, t: db_service.search_chat_history(u, t), cases)
+        like_p50, like_p95 = timed(lambda u, t: like_search(conn, u, t), cases)
+        print(f"{name:>28}  {fts_p50:8.2f}  {fts_p95:8.2f}  {like_p50:8.2f}  {like_p95:8.2f}")
+    conn.close()
+    cases = workloads["heavy user, rare term"]
+    print(f"\n{GREEN}Sample: {db_service.search_chat_history(cases[0][0], cases[0][1], limit=1)}{END}")
+
+
+if __name__ == "__main__":
+    main()
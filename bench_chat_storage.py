@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Chat Storage Benchmark
+Builds a synthetic two-year chat_history, then measures database size and
+history read latency before and after the compression and archive jobs
+(backend/chat_storage.py), plus archive query latency.
+
+Usage: python bench_chat_storage.py [--rows 200000] [--users 2000] [--days 730] [--reads 300]
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+_TMP = tempfile.mkdtemp(prefix="unigenai_bench_")
+DB_PATH = os.path.join(_TMP, "storage.db")
+ARCHIVE_DIR = os.path.join(_TMP, "archive")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+
+from sqlalchemy import text
+
+from backend import db_service
+from backend.chat_storage import compress_old_responses, archive_old_chats, query_archive
+from backend.migrations import apply_migrations
+from backend.models import engine
+
+BLUE = '\033[94m'
+GREEN = '\033[92m'
+END = '\033[0m'
+
+VOCAB = (
+    "paging segmentation virtual memory process thread deadlock semaphore mutex scheduler "
+    "round robin priority kernel interrupt cache tlb page fault swap disk file system inode "
+    "array linked list stack queue heap tree graph hashing recursion dynamic programming greedy "
+    "sorting merge quick binary search complexity normalization index transaction acid join "
+    "the a of to and is in that it for on with as this are be by an explain example because"
+).split()
+
+
+def populate(rows, users, days, seed=1):
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+
+    def gen():
+        for i in range(rows):
+            # Evenly spread over the window, oldest first like real inserts
+            created = now - timedelta(days=days) + timedelta(seconds=days * 86400 * i / rows)
+            # LLM answers: mostly a few hundred words, some very long
+            words = int(rng.lognormvariate(5.3, 0.7))
+            yield (
+                max(1, int(users ** rng.random())),
+                rng.choice(["academic", "code", "content", "general"]),
+                "explain " + " ".join(rng.choice(VOCAB) for _ in range(8)),
+                " ".join(rng.choice(VOCAB) for _ in range(words)),
+                created.strftime("%Y-%m-%d %H:%M:%S.%f"),
+            )
+
+    conn.executemany(
+        "INSERT INTO chat_history (user_id, role, message, response, created_at) VALUES (?, ?, ?, ?, ?)",
+        gen()
+    )
+    conn.commit()
+    conn.close()
+
+
+def db_size_mb():
+    with engine.connect() as conn:
+        conn.execution_options(isolation_level="AUTOCOMMIT").execute(text("VACUUM"))
+        conn.execute(text("PRAGMA wal_checkpoint(TRUNCATE)"))
+    return os.path.getsize(DB_PATH) / 1e6
+
+
+def dir_size_mb(path):
+    return sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(path) for f in files) / 1e6
+
+
+def timed(fn, cases):
+    latencies = []
+    for args in cases:
+        t0 = time.perf_counter()
+        fn(*args)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--reads", type=int, default=300)
+    args = parser.parse_args()
+
+    print(f"{BLUE}Chat storage benchmark: {args.rows:,} rows over {args.days} days ({DB_PATH}){END}")
+    populate(args.rows, args.users, args.days)
+    apply_migrations()
+
+    with engine.connect() as conn:
+        heavy = [u for u, in conn.execute(text(
+            "SELECT user_id FROM chat_history GROUP BY user_id ORDER BY COUNT(*) DESC LIMIT 20"))]
+    rng = random.Random(2)
+    users = [rng.choice(heavy) for _ in range(args.reads)]
+    warm_cursor = (datetime.utcnow() - timedelta(days=60), 2 ** 62)
+    read_cases = {
+        "recent page (hot)": [(u, 50, None) for u in users],
+        "60-day-old page (warm)": [(u, 50, warm_cursor) for u in users],
+    }
+
+    def report(label):
+        line = f"{label:>22}: DB {db_size_mb():7.1f} MB"
+        for name, cases in read_cases.items():
+            p50, p95 = min(timed(db_service.get_chat_history, cases) for _ in range(3))  # best of 3 rounds
+            line += f" | {name} p50 {p50:.2f} ms, p95 {p95:.2f} ms"
+        print(line)
+
+    report("baseline")
+
+    t0 = time.perf_counter()
+    stats = compress_old_responses()
+    print(f"  compressed {stats['rows']:,} responses in {time.perf_counter() - t0:.1f}s "
+          f"({stats['bytes_before'] / 1e6:.1f} MB -> {stats['bytes_after'] / 1e6:.1f} MB)")
+    report("after compression")
+
+    t0 = time.perf_counter()
+    stats = archive_old_chats(archive_dir=ARCHIVE_DIR)
+    print(f"  archived {stats['rows']:,} rows into {stats['partitions']} partitions "
+          f"in {time.perf_counter() - t0:.1f}s ({dir_size_mb(ARCHIVE_DIR):.1f} MB on disk)")
+    report("after archiving")
+
+    month = datetime.utcnow() - timedelta(days=args.days - 30)
+    archive_cases = [(u, month, month + timedelta(days=30), 50) for u in users[:50]]
+    p50, p95 = timed(lambda *a: query_archive(*a, archive_dir=ARCHIVE_DIR), archive_cases)
+    print(f"{GREEN}Archive query (one month, one user): p50 {p50:.1f} ms, p95 {p95:.1f} ms{END}")
+
+
+if __name__ == "__main__":
+    main()
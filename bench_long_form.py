@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Long-Form Content Benchmark
+Times a long blog post through content_agent.respond() against a mock
+Ollama, once as the old single stream and once as an outline plus
+parallel sections (backend/agents/long_form.py), and reports wall-clock
+time, time to the first token and the speedup.
+
+The mock streams one token every --token-ms. A real backend slows down a
+little for every extra stream it serves at once; --contention adds that
+fraction of the token time per additional concurrent stream.
+
+Usage: python bench_long_form.py [--words 1500] [--token-ms 5] [--contention 0.25] [--parallel 3] [--rounds 3]
+"""
+
+import os
+import tempfile
+
+_TMP = tempfile.mkdtemp(prefix="unigenai_bench_")
+os.environ["DATABASE_URL"] = f"sqlite:///{_TMP}/bench.db"
+
+import argparse
+import asyncio
+import re
+import statistics
+import time
+
+from backend import llm_client
+from backend.agents import content_agent, long_form
+
+BLUE = '\033[94m'
+GREEN = '\033[92m'
+END = '\033[0m'
+
+TOKENS_PER_WORD = 4 / 3
+OUTLINE_TOKENS = 60
+
+
+class MockOllama:
+    def __init__(self, words, token_ms, contention):
+        self.words = words
+        self.token_s = token_ms / 1000
+        self.contention = contention
+        self.streams = 0
+
+    def _delay(self):
+        return self.token_s * (1 + self.contention * max(0, self.streams - 1))
+
+    async def once(self, prompt, *args):
+        sections = int(re.search(r"exactly (\d+) sections", prompt).group(1))
+        for _ in range(OUTLINE_TOKENS):
+            await asyncio.sleep(self._delay())
+        return "\n".join(f"{n}. Part {n}" for n in range(1, sections + 1)) + "\nVoice: friendly, for students"
+
+    async def stream(self, prompt, *args):
+        match = re.search(r"in about (\d+) words", prompt)
+        tokens = round((int(match.group(1)) if match else self.words) * TOKENS_PER_WORD)
+        self.streams += 1
+        try:
+            for i in range(tokens):
+                await asyncio.sleep(self._delay())
+                yield f"w{i} "
+        finally:
+            self.streams -= 1
+
+
+async def generate(message):
+    start = time.perf_counter()
+    first = None
+    async for _ in content_agent.respond(message, 1):
+        if first is None:
+            first = time.perf_counter() - start
+    return time.perf_counter() - start, first
+
+
+def measure(mock, message, long_form_on, parallel, rounds):
+    long_form.CONTENT_LONG_FORM = long_form_on
+    long_form.CONTENT_PARALLEL_SECTIONS = parallel
+    llm_client._generate_once = mock.once
+    llm_client._generate_stream = mock.stream
+    walls, firsts = [], []
+    for _ in range(rounds):
+        llm_client.llm_scheduler = llm_client.LLMScheduler(max(parallel + 1, llm_client.LLM_MAX_CONCURRENCY))   # one left free
+        wall, first = asyncio.run(generate(message))
+        walls.append(wall)
+        firsts.append(first)
+    return statistics.median(walls), statistics.median(firsts)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--words", type=int, default=1500)
+    parser.add_argument("--token-ms", type=float, default=5.0)
+    parser.add_argument("--contention", type=float, default=0.25,
+                        help="extra token time per additional concurrent stream, as a fraction")
+    parser.add_argument("--parallel", type=int, default=long_form.CONTENT_PARALLEL_SECTIONS)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    message = f"write a {args.words}-word blog post about how the internet works"
+    mock = MockOllama(args.words, args.token_ms, args.contention)
+    print(f"{BLUE}Long-form benchmark: {args.words} words (~{round(args.words * TOKENS_PER_WORD)} tokens), "
+          f"{args.token_ms:g} ms/token, contention {args.contention:g}, "
+          f"{long_form.section_count(args.words)} sections{END}")
+
+    single, single_first = measure(mock, message, False, args.parallel, args.rounds)
+    print(f"single stream:          {single:6.2f} s  (first token {single_first * 1000:5.0f} ms)")
+    for parallel in sorted({1, args.parallel}):
+        wall, first = measure(mock, message, True, parallel, args.rounds)
+        line = (f"outline + {parallel} parallel:   {wall:6.2f} s  (first token {first * 1000:5.0f} ms)  "
+                f"speedup {single / wall:.2f}x")
+        print(f"{GREEN}{line}{END}" if parallel == args.parallel else line)
+
+
+if __name__ == "__main__":
+    main()
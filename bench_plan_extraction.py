@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Study Plan Extraction Benchmark
+Runs the local exam date / hours parser (backend/study_planner/extractor.py)
+over a labeled set of study plan requests and reports per-field accuracy
+and latency. With --llm, the same set also goes through the old LLM JSON
+extraction for comparison (needs Ollama).
+
+"Today" is fixed at Monday 2026-10-19 so the relative labels stay valid.
+
+Usage: python bench_plan_extraction.py [--rounds 200] [--llm]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import date
+
+from backend.study_planner.extractor import extract_plan_details, extract_with_llm
+
+BLUE = '\033[94m'
+GREEN = '\033[92m'
+RED = '\033[91m'
+END = '\033[0m'
+
+TODAY = date(2026, 10, 19)
+D = date
+
+# (message, expected exam_date, expected hours_per_day)
+LABELED = [
+    ("Make a study plan, my exam is on 2026-12-05 and I can study 4 hours a day", D(2026, 12, 5), 4),
+    ("study plan please, exam in 3 weeks, 3 hrs daily", D(2026, 11, 9), 3),
+    ("I have my DBMS exam in 10 days, make a plan with 2-3 hours per day", D(2026, 10, 29), 2.5),
+    ("create a revision plan, exam in two months, 90 minutes a day", D(2026, 12, 19), 1.5),
+    ("exam in a month. I can give an hour a day. make a study timetable", D(2026, 11, 19), 1),
+    ("need a study plan, test within 2 weeks, half an hour every day", D(2026, 11, 2), 0.5),
+    ("my finals are 5 days from now, 6 hours daily, study plan?", D(2026, 10, 24), 6),
+    ("I have 3 weeks left before the exam. study schedule with 20 hours a week", D(2026, 11, 9), 2.86),
+    ("exam in a couple of weeks, make a plan", D(2026, 11, 2), None),
+    ("make a plan, midterm in a few days, 5 hours", D(2026, 10, 22), 5),
+    ("My exam is next Friday. Study plan with 4 hours a day", D(2026, 10, 23), 4),
+    ("exam on Saturday, can do 2 hours each day, study plan", D(2026, 10, 24), 2),
+    ("study plan for my test this Wednesday", D(2026, 10, 21), None),
+    ("exam next Monday, 3.5 hours per day, make a plan", D(2026, 10, 26), 3.5),
+    ("the paper is this coming Sunday, study plan with 6h/day", D(2026, 10, 25), 6),
+    ("my exam is on the 15th, make a study plan for 4 hrs a day", D(2026, 11, 15), 4),
+    ("exam on the 25th. two hours each day. study timetable", D(2026, 10, 25), 2),
+    ("exam tomorrow!! make a plan, 8 hours", D(2026, 10, 20), 8),
+    ("exam day after tomorrow, study plan with 10 hours a day", D(2026, 10, 21), 10),
+    ("exam next week, I study 4 to 5 hours daily. plan?", D(2026, 10, 26), 4.5),
+    ("study plan, exam next month, 45 mins per day", D(2026, 11, 19), 0.75),
+    ("exam at the end of the month, study plan with 3 hours a day", D(2026, 10, 31), 3),
+    ("exam at the end of next month, 2 hours per day, revision plan", D(2026, 11, 30), 2),
+    ("make a study plan, exam on Dec 5, 4 hours a day", D(2026, 12, 5), 4),
+    ("exam on 5th December, an hour and a half per day, study plan", D(2026, 12, 5), 1.5),
+    ("my OS exam is January 10, make a study schedule", D(2027, 1, 10), None),
+    ("study plan for an exam on March 3rd, 2027, 2 hrs a day", D(2027, 3, 3), 2),
+    ("exam date 2026-11-30, 4 hours daily, plan", D(2026, 11, 30), 4),
+    ("exam on 30/11/2026, 3 hours a day, study plan", D(2026, 11, 30), 3),
+    ("exam on 11/30/2026 (US format), 3 hours a day, study plan", D(2026, 11, 30), 3),
+    ("my test is on 12/25, plan for 1 hour a day", D(2026, 12, 25), 1),
+    ("exam on 1.12.2026, study plan, 5 hrs per day", D(2026, 12, 1), 5),
+    ("exam on the 2nd of November, study plan, 3 hours", D(2026, 11, 2), 3),
+    ("exam: 15 Nov, hours: 4 per day, study plan", D(2026, 11, 15), 4),
+    ("study plan with 2 hours a day for the next 3 weeks", D(2026, 11, 9), 2),
+    ("I start today, exam on the 28th, 3 hrs/day. study plan", D(2026, 10, 28), 3),
+    ("make a study plan, 4 hours a day", None, 4),
+    ("study plan, I can do 3-4 hrs", None, 3.5),
+    ("make me a study plan for DSA", None, None),
+    ("how to study for exams", None, None),
+    ("prepare for exam, exam is in 48 hours, 6 hours a day", D(2026, 10, 21), 6),
+    ("finals are the week after next, 4 hours a day, study plan", D(2026, 11, 2), 4),
+    ("exam in three weeks time, a few hours every day", D(2026, 11, 9), 3),
+    ("exam on November 20th 2026 and I can only manage 1 hr daily", D(2026, 11, 20), 1),
+    ("timetable: exam 2026/12/10, 2.5 hours a day", D(2026, 12, 10), 2.5),
+]
+
+
+def field_accuracy(run):
+    date_hits = hours_hits = both = 0
+    misses = []
+    for message, exam_date, hours in LABELED:
+        got = run(message)
+        d_ok = got["exam_date"] == exam_date
+        h_ok = (got["hours_per_day"] is None and hours is None) or (
+            got["hours_per_day"] is not None and hours is not None and abs(got["hours_per_day"] - hours) < 0.01)
+        date_hits += d_ok
+        hours_hits += h_ok
+        both += d_ok and h_ok
+        if not (d_ok and h_ok):
+            misses.append((message, got))
+    n = len(LABELED)
+    return date_hits / n, hours_hits / n, both / n, misses
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--llm", action="store_true", help="also measure the LLM extraction (needs Ollama)")
+    args = parser.parse_args()
+
+    print(f"{BLUE}Plan extraction benchmark: {len(LABELED)} labeled requests, today = {TODAY}{END}")
+    date_acc, hours_acc, both_acc, misses = field_accuracy(lambda m: extract_plan_details(m, TODAY))
+
+    latencies = []
+    for _ in range(args.rounds):
+        for message, _, _ in LABELED:
+            t0 = time.perf_counter()
+            extract_plan_details(message, TODAY)
+            latencies.append((time.perf_counter() - t0) * 1e6)
+    latencies.sort()
+    print(f"{GREEN}parser: exam_date {date_acc:.0%}, hours {hours_acc:.0%}, both {both_acc:.0%} | "
+          f"p50 {statistics.median(latencies):.0f} us, p99 {latencies[int(len(latencies) * 0.99) - 1]:.0f} us{END}")
+    for message, got in misses:
+        print(f"  {RED}miss{END}: {message!r} -> {got}")
+
+    if args.llm:
+        async def run_llm():
+            results, times = {}, []
+            for message, _, _ in LABELED:
+                t0 = time.perf_counter()
+                results[message] = await extract_with_llm(f"(Today is {TODAY.isoformat()}.) {message}")
+                times.append(time.perf_counter() - t0)
+            return results, times
+
+        results, times = asyncio.run(run_llm())
+        date_acc, hours_acc, both_acc, _ = field_accuracy(lambda m: results[m])
+        print(f"llm:    exam_date {date_acc:.0%}, hours {hours_acc:.0%}, both {both_acc:.0%} | "
+              f"p50 {statistics.median(times) * 1000:.0f} ms, max {max(times) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
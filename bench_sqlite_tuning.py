@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+SQLite Tuning Benchmark
+Concurrent chat writes + history reads under the old engine settings
+(default rollback journal, synchronous=FULL) and the tuned profile
+(WAL, synchronous=NORMAL, mmap, cache, busy_timeout, sized pool).
+
+Usage: python bench_sqlite_tuning.py [--writers 4] [--readers 8] [--seconds 5]
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+# Keep backend.models away from the real unigenai.db
+_TMP = tempfile.mkdtemp(prefix="unigenai_bench_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_TMP}/import.db")
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from backend.models import Base, ChatHistory, SQLITE_PRAGMAS, create_db_engine
+
+BLUE = '\033[94m'
+GREEN = '\033[92m'
+END = '\033[0m'
+
+
+def legacy_engine(url):
+    # Exactly what models.py used to build
+    return create_engine(url, connect_args={"check_same_thread": False})
+
+
+def run_profile(name, engine, writers, readers, seconds):
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+
+    # Seed some history so reads do real work
+    with Session() as db:
+        db.add_all([
+            ChatHistory(user_id=u, role="general", message=f"seed {i}", response="x" * 400)
+            for u in range(1, 51) for i in range(40)
+        ])
+        db.commit()
+
+    stop = time.perf_counter() + seconds
+    write_lat, read_lat = [], []
+    errors = {"locked": 0}
+    lock = threading.Lock()
+
+    def writer(wid):
+        local = []
+        while time.perf_counter() < stop:
+            t0 = time.perf_counter()
+            db = Session()
+            try:
+                db.add(ChatHistory(user_id=wid % 50 + 1, role="general", message="bench", response="y" * 800))
+                db.commit()
+                local.append(time.perf_counter() - t0)
+            except OperationalError:
+                db.rollback()
+                with lock:
+                    errors["locked"] += 1
+            finally:
+                db.close()
+        with lock:
+            write_lat.extend(local)
+
+    def reader(rid):
+        local = []
+        while time.perf_counter() < stop:
+            t0 = time.perf_counter()
+            db = Session()
+            try:
+                db.query(ChatHistory).filter(ChatHistory.user_id == rid % 50 + 1) \
+                    .order_by(ChatHistory.created_at.desc()).limit(50).all()
+                local.append(time.perf_counter() - t0)
+            except OperationalError:
+                with lock:
+                    errors["locked"] += 1
+            finally:
+                db.close()
+        with lock:
+            read_lat.extend(local)
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    threads += [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    engine.dispose()
+
+    def pct(values, p):
+        if not values:
+            return 0.0
+        values = sorted(values)
+        return values[min(len(values) - 1, int(len(values) * p))] * 1000
+
+    return {
+        "profile": name,
+        "writes/s": round(len(write_lat) / seconds, 1),
+        "reads/s": round(len(read_lat) / seconds, 1),
+        "write p50 ms": round(statistics.median(write_lat) * 1000, 2) if write_lat else 0.0,
+        "write p95 ms": round(pct(write_lat, 0.95), 2),
+        "read p50 ms": round(statistics.median(read_lat) * 1000, 2) if read_lat else 0.0,
+        "read p95 ms": round(pct(read_lat, 0.95), 2),
+        "locked errors": errors["locked"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+
+    print(f"{BLUE}SQLite tuning benchmark: {args.writers} writers, {args.readers} readers, {args.seconds}s each{END}")
+    print(f"Tuned pragmas: {SQLITE_PRAGMAS}\n")
+
+    results = [
+        run_profile("old", legacy_engine(f"sqlite:///{_TMP}/old.db"), args.writers, args.readers, args.seconds),
+        run_profile("tuned", create_db_engine(f"sqlite:///{_TMP}/tuned.db"), args.writers, args.readers, args.seconds),
+    ]
+
+    cols = list(results[0].keys())
+    print("  ".join(f"{c:>14}" for c in cols))
+    for r in results:
+        print("  ".join(f"{str(r[c]):>14}" for c in cols))
+    print(f"\n{GREEN}Done. Databases left in {_TMP}{END}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Study Scheduler Benchmark
+Times backend/study_planner/scheduler.py on synthetic syllabi, from a
+two-week plan with a few topics to a full year with hundreds of topics,
+for a fresh plan and for a completion-aware re-plan (which schedules the
+original plan again to work out what was done). "cold" clears the
+schedule memo before every round, "cached" is a repeat of identical
+inputs (a memo hit, dates shifted to the new start).
+
+Usage: python bench_study_scheduler.py [--rounds 20] [--topics 500] [--days 365]
+"""
+
+import argparse
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+from backend.study_planner.scheduler import build_schedule, clear_cache, replan
+
+BLUE = '\033[94m'
+GREEN = '\033[92m'
+END = '\033[0m'
+
+START = date(2026, 10, 19)
+
+
+def syllabus(topics: int, subjects: int = 8, seed: int = 7):
+    rng = random.Random(seed)
+    per_subject = max(1, topics // subjects)
+    return [{"name": f"Subject {i}", "difficulty": rng.choice(["high", "medium", "low"]),
+             "topics": [{"name": f"Topic {i}.{j}", "hours": rng.choice([1, 1.5, 2, 3, 4, 6])}
+                        for j in range(per_subject)]}
+            for i in range(subjects)]
+
+
+def timed(fn, rounds, cold=True):
+    times = []
+    for _ in range(rounds):
+        if cold:
+            clear_cache()
+        t0 = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    return result, statistics.median(times), max(times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--topics", type=int, default=500)
+    parser.add_argument("--days", type=int, default=365)
+    args = parser.parse_args()
+
+    print(f"{BLUE}Study scheduler benchmark ({args.rounds} rounds each){END}")
+    for days, topics in [(14, 30), (90, 120), (args.days, args.topics)]:
+        subjects = syllabus(topics)
+        exam = START + timedelta(days=days)
+        build = lambda: build_schedule(subjects, exam, 4, START, rest_weekdays=[6])
+        schedule, p50, worst = timed(build, args.rounds)
+        summary = schedule["summary"]
+        print(f"{GREEN}{days:>4} days, {summary['topics']:>4} topics: build p50 {p50:6.2f} ms, max {worst:6.2f} ms "
+              f"| {summary['study_hours']:.0f} h study, {summary['revision_hours']:.0f} h revision, "
+              f"{summary['unscheduled_hours']:.0f} h unscheduled{END}")
+        _, p50, worst = timed(build, args.rounds, cold=False)
+        print(f"{'':>21}cached p50 {p50:6.2f} ms, max {worst:6.2f} ms")
+        _, p50, worst = timed(lambda: replan(subjects, exam, 4, START, 40, START + timedelta(days=days // 3),
+                                             rest_weekdays=[6]), args.rounds)
+        print(f"{'':>21}replan at 40% p50 {p50:6.2f} ms, max {worst:6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+WebSocket vs SSE Chat Benchmark
+Runs the app under uvicorn on localhost with a fake Ollama (no model, a
+fixed number of tokens per answer) and sends the same chat turns three
+ways:
+
+  sse-new     POST /chat with a new HTTP connection per turn
+  sse-reuse   POST /chat over one keep-alive connection
+  ws          chat frames over one /ws/chat connection
+
+For each: connection setup cost, time to first token and time to the
+last token per turn (p50/p95), turns one after another and then
+--concurrency turns at once (separate requests for SSE, multiplexed
+streams on the one socket for WS). The difference is transport and
+per-request overhead only; routing, agent and save work is the same.
+
+Usage: python bench_ws_chat.py [--turns 200] [--tokens 50] [--token-delay 0] [--concurrency 4]
+"""
+
+import os
+import tempfile
+
+_TMP = tempfile.mkdtemp(prefix="unigenai_bench_")
+os.environ["DATABASE_URL"] = f"sqlite:///{_TMP}/bench.db"
+os.environ["RATE_LIMIT_ENABLED"] = "0"
+os.environ.setdefault("WS_MAX_STREAMS", "64")
+
+import argparse
+import asyncio
+import json
+import logging
+import socket
+import threading
+import time
+
+import httpx
+import uvicorn
+from websockets.asyncio.client import connect
+
+from backend import llm_client
+from backend.app import app
+
+BLUE = '\033[94m'
+GREEN = '\033[92m'
+END = '\033[0m'
+
+MESSAGE = "how do black holes form?"
+
+
+def install_fake_llm(tokens: int, delay: float):
+    async def once(prompt, *args):
+        return "general"
+
+    async def stream(prompt, *args):
+        for i in range(tokens):
+            if delay:
+                await asyncio.sleep(delay)
+            yield f"w{i} "
+
+    llm_client._generate_once = once
+    llm_client._generate_stream = stream
+    llm_client.llm_scheduler = llm_client.LLMScheduler(64)
+
+
+def start_server() -> tuple:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, thread, port
+
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] * 1000
+
+
+async def sse_turn(client: httpx.AsyncClient, user_id: int):
+    start = time.perf_counter()
+    first = None
+    async with client.stream("POST", f"/chat?user_id={user_id}", json={"message": MESSAGE}) as r:
+        async for line in r.aiter_lines():
+            if line.startswith("data: ") and json.loads(line[6:])["token"] and first is None:
+                first = time.perf_counter()
+    return first - start, time.perf_counter() - start
+
+
+async def run_sse(base: str, turns: int, concurrency: int, reuse: bool):
+    shared = httpx.AsyncClient(base_url=base, timeout=30) if reuse else None
+    start = time.perf_counter()
+    if shared is not None:
+        await shared.get("/metrics")     # open the one connection up front
+    setup = time.perf_counter() - start
+
+    async def turn(user_id):
+        if shared is not None:
+            return await sse_turn(shared, user_id)
+        async with httpx.AsyncClient(base_url=base, timeout=30) as client:
+            return await sse_turn(client, user_id)
+
+    try:
+        sequential = [await turn(1) for _ in range(turns)]
+        start = time.perf_counter()
+        concurrent = []
+        for i in range(0, turns, concurrency):
+            concurrent += await asyncio.gather(*(turn(2 + j) for j in range(min(concurrency, turns - i))))
+        concurrent_wall = time.perf_counter() - start
+    finally:
+        if shared is not None:
+            await shared.aclose()
+    return setup, sequential, concurrent, concurrent_wall
+
+
+async def run_ws(base: str, turns: int, concurrency: int):
+    start = time.perf_counter()
+    async with connect(base.replace("http", "ws") + "/ws/chat?user_id=1&role=general") as ws:
+        json.loads(await ws.recv())      # ready
+        setup = time.perf_counter() - start
+        waiting = {}                     # stream id -> [start, first token, future]
+
+        async def reader():
+            async for raw in ws:
+                frame = json.loads(raw)
+                entry = waiting.get(frame.get("id"))
+                if entry is None:
+                    continue
+                if frame["type"] == "token" and entry[1] is None:
+                    entry[1] = time.perf_counter()
+                elif frame["type"] in ("end", "error", "cancelled"):
+                    entry[2].set_result((entry[1] - entry[0], time.perf_counter() - entry[0]))
+                    del waiting[frame["id"]]
+
+        next_id = iter(range(10 ** 9))
+
+        async def turn():
+            stream_id = next(next_id)
+            done = asyncio.get_running_loop().create_future()
+            waiting[stream_id] = [time.perf_counter(), None, done]
+            await ws.send(json.dumps({"type": "chat", "id": stream_id, "message": MESSAGE}))
+            return await done
+
+        read = asyncio.create_task(reader())
+        sequential = [await turn() for _ in range(turns)]
+        start = time.perf_counter()
+        concurrent = []
+        for i in range(0, turns, concurrency):
+            concurrent += await asyncio.gather(*(turn() for _ in range(min(concurrency, turns - i))))
+        concurrent_wall = time.perf_counter() - start
+        read.cancel()
+    return setup, sequential, concurrent, concurrent_wall
+
+
+def report(name, setup, sequential, concurrent, concurrent_wall):
+    ttft = [s[0] for s in sequential]
+    total = [s[1] for s in sequential]
+    conc_total = [c[1] for c in concurrent]
+    print(f"{name:<11}{setup * 1000:>9.2f}ms"
+          f"{pct(ttft, 0.5):>9.2f}{pct(ttft, 0.95):>9.2f}"
+          f"{pct(total, 0.5):>9.2f}{pct(total, 0.95):>9.2f}"
+          f"{pct(conc_total, 0.5):>9.2f}{pct(conc_total, 0.95):>9.2f}"
+          f"{len(concurrent) / concurrent_wall:>10.1f}/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=200, help="chat turns per mode and phase")
+    parser.add_argument("--tokens", type=int, default=50, help="tokens per fake answer")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="seconds between fake tokens")
+    parser.add_argument("--concurrency", type=int, default=4, help="turns in flight in the concurrent phase")
+    args = parser.parse_args()
+
+    logging.getLogger("backend.tracing").setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    install_fake_llm(args.tokens, args.token_delay)
+    server, thread, port = start_server()
+    base = f"http://127.0.0.1:{port}"
+
+    print(f"{BLUE}{args.turns} turns per mode, {args.tokens} tokens each, "
+          f"concurrency {args.concurrency} ({_TMP}){END}")
+    print(f"{'':<11}{'setup':>11}{'ttft p50':>9}{'p95':>9}{'last p50':>9}{'p95':>9}"
+          f"{'conc p50':>9}{'p95':>9}{'turns':>12}")
+    try:
+        report("sse-new", *asyncio.run(run_sse(base, args.turns, args.concurrency, reuse=False)))
+        report("sse-reuse", *asyncio.run(run_sse(base, args.turns, args.concurrency, reuse=True)))
+        report("ws", *asyncio.run(run_ws(base, args.turns, args.concurrency)))
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+    print(f"{GREEN}times in ms; setup is the connection (and WS handshake) before the first turn{END}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Shared pytest fixtures for the test_*.py scripts.
+
+fake_llm installs a FakeOllama in place of the two Ollama HTTP calls in
+backend/llm_client.py (_generate_once, _generate_stream) together with a
+fresh LLMScheduler; rate_limits installs a RateLimiter with the given
+policies. Both patch through monkeypatch, so every test gets the real
+module globals back when it ends. Tests that need a different fake
+subclass FakeOllama and pass an instance to fake_llm.
+
+The whole run shares one temporary directory, TMP_DIR, for the database,
+the chat archive and the key-point cache. backend.models reads
+DATABASE_URL once at import, so it is set here, before any test script
+imports the backend; the scripts import TMP_DIR from this module, which
+also sets it when they run standalone.
+"""
+
+import asyncio
+import os
+import tempfile
+
+import pytest
+
+TMP_DIR = tempfile.mkdtemp(prefix="unigenai_test_")
+os.environ["DATABASE_URL"] = f"sqlite:///{TMP_DIR}/test.db"
+os.environ["CHAT_ARCHIVE_DIR"] = os.path.join(TMP_DIR, "archive")
+os.environ["INTERVIEW_KEY_POINTS_CACHE"] = os.path.join(TMP_DIR, "key_points.npz")
+
+from backend import llm_client, rate_limit
+from backend.rate_limit import RateLimiter
+
+
+class FakeOllama:
+    """
+    Stands in for Ollama. once() returns `reply` (or reply(prompt) if it is
+    callable); stream() yields `tokens` tokens made from `token`, `delay`
+    seconds apart. Every call is recorded in `calls` as (kind, prompt,
+    model, options, priority); `running` / `max_running` count streams.
+    """
+
+    def __init__(self, reply="general", tokens=5, delay=0.0, token="t{i} "):
+        self.reply = reply
+        self.tokens = tokens
+        self.delay = delay
+        self.token = token
+        self.calls = []
+        self.running = 0
+        self.max_running = 0
+
+    @property
+    def prompts(self) -> list:
+        """Prompts of the streamed calls, in the order they started."""
+        return [call[1] for call in self.calls if call[0] == "stream"]
+
+    def record(self, kind, prompt, model, options):
+        self.calls.append((kind, prompt, model, options, llm_client.default_priority.get()))
+
+    async def once(self, prompt, model=None, options=None):
+        self.record("once", prompt, model, options)
+        return self.reply(prompt) if callable(self.reply) else self.reply
+
+    async def stream(self, prompt, model=None, options=None):
+        self.record("stream", prompt, model, options)
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            for i in range(self.tokens):
+                await asyncio.sleep(self.delay)
+                yield self.token.format(i=i)
+        finally:
+            self.running -= 1
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    """fake_llm(fake=None, slots=4, **FakeOllama kwargs) installs a fake Ollama and returns it."""
+    def install(fake: FakeOllama = None, slots: int = 4, **kwargs) -> FakeOllama:
+        fake = fake or FakeOllama(**kwargs)
+        monkeypatch.setattr(llm_client, "_generate_once", fake.once)
+        monkeypatch.setattr(llm_client, "_generate_stream", fake.stream)
+        monkeypatch.setattr(llm_client, "llm_scheduler", llm_client.LLMScheduler(slots))
+        return fake
+    return install
+
+
+@pytest.fixture
+def rate_limits(monkeypatch):
+    """rate_limits(policies=None) installs a RateLimiter ({policy: spec}; None = defaults) and returns it."""
+    def install(policies: dict = None) -> RateLimiter:
+        limiter = RateLimiter(policies)
+        monkeypatch.setattr(rate_limit, "rate_limiter", limiter)
+        return limiter
+    return install
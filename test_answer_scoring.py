@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Answer Scoring Test
+Checks that every interview question has reference key points, that the
+local scorer ranks a reference answer above an unrelated one within a few
+milliseconds, that the key point embeddings are cached and rebuilt when
+the key points change, and that a finished interview is saved with the
+real score and number of correct answers when LLM feedback is off.
+
+Needs the embedding model, not Ollama. Runs standalone
+(python test_answer_scoring.py) or under pytest.
+"""
+
+import os
+
+from conftest import TMP_DIR   # sets DATABASE_URL before the backend is imported
+
+import asyncio
+import statistics
+import time
+
+from backend import db_service
+from backend.agents import academic_agent
+from backend.migrations import apply_migrations
+from backend.mock_interview import scorer
+from backend.mock_interview.questions import (
+    DSA_QUESTIONS, OS_QUESTIONS, DBMS_QUESTIONS, ML_QUESTIONS, HR_QUESTIONS, QUESTION_KEY_POINTS
+)
+from backend.rag.vector_store import get_encoder
+
+GREEN = '\033[92m'
+RED = '\033[91m'
+BLUE = '\033[94m'
+END = '\033[0m'
+
+UNRELATED = "I enjoy playing football on weekends and my favourite food is pizza."
+
+
+class CountingEncoder:
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, texts, **kwargs):
+        self.calls += 1
+        return get_encoder().encode(texts, **kwargs)
+
+
+def reference_answer(question):
+    return ". ".join(QUESTION_KEY_POINTS[question]) + "."
+
+
+# =================== TESTS ===================
+
+def test_every_question_has_key_points():
+    for question in DSA_QUESTIONS + OS_QUESTIONS + DBMS_QUESTIONS + ML_QUESTIONS + HR_QUESTIONS:
+        assert len(QUESTION_KEY_POINTS.get(question, ())) >= 3, question
+
+
+def test_reference_answer_beats_unrelated_answer():
+    for question in (DSA_QUESTIONS[0], OS_QUESTIONS[1], DBMS_QUESTIONS[1], ML_QUESTIONS[2], HR_QUESTIONS[3]):
+        good = scorer.score_answer(question, reference_answer(question))
+        bad = scorer.score_answer(question, UNRELATED)
+        assert good["is_correct"] and not good["missed"], (question, good)
+        assert not bad["is_correct"] and bad["score"] < good["score"], (question, bad)
+    empty = scorer.score_answer(DSA_QUESTIONS[0], "   ")
+    assert empty["score"] == 0 and len(empty["missed"]) == len(QUESTION_KEY_POINTS[DSA_QUESTIONS[0]])
+    assert scorer.score_answer("Not an interview question", "anything") is None
+
+
+def test_scoring_takes_milliseconds():
+    scorer.reference_embeddings.load()
+    answer = "A stack is LIFO: push and pop happen at the top. It is used for function calls and undo."
+    timings = []
+    for _ in range(20):
+        start = time.perf_counter()
+        scorer.score_answer(DSA_QUESTIONS[2], answer)
+        timings.append(time.perf_counter() - start)
+    assert statistics.median(timings) < 0.1, timings
+
+
+def test_key_point_cache_is_reused_and_invalidated():
+    path = os.path.join(TMP_DIR, "cache_test.npz")
+    first = CountingEncoder()
+    scorer.ReferenceEmbeddings(cache_path=path, encoder=first).load()
+    assert first.calls == 1 and os.path.exists(path)
+
+    second = CountingEncoder()
+    scorer.ReferenceEmbeddings(cache_path=path, encoder=second).load()
+    assert second.calls == 0  # read from the cache
+
+    edited = dict(QUESTION_KEY_POINTS, **{DSA_QUESTIONS[0]: ["Arrays are contiguous"]})
+    third = CountingEncoder()
+    references = scorer.ReferenceEmbeddings(edited, cache_path=path, encoder=third)
+    references.load()
+    assert third.calls == 1 and len(references.for_question(DSA_QUESTIONS[0])[0]) == 1
+
+
+def test_interview_saved_with_real_scores():
+    apply_migrations()
+    academic_agent.INTERVIEW_LLM_FEEDBACK = False
+    user_id = 21
+
+    async def say(message):
+        return "".join([t async for t in academic_agent.respond(message, user_id)])
+
+    async def run():
+        await say("start mock interview")
+        await say("os")
+        for i, question in enumerate(OS_QUESTIONS):
+            text = await say(reference_answer(question) if i % 3 == 0 else UNRELATED)
+        return text
+
+    try:
+        report = asyncio.run(run())
+    finally:
+        academic_agent.INTERVIEW_LLM_FEEDBACK = True
+    expected_correct = len(range(0, len(OS_QUESTIONS), 3))
+    assert f"({expected_correct}/{len(OS_QUESTIONS)} correct)" in report, report
+    assert "Missing:" in report and "Interview Report" in report
+
+    saved = db_service.get_interview_history(user_id)
+    assert len(saved) == 1, saved
+    assert saved[0]["correct"] == expected_correct and saved[0]["total"] == len(OS_QUESTIONS), saved
+    assert 0 < saved[0]["score"] < 100, saved
+
+
+# =================== MAIN ===================
+
+if __name__ == "__main__":
+    print(f"{BLUE}Answer scoring tests ({TMP_DIR}){END}")
+    failed = 0
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            try:
+                fn()
+                print(f"{GREEN}✓ {name}{END}")
+            except AssertionError as e:
+                failed += 1
+                print(f"{RED}✗ {name}: {e}{END}")
+    raise SystemExit(1 if failed else 0)
@@ -41,14 +41,21 @@ def test_case(test_num, message, expected_agent, selected_agent=None):
     print(f"Message: '{message}'")
     
     try:
-        response = requests.post(
-            f"{BASE_URL}/chat?user_id=1",
-            json={
-                "message": message,
-                "forced_role": selected_agent
-            },
-            headers={"Accept": "text/event-stream"}
-        )
+        while True:
+            response = requests.post(
+                f"{BASE_URL}/chat?user_id=1",
+                json={
+                    "message": message,
+                    "forced_role": selected_agent
+                },
+                headers={"Accept": "text/event-stream"}
+            )
+            if response.status_code != 429:
+                break
+            # Over the server's chat budget (RATE_LIMIT_CHAT): wait as told, then retry
+            wait = float(response.headers.get("Retry-After", "1"))
+            info(f"Rate limited, retrying in {wait:.0f}s")
+            time.sleep(wait)
         
         if response.status_code != 200:
             error(f"HTTP {response.status_code}: {response.text}")
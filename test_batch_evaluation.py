@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Batch Evaluation Test
+Posts an answer sheet to /api/interview/evaluate-batch with a fake Ollama
+and checks that results stream back in completion order tagged with their
+index, that concurrency stays within the batch limit and the shared LLM
+scheduler, and that the aggregate is saved as an interview. Also checks
+the scheduler serves interactive calls before queued background ones.
+
+Needs the embedding model, not Ollama. Runs under pytest
+(python test_batch_evaluation.py calls it).
+"""
+
+from conftest import TMP_DIR   # sets DATABASE_URL before the backend is imported
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from backend import db_service, llm_client
+from backend.app import app
+from backend.migrations import apply_migrations
+from backend.mock_interview.questions import DSA_QUESTIONS, QUESTION_KEY_POINTS
+from conftest import FakeOllama
+
+BLUE = '\033[94m'
+END = '\033[0m'
+
+
+class GradingOllama(FakeOllama):
+    """Later answers finish first."""
+
+    async def stream(self, prompt, model=None, options=None):
+        self.record("stream", prompt, model, options)
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(0.05 if "answer-late" in prompt else 0.01)
+            yield "Strengths: fine. "
+            yield "Score: 8/10"
+        finally:
+            self.running -= 1
+
+
+def sheet():
+    items = [{"question": f"Custom question {i}?", "answer": f"answer-late {i}"} for i in range(3)]
+    items += [{"question": f"Custom question {i}?", "answer": f"answer {i}"} for i in range(3, 6)]
+    question = DSA_QUESTIONS[0]
+    items.append({"question": question, "answer": ". ".join(QUESTION_KEY_POINTS[question])})
+    return items
+
+
+async def post_batch(payload, user_id):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        r = await client.post(f"/api/interview/evaluate-batch?user_id={user_id}", json=payload)
+        assert r.status_code == 200, r.text
+        return [json.loads(line) for line in r.text.splitlines()]
+
+
+# =================== TESTS ===================
+
+def test_batch_streams_results_and_saves_summary(fake_llm):
+    apply_migrations()
+    fake = fake_llm(GradingOllama(), slots=2)
+
+    lines = asyncio.run(post_batch({"items": sheet(), "domain": "dsa"}, 31))
+    results, summary = lines[:-1], lines[-1]["summary"]
+    indices = [r["index"] for r in results]
+    assert sorted(indices) == list(range(7)) and indices != sorted(indices), indices
+    assert fake.max_running == 2, fake.max_running  # shared scheduler limit
+    assert all(r["status"] == "done" for r in results), results
+
+    by_index = {r["index"]: r for r in results}
+    assert by_index[0]["score"] == 8.0 and by_index[0]["is_correct"]     # parsed from the LLM
+    assert by_index[6]["is_correct"] and "Score: 8/10" in by_index[6]["feedback"]  # local key point score
+    assert summary["total"] == 7 and summary["correct"] == 7 and summary["failed"] == 0, summary
+
+    saved = db_service.get_interview_history(31)
+    assert len(saved) == 1 and saved[0]["domain"] == "dsa", saved
+    assert saved[0]["correct"] == 7 and saved[0]["total"] == 7 and saved[0]["score"] == summary["score"]
+
+
+def test_batch_concurrency_limit_and_validation(fake_llm):
+    apply_migrations()
+    fake = fake_llm(GradingOllama(), slots=4)
+
+    lines = asyncio.run(post_batch({"items": sheet(), "concurrency": 1}, 32))
+    assert fake.max_running == 1 and len(lines) == 8, (fake.max_running, lines)
+
+    async def empty():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/api/interview/evaluate-batch", json={"items": []})
+    assert asyncio.run(empty()).status_code == 400
+
+
+def test_scheduler_serves_interactive_first():
+    async def run():
+        scheduler = llm_client.LLMScheduler(1)
+        order = []
+
+        async def job(name, priority):
+            async with scheduler.slot(priority):
+                order.append(name)
+                await asyncio.sleep(0.01)
+
+        await scheduler.acquire()  # all slots busy
+        tasks = [asyncio.create_task(job("background", llm_client.PRIORITY_BACKGROUND)),
+                 asyncio.create_task(job("batch", llm_client.PRIORITY_BATCH)),
+                 asyncio.create_task(job("cancelled", llm_client.PRIORITY_INTERACTIVE)),
+                 asyncio.create_task(job("interactive", llm_client.PRIORITY_INTERACTIVE))]
+        await asyncio.sleep(0.01)
+        assert scheduler.queue_depth == 4
+        tasks[2].cancel()
+        await asyncio.sleep(0)
+        scheduler.release()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        assert order == ["interactive", "batch", "background"], order
+        assert scheduler.active == 0 and scheduler.queue_depth == 0
+
+    asyncio.run(run())
+
+
+# =================== MAIN ===================
+
+if __name__ == "__main__":
+    # The fake Ollama is a conftest.py fixture, so pytest runs the tests
+    print(f"{BLUE}Batch evaluation tests ({TMP_DIR}){END}")
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Batch Generation Jobs Test
+Checks /api/jobs (backend/jobs.py) with a fake Ollama: every prompt of a
+job is generated through the content agent at background LLM priority,
+without the user's chat history, and stored, progress and throughput can be polled and arrive as events,
+a chat turn overtakes the queued prompts, the local callback gets the
+finished job, a cancelled job stops generating, and a job resumes where
+it stopped after a clean restart and after a crash (once the lease runs
+out), without generating finished prompts again.
+
+Needs neither Ollama nor the embedding model. Runs under pytest
+(python test_batch_jobs.py calls it).
+"""
+
+from conftest import TMP_DIR   # sets DATABASE_URL before the backend is imported
+
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import httpx
+import pytest
+
+from backend import app as app_module, db_service, llm_client
+from backend.events import event_bus
+from backend.jobs import JobRunner
+from backend.migrations import apply_migrations
+
+BLUE = '\033[94m'
+END = '\033[0m'
+
+apply_migrations()
+
+
+@pytest.fixture
+def install_fake(fake_llm, rate_limits):
+    rate_limits({"jobs": "off", "chat": "off"})
+    return lambda tokens=4, delay=0.01, slots=4: fake_llm(tokens=tokens, delay=delay, slots=slots, token="w{i} ")
+
+
+def generated(fake):
+    """(prompt, priority) of every generation, in the order they started."""
+    return [(prompt, priority) for kind, prompt, _, _, priority in fake.calls if kind == "stream"]
+
+
+def prompts_for(fake, marker):
+    return [p for p in fake.prompts if marker in p]
+
+
+def client():
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app_module.app), base_url="http://test")
+
+
+async def wait_for_job(http, job_id, status="done", timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while True:
+        job = (await http.get(f"/api/jobs/{job_id}")).json()
+        if job["status"] == status:
+            return job
+        assert asyncio.get_running_loop().time() < deadline, f"job {job_id} is {job['status']}"
+        await asyncio.sleep(0.02)
+
+
+@pytest.fixture
+def with_runner(monkeypatch):
+    """with_runner(test, **kwargs) runs test(http, runner) with a started JobRunner installed in the app."""
+    def run_with(test, **runner_kwargs):
+        async def run():
+            runner = JobRunner(**runner_kwargs)
+            monkeypatch.setattr(app_module, "job_runner", runner)
+            await runner.start()
+            try:
+                async with client() as http:
+                    return await test(http, runner)
+            finally:
+                await runner.stop()
+        return asyncio.run(run())
+    return run_with
+
+
+# =================== TESTS ===================
+
+def test_job_runs_in_background_and_stores_results(install_fake, with_runner):
+    fake = install_fake(tokens=4)
+    prompts = [f"write a youtube script about sorting, part {i}" for i in range(5)]
+
+    async def test(http, runner):
+        events = event_bus.subscribe(201)
+        try:
+            r = await http.post("/api/jobs?user_id=201", json={"prompts": prompts})
+            assert r.status_code == 202, r.text
+            job = r.json()
+            assert job["status"] == "queued" and job["total"] == 5 and job["agent"] == "content"
+            done = await wait_for_job(http, job["id"])
+            received = [events.get_nowait() for _ in range(events.qsize())]
+        finally:
+            event_bus.unsubscribe(201, events)
+        listed = (await http.get("/api/jobs?user_id=201")).json()
+        return done, received, listed
+
+    job, events, listed = with_runner(test, concurrency=2)
+    assert [i["position"] for i in job["items"]] == list(range(5))
+    assert all(i["status"] == "done" and i["output"] == "w0 w1 w2 w3 " and i["tokens"] == 4 for i in job["items"])
+    assert job["done"] == 5 and job["failed"] == 0 and job["tokens"] == 20
+    assert job["throughput"]["seconds"] > 0 and job["throughput"]["tokens_per_second"] > 0
+    assert job["throughput"]["prompts_per_minute"] > 0
+    # The content agent's own prompt, at background priority
+    assert len(fake.prompts) == 5 and all(p == llm_client.PRIORITY_BACKGROUND for _, p in generated(fake))
+    assert all("creative content generator" in p for p in fake.prompts)
+    assert [e["done"] for e in events] == [1, 2, 3, 4, 5] and events[-1]["status"] == "done"
+    assert listed[0]["id"] == job["id"] and "items" not in listed[0]
+
+
+def test_chat_overtakes_queued_prompts(install_fake, with_runner):
+    fake = install_fake(tokens=3, delay=0.02, slots=1)
+
+    async def test(http, runner):
+        r = await http.post("/api/jobs?user_id=202",
+                            json={"prompts": [f"write a blog about job {i}" for i in range(4)]})
+        job = r.json()
+        while not fake.prompts:
+            await asyncio.sleep(0.005)
+        # One prompt is generating, the next one is waiting for the only slot
+        r = await http.post("/chat?user_id=202", json={"message": "write a youtube script about queues"})
+        assert r.status_code == 200
+        await wait_for_job(http, job["id"])
+
+    with_runner(test, concurrency=2)
+    order = fake.prompts
+    chat = next(n for n, p in enumerate(order) if "queues" in p)
+    assert chat == 1, order                  # right after the prompt that held the slot
+    assert generated(fake)[chat][1] == llm_client.PRIORITY_INTERACTIVE
+
+
+def test_jobs_leave_chat_history_out(install_fake, with_runner):
+    fake = install_fake(tokens=2)
+
+    async def test(http, runner):
+        await http.post("/chat?user_id=207", json={"message": "write a youtube script about zebras"})
+        job = (await http.post("/api/jobs?user_id=207",
+                               json={"prompts": ["write a book review of dune"]})).json()
+        job = await wait_for_job(http, job["id"])
+        await http.post("/chat?user_id=207", json={"message": "write a youtube script about lions"})
+        return job
+
+    job = with_runner(test)
+    assert "zebras" in prompts_for(fake, "lions")[0]          # chat turns do see the history
+    batch = prompts_for(fake, "dune")
+    assert len(batch) == 1 and "zebras" not in batch[0]
+    # "book" contains "ok": respond() would have answered with the feedback reply
+    assert job["items"][0]["output"] == "w0 w1 "
+
+
+def test_callback_and_validation(install_fake, with_runner):
+    install_fake(tokens=2)
+    received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            received.append(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    callback = f"http://127.0.0.1:{server.server_port}/done"
+
+    async def test(http, runner):
+        bad = [
+            {"prompts": ["a"], "callback_url": "http://example.com/hook"},   # not local
+            {"prompts": ["a"], "callback_url": "file:///etc/passwd"},
+            {"prompts": ["a"], "agent": "nope"},
+            {"prompts": ["a"], "agent": "academic"},                          # would start mock interviews
+            {"prompts": []},
+            {"prompts": ["a", "   "]},
+            {"prompts": ["a"] * 101},
+        ]
+        codes = [(await http.post("/api/jobs?user_id=203", json=body)).status_code for body in bad]
+        assert codes == [400] * len(bad), codes
+        assert (await http.get("/api/jobs/999999")).status_code == 404
+
+        job = (await http.post("/api/jobs?user_id=203", json={
+            "prompts": ["write a caption about cats", "write a caption about dogs"],
+            "callback_url": callback,
+        })).json()
+        await wait_for_job(http, job["id"])
+        for _ in range(200):
+            if received:
+                break
+            await asyncio.sleep(0.01)
+        return job
+
+    try:
+        job = with_runner(test)
+    finally:
+        server.shutdown()
+    assert len(received) == 1
+    assert received[0]["id"] == job["id"] and received[0]["status"] == "done" and received[0]["done"] == 2
+    assert "throughput" in received[0]
+
+
+def test_cancel_stops_generation(install_fake, with_runner):
+    fake = install_fake(tokens=200, delay=0.01, slots=2)
+
+    async def test(http, runner):
+        job = (await http.post("/api/jobs?user_id=204",
+                               json={"prompts": [f"write an essay on topic {i}" for i in range(6)]})).json()
+        while len(fake.prompts) < 2:
+            await asyncio.sleep(0.005)
+        r = await http.delete(f"/api/jobs/{job['id']}")
+        assert r.status_code == 200 and r.json()["status"] == "cancelled"
+        for _ in range(100):
+            if llm_client.llm_scheduler.active == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert llm_client.llm_scheduler.active == 0
+        assert runner.jobs() == []
+        return (await http.get(f"/api/jobs/{job['id']}")).json()
+
+    job = with_runner(test, concurrency=2)
+    assert len(fake.prompts) == 2                        # the other 4 prompts never started
+    assert job["status"] == "cancelled" and job["done"] == 0
+    assert [i["status"] for i in job["items"]] == ["cancelled"] * 6
+
+
+def test_resume_after_clean_restart(install_fake):
+    fake = install_fake(tokens=5, delay=0.01, slots=1)
+    prompts = [f"write a short story, chapter {i}" for i in range(4)]
+
+    async def run():
+        first = JobRunner(concurrency=1)
+        await first.start()
+        job = await first.submit(205, "content", prompts)
+        while db_service.get_job(job["id"])["done"] < 1:
+            await asyncio.sleep(0.01)
+        await first.stop()                               # leases are released
+        stopped_at = db_service.get_job(job["id"])["done"]
+
+        second = JobRunner(concurrency=2)
+        await second.start()                             # claims the job straight away
+        try:
+            while db_service.get_job(job["id"])["status"] != "done":
+                await asyncio.sleep(0.01)
+        finally:
+            await second.stop()
+        return job["id"], stopped_at
+
+    job_id, stopped_at = asyncio.run(run())
+    job = db_service.get_job(job_id, with_items=True)
+    assert 1 <= stopped_at < 4
+    assert job["done"] == 4 and [i["output"] for i in job["items"]] == ["w0 w1 w2 w3 w4 "] * 4
+    assert len(prompts_for(fake, "chapter 0")) == 1       # finished before the restart, not generated again
+
+
+def test_resume_after_crash_waits_for_the_lease(install_fake):
+    fake = install_fake(tokens=5, delay=0.01, slots=1)
+
+    async def run():
+        crashed = JobRunner(concurrency=1, lease_seconds=0.5, poll_seconds=0.05)
+        await crashed.start()
+        job = await crashed.submit(206, "content", [f"write a haiku about rivers {i}" for i in range(3)])
+        while db_service.get_job(job["id"])["done"] < 1:
+            await asyncio.sleep(0.01)
+        for task in crashed._tasks:                      # dies without giving the lease up
+            task.cancel()
+        await asyncio.gather(*crashed._tasks, return_exceptions=True)
+
+        survivor = JobRunner(concurrency=1, lease_seconds=0.5, poll_seconds=0.05)
+        assert await survivor.claim() == 0              # still leased to the crashed worker
+        await survivor.start()
+        try:
+            while db_service.get_job(job["id"])["status"] != "done":
+                await asyncio.sleep(0.02)
+        finally:
+            await survivor.stop()
+        return job["id"]
+
+    job = db_service.get_job(asyncio.run(run()), with_items=True)
+    assert job["done"] == 3 and all(i["output"] == "w0 w1 w2 w3 w4 " for i in job["items"])
+    assert len(prompts_for(fake, "rivers 0")) == 1
+
+
+# =================== MAIN ===================
+
+if __name__ == "__main__":
+    # The fake Ollama is a conftest.py fixture, so pytest runs the tests
+    print(f"{BLUE}Batch job tests ({TMP_DIR}){END}")
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Chat Memory Test
+Checks per-user conversation memory (backend/agents/memory.py) with a
+fake Ollama: a follow-up like "make it shorter" reaches the model with
+the previous answer, turns leaving the window are folded into a rolling
+summary in the background (once each, incrementally), the prompt context
+stays within its token budget however long the conversation runs, users
+do not see each other's history, and the sqlite store keeps memory
+across workers.
+
+Needs neither Ollama nor the embedding model. Runs under pytest
+(python test_chat_memory.py calls it).
+"""
+
+from conftest import TMP_DIR   # sets DATABASE_URL before the backend is imported
+
+import asyncio
+import json
+import threading
+
+import httpx
+import pytest
+
+from backend import llm_client
+from backend.agents import memory
+from backend.agents.memory import ConversationMemory, ConversationRecord, estimate_tokens
+from backend.app import app
+from backend.migrations import apply_migrations
+from backend.mock_interview.session_store import create_session_store
+from backend.models import ChatMemoryState
+from conftest import FakeOllama
+
+BLUE = '\033[94m'
+END = '\033[0m'
+
+
+class MemoryOllama(FakeOllama):
+    """Summarizes slowly, classifies everything as code and streams a short answer."""
+
+    def __init__(self):
+        super().__init__(reply="code")   # intent classification
+        self.summary_prompts = []
+
+    async def once(self, prompt, model=None, options=None):
+        if "running summary" in prompt:
+            self.summary_prompts.append(prompt)
+            await asyncio.sleep(0.01)
+            return f"Summary v{len(self.summary_prompts)}: the student is learning Python."
+        return await super().once(prompt, model, options)
+
+    async def stream(self, prompt, model=None, options=None):
+        self.record("stream", prompt, model, options)
+        yield "def reverse(items):\n"
+        yield "    return items[::-1]  # REVERSE-ANSWER"
+
+
+@pytest.fixture(autouse=True)
+def fake(fake_llm, monkeypatch):
+    monkeypatch.setattr(memory, "CHAT_MEMORY_ENABLED", True)
+    return fake_llm(MemoryOllama(), slots=2)
+
+
+async def drain(mem):
+    while mem.pending():
+        await asyncio.sleep(0.01)
+
+
+# =================== TESTS ===================
+
+def test_follow_up_sees_previous_answer(fake):
+    apply_migrations()
+    async def run():
+        await memory.conversation_memory.forget(71)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            for message in ["write a python function to reverse a list", "make it shorter"]:
+                r = await client.post("/chat?user_id=71", json={"message": message, "forced_role": "code"})
+                assert r.status_code == 200
+                agents = {json.loads(line[6:])["agent"] for line in r.text.splitlines() if line.startswith("data: ")}
+                assert agents == {"code"}, agents
+
+    asyncio.run(run())
+    first, follow_up = fake.prompts
+    assert "Recent conversation" not in first
+    assert "User: write a python function to reverse a list" in follow_up and "REVERSE-ANSWER" in follow_up
+    assert follow_up.rstrip().endswith("make it shorter\nAssistant:")
+
+
+def test_rolling_summary_is_incremental(fake):
+    mem = ConversationMemory(create_session_store("memory", record_type=ConversationRecord), turns=3)
+
+    async def run():
+        for i in range(10):
+            await mem.remember(72, "general", f"question {i}", f"answer {i}")
+        await drain(mem)
+        return await mem.context(72)
+
+    context = asyncio.run(run())
+    record = mem.store.get(72)
+    assert [t["user"] for t in record.turns] == ["question 7", "question 8", "question 9"]
+    assert record.pending == [] and record.summarized == 7
+    assert record.summary.startswith(f"Summary v{len(fake.summary_prompts)}")
+    # Each evicted turn went to the model once, together with the previous summary
+    sent = [f"question {i}" for i in range(7)]
+    assert sum(p.count("User: question") for p in fake.summary_prompts) == 7
+    assert all(any(f"User: {q}\n" in p for p in fake.summary_prompts) for q in sent)
+    assert all("Summary v" in p for p in fake.summary_prompts[1:])
+
+    assert context.index("Summary of the earlier conversation") < context.index("User: question 9")
+    assert "question 3\n" not in context
+
+
+def test_context_stays_within_budget():
+    mem = ConversationMemory(create_session_store("memory", record_type=ConversationRecord), turns=4,
+                             token_budget=800)
+    huge = "x" * 40000
+
+    async def run():
+        sizes = []
+        for i in range(60):
+            await mem.remember(73, "content", f"essay {i} " + huge, huge)
+            sizes.append(estimate_tokens(await mem.context(73)))
+        await drain(mem)
+        sizes.append(estimate_tokens(await mem.context(73)))
+        return sizes, await mem.context(74)
+
+    sizes, other_user = asyncio.run(run())
+    assert max(sizes) <= 800 + 20, max(sizes)   # budget plus the section headers
+    record = mem.store.get(73)
+    assert len(record.turns) == 4 and len(record.pending) <= memory.CHAT_MEMORY_MAX_PENDING
+    assert other_user == ""                      # another user has no history
+
+
+def test_summary_fallback_without_llm(monkeypatch):
+    async def broken(prompt, *args):
+        raise ConnectionError("ollama down")
+
+    monkeypatch.setattr(llm_client, "_generate_once", broken)
+    mem = ConversationMemory(create_session_store("memory", record_type=ConversationRecord), turns=2)
+
+    async def run():
+        for i in range(20):
+            await mem.remember(75, "general", f"topic {i}\nmore detail", "answer")
+        await drain(mem)
+
+    asyncio.run(run())
+    record = mem.store.get(75)
+    assert len(record.pending) == memory.CHAT_MEMORY_MAX_PENDING       # bounded while the LLM is down
+    assert "- Student asked: topic 0" in record.summary and "more detail" not in record.summary
+
+
+def test_sqlite_memory_shared_between_workers():
+    store = lambda: create_session_store("sqlite", record_type=ConversationRecord, table=ChatMemoryState)
+    worker_a, worker_b = ConversationMemory(store()), ConversationMemory(store())
+
+    async def run():
+        await worker_a.remember(76, "code", "explain recursion", "a function calling itself")
+        assert "a function calling itself" in await worker_b.context(76)
+        await worker_b.remember(76, "code", "shorter please", "self-call")
+
+    asyncio.run(run())
+    assert [t["user"] for t in worker_a.store.get(76).turns] == ["explain recursion", "shorter please"]
+
+
+def test_store_is_used_on_the_db_thread():
+    threads = set()
+
+    class RecordingStore:
+        def __init__(self, store):
+            self.store = store
+
+        def __getattr__(self, name):
+            def call(*args):
+                threads.add(threading.current_thread().name)
+                return getattr(self.store, name)(*args)
+            return call
+
+    mem = ConversationMemory(RecordingStore(create_session_store("memory", record_type=ConversationRecord)),
+                             turns=1)
+
+    async def run():
+        for i in range(3):
+            await mem.remember(77, "general", f"question {i}", "answer")
+        await drain(mem)
+        await mem.context(77)
+        await mem.forget(77)
+
+    asyncio.run(run())
+    assert threads and all(name.startswith("unigenai-db") for name in threads), threads
+
+
+# =================== MAIN ===================
+
+if __name__ == "__main__":
+    # The fake Ollama is a conftest.py fixture, so pytest runs the tests
+    print(f"{BLUE}Chat memory tests ({TMP_DIR}){END}")
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Chat Search Test
+Checks the FTS5 index stays in sync with chat_history (insert, bulk
+insert, update, delete), that results are scoped to one user and ranked,
+and that arbitrary user input cannot break the MATCH expression.
+
+Runs standalone (python test_chat_search.py) or under pytest.
+"""
+
+from conftest import TMP_DIR   # sets DATABASE_URL before the backend is imported
+
+from sqlalchemy import text
+
+from backend import db_service
+from backend.chat_search import fts_query, run_rebuild
+from backend.migrations import apply_migrations
+from backend.models import engine
+
+GREEN = '\033[92m'
+RED = '\033[91m'
+BLUE = '\033[94m'
+END = '\033[0m'
+
+
+def setup_module(module=None):
+    apply_migrations()
+    db_service.save_chat(501, "academic", "what is paging?", "Paging splits memory into fixed-size pages.")
+    db_service.save_chat(501, "academic", "explain deadlock", "A deadlock needs four conditions.")
+    db_service.save_chats([
+        {"user_id": 501, "role": "academic", "message": "paging vs segmentation",
+         "response": "Paging uses pages; segmentation uses variable segments."},
+        {"user_id": 502, "role": "academic", "message": "what is paging?", "response": "Other user's pages."},
+    ])
+
+
+# =================== TESTS ===================
+
+def test_search_is_scoped_to_user():
+    results = db_service.search_chat_history(501, "paging")
+    assert len(results) == 2, results
+    assert all("Other user" not in r["snippet"] for r in results)
+    assert len(db_service.search_chat_history(502, "paging")) == 1
+
+
+def test_results_ranked_with_snippets():
+    results = db_service.search_chat_history(501, "pages")  # stemmed: matches "paging"/"pages"
+    assert results[0]["score"] >= results[-1]["score"]
+    assert any("[" in r["snippet"] for r in results), results
+
+
+def test_hostile_input_is_quoted():
+    for query in ['"', "paging)", "NEAR(paging", "user_key : u502", "* OR *", ""]:
+        db_service.search_chat_history(501, query)  # must not raise
+    assert "u502" not in fts_query(501, "user_key : u502").split(" AND ", 1)[0]
+    assert db_service.search_chat_history(501, "   ") == []
+
+
+def test_update_and_delete_keep_index_in_sync():
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE chat_history SET response = 'Thrashing happens' "
+                          "WHERE user_id = 501 AND message = 'explain deadlock'"))
+    assert db_service.search_chat_history(501, "thrashing")
+    assert not db_service.search_chat_history(501, "conditions")
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM chat_history WHERE user_id = 501 AND message = 'explain deadlock'"))
+    assert not db_service.search_chat_history(501, "thrashing")
+
+
+def test_rebuild_repairs_missing_rows():
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO chat_history_fts (chat_history_fts) VALUES ('delete-all')"))
+    assert db_service.search_chat_history(501, "paging") == []
+    assert run_rebuild() >= 3
+    assert len(db_service.search_chat_history(501, "paging")) == 2
+    assert run_rebuild() >= 3  # idempotent
+    assert len(db_service.search_chat_history(501, "paging")) == 2
+
+
+# =================== MAIN ===================
+
+if __name__ == "__main__":
+    print(f"{BLUE}Chat search tests ({TMP_DIR}){END}")
+    setup_module()
+    failed = 0
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            try:
+                fn()
+                print(f"{GREEN}✓ {name}{END}")
+            except AssertionError as e:
+                failed += 1
+                print(f"{RED}✗ {name}: {e}{END}")
+    raise SystemExit(1 if failed else 0)
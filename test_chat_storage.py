@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Chat Storage Test
+Backdates chats in a throwaway database, runs the compression and archive
+jobs and checks history reads, full-text search and the archive query
+still return the same text, and that a worker skips archiving while
+another one holds the archive lock instead of waiting for it.
+
+Runs standalone (python test_chat_storage.py) or under pytest.
+"""
+
+import os
+
+from conftest import TMP_DIR   # sets DATABASE_URL before the backend is imported
+
+import asyncio
+import fcntl
+import json
+import time
+from datetime import datetime, timedelta
+
+import httpx
+
+from sqlalchemy import text
+
+from backend import app as app_module, db_service
+from backend.chat_storage import compress_old_responses, archive_old_chats, query_archive
+from backend.migrations import apply_migrations
+from backend.models import engine
+
+GREEN = '\033[92m'
+RED = '\033[91m'
+BLUE = '\033[94m'
+END = '\033[0m'
+
+ARCHIVE_DIR = os.environ["CHAT_ARCHIVE_DIR"]
+LONG_ANSWER = "Paging splits virtual memory into fixed-size pages mapped onto frames. " * 40
+
+
+def _backdate(message, days):
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE chat_history SET created_at = :t WHERE message = :m"),
+                     {"t": datetime.utcnow() - timedelta(days=days), "m": message})
+
+
+def setup_module(module=None):
+    apply_migrations()
+    db_service.save_chat(601, "academic", "old paging question", LONG_ANSWER)
+    db_service.save_chat(601, "academic", "old short question", "Short answer.")
+    db_service.save_chat(601, "academic", "fresh question", LONG_ANSWER)
+    db_service.save_chat(601, "academic", "ancient deadlock question", "Deadlock needs four conditions.")
+    db_service.save_chat(602, "academic", "ancient other user", "Not yours.")
+    _backdate("old paging question", 30)
+    _backdate("old short question", 30)
+    _backdate("ancient deadlock question", 400)
+    _backdate("ancient other user", 400)
+
+
+# =================== TESTS ===================
+
+def test_compression_is_transparent():
+    stats = compress_old_responses(older_than_days=7, min_bytes=1024)
+    assert stats["rows"] == 1, stats  # only the old, long response
+    assert stats["bytes_after"] < stats["bytes_before"] / 5, stats
+    with engine.connect() as conn:
+        stored = dict(conn.execute(text(
+            "SELECT message, response IS NULL FROM chat_history WHERE user_id = 601")).fetchall())
+    assert stored == {"old paging question": 1, "old short question": 0,
+                      "fresh question": 0, "ancient deadlock question": 0}, stored
+    history = {c["message"]: c["response"] for c in db_service.get_chat_history(601)}
+    assert history["old paging question"] == LONG_ANSWER
+    assert compress_old_responses(older_than_days=7, min_bytes=1024)["rows"] == 0
+
+
+def test_search_covers_compressed_rows():
+    results = db_service.search_chat_history(601, "frames")
+    assert {r["message"] for r in results} == {"old paging question", "fresh question"}, results
+    assert "[frames]" in results[0]["snippet"]
+
+
+def test_archive_moves_old_rows_out():
+    stats = archive_old_chats(older_than_days=180, archive_dir=ARCHIVE_DIR)
+    assert stats["rows"] == 2, stats
+    messages = {c["message"] for c in db_service.get_chat_history(601)}
+    assert "ancient deadlock question" not in messages
+    assert not db_service.search_chat_history(601, "deadlock")
+
+    archived = query_archive(601, archive_dir=ARCHIVE_DIR)
+    assert [c["message"] for c in archived] == ["ancient deadlock question"], archived
+    assert archived[0]["response"] == "Deadlock needs four conditions." and archived[0]["archived"]
+
+
+def test_archive_query_prunes_by_date():
+    when = datetime.fromisoformat(query_archive(602, archive_dir=ARCHIVE_DIR)[0]["date"])
+    assert query_archive(602, since=when - timedelta(days=1), until=when + timedelta(days=1),
+                         archive_dir=ARCHIVE_DIR)
+    assert not query_archive(602, since=when + timedelta(days=1), until=datetime.utcnow(),
+                             archive_dir=ARCHIVE_DIR)
+    assert not query_archive(602, until=when - timedelta(days=40), archive_dir=ARCHIVE_DIR)
+
+
+def test_archive_query_until_keeps_the_last_month():
+    when = datetime.fromisoformat(query_archive(602, archive_dir=ARCHIVE_DIR)[0]["date"])
+    # Only `until`, inside the chat's own month: that month's file must still be read
+    assert query_archive(602, until=when + timedelta(seconds=1), archive_dir=ARCHIVE_DIR)
+    assert query_archive(602, since=when - timedelta(seconds=1), archive_dir=ARCHIVE_DIR)
+    assert not query_archive(602, until=when, archive_dir=ARCHIVE_DIR)
+
+
+def test_export_includes_archived_chats():
+    async def export():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app_module.app),
+                                     base_url="http://test") as http:
+            r = await http.get("/api/chat/history/601/export")
+            return [json.loads(line) for line in r.text.splitlines()]
+
+    chats = asyncio.run(export())
+    messages = [c["message"] for c in chats]
+    assert "fresh question" in messages and "ancient deadlock question" in messages
+    assert chats[-1]["archived"] and not chats[0].get("archived")     # newest first, archive last
+    assert "ancient other user" not in messages
+
+
+def test_rerun_after_crash_does_not_duplicate():
+    # Simulate a crash between the archive write and the delete
+    db_service.save_chat(601, "academic", "ancient again", "Archived twice?")
+    _backdate("ancient again", 400)
+    with engine.begin() as conn:
+        row = conn.execute(text("SELECT * FROM chat_history WHERE message = 'ancient again'")).mappings().one()
+    archive_old_chats(older_than_days=180, archive_dir=ARCHIVE_DIR)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO chat_history (id, user_id, role, message, response, created_at) "
+                          "VALUES (:id, :user_id, :role, :message, :response, :created_at)"), dict(row))
+    archive_old_chats(older_than_days=180, archive_dir=ARCHIVE_DIR)
+    messages = [c["message"] for c in query_archive(601, archive_dir=ARCHIVE_DIR)]
+    assert messages.count("ancient again") == 1, messages
+
+
+def test_archiving_in_another_worker_is_skipped_not_waited_for():
+    db_service.save_chat(603, "academic", "ancient locked question", "Wait for me?")
+    _backdate("ancient locked question", 400)
+    with open(os.path.join(ARCHIVE_DIR, ".lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)               # another worker is archiving
+        start = time.perf_counter()
+        stats = archive_old_chats(older_than_days=180, archive_dir=ARCHIVE_DIR)
+        waited = time.perf_counter() - start
+    assert stats == {"rows": 0, "partitions": 0, "skipped": True} and waited < 1, (stats, waited)
+    assert archive_old_chats(older_than_days=180, archive_dir=ARCHIVE_DIR)["rows"] == 1   # next cycle
+
+
+# =================== MAIN ===================
+
+if __name__ == "__main__":
+    print(f"{BLUE}Chat storage tests ({TMP_DIR}){END}")
+    setup_module()
+    failed = 0
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            try:
+                fn()
+                print(f"{GREEN}✓ {name}{END}")
+            except AssertionError as e:
+                failed += 1
+                print(f"{RED}✗ {name}: {e}{END}")
+    raise SystemExit(1 if failed else 0)
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Chat Write-Behind Test
+Checks backend/chat_writer.py against a throwaway database: queued chats
+show up in history reads before and after they are flushed (exactly
+once), a failed flush puts its batch back in front and is retried, the
+queue is capped while the database keeps failing (counting only rows
+it really dropped, never the batch in flight), and stop() drains the
+queue, waiting for a flush already in flight instead of spinning.
+
+Runs standalone (python test_chat_writer.py) or under pytest.
+"""
+
+from conftest import TMP_DIR   # sets DATABASE_URL before the backend is imported
+
+import asyncio
+import time
+
+from backend import db_service
+from backend.async_db_service import run_in_db_thread
+from backend.chat_writer import ChatWriteBehind
+from backend.migrations import apply_migrations
+
+GREEN = '\033[92m'
+RED = '\033[91m'
+BLUE = '\033[94m'
+END = '\033[0m'
+
+apply_migrations()
+save_chats = db_service.save_chats
+
+
+class FlakyDatabase:
+    """Stands in for db_service.save_chats: fails the first `failures` calls, optionally slow."""
+
+    def __init__(self, failures=0, delay=0.0):
+        self.failures = failures
+        self.delay = delay
+        self.calls = 0
+
+    def __call__(self, rows):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.calls <= self.failures:
+            raise OSError("disk I/O error")
+        save_chats(rows)
+
+
+def with_database(fake, run):
+    db_service.save_chats = fake
+    try:
+        return asyncio.run(run())
+    finally:
+        db_service.save_chats = save_chats
+
+
+def messages(chats):
+    return [c["message"] for c in chats]
+
+
+# =================== TESTS ===================
+
+def test_reads_see_queued_chats_once():
+    writer = ChatWriteBehind(max_batch=100, flush_interval=60)
+
+    async def run():
+        writer.add(1101, "general", "first", "a")
+        writer.add(1101, "general", "second", "b")
+        writer.add(1102, "general", "not yours", "c")
+        queued = await run_in_db_thread(writer._history_with_pending, 1101)
+        await writer.flush()
+        flushed = await run_in_db_thread(writer._history_with_pending, 1101)
+        return queued, flushed
+
+    queued, flushed = asyncio.run(run())
+    assert messages(queued) == ["second", "first"] and all(c["id"] is None for c in queued), queued
+    assert messages(flushed) == ["second", "first"] and all(c["id"] for c in flushed), flushed
+    assert writer.queue_depth() == 0 and writer.stats()["rows_flushed"] == 3
+
+
+def test_failed_flush_is_requeued_in_order():
+    writer = ChatWriteBehind(max_batch=100, flush_interval=60)
+    fake = FlakyDatabase(failures=1)
+
+    async def run():
+        writer.add(1103, "general", "old", "a")
+        await writer.flush()                            # fails: the batch goes back
+        assert writer.queue_depth() == 1 and writer.stats()["flush_errors"] == 1
+        writer.add(1103, "general", "new", "b")
+        await writer.flush()
+
+    with_database(fake, run)
+    assert fake.calls == 2 and writer.queue_depth() == 0
+    assert messages(db_service.get_chat_history(1103)) == ["new", "old"]
+
+
+def test_queue_is_capped_while_the_database_fails():
+    writer = ChatWriteBehind(max_batch=100, flush_interval=60, max_pending=3)
+    fake = FlakyDatabase(failures=100)
+
+    async def run():
+        writer.add(1104, "general", "m0", "a")
+        await writer.flush()
+        for i in range(1, 5):
+            writer.add(1104, "general", f"m{i}", "a")
+        await writer.flush()
+        return [r["message"] for r in writer.pending_for(1104)]
+
+    kept = with_database(fake, run)
+    assert kept == ["m2", "m3", "m4"], kept             # the oldest went first
+    assert writer.stats()["rows_dropped"] == 2
+
+
+def test_rows_in_flight_are_not_counted_as_dropped():
+    writer = ChatWriteBehind(max_batch=100, flush_interval=60, max_pending=3)
+    fake = FlakyDatabase(delay=0.2)
+
+    async def run():
+        for message in ("a", "b", "c"):
+            writer.add(1107, "general", message, "x")
+        flushing = asyncio.create_task(writer.flush())
+        while fake.calls == 0:
+            await asyncio.sleep(0.005)
+        writer.max_pending = 1                          # the batch in flight alone is over the cap
+        writer.add(1107, "general", "d", "x")           # only "d" can be dropped
+        await flushing
+
+    with_database(fake, run)
+    assert writer.stats()["rows_dropped"] == 1 and writer.queue_depth() == 0
+    assert messages(db_service.get_chat_history(1107)) == ["c", "b", "a"]
+
+
+def test_stop_drains_and_waits_for_the_flush_in_flight():
+    writer = ChatWriteBehind(max_batch=2, flush_interval=60)
+    fake = FlakyDatabase(delay=0.2)
+    flushes = 0
+    flush = writer.flush
+
+    async def counting_flush():
+        nonlocal flushes
+        flushes += 1
+        await flush()
+
+    writer.flush = counting_flush
+
+    async def run():
+        await writer.start()
+        writer.add(1105, "general", "a", "x")
+        writer.add(1105, "general", "b", "x")           # full batch: the flusher wakes up
+        while fake.calls == 0:
+            await asyncio.sleep(0.005)
+        writer.add(1105, "general", "c", "x")            # queued behind the batch in flight
+        await writer.stop()
+
+    with_database(fake, run)
+    assert writer.queue_depth() == 0 and fake.calls == 2
+    assert messages(db_service.get_chat_history(1105)) == ["c", "b", "a"]
+    assert flushes <= 3, flushes                        # awaited, not spun
+
+
+def test_stop_gives_up_after_a_failed_attempt():
+    writer = ChatWriteBehind(max_batch=100, flush_interval=60)
+    fake = FlakyDatabase(failures=100)
+
+    async def run():
+        await writer.start()
+        writer.add(1106, "general", "lost", "x")
+        await writer.stop()
+
+    with_database(fake, run)
+    assert fake.calls == 1 and writer.queue_depth() == 1
+
+
+# =================== MAIN ===================
+
+if __name__ == "__main__":
+    print(f"{BLUE}Chat write-behind tests ({TMP_DIR}){END}")
+    failed = 0
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            try:
+                fn()
+                print(f"{GREEN}✓ {name}{END}")
+            except AssertionError as e:
+                failed += 1
+                print(f"{RED}✗ {name}: {e}{END}")
+    raise SystemExit(1 if failed else 0)
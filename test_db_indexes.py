@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Database Index Test
+Runs the real db_service queries against a throwaway SQLite database,
+captures the SQL they issue and checks EXPLAIN QUERY PLAN uses the
+composite indexes added by the migrations.
+
+Runs standalone (python test_db_indexes.py) or under pytest.
+"""
+
+from conftest import TMP_DIR   # sets DATABASE_URL before the backend is imported
+
+from contextlib import contextmanager
+from datetime import datetime
+
+from sqlalchemy import event, text
+
+from backend import db_service
+from backend.migrations import apply_migrations, current_version, MIGRATIONS
+from backend.models import engine
+
+GREEN = '\033[92m'
+RED = '\033[91m'
+BLUE = '\033[94m'
+END = '\033[0m'
+
+
+@contextmanager
+def captured_sql():
+    """Collect (statement, params) for every SELECT issued inside the block."""
+    statements = []
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_execute)
+
+
+def query_plan(statement, parameters) -> str:
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+    return "\n".join(row[-1] for row in rows)
+
+
+def plans_for(func, *args):
+    with captured_sql() as statements:
+        func(*args)
+    assert statements, f"{func.__name__} issued no SELECT"
+    return [query_plan(s, p) for s, p in statements]
+
+
+def setup_module(module=None):
+    apply_migrations()
+    for i in range(20):
+        db_service.save_interview(1, "DSA" if i % 2 else "OS", 50 + i, 5, 10)
+        db_service.save_chat(1, "general", f"message {i}", "response")
+
+
+# =================== TESTS ===================
+
+def test_migrations_recorded():
+    assert current_version() == MIGRATIONS[-1][0]
+    assert apply_migrations() == []  # idempotent on a second run
+    with engine.connect() as conn:
+        names = {r[0] for r in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'"))}
+    for index in ("ix_chat_history_user_created", "ix_interview_sessions_user_created",
+                  "ix_interview_sessions_user_domain_created", "ix_study_plans_user_created",
+                  "ix_users_created"):
+        assert index in names, index
+
+
+def test_chat_history_uses_index():
+    for plan in plans_for(db_service.get_chat_history, 1, 50):
+        assert "ix_chat_history_user_created" in plan, plan
+        assert "TEMP B-TREE" not in plan, plan
+
+
+def test_interview_history_uses_index():
+    for plan in plans_for(db_service.get_interview_history, 1):
+        assert "ix_interview_sessions_user_created" in plan, plan
+        assert "TEMP B-TREE" not in plan, plan
+
+
+def test_interview_history_by_domain_uses_index():
+    for plan in plans_for(db_service.get_interview_history, 1, "DSA"):
+        assert "ix_interview_sessions_user_domain_created" in plan, plan
+        assert "TEMP B-TREE" not in plan, plan
+
+
+def test_keyset_pages_seek_the_index():
+    page = db_service.get_chat_history(1, 5)
+    cursor = db_service.decode_cursor(db_service.encode_cursor(
+        datetime.fromisoformat(page[-1]["date"]), page[-1]["id"]))
+    for plan in plans_for(db_service.get_chat_history, 1, 5, cursor):
+        assert "ix_chat_history_user_created (user_id=? AND created_at<?)" in plan, plan
+    for plan in plans_for(db_service.get_all_users, 5, cursor):
+        assert "ix_users_created" in plan, plan
+    next_page = db_service.get_chat_history(1, 5, cursor)
+    assert next_page and {c["id"] for c in next_page}.isdisjoint(c["id"] for c in page)
+
+
+def test_interview_stats_reads_only_aggregates():
+    for plan in plans_for(db_service.get_interview_stats, 1):
+        assert "interview_stats" in plan and "interview_sessions" not in plan, plan
+        assert "USING INDEX" in plan or "PRIMARY KEY" in plan, plan
+        assert not plan.startswith("SCAN"), plan
+
+
+# =================== MAIN ===================
+
+if __name__ == "__main__":
+    print(f"{BLUE}Database index tests ({TMP_DIR}){END}")
+    setup_module()
+    failed = 0
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            try:
+                fn()
+                print(f"{GREEN}✓ {name}{END}")
+            except AssertionError as e:
+                failed += 1
+                print(f"{RED}✗ {name}: {e}{END}")
+    raise SystemExit(1 if failed else 0)
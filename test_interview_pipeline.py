@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Interview Pipeline Test
+Drives academic_agent.respond through a mock interview with a slow fake
+evaluator and checks the next question comes back without waiting for
+feedback (or for a cold local scorer), that per-user evaluation
+concurrency is bounded, and that the end-of-interview report contains
+every evaluation.
+
+Runs under pytest (python test_interview_pipeline.py calls it).
+"""
+
+import os
+
+from conftest import TMP_DIR   # sets DATABASE_URL before the backend is imported
+os.environ["INTERVIEW_PIPELINE"] = "1"
+
+import asyncio
+import time
+
+import pytest
+
+from backend.agents import academic_agent
+from backend.mock_interview import pipeline, rubrics
+from backend.mock_interview.questions import DSA_QUESTIONS
+
+BLUE = '\033[94m'
+END = '\033[0m'
+
+EVAL_SECONDS = 0.3
+LOAD_SECONDS = 0.5   # a cold scorer's first call loads the embedding model
+
+
+class SlowEvaluator:
+    """Stands in for the LLM: EVAL_SECONDS per answer, tracks concurrency."""
+
+    def __init__(self):
+        self.running = 0
+        self.max_running = 0
+
+    async def __call__(self, question, answer):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(EVAL_SECONDS)
+            yield f"Score: 7/10 for '{answer}'"
+        finally:
+            self.running -= 1
+
+
+class StubScorer:
+    """Stands in for scorer.score_answer; the first call pays LOAD_SECONDS like a model load."""
+
+    def __init__(self, ready):
+        self.ready = ready     # read as reference_embeddings.ready by the agent
+        self.calls = 0
+
+    def __call__(self, question, answer):
+        self.calls += 1
+        if self.calls == 1 and not self.ready:
+            time.sleep(LOAD_SECONDS)
+        return {"score": 7.0, "is_correct": True, "covered": [], "missed": []}
+
+
+@pytest.fixture
+def install(monkeypatch):
+    """install(ready) puts a SlowEvaluator and a StubScorer in place and returns both."""
+    def install_fakes(ready):
+        evaluator, stub = SlowEvaluator(), StubScorer(ready)
+        monkeypatch.setattr(pipeline, "evaluate_answer", evaluator)
+        monkeypatch.setattr(pipeline, "score_answer", stub)
+        monkeypatch.setattr(academic_agent, "reference_embeddings", stub)
+        monkeypatch.setattr(rubrics, "INTERVIEW_RUBRIC_PREFETCH", False)   # no Ollama here to generate rubrics
+        return evaluator, stub
+    return install_fakes
+
+
+async def say(message, user_id):
+    start = time.perf_counter()
+    text = "".join([t async for t in academic_agent.respond(message, user_id)])
+    return text, time.perf_counter() - start
+
+
+# =================== TESTS ===================
+
+def test_next_question_does_not_wait_for_feedback(install):
+    evaluator, stub = install(ready=False)
+
+    async def run():
+        await say("start mock interview", 11)
+        await say("dsa", 11)
+        turn_times = []
+        for i in range(len(DSA_QUESTIONS) - 1):
+            text, seconds = await say(f"answer {i}", 11)
+            assert "Next Question" in text and DSA_QUESTIONS[i + 1] in text, text
+            turn_times.append(seconds)
+        report, final_seconds = await say("last answer", 11)
+        return turn_times, report, final_seconds
+
+    turn_times, report, final_seconds = asyncio.run(run())
+    assert max(turn_times) < EVAL_SECONDS / 3, turn_times       # not even the first, cold-scorer turn
+    assert stub.calls == len(DSA_QUESTIONS) and report.count("(score 7.0/10)") == len(DSA_QUESTIONS), report
+    assert evaluator.max_running <= pipeline.INTERVIEW_MAX_EVALUATIONS_PER_USER, evaluator.max_running
+    # The report waits for every evaluation and contains each one
+    for i in range(len(DSA_QUESTIONS) - 1):
+        assert f"for 'answer {i}'" in report, report
+    assert "for 'last answer'" in report and "Interview Report" in report
+    assert final_seconds < EVAL_SECONDS * len(DSA_QUESTIONS)  # ran in parallel, not one by one
+    assert not asyncio.run(academic_agent.is_session_active(11))
+
+
+def test_feedback_side_channel_and_stop(install):
+    install(ready=True)
+
+    async def run():
+        await say("start mock interview", 12)
+        await say("dsa", 12)
+        await say("first answer", 12)
+        answers = await pipeline.get_answers(12)
+        assert answers[0]["status"] == "pending", answers
+        await asyncio.sleep(EVAL_SECONDS * 1.5)
+        answers = await pipeline.get_answers(12)
+        assert answers[0]["status"] == "done" and "first answer" in answers[0]["feedback"], answers
+
+        await say("second answer", 12)
+        assert pipeline.evaluation_pipeline.pending(12) == 1
+        await say("stop interview", 12)
+        await asyncio.sleep(0.05)  # let the cancelled task unwind
+        assert pipeline.evaluation_pipeline.pending(12) == 0
+        assert await pipeline.get_answers(12) == []
+
+    asyncio.run(run())
+
+
+def test_warm_scorer_scores_inline(install):
+    install(ready=True)
+
+    async def run():
+        await say("start mock interview", 13)
+        await say("dsa", 13)
+        text, seconds = await say("first answer", 13)
+        await say("stop interview", 13)
+        return text, seconds
+
+    text, seconds = asyncio.run(run())
+    assert "Answer recorded (score 7.0/10)" in text and seconds < EVAL_SECONDS / 3, (text, seconds)
+
+
+# =================== MAIN ===================
+
+if __name__ == "__main__":
+    # The fakes go in through pytest's monkeypatch fixture, so pytest runs the tests
+    print(f"{BLUE}Interview pipeline tests ({TMP_DIR}){END}")
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Interview Stats Test
+Checks that get_interview_stats, now served from the interview_stats
+running aggregates, returns exactly what the old full-scan implementation
+returned, both for rows written through save_interview and for rows
+backfilled by the migration.
+
+Runs standalone (python test_interview_stats.py) or under pytest.
+"""
+
+import math
+import random
+
+from conftest import TMP_DIR   # sets DATABASE_URL before the backend is imported
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from backend import db_service
+from backend.migrations import apply_migrations
+from backend.models import engine, SessionLocal, InterviewSession
+
+GREEN = '\033[92m'
+RED = '\033[91m'
+BLUE = '\033[94m'
+END = '\033[0m'
+
+
+def reference_stats(user_id):
+    """The original implementation: load every session and aggregate in Python."""
+    db = SessionLocal()
+    try:
+        interviews = db.query(InterviewSession).filter(
+            InterviewSession.user_id == user_id
+        ).order_by(InterviewSession.created_at).all()
+        if not interviews:
+            return {"total_interviews": 0, "avg_score": 0, "improvement": 0, "by_domain": {}}
+        scores = [i.score for i in interviews]
+        stats_by_domain = {}
+        for interview in interviews:
+            stats_by_domain.setdefault(interview.domain, []).append(interview.score)
+        return {
+            "total_interviews": len(interviews),
+            "avg_score": round(sum(scores) / len(scores), 2),
+            "last_score": scores[-1],
+            "first_score": scores[0],
+            "improvement": round(scores[-1] - scores[0], 2),
+            "by_domain": {d: sum(v) / len(v) for d, v in stats_by_domain.items()}
+        }
+    finally:
+        db.close()
+
+
+def assert_same(actual, expected):
+    assert list(actual.keys()) == list(expected.keys()), (actual, expected)
+    assert list(actual["by_domain"].keys()) == list(expected["by_domain"].keys()), (actual, expected)
+    for key, value in expected.items():
+        if key == "by_domain":
+            for domain, mean in value.items():
+                assert math.isclose(actual["by_domain"][domain], mean, rel_tol=1e-9), (domain, actual, expected)
+        else:
+            assert math.isclose(actual[key], value, rel_tol=1e-9), (key, actual, expected)
+
+
+def setup_module(module=None):
+    apply_migrations()
+
+
+# =================== TESTS ===================
+
+def test_empty_user():
+    assert db_service.get_interview_stats(424242) == reference_stats(424242)
+
+
+def test_matches_full_scan():
+    rng = random.Random(7)
+    for _ in range(200):
+        user = rng.randint(1, 5)
+        db_service.save_interview(user, rng.choice(["DSA", "OS", "DBMS", "ML", "HR"]),
+                                  round(rng.uniform(0, 100), 1), 5, 10)
+    for user in range(1, 6):
+        assert_same(db_service.get_interview_stats(user), reference_stats(user))
+
+
+def test_delete_clears_aggregates():
+    db_service.save_interview(77, "DSA", 40.0, 4, 10)
+    db_service.delete_all_interviews(77)
+    assert db_service.get_interview_stats(77) == reference_stats(77)
+
+
+def test_migration_backfills_existing_rows():
+    # Rows written before the aggregate table existed
+    db = SessionLocal()
+    start = datetime(2025, 1, 1)
+    rng = random.Random(11)
+    for i in range(60):
+        db.add(InterviewSession(user_id=900 + i % 3, domain=rng.choice(["OS", "DBMS"]),
+                                score=rng.uniform(0, 100), questions_answered=10,
+                                correct_answers=5, created_at=start + timedelta(minutes=i)))
+    db.commit()
+    db.close()
+
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM interview_stats"))
+        conn.execute(text("DELETE FROM schema_migrations WHERE version = 2"))
+    assert 2 in apply_migrations()
+
+    for user in (1, 2, 900, 901, 902):
+        assert_same(db_service.get_interview_stats(user), reference_stats(user))
+
+
+# =================== MAIN ===================
+
+if __name__ == "__main__":
+    print(f"{BLUE}Interview stats tests ({TMP_DIR}){END}")
+    setup_module()
+    failed = 0
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            try:
+                fn()
+                print(f"{GREEN}✓ {name}{END}")
+            except AssertionError as e:
+                failed += 1
+                print(f"{RED}✗ {name}: {e}{END}")
+    raise SystemExit(1 if failed else 0)
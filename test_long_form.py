@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Long-Form Content Test
+Checks outline-then-parallel generation (backend/agents/long_form.py)
+with a fake Ollama: long blog/script requests are recognised by their
+length, outlines are parsed from the usual list styles, the sections run
+concurrently but stream strictly in outline order with every section
+prompt sharing the same header (conversation included), only the first
+section runs at interactive priority and a busy scheduler gets fewer
+sections at once, the whole thing finishes well before the
+single-stream answer, and unparseable outlines, failed sections and
+clients that leave early are handled.
+
+Needs neither Ollama nor the embedding model. Runs under pytest
+(python test_long_form.py calls it).
+"""
+
+from conftest import TMP_DIR   # sets DATABASE_URL before the backend is imported
+
+import asyncio
+import re
+import time
+
+import pytest
+
+from backend import llm_client
+from backend.agents import content_agent, long_form
+from backend.agents.long_form import parse_outline, target_words
+from conftest import FakeOllama
+
+BLUE = '\033[94m'
+END = '\033[0m'
+
+REQUEST = "write a 1500-word blog post about why sleep matters"
+OUTLINE = """Here is the outline:
+1. **Why We Sleep**
+2. What Happens at Night
+3. Memory and Learning
+4. The Cost of Short Nights
+5. How to Sleep Better
+6. Wrapping Up
+Voice: warm, practical, for students"""
+
+
+class SectionOllama(FakeOllama):
+    """Replies with `outline`; each section streams its own tokens, later sections faster."""
+
+    def __init__(self, outline=OUTLINE, tokens=20, delay=0.005, fail_section=None):
+        super().__init__(reply=outline, tokens=tokens, delay=delay)
+        self.fail_section = fail_section
+
+    async def stream(self, prompt, model=None, options=None):
+        self.record("stream", prompt, model, options)
+        match = re.search(r"Section (\d+):$", prompt)
+        section = int(match.group(1)) if match else 0
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            for i in range(self.tokens):
+                # Later sections are faster, so they finish before the earlier ones
+                await asyncio.sleep(self.delay / (section or 1))
+                if section and section == self.fail_section and i == 3:
+                    raise ConnectionError("ollama went away")
+                yield f"s{section}t{i} "
+        finally:
+            self.running -= 1
+
+
+def answer(message=REQUEST, user_id=401):
+    async def run():
+        start = time.perf_counter()
+        tokens = [t async for t in content_agent.respond(message, user_id)]
+        return "".join(tokens), time.perf_counter() - start
+    return asyncio.run(run())
+
+
+# =================== TESTS ===================
+
+def test_long_form_requests():
+    assert target_words(REQUEST) == 1500
+    assert target_words("Essay on climate policy, 1,200 words") == 1200
+    assert target_words("a detailed youtube script about volcanoes") == long_form.CONTENT_LONG_FORM_DEFAULT_WORDS
+    assert target_words("write a 300 word blog post about tea") is None        # short: one stream is fine
+    assert target_words("summarize this in 2000 words") is None                 # not a piece of content
+    assert target_words("a caption for my cat photo") is None
+    assert long_form.section_count(1500) == 6 and long_form.section_count(900) == 4
+
+
+def test_parse_outline():
+    titles, voice = parse_outline(OUTLINE)
+    assert titles == ["Why We Sleep", "What Happens at Night", "Memory and Learning", "The Cost of Short Nights",
+                      "How to Sleep Better", "Wrapping Up"]
+    assert voice == "warm, practical, for students"
+    titles, voice = parse_outline("## Hook\n- Story\n* Story\n- Lesson:\n\nThanks!", max_sections=2)
+    assert titles == ["Hook", "Story"] and voice is None
+    assert parse_outline("Sure, I can help with that!")[0] == []
+
+
+@pytest.fixture
+def fake(fake_llm):
+    """Installs a SectionOllama, 8 scheduler slots by default; call it again for other settings."""
+    return lambda slots=8, **kwargs: fake_llm(SectionOllama(**kwargs), slots=slots)
+
+
+def test_sections_run_in_parallel_and_stream_in_order(fake):
+    fake = fake()
+    text, _ = answer()
+    headings = re.findall(r"^## (.+)$", text, re.MULTILINE)
+    assert headings == parse_outline(OUTLINE)[0]
+    # Each heading is followed by exactly its own section's tokens, in order
+    for n, body in enumerate(re.split(r"^## .+$", text, flags=re.MULTILINE)[1:], 1):
+        assert body.split() == [f"s{n}t{i}" for i in range(20)], (n, body)
+    assert fake.max_running == long_form.CONTENT_PARALLEL_SECTIONS
+    # One shared header: the request, the whole outline and the voice in every section prompt
+    assert len(fake.prompts) == 6
+    header = fake.prompts[0][:fake.prompts[0].index("\nWrite only section")]
+    assert all(p.startswith(header) for p in fake.prompts)
+    assert REQUEST in header and "6. Wrapping Up" in header and "Voice: warm, practical, for students" in header
+    assert "about 250 words" in fake.prompts[0]
+    # Only the section being read runs at interactive priority
+    priorities = [priority for kind, *_, priority in fake.calls if kind == "stream"]
+    assert priorities == [llm_client.PRIORITY_INTERACTIVE] + [llm_client.PRIORITY_BATCH] * 5
+
+
+def test_sections_keep_the_conversation(fake):
+    fake()
+    history = "Recent conversation:\nUser: my readers are night-shift nurses\nAssistant: Noted.\n\n"
+    sections = asyncio.run(long_form.plan(REQUEST, 1500, "You write.", history))
+    assert len(sections) == 6 and all(history + "Request: " in prompt for _, prompt in sections)
+
+
+def test_busy_scheduler_gets_fewer_sections(fake):
+    fake = fake(slots=4)
+    scheduler = llm_client.llm_scheduler
+
+    async def run():
+        for _ in range(2):      # two other users' generations
+            await scheduler.acquire()
+        try:
+            return [t async for t in content_agent.respond(REQUEST, 404)]
+        finally:
+            scheduler.release()
+            scheduler.release()
+
+    asyncio.run(run())
+    assert fake.max_running == 1 and len(fake.prompts) == 6      # 2 free slots, one left for the others
+
+
+def test_faster_than_one_stream(fake, monkeypatch):
+    fake(tokens=30, delay=0.01)
+    _, parallel = answer()
+    monkeypatch.setattr(long_form, "CONTENT_LONG_FORM", False)
+    fake = fake(tokens=180, delay=0.01)                # the same 6 x 30 tokens as one stream
+    _, sequential = answer()
+    assert len(fake.prompts) == 1 and fake.prompts[0].endswith("Content:")
+    assert parallel < sequential * 0.75, (parallel, sequential)
+
+
+def test_unparseable_outline_falls_back_to_one_stream(fake):
+    fake = fake(outline="Sure! Here's a great blog post for you.")
+    text, _ = answer()
+    assert len(fake.prompts) == 1 and fake.prompts[0].endswith("Content:") and "##" not in text
+
+
+def test_failed_section_stops_the_rest(fake):
+    fake = fake(tokens=50, delay=0.02, fail_section=2)
+
+    async def run():
+        out = []
+        try:
+            async for token in content_agent.respond(REQUEST, 402):
+                out.append(token)
+        except ConnectionError:
+            return out
+        raise AssertionError("the failure was not raised")
+
+    out = asyncio.run(run())
+    # Everything before the failure point still streams in order, nothing after it
+    assert out[-4:] == ["\n\n## What Happens at Night\n\n", "s2t0 ", "s2t1 ", "s2t2 "]
+    assert "s1t49 " in out and not any(t.startswith("s3") for t in out)
+    assert llm_client.llm_scheduler.active == 0 and fake.running == 0
+
+
+def test_leaving_early_frees_the_slots(fake):
+    fake = fake(tokens=200, delay=0.01)
+
+    async def run():
+        stream = content_agent.respond(REQUEST, 403)
+        async for token in stream:
+            if token.startswith("s1t5"):
+                break
+        await stream.aclose()
+        await asyncio.sleep(0.05)
+        return llm_client.llm_scheduler.active, llm_client.llm_scheduler.queue_depth
+
+    assert asyncio.run(run()) == (0, 0)
+    assert fake.running == 0 and len(fake.prompts) == long_form.CONTENT_PARALLEL_SECTIONS
+
+
+# =================== MAIN ===================
+
+if __name__ == "__main__":
+    # The fake Ollama is a conftest.py fixture, so pytest runs the tests
+    print(f"{BLUE}Long-form content tests ({TMP_DIR}){END}")
+    raise SystemExit(pytest.main([__file__, "-q"]))
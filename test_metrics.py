@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Metrics Test
+Checks backend/metrics.py and the /metrics endpoint: the Prometheus text
+format (HELP/TYPE lines, cumulative histogram buckets, escaped labels),
+exact totals when many threads record at once without locks, and that a
+/chat turn against a fake Ollama shows up as time to first token and
+tokens per agent, route_agent time split by rule/LLM, DB time per
+function, and the LLM queue and SSE stream gauges.
+
+Needs neither Ollama nor the embedding model. Runs under pytest
+(python test_metrics.py calls it).
+"""
+
+from conftest import TMP_DIR   # sets DATABASE_URL before the backend is imported
+
+import asyncio
+import re
+import threading
+
+import httpx
+import pytest
+
+from backend import llm_client, metrics
+from backend.app import app
+from backend.migrations import apply_migrations
+
+BLUE = '\033[94m'
+END = '\033[0m'
+
+
+def sample(text: str, name: str, **labels) -> float:
+    """Value of one sample in an exposition, 0 when it is missing."""
+    for line in text.splitlines():
+        if line.startswith("#"):
+            continue
+        metric, value = line.rsplit(" ", 1)
+        base, _, rest = metric.partition("{")
+        found = dict(re.findall(r'(\w+)="((?:[^"\\]|\\.)*)"', rest))
+        if base == name and all(found.get(k) == str(v) for k, v in labels.items()):
+            return float(value)
+    return 0.0
+
+
+# =================== TESTS ===================
+
+def test_exposition_format():
+    registry = metrics.Registry()
+    requests = metrics.Counter("t_requests_total", "Requests", ["path"], registry=registry)
+    latency = metrics.Histogram("t_latency_seconds", "Latency", buckets=(0.1, 1.0), registry=registry)
+    depth = metrics.Gauge("t_depth", "Depth", registry=registry)
+    requests.labels('say "hi"\n').inc(2)
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value)
+    depth.set_function(lambda: 7)
+
+    text = registry.render()
+    assert "# HELP t_requests_total Requests\n# TYPE t_requests_total counter" in text
+    assert 't_requests_total{path="say \\"hi\\"\\n"} 2' in text
+    assert 't_latency_seconds_bucket{le="0.1"} 2' in text          # le is inclusive
+    assert 't_latency_seconds_bucket{le="1"} 3' in text
+    assert 't_latency_seconds_bucket{le="+Inf"} 4' in text
+    assert "t_latency_seconds_sum 3.65" in text and "t_latency_seconds_count 4" in text
+    assert "# TYPE t_depth gauge\nt_depth 7" in text
+    try:
+        metrics.Counter("t_depth", "again", registry=registry)
+        assert False, "duplicate name accepted"
+    except ValueError:
+        pass
+
+
+def test_concurrent_recording_is_exact():
+    registry = metrics.Registry()
+    hits = metrics.Counter("t_hits_total", "Hits", ["worker"], registry=registry)
+    seconds = metrics.Histogram("t_seconds", "Seconds", buckets=(0.5,), registry=registry)
+    active = metrics.Gauge("t_active", "Active", registry=registry)
+
+    def work(n):
+        child = hits.labels(n % 2)
+        for i in range(20000):
+            child.inc()
+            seconds.observe(0.25 if i % 2 else 0.75)
+            with active.track_inprogress():
+                pass
+
+    threads = [threading.Thread(target=work, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    text = registry.render()
+    assert sample(text, "t_hits_total", worker=0) == sample(text, "t_hits_total", worker=1) == 80000
+    assert sample(text, "t_seconds_count") == 160000
+    assert sample(text, "t_seconds_bucket", le="0.5") == 80000
+    assert sample(text, "t_active") == 0
+
+
+def test_chat_turn_shows_up_in_metrics(fake_llm):
+    apply_migrations()
+    fake_llm(slots=2, tokens=5, delay=0.001)   # "general" for intent classification, then 5 tokens
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            before = (await client.get("/metrics")).text
+            for message in ["hi, how are you?", "fix this python bug"]:
+                r = await client.post("/chat?user_id=81", json={"message": message})
+                assert r.status_code == 200
+            await client.get("/api/chat/history/81")
+            r = await client.get("/metrics")
+            assert r.status_code == 200 and r.headers["content-type"].startswith("text/plain; version=0.0.4")
+            return before, r.text
+
+    before, after = asyncio.run(run())
+
+    def delta(name, **labels):
+        return sample(after, name, **labels) - sample(before, name, **labels)
+
+    assert delta("unigenai_chat_requests_total", agent="general") == 1
+    assert delta("unigenai_chat_requests_total", agent="code") == 1
+    assert delta("unigenai_chat_tokens_total", agent="general") == 5
+    assert delta("unigenai_chat_time_to_first_token_seconds_count", agent="general") == 1
+    assert delta("unigenai_chat_tokens_per_second_count", agent="general") == 1
+    assert delta("unigenai_route_agent_seconds_count", path="llm") == 1
+    assert delta("unigenai_route_agent_seconds_count", path="rule") == 1
+    assert delta("unigenai_db_seconds_count", function="_history_with_pending") >= 1   # chat history read
+    assert delta("unigenai_llm_wait_seconds_count", priority=llm_client.PRIORITY_INTERACTIVE) >= 3
+    assert "unigenai_llm_queue_depth 0" in after and "unigenai_sse_streams_active 0" in after
+    assert "# TYPE unigenai_rag_embed_seconds histogram" in after
+
+
+def test_chat_errors_are_counted(fake_llm, monkeypatch):
+    async def broken(prompt, *args):
+        raise ConnectionError("ollama down")
+        yield
+
+    fake_llm(slots=2)
+    monkeypatch.setattr(llm_client, "_generate_stream", broken)
+    before = metrics.CHAT_ERRORS.labels("code").value
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            r = await client.post("/chat?user_id=82", json={"message": "debug my java", "forced_role": "code"})
+            assert r.status_code == 200
+
+    asyncio.run(run())
+    assert metrics.CHAT_ERRORS.labels("code").value == before + 1
+    assert "unigenai_sse_streams_active 0" in metrics.render()
+
+
+# =================== MAIN ===================
+
+if __name__ == "__main__":
+    # The fake Ollama is a conftest.py fixture, so pytest runs the tests
+    print(f"{BLUE}Metrics tests ({TMP_DIR}){END}")
+    raise SystemExit(pytest.main([__file__, "-q"]))
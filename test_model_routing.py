@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Model Routing Test
+Checks the load-adaptive routing in backend/llm_client.py: each profile
+gets its model and generation caps, general chat and intent fallback drop
+to the smallest model while the LLM queue is deep but evaluation does
+not, long prompts keep their model, LLM_PROFILES overrides apply, the
+agents and the classifier call with their own profiles, and every
+decision is counted in unigenai_llm_routes_total.
+
+Needs neither Ollama nor the embedding model. Runs under pytest
+(python test_model_routing.py calls it).
+"""
+
+from conftest import TMP_DIR   # sets DATABASE_URL before the backend is imported
+
+import asyncio
+
+import pytest
+
+from backend import llm_client, metrics
+from backend.agents import code_agent, general_agent
+from backend.intent_router import llm_intent
+from backend.llm_client import load_profiles, route
+
+BLUE = '\033[94m'
+END = '\033[0m'
+
+MODELS = ["tiny:1b", "big:8b"]
+
+
+@pytest.fixture
+def install(fake_llm, monkeypatch):
+    monkeypatch.setattr(llm_client, "LLM_MODELS", list(MODELS))
+    return lambda slots=4: fake_llm(slots=slots, reply="code", tokens=1, delay=0.01, token="ok")
+
+
+def calls(fake):
+    """(kind, model, options) of every call, in order."""
+    return [(kind, model, options) for kind, _, model, options, _ in fake.calls]
+
+
+def routes(profile, model, reason):
+    return metrics.LLM_ROUTES.labels(profile, model, reason).value
+
+
+# =================== TESTS ===================
+
+def test_route_by_profile_load_and_prompt_length(install, monkeypatch):
+    install()
+    depth = llm_client.LLM_DEGRADE_QUEUE_DEPTH
+    assert route("general", 100, 0)[::2] == ("big:8b", "profile")
+    assert route("general", 100, depth)[::2] == ("tiny:1b", "load")
+    assert route("intent", 500, depth)[::2] == ("tiny:1b", "load")
+    assert route("evaluation", 100, depth * 10)[::2] == ("big:8b", "profile")    # never degraded
+    assert route("general", llm_client.LLM_LONG_PROMPT_CHARS + 1, depth)[::2] == ("big:8b", "long_prompt")
+    assert route("summary", 100, 0)[0] == "tiny:1b"                             # background, small anyway
+    assert route("no-such-profile", 100, 0)[0] == "big:8b"
+
+    monkeypatch.setattr(llm_client, "LLM_MODELS", ["only:3b"])                # one model: nothing to drop to
+    assert route("general", 100, depth * 10)[::2] == ("only:3b", "profile")
+
+
+def test_profiles_cap_generation():
+    profiles = llm_client.GENERATION_PROFILES
+    assert profiles["intent"]["options"]["num_predict"] <= 16 and profiles["intent"]["options"]["stop"] == ["\n"]
+    for name, profile in profiles.items():
+        options = profile["options"]
+        assert 0 < options["num_predict"] <= 2048, name
+        assert options["num_ctx"] == llm_client.LLM_NUM_CTX, name               # one num_ctx: no model reloads
+        assert 0 <= options["temperature"] <= 1, name
+
+
+def test_profile_overrides():
+    profiles = load_profiles('{"general": {"num_predict": 64, "model": "small"}, '
+                             '"captions": {"temperature": 1.0, "degrade": true}}')
+    assert profiles["general"]["model"] == "small" and profiles["general"]["options"]["num_predict"] == 64
+    assert profiles["general"]["options"]["temperature"] == llm_client.DEFAULT_PROFILES["general"]["options"]["temperature"]
+    assert profiles["captions"]["degrade"] is True and profiles["captions"]["options"]["temperature"] == 1.0
+    assert profiles["captions"]["options"]["num_predict"] == llm_client.DEFAULT_PROFILES["default"]["options"]["num_predict"]
+    assert llm_client.DEFAULT_PROFILES["general"]["options"]["num_predict"] != 64  # defaults untouched
+
+
+def test_calls_use_their_profiles(install):
+    fake = install()
+    before = routes("code", "big:8b", "profile"), routes("intent", "big:8b", "profile")
+
+    async def run():
+        assert await llm_intent("fix my segfault") == "code"
+        return [t async for t in code_agent.respond("fix my segfault in this loop", 301)]
+
+    assert asyncio.run(run()) == ["ok"]
+    (kind1, model1, intent), (kind2, model2, code) = calls(fake)
+    assert (kind1, model1, kind2, model2) == ("once", "big:8b", "stream", "big:8b")
+    assert intent == llm_client.GENERATION_PROFILES["intent"]["options"]
+    assert code == llm_client.GENERATION_PROFILES["code"]["options"]
+    assert routes("code", "big:8b", "profile") == before[0] + 1
+    assert routes("intent", "big:8b", "profile") == before[1] + 1
+
+
+def test_general_chat_degrades_under_load(install):
+    fake = install(slots=1)
+    depth = llm_client.LLM_DEGRADE_QUEUE_DEPTH
+    degraded = routes("general", "tiny:1b", "load")
+
+    async def evaluation():
+        return [t async for t in llm_client.call_llm_stream("grade this", llm_client.PRIORITY_BATCH, "evaluation")]
+
+    async def run():
+        # Fill the only slot and the queue with evaluations, then ask two chat questions
+        backlog = [asyncio.create_task(evaluation()) for _ in range(depth + 1)]
+        await asyncio.sleep(0)
+        assert llm_client.llm_scheduler.queue_depth >= depth
+        chats = [[t async for t in general_agent.respond(q, 302)]
+                 for q in ["how do black holes form?", "why is the sky blue?"]]
+        await asyncio.gather(*backlog)
+        return chats
+
+    assert asyncio.run(run()) == [["ok"], ["ok"]]
+    general = [c for c in calls(fake) if c[2] == llm_client.GENERATION_PROFILES["general"]["options"]]
+    evaluations = [c for c in calls(fake) if c[2] == llm_client.GENERATION_PROFILES["evaluation"]["options"]]
+    assert general[0][1] == "tiny:1b"                # queue was deep when the first one arrived
+    assert general[1][1] == "big:8b"                 # it had drained by the second
+    assert {c[1] for c in evaluations} == {"big:8b"}
+    assert routes("general", "tiny:1b", "load") == degraded + 1
+    assert 'unigenai_llm_routes_total{profile="general",model="tiny:1b",reason="load"}' in metrics.render()
+
+
+# =================== MAIN ===================
+
+if __name__ == "__main__":
+    # The fake Ollama is a conftest.py fixture, so pytest runs the tests
+    print(f"{BLUE}Model routing tests ({TMP_DIR}){END}")
+    raise SystemExit(pytest.main([__file__, "-q"]))
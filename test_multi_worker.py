@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Multi-Worker Test
+Starts `python -m backend.serve --workers 4` on a throwaway database and
+index directory, then sends every request on a fresh connection so they
+spread over the workers, and checks that a mock interview started on one
+worker is seen and advanced by the others, and that notes uploaded to one
+worker are searchable with identical results on all of them.
+
+No Ollama needed (answer evaluation failing is fine here), but the
+embedding model must be available. Runs standalone
+(python test_multi_worker.py) or under pytest.
+"""
+
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+WORKERS = 4
+GREEN = '\033[92m'
+RED = '\033[91m'
+BLUE = '\033[94m'
+END = '\033[0m'
+
+_TMP = tempfile.mkdtemp(prefix="unigenai_test_")
+_server = None
+BASE_URL = None
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def request(method, path, **kwargs):
+    """One request on its own connection, so the kernel may hand it to any worker."""
+    with httpx.Client(base_url=BASE_URL, timeout=60) as client:
+        return client.request(method, path, **kwargs)
+
+
+def chat(message, user_id):
+    r = request("POST", f"/chat?user_id={user_id}", json={"message": message, "forced_role": "academic"})
+    assert r.status_code == 200, r.text
+    return r
+
+
+def setup_module(module=None):
+    global _server, BASE_URL
+    port = _free_port()
+    BASE_URL = f"http://127.0.0.1:{port}"
+    env = dict(os.environ,
+               DATABASE_URL=f"sqlite:///{_TMP}/test.db",
+               CHAT_ARCHIVE_DIR=os.path.join(_TMP, "archive"),
+               UPLOAD_DIR=os.path.join(_TMP, "uploads"),
+               RATE_LIMIT_ENABLED="0")   # interview turns come faster than a person types
+    env.pop("EMBEDDING_SERVER", None)
+    _server = subprocess.Popen(
+        [sys.executable, "-m", "backend.serve", "--workers", str(WORKERS), "--port", str(port),
+         "--embedding-port", str(_free_port()), "--index-dir", os.path.join(_TMP, "index")],
+        env=env, cwd=os.path.dirname(os.path.abspath(__file__)),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        try:
+            if request("GET", "/api/debug/chat-writer").status_code == 200:
+                return
+        except httpx.TransportError:
+            time.sleep(0.5)
+    teardown_module()
+    raise RuntimeError("server did not start")
+
+
+def teardown_module(module=None):
+    if _server is not None and _server.poll() is None:
+        _server.terminate()
+        _server.wait(timeout=30)
+
+
+# =================== TESTS ===================
+
+def test_interview_state_shared_across_workers():
+    user_id = 9001
+    chat("start mock interview", user_id)
+    assert "Interview Question 1" in chat("dsa", user_id).text
+
+    seen_by = set()
+    for _ in range(20):
+        r = request("GET", f"/api/debug/interview-session/{user_id}")
+        seen_by.add(r.headers["X-Worker-Id"])
+        assert r.json()["current_index"] == 0 and r.json()["domain"] == "dsa", r.json()
+    assert len(seen_by) > 1, "all requests hit one worker"
+
+    # The answer may land on any worker; it must advance the same interview
+    assert "Next Question" in chat("A stack is LIFO, a queue is FIFO", user_id).text
+    for _ in range(10):
+        assert request("GET", f"/api/debug/interview-session/{user_id}").json()["current_index"] == 1
+
+    chat("stop interview", user_id)
+    for _ in range(10):
+        assert request("GET", f"/api/debug/interview-session/{user_id}").json() is None
+
+
+def test_rag_results_consistent_across_workers():
+    notes = ("Belady's anomaly: with FIFO page replacement, adding frames can increase page faults. "
+             "LRU and optimal replacement are stack algorithms and never show it.")
+    r = request("POST", "/upload-pdf", files={"file": ("belady.txt", notes.encode(), "text/plain")})
+    assert r.status_code == 200, r.text
+
+    answers, seen_by = set(), set()
+    for _ in range(20):
+        r = request("GET", "/api/rag/search", params={"q": "Belady anomaly FIFO page faults", "top_k": 1})
+        seen_by.add(r.headers["X-Worker-Id"])
+        answers.add(tuple(r.json()["results"]))
+    assert answers == {(notes,)}, answers
+    assert len(seen_by) > 1, "all requests hit one worker"
+
+
+# =================== MAIN ===================
+
+if __name__ == "__main__":
+    print(f"{BLUE}Multi-worker tests ({_TMP}){END}")
+    setup_module()
+    failed = 0
+    try:
+        for name, fn in list(globals().items()):
+            if name.startswith("test_") and callable(fn):
+                try:
+                    fn()
+                    print(f"{GREEN}✓ {name}{END}")
+                except AssertionError as e:
+                    failed += 1
+                    print(f"{RED}✗ {name}: {e}{END}")
+    finally:
+        teardown_module()
+    raise SystemExit(1 if failed else 0)
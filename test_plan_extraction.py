@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Study Plan Extraction Test
+Checks the local exam date / hours parser on absolute, relative and
+weekday phrasings, that dates past year 9999 are skipped rather than
+raised, that deadlines like "in 48 hours" are not read as study time,
+and that the LLM is only asked when the parser finds nothing (and that
+its malformed JSON falls back to defaults).
+
+Runs standalone (python test_plan_extraction.py) or under pytest.
+"""
+
+import asyncio
+from datetime import date
+
+from backend.study_planner import extractor
+from backend.study_planner.extractor import extract_plan_details, extract_with_fallback
+
+GREEN = '\033[92m'
+RED = '\033[91m'
+BLUE = '\033[94m'
+END = '\033[0m'
+
+TODAY = date(2026, 10, 19)   # a Monday
+
+
+def parse(message):
+    details = extract_plan_details(message, TODAY)
+    return details["exam_date"], details["hours_per_day"]
+
+
+# =================== TESTS ===================
+
+def test_absolute_dates():
+    assert parse("exam on 2026-12-05")[0] == date(2026, 12, 5)
+    assert parse("exam on 05/12/2026")[0] == date(2026, 12, 5)       # day first
+    assert parse("exam on 12/25/2026")[0] == date(2026, 12, 25)      # unless that is impossible
+    assert parse("exam on Dec 5th")[0] == date(2026, 12, 5)
+    assert parse("exam on 3 January")[0] == date(2027, 1, 3)          # no year: next occurrence
+    assert parse("exam on February 30")[0] is None
+
+
+def test_relative_dates():
+    assert parse("exam in 3 weeks")[0] == date(2026, 11, 9)
+    assert parse("exam in two months")[0] == date(2026, 12, 19)
+    assert parse("exam tomorrow")[0] == date(2026, 10, 20)
+    assert parse("exam next Friday")[0] == date(2026, 10, 23)
+    assert parse("exam on Monday")[0] == date(2026, 10, 26)          # never today
+    assert parse("exam on the 15th")[0] == date(2026, 11, 15)
+    assert parse("exam on the 31st")[0] == date(2026, 10, 31)
+    assert parse("exam at the end of the month")[0] == date(2026, 10, 31)
+
+
+def test_out_of_range_dates_are_ignored():
+    assert parse("exam in 99999999 days")[0] is None                   # past year 9999
+    assert parse("exam in 9999999999 months")[0] is None
+    assert parse("exam in 999999999999999999999999 days, 2 hours a day") == (None, 2)
+    assert parse("exam in 99999999 days or maybe next Friday")[0] == date(2026, 10, 23)
+
+
+def test_exam_date_wins_over_other_dates():
+    assert parse("starting today, my exam is on the 28th")[0] == date(2026, 10, 28)
+    assert parse("I have a lecture tomorrow but my exam is on Dec 5")[0] == date(2026, 12, 5)
+    assert parse("the exam is Dec 5, today is my first day")[0] == date(2026, 12, 5)
+
+
+def test_hours():
+    assert parse("4 hours a day")[1] == 4
+    assert parse("2-3 hrs daily")[1] == 2.5
+    assert parse("90 minutes per day")[1] == 1.5
+    assert parse("an hour and a half each day")[1] == 1.5
+    assert parse("20 hours a week")[1] == 2.86
+    assert parse("exam in 48 hours, 6 hours a day") == (date(2026, 10, 21), 6)
+    assert parse("exam in 48 hours")[1] is None
+    assert parse("I can study 30 hours a day")[1] is None
+
+
+def test_llm_only_used_when_parser_finds_nothing():
+    calls = []
+
+    async def fake_llm(prompt, *args, **kwargs):
+        calls.append(prompt)
+        return 'Sure! {"exam_date": "2026-11-01", "hours_per_day": "3"} Hope that helps.'
+
+    extractor.call_llm_once = fake_llm
+    found = asyncio.run(extract_with_fallback("study plan, exam in 3 weeks", TODAY))
+    assert found["exam_date"] == date(2026, 11, 9) and not calls
+
+    fallback = asyncio.run(extract_with_fallback("make me a study plan", TODAY))
+    assert len(calls) == 1 and fallback == {"exam_date": date(2026, 11, 1), "hours_per_day": 3.0}, fallback
+
+    async def broken_llm(prompt, *args):
+        return "exam_date: soon"
+
+    extractor.call_llm_once = broken_llm
+    assert asyncio.run(extract_with_fallback("make me a study plan", TODAY)) == {
+        "exam_date": None, "hours_per_day": None}
+
+
+# =================== MAIN ===================
+
+if __name__ == "__main__":
+    print(f"{BLUE}Plan extraction tests{END}")
+    failed = 0
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            try:
+                fn()
+                print(f"{GREEN}✓ {name}{END}")
+            except AssertionError as e:
+                failed += 1
+                print(f"{RED}✗ {name}: {e}{END}")
+    raise SystemExit(1 if failed else 0)
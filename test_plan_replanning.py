@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Plan Re-planning Test
+Checks that saved study plans keep their schedule in structured form
+(study_plan_schedules / study_plan_days), that a completion update or a
+missed day recomputes only the days from then on and leaves earlier days
+untouched, that revisions of topics already done stay on the plan, that
+identical scheduler inputs hit the memo (dates shifted to the new start),
+that /api/planner/{plan_id}/days streams just the requested range, and
+that a plan made in chat is stored the same way and can be re-planned.
+
+Runs standalone (python test_plan_replanning.py) or under pytest.
+"""
+
+from conftest import TMP_DIR   # sets DATABASE_URL before the backend is imported
+
+import asyncio
+import json
+from datetime import date, timedelta
+
+import httpx
+
+from backend import db_service
+from backend.agents import academic_agent
+from backend.app import app
+from backend.migrations import apply_migrations
+from backend.study_planner import plans, scheduler
+
+GREEN = '\033[92m'
+RED = '\033[91m'
+BLUE = '\033[94m'
+END = '\033[0m'
+
+TOPICS = [{"name": f"DSA {i}", "hours": 3} for i in range(10)] + \
+         [{"name": f"OS {i}", "hours": 2, "subject": "OS"} for i in range(10)]
+
+
+def new_plan(user_id, days=40):
+    exam = (date.today() + timedelta(days=days)).isoformat()
+    return db_service.save_study_plan(user_id, "DSA", TOPICS, exam)["plan_id"]
+
+
+def stored_days(plan_id, start=None, end=None):
+    return list(db_service.iter_plan_days(plan_id, start, end))
+
+
+# =================== TESTS ===================
+
+def test_completion_replans_only_remaining_days():
+    apply_migrations()
+    plan_id = new_plan(61)
+    today = date.today()
+
+    async def run():
+        first = await plans.ensure_schedule(plan_id, 3, today=today)
+        before = stored_days(plan_id)
+        db_service.update_plan_completion(plan_id, 40)
+        cut = today + timedelta(days=10)
+        header = await plans.replan(plan_id, cut)
+        return first, before, header, cut
+
+    first, before, header, cut = asyncio.run(run())
+    after = stored_days(plan_id)
+    assert first["start"] == today.isoformat() and header["start"] == today.isoformat()
+    assert header["replanned_from"] == cut.isoformat()
+    assert len(after) == len(before) == 40
+
+    kept = [d for d in after if d["date"] < cut.isoformat()]
+    assert kept == before[:10]                                   # history untouched
+    assert after[10:] != before[10:]                             # the rest re-planned
+    # 40% of 50 hours done: only 30 hours of new material are left
+    assert abs(header["summary"]["study_hours"] - 30) < 0.05, header["summary"]
+    assert header["summary"]["revision_hours"] > 0               # revisions of finished topics kept
+
+
+def test_missed_day_replans_from_next_day():
+    apply_migrations()
+    plan_id = new_plan(62)
+    today = date.today()
+
+    async def run():
+        await plans.ensure_schedule(plan_id, 3, today=today)
+        before = stored_days(plan_id)
+        header = await plans.mark_day_missed(plan_id, today, today)
+        return before, header
+
+    before, header = asyncio.run(run())
+    after = stored_days(plan_id)
+    tomorrow = (today + timedelta(days=1)).isoformat()
+    assert header["missed_days"] == [today.isoformat()] and header["replanned_from"] == tomorrow
+    assert after[0] == before[0] and after[0]["date"] == today.isoformat()
+    # Nothing was done on the missed day, so tomorrow starts where today would have
+    today_topics = [s["topic"] for s in before[0]["slots"] if s["kind"] == "study"]
+    assert [s["topic"] for s in after[1]["slots"] if s["kind"] == "study"][:1] == today_topics[:1]
+
+
+def test_identical_inputs_hit_memo():
+    scheduler.clear_cache()
+    subjects = [{"name": "DBMS", "difficulty": "high", "topics": [{"name": f"t{i}", "hours": 2} for i in range(30)]}]
+    hits = scheduler.cache_stats["hits"]
+    first = scheduler.build_schedule(subjects, date(2026, 12, 1), 3, date(2026, 11, 1))
+    second = scheduler.build_schedule(subjects, date(2027, 1, 1), 3, date(2026, 12, 2))   # same 30 days
+    assert scheduler.cache_stats["hits"] == hits + 1
+    assert second["days"][0]["date"] == "2026-12-02" and second["exam_date"] == "2027-01-01"
+    assert [d["slots"] for d in first["days"]] == [d["slots"] for d in second["days"]]
+
+    second["days"][0]["slots"].clear()    # callers get their own copy
+    third = scheduler.build_schedule(subjects, date(2026, 12, 1), 3, date(2026, 11, 1))
+    assert third["days"][0]["slots"] == first["days"][0]["slots"]
+
+    # With rest days the weekday of the start matters
+    scheduler.build_schedule(subjects, date(2026, 12, 1), 3, date(2026, 11, 1), rest_weekdays=[6])
+    scheduler.build_schedule(subjects, date(2026, 12, 2), 3, date(2026, 11, 2), rest_weekdays=[6])
+    assert scheduler.cache_stats["hits"] == hits + 2
+
+
+def test_days_endpoint_streams_range():
+    apply_migrations()
+    plan_id = new_plan(63, days=365)
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            header = (await client.get(f"/api/planner/{plan_id}/schedule?hours_per_day=2")).json()
+            start = date.today() + timedelta(days=30)
+            end = start + timedelta(days=6)
+            r = await client.get(f"/api/planner/{plan_id}/days?from={start}&to={end}")
+            assert r.status_code == 200 and r.headers["content-type"] == "application/x-ndjson"
+            days = [json.loads(line) for line in r.text.splitlines()]
+            assert [d["date"] for d in days] == [(start + timedelta(days=i)).isoformat() for i in range(7)]
+
+            r = await client.put(f"/api/planner/{plan_id}/update?completion=25")
+            assert r.json()["schedule"]["replanned_from"] == date.today().isoformat(), r.text
+            r = await client.post(f"/api/planner/{plan_id}/missed")
+            assert r.json()["missed_days"] == [date.today().isoformat()], r.text
+            assert (await client.get("/api/planner/999999/days")).status_code == 404
+            return header
+
+    header = asyncio.run(run())
+    assert header["hours_per_day"] == 2 and header["summary"]["study_days"] == 365
+
+
+def test_chat_plan_is_stored():
+    apply_migrations()
+
+    async def run():
+        reply = "".join([t async for t in academic_agent.respond("study plan, exam in 30 days, 3 hours a day", 64)])
+        plan_id = db_service.get_user_plans(64)[0]["id"]
+        before = stored_days(plan_id)
+        await plans.replan(plan_id)
+        rebuilt = stored_days(plan_id)
+        header = await plans.mark_day_missed(plan_id, date.today())
+        return reply, plan_id, before, rebuilt, header
+
+    reply, plan_id, before, rebuilt, header = asyncio.run(run())
+    assert f"plan #{plan_id}" in reply
+    assert len(before) == 30 and before[0]["date"] == date.today().isoformat()
+    assert f"{before[0]['slots'][0]['subject']} ({before[0]['slots'][0]['hours']} hrs)" in reply
+    assert rebuilt == before                                     # stored topics give the same plan
+    assert header["hours_per_day"] == 3 and header["missed_days"] == [date.today().isoformat()]
+    assert stored_days(plan_id)[0] == before[0]
+
+
+# =================== MAIN ===================
+
+if __name__ == "__main__":
+    print(f"{BLUE}Plan re-planning tests ({TMP_DIR}){END}")
+    failed = 0
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            try:
+                fn()
+                print(f"{GREEN}✓ {name}{END}")
+            except AssertionError as e:
+                failed += 1
+                print(f"{RED}✗ {name}: {e}{END}")
+    raise SystemExit(1 if failed else 0)
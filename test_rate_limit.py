@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Rate Limit Test
+Checks the per-user token buckets (backend/rate_limit.py): bursts pass,
+the refill rate holds after that, Retry-After says when to come back,
+each policy has its own budget, users are keyed by user_id and anonymous
+callers by IP, the bucket table stays within its key cap under a flood
+of distinct keys, rejected /chat and /upload-pdf requests do no LLM,
+DB or file work, and a 429 carries the CORS headers a browser needs.
+
+Needs neither Ollama nor the embedding model. Runs under pytest
+(python test_rate_limit.py calls it).
+"""
+
+import os
+
+from conftest import TMP_DIR   # sets DATABASE_URL before the backend is imported
+
+import asyncio
+
+import httpx
+import pytest
+
+from backend import metrics
+from backend.app import UPLOAD_DIR, app
+from backend.migrations import apply_migrations
+from backend.rate_limit import RateLimiter, TokenBucketTable, parse_limit, request_key
+
+BLUE = '\033[94m'
+END = '\033[0m'
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+# =================== TESTS ===================
+
+def test_parse_limit():
+    assert parse_limit("20/60:5") == (20 / 60, 5)
+    assert parse_limit("10/1") == (10, 10)          # burst defaults to the request count
+    assert parse_limit("off") is None and parse_limit("0") is None
+    for bad in ["x/60", "5/0:1", "5/60:0"]:
+        try:
+            parse_limit(bad)
+            assert False, bad
+        except ValueError:
+            pass
+
+
+def test_burst_then_refill_rate():
+    clock = FakeClock()
+    table = TokenBucketTable(rate=0.5, burst=3, clock=clock)   # one request every 2 s, 3 back to back
+    assert [table.acquire("u") for _ in range(3)] == [0, 0, 0]
+    assert table.acquire("u") == 2.0                             # next token in 2 s
+    clock.now += 1
+    assert table.acquire("u") == 1.0
+    clock.now += 1
+    assert table.acquire("u") == 0
+    clock.now += 60                                              # idle: refills to the burst, not beyond
+    assert [table.acquire("u") for _ in range(4)][-1] > 0
+    assert table.acquire("other") == 0                          # other keys are independent
+
+
+def test_policies_are_separate():
+    clock = FakeClock()
+    limiter = RateLimiter({"chat": "60/60:2", "upload": "1/3600:1", "evaluation": "off"}, clock=clock)
+    assert limiter.check("chat", "user:1") == 0 and limiter.check("chat", "user:1") == 0
+    assert limiter.check("chat", "user:1") > 0
+    assert limiter.check("upload", "user:1") == 0             # its own budget
+    assert 3599 < limiter.check("upload", "user:1") <= 3600
+    assert all(limiter.check("evaluation", "user:1") == 0 for _ in range(100))   # off
+    assert limiter.check("unknown", "user:1") == 0
+
+
+def test_table_is_memory_bounded():
+    clock = FakeClock()
+    table = TokenBucketTable(rate=1, burst=2, max_keys=1000, clock=clock)
+    for i in range(200000):
+        table.acquire(f"ip:10.{i // 65536}.{i // 256 % 256}.{i % 256}")
+    assert len(table) == 1000
+    # Recently active keys are the ones kept
+    table.acquire("hot")
+    table.acquire("hot")
+    for i in range(999):
+        table.acquire(f"cold {i}")
+    assert table.acquire("hot") > 0
+
+
+def test_request_key():
+    assert request_key("42", "1.2.3.4") == "user:42"
+    assert request_key(None, "1.2.3.4") == request_key("not-a-number", "1.2.3.4") == "ip:1.2.3.4"
+    assert request_key(None, None) == "ip:unknown"
+
+
+def test_rejected_requests_do_no_work(fake_llm, rate_limits):
+    apply_migrations()
+    fake = fake_llm(slots=2, tokens=1, token="ok")
+    limiter = rate_limits({"chat": "1/60:2", "upload": "1/3600:1", "evaluation": "1/60:1"})
+    rejected = metrics.RATE_LIMITED.labels("chat").value
+
+    async def run():
+        transport = httpx.ASGITransport(app=app, client=("10.0.0.7", 5000))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            codes = []
+            for _ in range(3):
+                r = await client.post("/chat?user_id=101", json={"message": "what is entropy?"})
+                codes.append(r.status_code)
+            assert codes == [200, 200, 429], codes
+            assert int(r.headers["Retry-After"]) == 60 and "X-Request-ID" in r.headers
+            llm_calls = len(fake.calls)
+
+            # Another user, and anonymous callers by IP, have their own buckets
+            assert (await client.post("/chat?user_id=102", json={"message": "what is entropy?"})).status_code == 200
+            assert (await client.post("/chat", json={"message": "what is entropy?"})).status_code == 200
+            assert (await client.post("/chat", json={"message": "what is entropy?"})).status_code == 200
+            assert (await client.post("/chat", json={"message": "what is entropy?"})).status_code == 429
+
+            limiter.check("upload", "ip:10.0.0.7")   # this IP's only upload token
+            files = {"file": ("rate-limited-notes.txt", b"entropy measures disorder", "text/plain")}
+            r = await client.post("/upload-pdf", files=files)
+            assert r.status_code == 429 and int(r.headers["Retry-After"]) == 3600
+            return llm_calls
+
+    llm_calls = asyncio.run(run())
+
+    assert llm_calls == 4                    # 2 chats x (intent + answer); the rejected one made none
+    assert not os.path.exists(os.path.join(UPLOAD_DIR, "rate-limited-notes.txt"))
+    assert metrics.RATE_LIMITED.labels("chat").value == rejected + 2
+
+
+def test_browsers_can_read_the_429(fake_llm, rate_limits):
+    fake_llm(tokens=1)
+    rate_limits({"chat": "1/60:1"})
+    origin = {"Origin": "http://localhost:5173"}
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            await client.post("/chat?user_id=103", json={"message": "hi"}, headers=origin)
+            return await client.post("/chat?user_id=103", json={"message": "hi"}, headers=origin)
+
+    r = asyncio.run(run())
+    assert r.status_code == 429
+    # CORS wraps the rate limiter: the frontend sees the error and when to retry
+    assert r.headers["Access-Control-Allow-Origin"] in ("*", origin["Origin"])
+    assert "retry-after" in r.headers["Access-Control-Expose-Headers"].lower()
+
+
+# =================== MAIN ===================
+
+if __name__ == "__main__":
+    # The fake Ollama is a conftest.py fixture, so pytest runs the tests
+    print(f"{BLUE}Rate limit tests ({TMP_DIR}){END}")
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Rubric Prefetch Test
+Starts mock interviews with a fake Ollama and checks that reference
+rubrics for the domain's questions are generated once in the background
+and shared by later users and other processes (via the database), that
+evaluate_answer switches to the short comparison prompt once a rubric is
+cached, and that prefetching never holds up an interactive LLM call.
+
+Needs the embedding model, not Ollama. Runs under pytest
+(python test_rubric_prefetch.py calls it).
+"""
+
+from conftest import TMP_DIR   # sets DATABASE_URL before the backend is imported
+
+import asyncio
+import time
+
+import pytest
+
+from backend import llm_client
+from backend.agents import academic_agent
+from backend.mock_interview import rubrics
+from backend.mock_interview.evaluator import evaluate_answer
+from backend.mock_interview.questions import OS_QUESTIONS, ML_QUESTIONS
+from conftest import FakeOllama
+
+BLUE = '\033[94m'
+END = '\033[0m'
+
+GENERATION_SECONDS = 0.05
+
+
+class RubricOllama(FakeOllama):
+    """Generates a rubric in GENERATION_SECONDS; evaluations stream one score."""
+
+    def __init__(self):
+        super().__init__(reply="Ideal answer:\n- reference point one\n- reference point two\nScoring: 9-10 covers both.",
+                         tokens=1, token="Score: 7/10")
+        self.rubric_calls = 0
+
+    async def once(self, prompt, model=None, options=None):
+        self.rubric_calls += 1
+        await asyncio.sleep(GENERATION_SECONDS)
+        return await super().once(prompt, model, options)
+
+
+@pytest.fixture
+def install_fake(fake_llm, monkeypatch):
+    monkeypatch.setattr(rubrics, "INTERVIEW_RUBRIC_PREFETCH", True)
+    return lambda slots=2: fake_llm(RubricOllama(), slots=slots)
+
+
+async def start_interview(user_id, domain):
+    async for _ in academic_agent.respond("start mock interview", user_id):
+        pass
+    async for _ in academic_agent.respond(domain, user_id):
+        pass
+
+
+async def wait_for_prefetch():
+    while rubrics.rubric_cache.pending():
+        await asyncio.sleep(0.01)
+
+
+# =================== TESTS ===================
+
+def test_rubrics_prefetched_once_and_shared(install_fake):
+    fake = install_fake()
+
+    async def run():
+        await start_interview(41, "os")
+        assert rubrics.rubric_cache.pending() == len(OS_QUESTIONS)
+        await wait_for_prefetch()
+        await start_interview(42, "os")   # another user, same questions
+        await wait_for_prefetch()
+
+    asyncio.run(run())
+    assert fake.rubric_calls == len(OS_QUESTIONS), fake.rubric_calls
+
+    # A fresh cache (another worker, or after a restart) reads them from the database
+    other_worker = rubrics.RubricCache()
+    assert asyncio.run(other_worker.get(OS_QUESTIONS[3])).startswith("Ideal answer")
+    assert asyncio.run(other_worker.get("Never asked?")) is None
+
+
+def test_cached_rubric_shortens_evaluation_prompt(install_fake):
+    fake = install_fake()
+
+    async def evaluate(question):
+        return "".join([t async for t in evaluate_answer(question, "Some answer")])
+
+    async def run():
+        await evaluate(ML_QUESTIONS[0])                 # no rubric yet: full prompt
+        await asyncio.gather(*rubrics.rubric_cache.prefetch([ML_QUESTIONS[0]]))
+        await evaluate(ML_QUESTIONS[0])                 # rubric cached: comparison prompt
+
+    asyncio.run(run())
+    full, short = fake.prompts
+    assert "Reference rubric" not in full and "Reference rubric" in short and "reference point one" in short
+    assert len(short) < len(full), (len(short), len(full))
+
+
+def test_prefetch_does_not_delay_interactive_calls(install_fake):
+    install_fake(slots=1)
+    cache = rubrics.RubricCache(model="prefetch-priority-test")
+
+    async def run():
+        cache.prefetch(OS_QUESTIONS)
+        await asyncio.sleep(0.01)   # the first generation holds the only slot
+        start = time.perf_counter()
+        await llm_client.call_llm_once("interactive")
+        waited = time.perf_counter() - start
+        for task in list(cache._inflight.values()):
+            task.cancel()
+        return waited
+
+    waited = asyncio.run(run())
+    # Behind at most the one generation already running, not the whole queue
+    assert waited < GENERATION_SECONDS * 3, waited
+
+
+# =================== MAIN ===================
+
+if __name__ == "__main__":
+    # The fake Ollama is a conftest.py fixture, so pytest runs the tests
+    print(f"{BLUE}Rubric prefetch tests ({TMP_DIR}){END}")
+    raise SystemExit(pytest.main([__file__, "-q"]))
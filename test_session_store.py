@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Interview Session Store Test
+Checks both session store backends expire abandoned interviews, respect
+the size cap and treat int and str user ids alike, that the SQLite store
+survives a restart, that the SQLite store backs off between conflicting
+updates, that the router keeps an interviewing user on the academic agent,
+and that the session helpers call the store on the DB thread.
+
+Runs standalone (python test_session_store.py) or under pytest.
+"""
+
+from conftest import TMP_DIR   # sets DATABASE_URL before the backend is imported
+
+import asyncio
+import threading
+import time
+
+from backend.mock_interview import session
+from backend.mock_interview.session_store import (
+    SessionRecord, SessionStore, InMemorySessionStore, SqliteSessionStore
+)
+from backend.agents.agent_router import route_agent
+
+GREEN = '\033[92m'
+RED = '\033[91m'
+BLUE = '\033[94m'
+END = '\033[0m'
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _stores(**kwargs):
+    yield InMemorySessionStore(**kwargs)
+    yield SqliteSessionStore(**kwargs)
+
+
+def _record(user_id, domain="dsa"):
+    return SessionRecord(user_id=user_id, domain=domain, questions=["Q1", "Q2"])
+
+
+# =================== TESTS ===================
+
+def test_store_interface_is_abstract():
+    class Partial(SessionStore):
+        def get(self, user_id):
+            return None
+
+    for cls in (SessionStore, Partial):
+        try:
+            cls()
+        except TypeError:
+            continue
+        raise AssertionError(f"{cls.__name__} should not be instantiable")
+
+
+def test_int_and_str_keys_match():
+    for store in _stores():
+        store.put(_record(7))
+        assert store.get("7") is not None and store.get(7) is not None, type(store).__name__
+        store.delete("7")
+        assert store.get(7) is None
+
+
+def test_ttl_evicts_abandoned_sessions():
+    for store in _stores(ttl=60, clock=(clock := FakeClock())):
+        store.put(_record(1))
+        clock.now += 59
+        assert store.get(1) is not None
+        store.put(store.get(1))          # an update restarts the TTL
+        clock.now += 59
+        assert store.get(1) is not None
+        clock.now += 2
+        assert store.get(1) is None, type(store).__name__
+        assert store.purge_expired() in (0, 1) and len(store) == 0
+
+
+def test_max_entries_drops_least_recently_updated():
+    for store in _stores(max_entries=3, clock=(clock := FakeClock())):
+        for user_id in range(100, 104):
+            clock.now += 1
+            store.put(_record(user_id))
+        store.purge_expired()
+        assert len(store) == 3, type(store).__name__
+        assert store.get(100) is None and store.get(103) is not None
+
+
+def test_sqlite_sessions_survive_restart():
+    store = SqliteSessionStore()
+    record = _record(42, "os")
+    record.current_index = 1
+    record.answers.append({"is_correct": True})
+    store.put(record)
+    restored = SqliteSessionStore().get(42)  # fresh store, e.g. another worker
+    assert restored == record, restored
+    assert restored.current_question == "Q2"
+
+
+def test_concurrent_updates_are_not_lost():
+    for store in _stores():
+        store.put(_record(77))
+        threads = [threading.Thread(target=lambda: [store.update(77, lambda r: r.answers.append(1))
+                                                    for _ in range(10)]) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(store.get(77).answers) == 40, type(store).__name__
+        assert store.update(78, lambda r: None) is None
+
+
+def test_conflicting_updates_back_off():
+    store = SqliteSessionStore()
+    store.put(_record(79))
+    sleeps = []
+    clashes = 3
+
+    def clash(record):
+        nonlocal clashes
+        if clashes:                      # another worker writes between our read and our swap
+            clashes -= 1
+            rival = store.get(79)
+            rival.version += 1
+            store.put(rival)
+        record.answers.append("mine")
+
+    sleep = time.sleep
+    time.sleep = sleeps.append
+    try:
+        updated = store.update(79, clash)
+    finally:
+        time.sleep = sleep
+    assert updated.answers == ["mine"] and store.get(79).answers == ["mine"]
+    assert len(sleeps) == 3 and all(0 <= s <= 0.1 for s in sleeps), sleeps
+
+
+def test_router_keeps_interview_on_academic():
+    async def run():
+        await session.start_session(5, "dsa", ["Q1", "Q2"])  # academic_agent passes an int id
+        assert await session.is_session_active("5")
+        assert await route_agent("write a python script", "code", 5) == "academic"
+        assert await session.advance_question(5) == "Q2"
+        assert await session.advance_question(5) is None and not await session.is_session_active(5)
+        await session.clear_session(5)
+        assert await session.get_current_question(5) is None
+
+    asyncio.run(run())
+
+
+def test_session_store_is_used_on_the_db_thread():
+    threads = set()
+    store = session.session_store
+
+    class RecordingStore:
+        def __getattr__(self, name):
+            def call(*args):
+                threads.add(threading.current_thread().name)
+                return getattr(store, name)(*args)
+            return call
+
+    session.session_store = RecordingStore()
+    try:
+        async def run():
+            await session.start_session(6, "os", ["Q1", "Q2"])
+            await session.submit_answer(6, "an answer")
+            await session.set_answer_feedback(6, 0, "fine")
+            answers = await session.get_answers(6)
+            await session.clear_session(6)
+            return answers
+
+        answers = asyncio.run(run())
+    finally:
+        session.session_store = store
+    assert answers[0]["feedback"] == "fine"
+    assert threads and all(name.startswith("unigenai-db") for name in threads), threads
+
+
+# =================== MAIN ===================
+
+if __name__ == "__main__":
+    print(f"{BLUE}Session store tests ({TMP_DIR}){END}")
+    failed = 0
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            try:
+                fn()
+                print(f"{GREEN}✓ {name}{END}")
+            except AssertionError as e:
+                failed += 1
+                print(f"{RED}✗ {name}: {e}{END}")
+    raise SystemExit(1 if failed else 0)
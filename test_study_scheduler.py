@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Study Scheduler Test
+Checks the study plan scheduler (backend/study_planner/scheduler.py):
+daily capacity and rest days are respected, subjects get time in
+proportion to difficulty x work, finished topics come back for revision
+at the spaced intervals, topics that do not fit are reported, and a
+completion update re-plans only the remaining work. Also posts to
+/api/planner/schedule and re-plans a stored plan through the API, and
+checks a year-long plan with hundreds of topics stays fast.
+
+Runs standalone (python test_study_scheduler.py) or under pytest.
+"""
+
+from conftest import TMP_DIR   # sets DATABASE_URL before the backend is imported
+
+import asyncio
+import time
+from datetime import date, timedelta
+
+import httpx
+
+from backend.app import app
+from backend.migrations import apply_migrations
+from backend.study_planner.scheduler import (
+    REVISION_INTERVALS, build_schedule, progress_from_completion, replan,
+)
+
+GREEN = '\033[92m'
+RED = '\033[91m'
+BLUE = '\033[94m'
+END = '\033[0m'
+
+START = date(2026, 10, 19)   # a Monday
+
+
+def slots(schedule, kind=None):
+    return [(day["date"], slot) for day in schedule["days"] for slot in day["slots"]
+            if kind is None or slot["kind"] == kind]
+
+
+def hours_by_subject(schedule, kind="study"):
+    totals = {}
+    for _, slot in slots(schedule, kind):
+        totals[slot["subject"]] = totals.get(slot["subject"], 0) + slot["hours"]
+    return totals
+
+
+def syllabus(subjects=3, topics=10, hours=2):
+    difficulties = ["high", "medium", "low"]
+    return [{"name": f"S{i}", "difficulty": difficulties[i % 3],
+             "topics": [{"name": f"S{i} topic {j}", "hours": hours} for j in range(topics)]}
+            for i in range(subjects)]
+
+
+# =================== TESTS ===================
+
+def test_capacity_and_rest_days():
+    schedule = build_schedule(syllabus(), START + timedelta(days=42), 3, START, rest_weekdays=[6])
+    dates = [date.fromisoformat(day["date"]) for day in schedule["days"]]
+    assert len(dates) == 36 and all(d.weekday() != 6 for d in dates), dates
+    assert dates[-1] < START + timedelta(days=42)          # the exam day itself is free
+    assert all(day["hours"] <= 3 + 1e-6 for day in schedule["days"])
+    assert schedule["summary"]["unscheduled_hours"] == 0
+    assert schedule["summary"]["study_hours"] == 60         # every topic fully studied
+    assert all(slot["kind"] == "review" for day in schedule["days"][-2:] for slot in day["slots"])
+
+
+def test_time_follows_difficulty_and_work():
+    subjects = [
+        {"name": "Hard", "difficulty": "high", "topics": [{"name": f"h{i}", "hours": 2} for i in range(50)]},
+        {"name": "Easy", "difficulty": "low", "topics": [{"name": f"e{i}", "hours": 2} for i in range(50)]},
+        {"name": "Big", "difficulty": "low", "topics": [{"name": f"b{i}", "hours": 4} for i in range(50)]},
+    ]
+    # Not enough time for everything: the split shows the weighting
+    schedule = build_schedule(subjects, START + timedelta(days=20), 4, START, final_review_days=0)
+    totals = hours_by_subject(schedule)
+    assert 2.2 < totals["Hard"] / totals["Easy"] < 2.8, totals    # weight 0.5 vs 0.2
+    assert 1.7 < totals["Big"] / totals["Easy"] < 2.3, totals     # twice the work
+    assert schedule["unscheduled"] and schedule["summary"]["unscheduled_hours"] > 0
+
+
+def test_revisions_at_spaced_intervals():
+    subjects = [{"name": "DSA", "topics": [{"name": "Arrays", "hours": 1}, {"name": "Trees", "hours": 30}]}]
+    schedule = build_schedule(subjects, START + timedelta(days=60), 2, START)
+    finished = max(date.fromisoformat(d) for d, slot in slots(schedule, "study") if slot["topic"] == "Arrays")
+    revised = [date.fromisoformat(d) for d, slot in slots(schedule, "revision") if slot["topic"] == "Arrays"]
+    assert [(d - finished).days for d in revised] == list(REVISION_INTERVALS), revised
+
+
+def test_completion_replans_remaining_work():
+    subjects = syllabus(topics=8)
+    exam = START + timedelta(days=30)
+    original = build_schedule(subjects, exam, 3, START)
+
+    progress = progress_from_completion(subjects, exam, 3, START, 50)
+    assert abs(sum(progress.values()) - 24) < 1e-6          # half of 48 hours
+    # The hours done are the ones the original schedule planned first
+    first_day = original["days"][0]["slots"][0]
+    assert progress[(first_day["subject"], first_day["topic"])] > 0
+
+    later = replan(subjects, exam, 3, START, 50, today=START + timedelta(days=5))
+    assert later["days"][0]["date"] == (START + timedelta(days=5)).isoformat()
+    assert abs(later["summary"]["study_hours"] - 24) < 0.05, later["summary"]
+    assert later["summary"]["topics_completed"] > 0
+
+
+def test_schedule_endpoints():
+    apply_migrations()
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            exam = (date.today() + timedelta(days=21)).isoformat()
+            r = await client.post("/api/planner/schedule", json={
+                "subjects": [{"name": "DBMS", "difficulty": "high",
+                              "topics": ["ER Model", {"name": "SQL Queries", "hours": 5}]},
+                             {"name": "OS", "topics": ["Paging"]}],
+                "exam_date": exam, "hours_per_day": 2})
+            assert r.status_code == 200, r.text
+            assert {s["topic"] for _, s in slots(r.json(), "study")} == {"ER Model", "SQL Queries", "Paging"}
+
+            bad = await client.post("/api/planner/schedule", json={"subjects": [], "exam_date": "soon"})
+            assert bad.status_code == 400
+
+            saved = (await client.post("/api/planner/save", json={
+                "user_id": 51, "subject": "OS", "exam_date": exam,
+                "topics": ["Deadlocks", {"name": "Paging", "hours": 4}, {"name": "Joins", "subject": "DBMS"}]})).json()
+            r = await client.get(f"/api/planner/{saved['plan_id']}/schedule?hours_per_day=2")
+            assert r.status_code == 200 and r.json()["summary"]["study_hours"] == 8, r.text
+
+            r = await client.put(f"/api/planner/{saved['plan_id']}/update?completion=50")
+            assert r.json()["completion"] == 50 and r.json()["schedule"]["summary"]["study_hours"] == 4, r.text
+            assert (await client.get("/api/planner/999999/schedule")).status_code == 404
+
+    asyncio.run(run())
+
+
+def test_year_with_hundreds_of_topics_is_fast():
+    subjects = syllabus(subjects=10, topics=50, hours=3)
+    start = time.perf_counter()
+    schedule = build_schedule(subjects, START + timedelta(days=365), 5, START)
+    elapsed = time.perf_counter() - start
+    assert schedule["summary"]["topics"] == 500 and len(schedule["days"]) == 365
+    assert elapsed < 0.5, elapsed
+
+
+# =================== MAIN ===================
+
+if __name__ == "__main__":
+    print(f"{BLUE}Study scheduler tests ({TMP_DIR}){END}")
+    failed = 0
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            try:
+                fn()
+                print(f"{GREEN}✓ {name}{END}")
+            except AssertionError as e:
+                failed += 1
+                print(f"{RED}✗ {name}: {e}{END}")
+    raise SystemExit(1 if failed else 0)
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Tracing Test
+Checks per-request tracing (backend/tracing.py) and on-demand profiling
+(backend/profiler.py) with a fake Ollama: every response carries an
+X-Request-ID (the client's own if it sent a sane one) that browsers may
+read along with X-Next-Cursor and X-Worker-Id, a /chat turn is
+traced as route_agent > classify_intent > llm, the streamed LLM call,
+the agent and save_chat, with DB calls as "db" spans, the trace is logged
+as one JSON line and can be fetched back by request ID, and the profile
+endpoint aggregates exactly the next N requests in both modes.
+
+Needs neither Ollama nor the embedding model. Runs under pytest
+(python test_tracing.py calls it).
+"""
+
+from conftest import TMP_DIR   # sets DATABASE_URL before the backend is imported
+
+import asyncio
+import json
+import logging
+
+import httpx
+import pytest
+
+from backend import tracing
+from backend.app import app
+from backend.migrations import apply_migrations
+from conftest import FakeOllama
+
+BLUE = '\033[94m'
+END = '\033[0m'
+
+
+def busy_tokenizer(n=300000):
+    """Stands in for CPU work on the event loop that a profile should find."""
+    return sum(i * i for i in range(n))
+
+
+class TracedOllama(FakeOllama):
+    """Classifies in 5 ms, then streams two tokens with tokenizer work before each."""
+
+    async def once(self, prompt, model=None, options=None):
+        await asyncio.sleep(0.005)
+        return await super().once(prompt, model, options)   # "general": intent classification
+
+    async def stream(self, prompt, model=None, options=None):
+        self.record("stream", prompt, model, options)
+        for word in ["Traced", " answer"]:
+            busy_tokenizer()
+            await asyncio.sleep(0.001)
+            yield word
+
+
+@pytest.fixture(autouse=True)
+def fake(fake_llm):
+    return fake_llm(TracedOllama(), slots=2)
+
+
+class Captured(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def client():
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+# =================== TESTS ===================
+
+def test_chat_trace_has_spans():
+    apply_migrations()
+    captured = Captured()
+    trace_logger = logging.getLogger("backend.tracing")
+    trace_logger.addHandler(captured)
+    trace_logger.setLevel(logging.INFO)
+
+    async def run():
+        async with client() as c:
+            r = await c.post("/chat?user_id=91", json={"message": "hello there"},
+                             headers={"X-Request-ID": "slow-reply-42"})
+            assert r.status_code == 200 and r.headers["X-Request-ID"] == "slow-reply-42"
+            return (await c.get("/api/admin/traces/slow-reply-42")).json()
+
+    try:
+        trace = asyncio.run(run())
+    finally:
+        trace_logger.removeHandler(captured)
+
+    spans = {s["name"]: s for s in trace["spans"]}
+    assert {"route_agent", "classify_intent", "llm", "agent", "save_chat"} <= set(spans), list(spans)
+    assert trace["path"] == "/chat" and trace["status"] == 200 and trace["ms"] > 0
+    route, classify = spans["route_agent"], spans["classify_intent"]
+    assert classify["parent"] == route["id"] and classify["path"] == "llm" and classify["intent"] == "general"
+    llm_calls = [s for s in trace["spans"] if s["name"] == "llm"]
+    once = next(s for s in llm_calls if s["kind"] == "once")
+    stream = next(s for s in llm_calls if s["kind"] == "stream")
+    assert once["parent"] == classify["id"] and once["ms"] >= 5 and "wait_ms" in once
+    assert stream["tokens"] == 2 and "first_token_ms" in stream
+    assert spans["agent"]["tokens"] == 2 and spans["agent"]["ms"] >= stream["ms"]
+    assert all(s["ms"] is not None for s in trace["spans"])
+
+    logged = [r for r in captured.records if getattr(r, "fields", {}).get("request_id") == "slow-reply-42"]
+    assert len(logged) == 1
+    line = json.loads(tracing.JsonFormatter().format(logged[0]))
+    assert line["event"] == "request" and line["path"] == "/chat" and len(line["spans"]) == len(trace["spans"])
+
+
+def test_request_ids_and_db_spans():
+    apply_migrations()
+
+    async def run():
+        async with client() as c:
+            a = await c.get("/api/chat/history/91")
+            b = await c.get("/api/chat/history/91", headers={"X-Request-ID": "bad id\twith spaces"})
+            assert a.headers["X-Request-ID"] != b.headers["X-Request-ID"]
+            assert " " not in b.headers["X-Request-ID"]
+            trace = (await c.get(f"/api/admin/traces/{a.headers['X-Request-ID']}")).json()
+            missing = await c.get("/api/admin/traces/nope")
+            return trace, missing
+
+    trace, missing = asyncio.run(run())
+    assert [s["function"] for s in trace["spans"] if s["name"] == "db"] == ["_history_with_pending"]
+    assert "queue_ms" in trace["spans"][0]
+    assert missing.status_code == 404
+
+
+def test_browsers_can_read_the_response_headers():
+    async def run():
+        async with client() as c:
+            return await c.get("/api/interview/history/91?limit=1", headers={"Origin": "http://localhost:5173"})
+
+    r = asyncio.run(run())
+    exposed = {h.strip().lower() for h in r.headers["Access-Control-Expose-Headers"].split(",")}
+    assert {"x-next-cursor", "x-request-id", "x-worker-id"} <= exposed, exposed
+
+
+def test_json_log_lines_carry_request_id():
+    formatter = tracing.JsonFormatter()
+    request_filter = tracing.RequestIdFilter()
+    record = logging.LogRecord("backend.app", logging.WARNING, __file__, 1, "slow %s", ("db",), None)
+
+    trace, token = tracing.start_trace("abc123", "POST", "/chat")
+    try:
+        request_filter.filter(record)
+        with tracing.span("outer"):
+            with tracing.span("inner") as inner:
+                inner.set(rows=3)
+    finally:
+        tracing.reset(token)
+
+    line = json.loads(formatter.format(record))
+    assert line == {"ts": line["ts"], "level": "WARNING", "logger": "backend.app",
+                    "request_id": "abc123", "message": "slow db"}
+    outer, inner = trace.spans
+    assert inner.parent == outer.id and inner.attrs == {"rows": 3}
+    assert tracing.current_trace() is None
+    assert tracing.span("outside") is tracing.start_span("outside")   # no-op outside a request
+
+
+def profile_run(mode, requests=2):
+    async def run():
+        async with client() as c:
+            profile = asyncio.create_task(c.post(f"/api/admin/profile?requests={requests}&mode={mode}&timeout=30"))
+            await asyncio.sleep(0.05)
+            busy = await c.post(f"/api/admin/profile?requests=1&mode={mode}")
+            assert busy.status_code == 409
+            await c.get("/metrics")   # never profiled
+            ids = []
+            for _ in range(requests):
+                r = await c.post("/chat?user_id=92", json={"message": "how do black holes form?"})
+                ids.append(r.headers["X-Request-ID"])
+            await c.post("/chat?user_id=92", json={"message": "how do black holes form?"})   # after the profile
+            result = await profile
+            assert result.status_code == 200, result.text
+            return result.json(), ids
+
+    return asyncio.run(run())
+
+
+def test_profile_sample_mode():
+    result, ids = profile_run("sample")
+    assert result["complete"] and result["request_ids"] == ids
+    assert result["samples"] > 0 and result["profiled_ms"] > 0
+    names = [f["function"] for f in result["functions"]]
+    assert any(n.startswith("busy_tokenizer") or n.startswith("<genexpr>") for n in names), names
+    assert all(s["stack"].split(";")[0] in ("loop", "db") for s in result["stacks"])
+
+
+def test_profile_cprofile_mode():
+    result, ids = profile_run("cprofile")
+    assert result["complete"] and result["request_ids"] == ids
+    busy = [f for f in result["functions"] if f["function"].startswith("busy_tokenizer")]
+    assert busy and busy[0]["calls"] == 4, result["functions"][:5]   # 2 requests x 2 tokens
+
+
+# =================== MAIN ===================
+
+if __name__ == "__main__":
+    # The fake Ollama is a conftest.py fixture, so pytest runs the tests
+    print(f"{BLUE}Tracing tests ({TMP_DIR}){END}")
+    raise SystemExit(pytest.main([__file__, "-q"]))
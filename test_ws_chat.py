@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+WebSocket Chat Test
+Checks /ws/chat (backend/ws_chat.py) with a fake Ollama: two streams on
+one connection run concurrently with their frames tagged by id and both
+turns saved, the connection's role applies to every turn, a cancel stops
+a stream and frees its LLM slot without saving it, ingest progress and
+background evaluation results arrive as server events, bad (or binary) frames and
+the rate limit are answered with error frames without closing the
+connection, and closing the socket cancels what is still running.
+
+Needs neither Ollama nor the embedding model. Runs under pytest
+(python test_ws_chat.py calls it).
+"""
+
+from conftest import TMP_DIR   # sets DATABASE_URL before the backend is imported
+
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import app as app_module, llm_client, metrics
+from backend.events import EventBus, event_bus
+from backend.mock_interview import pipeline
+from backend.migrations import apply_migrations
+
+BLUE = '\033[94m'
+END = '\033[0m'
+
+
+@pytest.fixture
+def install_fake(fake_llm, rate_limits):
+    rate_limits({"chat": "1000/1:1000"})
+    return lambda tokens=5, delay=0.01: fake_llm(tokens=tokens, delay=delay)
+
+
+def read_until(ws, done):
+    """Frames up to and including the first one for which done(frame) is true."""
+    frames = []
+    while True:
+        frames.append(ws.receive_json())
+        if done(frames[-1]):
+            return frames
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+apply_migrations()
+client = TestClient(app_module.app)
+
+
+# =================== TESTS ===================
+
+def test_concurrent_streams_on_one_connection(install_fake):
+    install_fake(tokens=5)
+    with client.websocket_connect("/ws/chat?user_id=111&role=code") as ws:
+        ready = ws.receive_json()
+        assert ready["type"] == "ready" and ready["user_id"] == 111 and ready["role"] == "code"
+        ws.send_json({"type": "chat", "id": "a", "message": "explain recursion"})
+        ws.send_json({"type": "chat", "id": "b", "message": "write a youtube script about heaps", "role": "content"})
+        ends = set()
+        frames = read_until(ws, lambda f: f["type"] == "end" and (ends.add(f["id"]) or ends == {"a", "b"}))
+
+    by_stream = {sid: [f for f in frames if f.get("id") == sid] for sid in ("a", "b")}
+    starts = {f["id"]: f["agent"] for f in frames if f["type"] == "start"}
+    assert starts == {"a": "code", "b": "content"}       # connection role, and a per-stream override
+    for sid, own in by_stream.items():
+        tokens = [f["token"] for f in own if f["type"] == "token"]
+        assert "".join(tokens) == "t0 t1 t2 t3 t4 " and own[-1] == {"type": "end", "id": sid, "tokens": 5}
+    # Interleaved: the second stream started before the first one ended
+    order = [f["id"] for f in frames if f["type"] == "token"]
+    assert order.index("b") < len(order) - 1 - order[::-1].index("a")
+    saved = {c["message"] for c in client.get("/api/chat/history/111").json()}
+    assert saved == {"explain recursion", "write a youtube script about heaps"}
+
+
+def test_cancel_frees_the_llm_slot(install_fake):
+    install_fake(tokens=200, delay=0.01)
+    with client.websocket_connect("/ws/chat?user_id=112&role=general") as ws:
+        ws.receive_json()
+        ws.send_json({"type": "chat", "id": 7, "message": "write a very long essay"})
+        read_until(ws, lambda f: f["type"] == "token")
+        ws.send_json({"type": "cancel", "id": 7})
+        frames = read_until(ws, lambda f: f["type"] == "cancelled")
+        assert frames[-1] == {"type": "cancelled", "id": 7}
+        ws.send_json({"type": "cancel", "id": 7})
+        assert ws.receive_json() == {"type": "error", "detail": "No such stream", "id": 7}
+        wait_for(lambda: llm_client.llm_scheduler.active == 0)
+        # Closing with a stream still running cancels it too
+        ws.send_json({"type": "chat", "id": 8, "message": "another long essay"})
+        read_until(ws, lambda f: f["type"] == "token")
+    wait_for(lambda: llm_client.llm_scheduler.active == 0)
+    assert client.get("/api/chat/history/112").json() == []
+    assert "unigenai_ws_connections_active 0" in metrics.render()
+
+
+def test_errors_keep_the_connection_open(install_fake, rate_limits):
+    install_fake(tokens=2)
+    rate_limits({"chat": "1/60:1"})
+    with client.websocket_connect("/ws/chat?user_id=113") as ws:
+        ws.receive_json()
+        ws.send_text("not json")
+        assert ws.receive_json()["type"] == "error"
+        ws.send_bytes(b"\x00\x01 binary")
+        assert ws.receive_json()["type"] == "error"
+        ws.send_json({"type": "chat", "id": "x", "message": ""})
+        assert ws.receive_json() == {"type": "error", "detail": "message must be a non-empty string", "id": "x"}
+        ws.send_json({"type": "chat", "id": "ok", "message": "what is a heap?"})
+        read_until(ws, lambda f: f["type"] == "end")
+        ws.send_json({"type": "chat", "id": "limited", "message": "and a stack?"})
+        error = ws.receive_json()
+        assert error["type"] == "error" and error["id"] == "limited" and error["retry_after"] > 0
+        ws.send_json({"type": "ping"})
+        assert ws.receive_json() == {"type": "pong"}
+
+
+def test_ingest_progress_events(install_fake, monkeypatch):
+    install_fake()
+    indexed = []
+    monkeypatch.setattr(app_module, "add_documents", indexed.extend)
+    monkeypatch.setattr(app_module, "UPLOAD_DIR", TMP_DIR)
+    with client.websocket_connect("/ws/chat?user_id=114") as ws:
+        ws.receive_json()
+        files = {"file": ("heaps.txt", b"A heap is a tree with the heap property.", "text/plain")}
+        assert client.post("/upload-pdf?user_id=114", files=files).status_code == 200
+        frames = read_until(ws, lambda f: f.get("stage") == "indexed")
+    assert [f["stage"] for f in frames] == ["received", "parsed", "indexed"]
+    assert all(f["type"] == "event" and f["event"] == "ingest" and f["file"] == "heaps.txt" for f in frames)
+    assert indexed == ["A heap is a tree with the heap property."]
+
+
+def test_evaluation_results_are_published(monkeypatch):
+    async def fake_evaluate(question, answer):
+        yield "Strengths: clear. Score: 8/10"
+
+    monkeypatch.setattr(pipeline, "evaluate_answer", fake_evaluate)
+
+    async def run():
+        queue = event_bus.subscribe(115)
+        try:
+            await pipeline.evaluation_pipeline.submit(115, 0, "What is a heap?", "A tree")
+            return queue.get_nowait()
+        finally:
+            event_bus.unsubscribe(115, queue)
+
+    event = asyncio.run(run())
+    assert event == {"event": "evaluation", "index": 0, "status": "done", "feedback": "Strengths: clear. Score: 8/10"}
+    assert event_bus.subscribers(115) == 0
+
+
+def test_slow_subscriber_drops_oldest_events():
+    async def run():
+        bus = EventBus(max_queued=3)
+        queue = bus.subscribe(1)
+        for i in range(10):
+            bus.publish(1, {"n": i})
+        assert bus.publish(2, {"n": 0}) == 0     # nobody listening
+        return [queue.get_nowait()["n"] for _ in range(queue.qsize())], bus.dropped
+
+    kept, dropped = asyncio.run(run())
+    assert kept == [7, 8, 9] and dropped == 7
+
+
+def test_app_starts_again_after_shutdown(monkeypatch):
+    async def no_warm_up():
+        pass
+
+    monkeypatch.setattr(app_module, "warm_up_scorer", no_warm_up)     # no embedding model in these tests
+    for _ in range(2):     # each block runs the lifespan: DB thread started, then shut down
+        with TestClient(app_module.app) as http:
+            assert http.get("/api/chat/history/116").status_code == 200
+    assert client.get("/api/chat/history/116").status_code == 200
+
+
+# =================== MAIN ===================
+
+if __name__ == "__main__":
+    # The fake Ollama is a conftest.py fixture, so pytest runs the tests
+    print(f"{BLUE}WebSocket chat tests ({TMP_DIR}){END}")
+    raise SystemExit(pytest.main([__file__, "-q"]))